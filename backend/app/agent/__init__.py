@@ -1,11 +1,23 @@
 """
 Agente Smith - SDR Inteligente
 """
-from app.agent.smith_agent import smith_agent, smith_graph, SmithAgent, AgentState
+from app.agent.smith_agent import get_smith_agent, get_smith_graph, SmithAgent, AgentState
+from app.agent.checkpointer import (
+    get_checkpointer,
+    thread_config,
+    load_checkpoint_state,
+    append_checkpoint_messages,
+    clear_checkpoint,
+)
 
 __all__ = [
-    "smith_agent",
-    "smith_graph",
+    "get_smith_agent",
+    "get_smith_graph",
     "SmithAgent",
     "AgentState",
+    "get_checkpointer",
+    "thread_config",
+    "load_checkpoint_state",
+    "append_checkpoint_messages",
+    "clear_checkpoint",
 ]
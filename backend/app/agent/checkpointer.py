@@ -0,0 +1,168 @@
+"""
+Checkpointing do agente Smith (LangGraph)
+Persiste o AgentState por lead (thread_id = lead.id) entre turnos
+
+Backends (AGENT_CHECKPOINTER):
+- none: sem checkpoint (estado reconstruído do banco a cada turno)
+- memory: MemorySaver em processo (dev/testes)
+- sqlite: SqliteSaver em arquivo local (requer langgraph-checkpoint-sqlite)
+- postgres: PostgresSaver no Postgres do Supabase (requer langgraph-checkpoint-postgres)
+"""
+from typing import Optional, List, Any
+from loguru import logger
+
+from app.config import settings
+
+
+# Checkpointer global (inicializado sob demanda)
+_checkpointer = None
+_checkpointer_initialized = False
+
+
+def _build_memory_saver():
+    from langgraph.checkpoint.memory import MemorySaver
+    return MemorySaver()
+
+
+def _build_sqlite_saver():
+    import sqlite3
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+    # check_same_thread=False: nodes rodam em threads do executor do LangGraph
+    conn = sqlite3.connect(settings.agent_checkpoint_sqlite_path, check_same_thread=False)
+    return SqliteSaver(conn)
+
+
+def _build_postgres_saver():
+    from langgraph.checkpoint.postgres import PostgresSaver
+    from psycopg_pool import ConnectionPool
+    from app.database import DATABASE_URL
+
+    # psycopg (v3) não entende o dialeto SQLAlchemy "+psycopg2"
+    conninfo = DATABASE_URL.replace("postgresql+psycopg2://", "postgresql://", 1)
+    pool = ConnectionPool(
+        conninfo=conninfo,
+        max_size=5,
+        kwargs={"autocommit": True, "prepare_threshold": 0},
+    )
+    saver = PostgresSaver(pool)
+    saver.setup()  # Cria tabelas de checkpoint se não existirem
+    return saver
+
+
+def get_checkpointer():
+    """
+    Retorna o checkpointer configurado (singleton)
+
+    Returns:
+        Instância de BaseCheckpointSaver ou None se desabilitado
+    """
+    global _checkpointer, _checkpointer_initialized
+
+    if _checkpointer_initialized:
+        return _checkpointer
+
+    backend = (settings.agent_checkpointer or "none").strip().lower()
+    builders = {
+        "memory": _build_memory_saver,
+        "sqlite": _build_sqlite_saver,
+        "postgres": _build_postgres_saver,
+    }
+
+    if backend not in builders:
+        if backend not in ("none", "off", ""):
+            logger.warning(f"⚠️ AGENT_CHECKPOINTER desconhecido: {backend} - checkpoint desabilitado")
+        _checkpointer = None
+    else:
+        try:
+            _checkpointer = builders[backend]()
+            logger.info(f"💾 Checkpoint do agente habilitado (backend={backend})")
+        except ImportError as e:
+            logger.warning(
+                f"⚠️ Backend de checkpoint '{backend}' indisponível ({e}) - usando memória"
+            )
+            _checkpointer = _build_memory_saver()
+        except Exception as e:
+            logger.error(f"❌ Erro ao inicializar checkpoint '{backend}': {e} - usando memória")
+            _checkpointer = _build_memory_saver()
+
+    _checkpointer_initialized = True
+    return _checkpointer
+
+
+def thread_config(lead_id) -> dict:
+    """Config do LangGraph para a thread de um lead"""
+    return {"configurable": {"thread_id": str(lead_id)}}
+
+
+def load_checkpoint_state(graph, lead_id) -> Optional[dict]:
+    """
+    Carrega o último estado salvo do agente para o lead
+
+    Args:
+        graph: Grafo compilado (smith_graph)
+        lead_id: ID do lead
+
+    Returns:
+        Valores do AgentState salvo ou None se não houver checkpoint
+    """
+    if get_checkpointer() is None:
+        return None
+
+    try:
+        snapshot = graph.get_state(thread_config(lead_id))
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao carregar checkpoint do lead {lead_id}: {e}")
+        return None
+
+    if not snapshot or not snapshot.values:
+        return None
+
+    if snapshot.next:
+        # Turno anterior interrompido no meio (crash/deploy) - o estado salvo
+        # é o do último node concluído; o novo turno parte dele
+        logger.warning(
+            f"⚠️ Turno anterior do lead {lead_id} não terminou "
+            f"(pendente: {', '.join(snapshot.next)}) - retomando do último checkpoint"
+        )
+
+    return snapshot.values
+
+
+def append_checkpoint_messages(graph, lead_id, new_messages: List[Any]) -> bool:
+    """
+    Acrescenta mensagens ao histórico salvo sem executar o grafo
+
+    Usado quando a resposta é gerada fora do agente (ex: análise de site),
+    para que o próximo turno veja a conversa completa.
+    """
+    state = load_checkpoint_state(graph, lead_id)
+    if state is None:
+        return False
+
+    try:
+        messages = list(state.get("messages") or []) + list(new_messages)
+        graph.update_state(thread_config(lead_id), {"messages": messages})
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao atualizar checkpoint do lead {lead_id}: {e}")
+        return False
+
+
+def clear_checkpoint(lead_id) -> bool:
+    """Remove todos os checkpoints do lead (ex: comando /delete)"""
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        return False
+
+    try:
+        if hasattr(checkpointer, "delete_thread"):
+            checkpointer.delete_thread(str(lead_id))
+        elif hasattr(checkpointer, "storage"):
+            # MemorySaver de versões antigas não tem delete_thread
+            checkpointer.storage.pop(str(lead_id), None)
+        logger.info(f"🗑️ Checkpoint do agente limpo para lead {lead_id}")
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Erro ao limpar checkpoint do lead {lead_id}: {e}")
+        return False
@@ -0,0 +1,126 @@
+"""
+Tempos por node do grafo do agente Smith (LangGraph)
+
+Cada node registrado no build_graph é envolvido por timed_node: mede a duração,
+loga e acumula contagem/média/máximo por node. Os branches paralelos
+(extract_lead_data / prefetch_site_insight) aparecem separados, então dá para ver
+qual deles define a latência do turno.
+
+Cada node também vira span "node" no tracer (histograma em /metrics + trace do turno).
+"""
+import functools
+import inspect
+import threading
+import time
+from typing import Callable, Dict
+
+from loguru import logger
+
+from app.services.tracing import get_tracer
+
+
+class NodeTimings:
+    """Acumulador thread-safe de duração por node (nodes paralelos rodam em threads)"""
+
+    def __init__(self):
+        self._stats: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, node: str, elapsed_ms: float, error: bool = False):
+        with self._lock:
+            stats = self._stats.setdefault(
+                node, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+            )
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["last_ms"] = elapsed_ms
+
+    def get_stats(self) -> dict:
+        """
+        Retorna estatísticas por node
+
+        Returns:
+            Dict {node: {count, errors, avg_ms, max_ms, last_ms}}
+        """
+        with self._lock:
+            return {
+                node: {
+                    "count": s["count"],
+                    "errors": s["errors"],
+                    "avg_ms": round(s["total_ms"] / s["count"], 1) if s["count"] else 0.0,
+                    "max_ms": round(s["max_ms"], 1),
+                    "last_ms": round(s["last_ms"], 1),
+                }
+                for node, s in self._stats.items()
+            }
+
+
+# Instância global
+_node_timings: NodeTimings = None
+
+
+def get_node_timings() -> NodeTimings:
+    """
+    Retorna instância global do acumulador de tempos (singleton)
+
+    Returns:
+        NodeTimings
+    """
+    global _node_timings
+
+    if _node_timings is None:
+        _node_timings = NodeTimings()
+
+    return _node_timings
+
+
+def timed_node(name: str, fn: Callable) -> Callable:
+    """
+    Envolve um node do grafo medindo sua duração (sync ou async)
+
+    Args:
+        name: Nome do node no grafo
+        fn: Função do node
+
+    Returns:
+        Função com a mesma assinatura
+    """
+    timings = get_node_timings()
+
+    def _done(start: float, error: bool):
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        timings.record(name, elapsed_ms, error=error)
+        logger.debug(f"⏱️ Node {name}: {elapsed_ms:.0f}ms")
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(state):
+            start = time.perf_counter()
+            error = False
+            try:
+                with get_tracer().span("node", name):
+                    return await fn(state)
+            except Exception:
+                error = True
+                raise
+            finally:
+                _done(start, error)
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(state):
+        start = time.perf_counter()
+        error = False
+        try:
+            with get_tracer().span("node", name):
+                return fn(state)
+        except Exception:
+            error = True
+            raise
+        finally:
+            _done(start, error)
+
+    return wrapper
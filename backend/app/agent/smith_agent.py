@@ -2,10 +2,9 @@
 Smith 2.0 - Agente SDR Inteligente
 State Machine LangGraph para qualificação e agendamento de leads
 """
-import re
+import threading
+from functools import cached_property
 from typing import TypedDict, Annotated, Sequence, Optional, Any
-from langgraph.graph import StateGraph, END
-from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from datetime import datetime
 
@@ -14,6 +13,11 @@ from app.models.lead import Lead, LeadStatus, LeadTemperature, QualificationData
 from app.services import roi_generator, whatsapp_service, lead_qualifier
 from app.services.google_calendar_service import google_calendar_service
 from app.services.data_extractor import DataExtractor
+from app.services.llm_gateway import get_chat_model
+from app.services.intent_detector import ACEITE_AGENDAMENTO, OFERTA_AGENDAMENTO
+from app.services.datetime_parser import parse_datetime, match_slot
+from app.agent.checkpointer import get_checkpointer
+from app.agent.node_timings import timed_node
 from loguru import logger
 
 
@@ -29,6 +33,9 @@ class AgentState(TypedDict):
     next_action: str
     requires_human_approval: bool
     available_slots: list  # Horários disponíveis do Google Calendar
+    # Resultados dos branches paralelos que antecedem o qualify_lead (consumidos e limpos por ele)
+    extracted_data: Optional[dict]  # {"data": ExtractedData | None} do extract_lead_data
+    site_insight: Optional[str]  # Insight do prefetch_site_insight ("" = tentou e falhou)
 
 
 # ========================================
@@ -327,20 +334,20 @@ REGRAS:
 # NODES DA STATE MACHINE
 # ========================================
 
+# Branches independentes que rodam em paralelo antes do qualify_lead
+QUALIFY_BRANCHES = ["extract_lead_data", "prefetch_site_insight"]
+
 class SmithAgent:
     """Agente Smith - SDR Inteligente"""
 
     def __init__(self):
-        self.llm = ChatAnthropic(
-            model=settings.claude_model,
-            temperature=0,
-            api_key=settings.anthropic_api_key,
-            max_tokens=2048,
-            max_retries=2,
-            timeout=30,
-        )
         self.data_extractor = DataExtractor()
 
+    @cached_property
+    def llm(self):
+        """Modelo de conversa criado no primeiro uso (fora do import do app)"""
+        return get_chat_model(temperature=0, max_tokens=2048, max_retries=2, timeout=30, task="conversa")
+
     # ----------------
     # NODES
     # ----------------
@@ -509,12 +516,109 @@ REGRAS CRÍTICAS:
 - NUNCA use as palavras "chatbot", "robô" ou "bot" — você é uma IA de atendimento, um agente inteligente
 - Tom de consultor que entende o negócio, não de formulário"""
 
+    # ----------------
+    # BRANCHES PARALELOS (antes do qualify_lead)
+    # ----------------
+
+    def extract_lead_data(self, state: AgentState) -> dict:
+        """
+        Node (branch paralelo): extrair dados de qualificação da conversa
+
+        Não altera o lead (o branch de insight lê o mesmo estado em paralelo);
+        o qualify_lead aplica o resultado depois do join.
+        """
+        lead = state["lead"]
+        logger.info(f"🔍 Extraindo dados de qualificação de {lead.nome}...")
+        try:
+            extracted = self.data_extractor.extract_qualification_data(lead)
+        except Exception as e:
+            logger.error(f"Erro no extract_lead_data: {e}")
+            extracted = None
+        return {"extracted_data": {"data": extracted}}
+
+    def prefetch_site_insight(self, state: AgentState) -> dict:
+        """
+        Node (branch paralelo): buscar insight do site enquanto os dados são extraídos
+
+        Só pesquisa quando o lead já está perto da oferta de ROI (time e faturamento
+        informados) — antes disso o insight não é usado e o branch não deve segurar o turno.
+        """
+        lead = state["lead"]
+        try:
+            from app.services.empresa_research_service import empresa_research_service
+
+            site_insight = empresa_research_service.get_cached_insight(lead)
+            if site_insight:
+                return {"site_insight": site_insight}
+
+            qd = lead.qualification_data
+            perto_da_oferta = bool(qd and qd.funcionarios_atendimento and qd.faturamento_anual)
+            site_url = self._site_url(lead, state["messages"])
+            if not perto_da_oferta or not site_url:
+                return {"site_insight": None}
+
+            logger.info(f"Cache vazio — gerando insight do site {site_url} em paralelo")
+            # "" = branch tentou e não ficou pronto (qualify_lead não espera de novo)
+            return {"site_insight": self._fetch_site_insight(lead, site_url) or ""}
+        except Exception as e:
+            logger.warning(f"Erro no prefetch_site_insight: {e}")
+            return {"site_insight": None}
+
+    def _site_url(self, lead, messages) -> Optional[str]:
+        """URL do site do lead: já salva ou respondida nas últimas mensagens"""
+        qd = lead.qualification_data
+        if not qd:
+            return None
+        if qd.site_url:
+            return qd.site_url if qd.site_url != "sem_site" else None
+        if not qd.site_perguntado:
+            return None
+
+        from app.services.website_research_service import WebsiteResearchService
+        wrs = WebsiteResearchService()
+        for msg in reversed(list(messages)[-3:]):
+            if isinstance(msg, HumanMessage):
+                url_found = wrs.extract_url(msg.content)
+                if url_found:
+                    return url_found
+        return None
+
+    def _fetch_site_insight(self, lead, site_url: str) -> Optional[str]:
+        """
+        Insight do site pela fila de pesquisas (prioridade do agente)
+
+        Se o prefetch do webhook já pesquisa esse domínio, só aguarda o que falta.
+        Espera até RESEARCH_AGENT_WAIT_SECONDS; depois disso a pesquisa continua em
+        background e o insight fica no cache para os próximos turnos.
+        """
+        from app.services.empresa_research_service import empresa_research_service
+        from app.services.research_queue import ResearchPriority, get_research_queue
+
+        job = get_research_queue().submit(lead, url=site_url, priority=ResearchPriority.AGENTE)
+        if job is None:
+            # Já em cache (ou fila cheia)
+            return empresa_research_service.get_cached_insight(lead, url=site_url)
+
+        site_insight = job.wait(timeout=settings.research_agent_wait_seconds)
+        if not site_insight and job.active:
+            logger.warning(
+                f"Insight de {job.key} não ficou pronto em {settings.research_agent_wait_seconds}s "
+                f"— segue em background"
+            )
+        return site_insight
+
     def qualify_lead(self, state: AgentState) -> AgentState:
-        """Node: Qualificar lead com perguntas BANT"""
+        """Node: Qualificar lead com perguntas BANT (após o join dos branches paralelos)"""
         try:
             lead = state["lead"]
             messages = state["messages"]
 
+            # Resultados dos branches paralelos (limpos para não vazar para o próximo turno)
+            prefetched_data = state.get("extracted_data")
+            prefetched_insight = state.get("site_insight")
+            state["extracted_data"] = None
+            state["site_insight"] = None
+
             # DETECTAR SE LEAD ACEITOU AGENDAR (últimas 2 mensagens)
             last_messages = []
             if messages:
@@ -526,17 +630,8 @@ REGRAS CRÍTICAS:
                         if count >= 2:
                             break
 
-            # Palavras que indicam aceitação de agendamento (word boundaries para evitar falsos positivos)
-            # Ex: "poderia" não deve ser detectado como "pode", "sim" não deve pegar "assim"
-            aceita_agendar_keywords = ["sim", "pode", "vamos", "aceito", "quero", "ok", "beleza",
-                                       "confirmo", "agenda", "marcar", "agendar", "combina",
-                                       "feito", "bora", "vou", "quero sim", "pode ser"]
-
-            # Verificar se ACEITOU com word boundary (evita substring como "poderia" → "pode")
-            aceitou_agendar = any(
-                any(re.search(r'\b' + re.escape(kw) + r'\b', msg, re.IGNORECASE) for kw in aceita_agendar_keywords)
-                for msg in last_messages
-            )
+            # Verificar se ACEITOU (palavra inteira: "poderia" não casa "pode", "assim" não casa "sim")
+            aceitou_agendar = any(ACEITE_AGENDAMENTO.matches(msg) for msg in last_messages)
 
             # Verificar se IA OFERECEU agendamento recentemente (penúltima mensagem do assistant)
             ia_ofereceu_agendamento = False
@@ -551,15 +646,18 @@ REGRAS CRÍTICAS:
                 for msg in reversed(messages):
                     if isinstance(msg, AIMessage):
                         msg_lower = msg.content.lower()
-                        ofereceu_keywords = ["agendar", "reunião", "conversa", "momento para discutir", "horário", "agenda", "marcar", "call", "bora marcar"]
-                        ia_ofereceu_agendamento = any(kw in msg_lower for kw in ofereceu_keywords)
+                        ia_ofereceu_agendamento = OFERTA_AGENDAMENTO.matches(msg_lower)
                         logger.info(f"🔍 DEBUG - Verificando AIMessage: '{msg_lower[:80]}'")
                         logger.info(f"🔍 DEBUG - Encontrou keyword? {ia_ofereceu_agendamento}")
                         break
 
             # ✅ EXTRAIR DADOS DA CONVERSA PRIMEIRO (ANTES DE DECIDIR PRÓXIMO PASSO!)
-            logger.info(f"🔍 Extraindo dados de qualificação de {lead.nome}...")
-            extracted_qual_data = self.data_extractor.extract_qualification_data(lead)
+            if prefetched_data is not None:
+                extracted_qual_data = prefetched_data.get("data")
+            else:
+                # Chamada direta (fora do grafo, ex: webhook legado): extrair agora
+                logger.info(f"🔍 Extraindo dados de qualificação de {lead.nome}...")
+                extracted_qual_data = self.data_extractor.extract_qualification_data(lead)
 
             if extracted_qual_data:
                 # Atualizar campos de qualificação
@@ -732,39 +830,13 @@ REGRAS CRÍTICAS:
                 try:
                     from app.services.empresa_research_service import empresa_research_service
 
-                    # 1. Tentar cache em memória primeiro (rápido)
-                    site_insight = empresa_research_service.get_cached_insight(str(lead.id))
+                    # 1. Insight do branch paralelo ou cache do domínio (rápido)
+                    site_insight = prefetched_insight or empresa_research_service.get_cached_insight(lead)
 
-                    # 2. Cache miss + temos URL → gerar insight agora (síncrono via thread)
-                    if not site_insight and site_url:
+                    # 2. Branch não pesquisou (ex: lead respondeu várias perguntas de uma vez) → gerar agora
+                    if not site_insight and site_url and prefetched_insight != "":
                         logger.info(f"Cache vazio — gerando insight do site {site_url} agora")
-                        import asyncio as _asyncio
-                        from concurrent.futures import ThreadPoolExecutor as _TPE
-
-                        async def _get_insight():
-                            return await empresa_research_service.research_empresa(lead, url=site_url)
-
-                        def _run():
-                            _loop = _asyncio.new_event_loop()
-                            _asyncio.set_event_loop(_loop)
-                            try:
-                                return _loop.run_until_complete(_get_insight())
-                            finally:
-                                _loop.close()
-
-                        try:
-                            with _TPE(max_workers=1) as _ex:
-                                site_insight = _ex.submit(_run).result(timeout=20)
-                        except Exception as _te:
-                            logger.warning(f"Timeout/erro ao gerar insight do site: {_te}")
-
-                        # Salvar no cache para evitar regerar depois
-                        if site_insight:
-                            empresa_research_service._cache[str(lead.id)] = {
-                                "insight": site_insight,
-                                "timestamp": __import__("datetime").datetime.now(),
-                                "empresa": lead.empresa or "",
-                            }
+                        site_insight = self._fetch_site_insight(lead, site_url)
 
                     if site_insight:
                         logger.info(f"Usando insight do site na oferta de ROI: {site_insight[:60]}...")
@@ -824,7 +896,7 @@ Responda APENAS com a mensagem."""
                 if proximo_passo == "dor_principal":
                     try:
                         from app.services.empresa_research_service import empresa_research_service
-                        company_insight = empresa_research_service.get_cached_insight(str(lead.id))
+                        company_insight = prefetched_insight or empresa_research_service.get_cached_insight(lead)
                         if company_insight:
                             logger.info(f"Usando insight da empresa: {company_insight[:60]}...")
                     except Exception:
@@ -1097,84 +1169,32 @@ Qual desses funciona melhor pra você?"""
             aceita_keywords = ["sim", "ok", "pode", "vamos", "aceito", "quero", "beleza", "perfeito"]
             apenas_aceitacao = any(kw in last_message for kw in aceita_keywords) and len(last_message.split()) <= 3
 
-            # Detectar horários (formato: 10h, 14h30, 10:00, 14:30)
-            import re
-            from datetime import datetime, timedelta
+            # Interpretar dia/hora com o parser local (hoje, amanhã, terça, 14h30, de manhã...)
+            from datetime import timedelta
             import pytz
 
-            hora_pattern = r'(\d{1,2})(?:h|:)?(\d{2})?'
-            hora_match = re.search(hora_pattern, last_message)
-
-            # Detectar dia escolhido (weekday ou data relativa)
-            dia_escolhido = None
             tz = pytz.timezone('America/Sao_Paulo')
             now = datetime.now(tz)
-
-            # 1. Detectar "hoje", "amanhã", "depois de amanhã"
-            if "hoje" in last_message:
-                dia_escolhido = now.weekday()
-                days_ahead = 0
-            elif "amanhã" in last_message or "amanha" in last_message:
-                tomorrow = now + timedelta(days=1)
-                dia_escolhido = tomorrow.weekday()
-                days_ahead = 1
-            elif "depois" in last_message and ("amanhã" in last_message or "amanha" in last_message):
-                after_tomorrow = now + timedelta(days=2)
-                dia_escolhido = after_tomorrow.weekday()
-                days_ahead = 2
-            else:
-                # 2. Detectar dias da semana
-                dias_map = {
-                    "segunda": 0, "seg": 0,
-                    "terça": 1, "terca": 1, "ter": 1,
-                    "quarta": 2, "qua": 2,
-                    "quinta": 3, "qui": 3,
-                    "sexta": 4, "sex": 4,
-                    "sábado": 5, "sabado": 5, "sab": 5,
-                    "domingo": 6, "dom": 6
-                }
-
-                for dia, weekday in dias_map.items():
-                    if dia in last_message:
-                        dia_escolhido = weekday
-                        days_ahead = (dia_escolhido - now.weekday()) % 7
-                        if days_ahead == 0:
-                            days_ahead = 7  # Próxima semana se for hoje
-                        break
+            parsed = parse_datetime(last_message, now)
 
             # SE É APENAS "SIM" SEM HORÁRIO → ir para schedule_meeting mostrar horários
-            if apenas_aceitacao and not hora_match and dia_escolhido is None:
+            if apenas_aceitacao and not parsed.found and not parsed.ambiguous:
                 logger.info("🔄 Lead aceitou agendar mas não escolheu horário - redirecionando para schedule_meeting")
                 state["next_action"] = "schedule"
                 state["current_stage"] = "qualificado"
                 return state
 
-            # Tentar encontrar o slot correspondente
-            chosen_slot = None
-
-            if hora_match and dia_escolhido is not None:
-                hora = int(hora_match.group(1))
-                minuto = int(hora_match.group(2)) if hora_match.group(2) else 0
-
-                # Construir datetime alvo
-                target_datetime = now + timedelta(days=days_ahead if 'days_ahead' in locals() else 0)
-                target_datetime = target_datetime.replace(hour=hora, minute=minuto, second=0, microsecond=0)
-
-                logger.info(f"🔍 Lead escolheu: {target_datetime.strftime('%d/%m às %H:%M')}")
+            if parsed.ambiguous:
+                logger.info(f"🤔 Escolha de horário ambígua ({parsed.reason}): {last_message}")
 
-                # Procurar slot correspondente nos slots disponíveis
-                for slot in available_slots:
-                    slot_start = slot['start']
-                    if isinstance(slot_start, str):
-                        slot_start = datetime.fromisoformat(slot_start)
-
-                    if slot_start.weekday() == dia_escolhido and slot_start.hour == hora and slot_start.minute == minuto:
-                        chosen_slot = slot
-                        logger.success(f"✅ Slot encontrado: {slot['display']}")
-                        break
+            # Procurar slot correspondente nos slots oferecidos
+            chosen_slot = match_slot(parsed, available_slots)
+            if chosen_slot:
+                logger.success(f"✅ Slot encontrado: {chosen_slot['display']}")
 
-            # Se não encontrou slot exato, criar um novo baseado no target_datetime
-            if not chosen_slot and hora_match and dia_escolhido is not None and 'target_datetime' in locals():
+            # Se não encontrou slot oferecido, criar um novo com o dia + hora informados
+            if not chosen_slot and not parsed.ambiguous and parsed.date is not None and parsed.time is not None:
+                target_datetime = tz.localize(parsed.to_datetime(now).replace(tzinfo=None))
                 chosen_slot = {
                     'start': target_datetime,
                     'end': target_datetime + timedelta(minutes=60),
@@ -1373,12 +1393,19 @@ PEÇA NOVAMENTE de forma CLARA e DIRETA (máximo 2 linhas):
     # ROUTING
     # ----------------
 
-    def route_conversation(self, state: AgentState) -> str:
-        """Determina próximo node baseado no estado"""
+    def route_conversation(self, state: AgentState):
+        """
+        Determina próximo node baseado no estado
+
+        "qualify" abre os branches paralelos (extração + insight do site);
+        o join no qualify_lead espera os dois.
+        """
+        from langgraph.graph import END
+
         next_action = state.get("next_action", "qualify")
 
         routing_map = {
-            "qualify": "qualify_lead",
+            "qualify": QUALIFY_BRANCHES,
             "check_qualification": "check_qualification",
             "generate_roi": "generate_roi",
             "schedule": "schedule_meeting",
@@ -1387,29 +1414,45 @@ PEÇA NOVAMENTE de forma CLARA e DIRETA (máximo 2 linhas):
             "end": END
         }
 
-        return routing_map.get(next_action, "qualify_lead")
+        return routing_map.get(next_action, QUALIFY_BRANCHES)
 
     # ----------------
     # BUILD GRAPH
     # ----------------
 
-    def build_graph(self) -> StateGraph:
-        """Constrói o grafo da state machine"""
+    def build_graph(self, checkpointer=None):
+        """
+        Constrói o grafo da state machine
+
+        Args:
+            checkpointer: Saver do LangGraph para persistir o estado por lead
+                          (thread_id = lead.id). None = sem checkpoint.
+        """
+        from langgraph.graph import StateGraph
 
         workflow = StateGraph(AgentState)
 
-        # Adicionar nodes
-        workflow.add_node("handle_new_lead", self.handle_new_lead)
-        workflow.add_node("qualify_lead", self.qualify_lead)
-        workflow.add_node("check_qualification", self.check_qualification)
-        workflow.add_node("generate_roi", self.generate_roi)
-        workflow.add_node("schedule_meeting", self.schedule_meeting)
-        workflow.add_node("confirm_meeting", self.confirm_meeting)
-        workflow.add_node("handle_followup", self.handle_followup)
+        # Adicionar nodes (cada um com medição de tempo)
+        nodes = {
+            "handle_new_lead": self.handle_new_lead,
+            "extract_lead_data": self.extract_lead_data,
+            "prefetch_site_insight": self.prefetch_site_insight,
+            "qualify_lead": self.qualify_lead,
+            "check_qualification": self.check_qualification,
+            "generate_roi": self.generate_roi,
+            "schedule_meeting": self.schedule_meeting,
+            "confirm_meeting": self.confirm_meeting,
+            "handle_followup": self.handle_followup,
+        }
+        for name, node in nodes.items():
+            workflow.add_node(name, timed_node(name, node))
 
         # Definir entry point
         workflow.set_entry_point("handle_new_lead")
 
+        # Branches paralelos → join no qualify_lead (latência = branch mais lento, não a soma)
+        workflow.add_edge(QUALIFY_BRANCHES, "qualify_lead")
+
         # Adicionar edges condicionais
         workflow.add_conditional_edges(
             "handle_new_lead",
@@ -1440,9 +1483,56 @@ PEÇA NOVAMENTE de forma CLARA e DIRETA (máximo 2 linhas):
             self.route_conversation
         )
 
-        return workflow.compile()
+        return workflow.compile(checkpointer=checkpointer)
+
+
+# Instâncias globais (criadas no primeiro turno, não no import: langgraph + compilação
+# do grafo + checkpointer ficam fora do cold start)
+_smith_agent: Optional[SmithAgent] = None
+_smith_graph = None
+_init_lock = threading.Lock()
+
+
+def get_smith_agent() -> SmithAgent:
+    """
+    Retorna instância global do SmithAgent (singleton)
+
+    Returns:
+        SmithAgent
+    """
+    global _smith_agent
+
+    if _smith_agent is None:
+        with _init_lock:
+            if _smith_agent is None:
+                _smith_agent = SmithAgent()
+
+    return _smith_agent
+
+
+def get_smith_graph():
+    """
+    Retorna o grafo compilado do agente (singleton, compilado no primeiro uso)
+
+    Returns:
+        CompiledStateGraph com o checkpointer configurado (AGENT_CHECKPOINTER)
+    """
+    global _smith_graph
+
+    if _smith_graph is None:
+        agent = get_smith_agent()
+        with _init_lock:
+            if _smith_graph is None:
+                _smith_graph = agent.build_graph(checkpointer=get_checkpointer())
+                logger.info("🧠 Grafo do agente Smith compilado")
+
+    return _smith_graph
 
 
-# Instância global
-smith_agent = SmithAgent()
-smith_graph = smith_agent.build_graph()
+def __getattr__(name: str):
+    # Compatibilidade: `from app.agent.smith_agent import smith_agent, smith_graph`
+    if name == "smith_agent":
+        return get_smith_agent()
+    if name == "smith_graph":
+        return get_smith_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,6 +1,6 @@
 """
 Rotas da API do Smith 2.0
-"""
-from app.api import leads, webhook
 
-__all__ = ["leads", "webhook"]
+Os routers são importados explicitamente por quem monta o app (app/main.py,
+api/index.py): importar um deles não carrega os demais (nem o agente LangGraph).
+"""
@@ -2,10 +2,21 @@
 API de Analytics
 Endpoints para métricas e dashboards
 """
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Query, Depends
 from typing import Dict, Any
 from app.services.analytics_service import analytics_service
 from app.repository.leads_repository import LeadsRepository
+from app.services.llm_gateway import get_llm_gateway
+from app.agent.node_timings import get_node_timings
+from app.services.tracing import get_tracer
+from app.services.loop_monitor import get_loop_monitor
+from app.services.audio_transcription_service import audio_transcription_service
+from app.services.website_crawler import get_website_crawler
+from app.services.empresa_research_service import empresa_research_service
+from app.services.research_queue import get_research_queue
+from app.services.scheduler import get_scheduler
+from app.services.facebook_lead_queue import get_facebook_lead_queue
+from app.middleware.auth import get_current_admin
 from loguru import logger
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
@@ -143,25 +154,19 @@ async def get_metricas_integracao() -> Dict[str, Any]:
         Métricas de integração CRM/WhatsApp
     """
     try:
-        # Buscar todos os leads
-        all_leads = await leads_repository.list_all(limit=10000)
+        # Só contagens (GROUP BY origem no banco): nenhuma linha de lead é trazida
+        origens = await leads_repository.count_by_origem()
+        conversas = await leads_repository.count_conversations()
 
         # Total de leads integrados ao CRM
-        total_leads_crm = len(all_leads)
+        total_leads_crm = sum(origens.values())
 
         # Leads que tiveram interação pelo WhatsApp
-        leads_whatsapp = [l for l in all_leads if l.origem == "whatsapp"]
-        total_interacoes_whatsapp = len(leads_whatsapp)
+        total_interacoes_whatsapp = origens.get("whatsapp", 0)
 
-        # Calcular contagem de mensagens por lead
-        total_mensagens = 0
-        leads_com_conversas = 0
-
-        for lead in all_leads:
-            num_mensagens = len(lead.conversation_history) if lead.conversation_history else 0
-            if num_mensagens > 0:
-                leads_com_conversas += 1
-                total_mensagens += num_mensagens
+        # Leads com conversa e mensagens trocadas
+        leads_com_conversas = conversas["leads_com_interacao"]
+        total_mensagens = conversas["total_mensagens"]
 
         # Taxa de integração
         taxa_integracao = (total_leads_crm / total_interacoes_whatsapp * 100) if total_interacoes_whatsapp > 0 else 0
@@ -169,12 +174,6 @@ async def get_metricas_integracao() -> Dict[str, Any]:
         # Média de mensagens por lead
         media_mensagens = total_mensagens / total_leads_crm if total_leads_crm > 0 else 0
 
-        # Distribuição por origem
-        origens = {}
-        for lead in all_leads:
-            origem = str(lead.origem)
-            origens[origem] = origens.get(origem, 0) + 1
-
         return {
             "total_interacoes_whatsapp": total_interacoes_whatsapp,
             "total_leads_integrados_crm": total_leads_crm,
@@ -193,3 +192,144 @@ async def get_metricas_integracao() -> Dict[str, Any]:
     except Exception as e:
         logger.error(f"Erro ao buscar métricas de integração: {e}")
         raise
+
+
+@router.get("/llm-gateway")
+async def get_llm_gateway_stats(_admin=Depends(get_current_admin)) -> Dict[str, Any]:
+    """
+    Retorna métricas do gateway de LLM
+
+    Returns:
+        Ocupação e fila de cada limitador (global, background, por modelo) e
+        tempo médio/máximo em fila por modelo e prioridade
+    """
+    return get_llm_gateway().get_stats()
+
+
+@router.get("/agent-nodes")
+async def get_agent_node_timings(_admin=Depends(get_current_admin)) -> Dict[str, Any]:
+    """
+    Retorna tempos por node do grafo do agente
+
+    Returns:
+        Contagem, erros e tempo médio/máximo/último (ms) de cada node, incluindo
+        os branches paralelos extract_lead_data e prefetch_site_insight
+    """
+    return get_node_timings().get_stats()
+
+
+@router.get("/traces")
+async def get_recent_traces(
+    limit: int = Query(50, ge=1, le=500),
+    slowest: bool = Query(False, description="Ordenar pelos turnos mais lentos"),
+    _admin=Depends(get_current_admin)
+) -> Dict[str, Any]:
+    """
+    Retorna resumo dos turnos recentes (todos os leads)
+
+    Returns:
+        Turnos com duração total e tempo por categoria (llm, supabase, calendar, gemini...)
+    """
+    return {"turns": get_tracer().get_recent_turns(limit=limit, slowest=slowest)}
+
+
+@router.get("/traces/{lead_id}")
+async def get_lead_traces(lead_id: str, _admin=Depends(get_current_admin)) -> Dict[str, Any]:
+    """
+    Retorna os traces dos últimos turnos de um lead
+
+    Returns:
+        Turnos (mais recente primeiro) com cada span: node/chamada, início relativo,
+        duração, status e atributos (tokens, cache hit...)
+    """
+    return {"lead_id": lead_id, "turns": get_tracer().get_turns(lead_id)}
+
+
+@router.get("/event-loop")
+async def get_event_loop_diagnostics(
+    limit: int = Query(20, ge=1, le=100),
+    _admin=Depends(get_current_admin)
+) -> Dict[str, Any]:
+    """
+    Retorna lag do event loop e as chamadas que mais o bloquearam (LOOP_MONITOR_ENABLED)
+
+    Returns:
+        Lag p50/p99/max do último minuto, total de bloqueios e ofensores ordenados por
+        tempo total bloqueado (local no código do app, chamada bloqueante e stack)
+    """
+    return get_loop_monitor().get_stats(limit=limit)
+
+
+@router.post("/event-loop/reset")
+async def reset_event_loop_diagnostics(_admin=Depends(get_current_admin)) -> Dict[str, Any]:
+    """Zera ofensores e contadores do monitor do event loop"""
+    get_loop_monitor().reset()
+    return {"success": True}
+
+
+@router.get("/transcription")
+async def get_transcription_stats(_admin=Depends(get_current_admin)) -> Dict[str, Any]:
+    """
+    Retorna métricas da transcrição de áudios
+
+    Returns:
+        Motor, ocupação do pool (fila, recusados, duplicados aguardando) e
+        hit rate do cache de transcrições (memória e tabela)
+    """
+    return audio_transcription_service.get_stats()
+
+
+@router.get("/crawler")
+async def get_crawler_stats(_admin=Depends(get_current_admin)) -> Dict[str, Any]:
+    """
+    Retorna métricas do crawler de sites
+
+    Returns:
+        Parser em uso, páginas buscadas, revalidações 304 do cache HTTP e erros
+    """
+    return get_website_crawler().get_stats()
+
+
+@router.get("/research")
+async def get_research_stats(
+    limit: int = Query(20, ge=1, le=200),
+    _admin=Depends(get_current_admin)
+) -> Dict[str, Any]:
+    """
+    Retorna métricas da pesquisa de empresas
+
+    Returns:
+        cache: entradas, hit rate (memória e tabela), expirados, pesquisas em andamento
+            e chamadas que aguardaram uma pesquisa já em andamento (coalesced)
+        queue: workers, jobs na fila/rodando, deduplicados/recusados/retries e os
+            últimos jobs com status (queued/running/done/failed)
+    """
+    return {
+        "cache": empresa_research_service.get_stats(),
+        "queue": get_research_queue().get_stats(limit=limit),
+    }
+
+
+@router.get("/scheduler")
+async def get_scheduler_stats(_admin=Depends(get_current_admin)) -> Dict[str, Any]:
+    """
+    Retorna métricas do agendador interno
+
+    Returns:
+        Se este worker é o líder, jobs na roda de tempo, disparos/sucessos/retries/falhas
+        (total e por tipo) e jobs na tabela scheduled_jobs por status
+    """
+    return await get_scheduler().get_stats()
+
+
+@router.get("/facebook-leads")
+async def get_facebook_leads_stats(_admin=Depends(get_current_admin)) -> Dict[str, Any]:
+    """
+    Retorna métricas da fila de leads do Facebook Lead Ads
+
+    Returns:
+        Workers, eventos na fila/rodando, enfileirados/adiados (fila cheia)/ignorados
+        (já processados), resultados por status, tempo médio de processamento e
+        eventos na tabela facebook_lead_events por status
+    """
+    return await get_facebook_lead_queue().get_stats()
@@ -1,7 +1,7 @@
 """
 API de Leads - CRUD e operações
 """
-from typing import List, Optional
+from typing import List, Literal, Optional
 from fastapi import APIRouter, HTTPException, Query
 from loguru import logger
 from datetime import datetime
@@ -9,6 +9,8 @@ import uuid
 
 from app.models.lead import (
     Lead,
+    LeadPage,
+    ConversationMessage,
     LeadCreate,
     LeadUpdate,
     LeadResponse,
@@ -124,6 +126,52 @@ async def list_leads(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/page", response_model=LeadPage)
+async def list_leads_page(
+    cursor: Optional[str] = None,
+    limit: int = Query(default=50, ge=1, le=500),
+    fields: Literal["summary", "full"] = "summary",
+    status: Optional[LeadStatus] = None,
+    origem: Optional[LeadOrigin] = None,
+    temperatura: Optional[LeadTemperature] = None,
+):
+    """
+    Lista leads com paginação por cursor (mais recentes primeiro)
+
+    Custo constante por página, independente da profundidade (ao contrário do
+    offset de GET /). Para a próxima página, repetir a chamada com `cursor=next_cursor`.
+
+    Args:
+        cursor: next_cursor da página anterior (vazio = primeira página)
+        limit: Tamanho da página
+        fields: "summary" (colunas da listagem) ou "full" (Lead completo, com JSONB)
+        status: Filtrar por status
+        origem: Filtrar por origem
+        temperatura: Filtrar por temperatura
+
+    Returns:
+        Itens da página, next_cursor (null na última) e total estimado (1ª página)
+    """
+    try:
+        page = await repository.list_page(
+            cursor=cursor,
+            limit=limit,
+            fields=fields,
+            status=status,
+            origem=origem,
+            temperatura=temperatura,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro ao paginar leads: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    logger.info(f"Página de leads: {len(page.items)} itens ({fields})")
+
+    return page
+
+
 @router.get("/stats/summary")
 async def get_stats():
     """
@@ -174,6 +222,38 @@ async def get_lead(lead_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/{lead_id}/messages", response_model=List[ConversationMessage])
+async def list_lead_messages(
+    lead_id: str,
+    limit: int = Query(default=50, ge=1, le=500),
+    before: Optional[datetime] = None,
+):
+    """
+    Lista mensagens da conversa do lead em janelas (mais recentes primeiro a carregar)
+
+    Para carregar mensagens mais antigas, repetir com `before` = timestamp da
+    primeira mensagem recebida.
+
+    Args:
+        lead_id: ID do lead
+        limit: Tamanho da janela
+        before: Só mensagens anteriores a este timestamp
+
+    Returns:
+        Mensagens da janela em ordem cronológica
+    """
+    try:
+        messages = await repository.get_conversation_messages(lead_id, limit=limit, before=before)
+
+        logger.info(f"{len(messages)} mensagens do lead {lead_id}")
+
+        return messages
+
+    except Exception as e:
+        logger.error(f"Erro ao buscar mensagens do lead {lead_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.put("/{lead_id}", response_model=LeadResponse)
 async def update_lead(lead_id: str, lead_data: LeadUpdate):
     """
@@ -140,11 +140,8 @@ async def bulk_create_milestones(
                     detail="Todos os marcos devem ser do mesmo projeto"
                 )
 
-        # Criar todos os marcos
-        milestones = []
-        for milestone_data in milestones_data:
-            milestone = await repo.create_milestone(milestone_data)
-            milestones.append(milestone)
+        # Criar todos os marcos (um INSERT; lembretes criados pelo trigger na mesma transação)
+        milestones = await repo.create_milestones(milestones_data)
 
         logger.info(
             f"✅ {len(milestones)} marcos criados para Projeto #{project_id}"
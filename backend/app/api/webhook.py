@@ -17,7 +17,7 @@ from app.models.lead import (
 )
 from app.services import whatsapp_service
 from app.services.data_extractor import data_extractor
-from app.agent import smith_agent, smith_graph, AgentState
+from app.agent import get_smith_agent, AgentState
 from langchain_core.messages import HumanMessage, AIMessage
 
 router = APIRouter()
@@ -28,6 +28,9 @@ from app.repository.leads_repository import LeadsRepository
 # Instanciar repository
 repository = LeadsRepository()
 
+# Janela de histórico carregada por turno (últimas N mensagens; o agente não usa a conversa inteira)
+HISTORY_WINDOW = 40
+
 
 @router.post("/whatsapp")
 async def webhook_whatsapp(request: Request):
@@ -198,8 +201,10 @@ async def get_or_create_lead(phone: str, name: str) -> Lead:
 
     if existing_lead:
         logger.info(f"Lead existente encontrado: {existing_lead.nome} ({existing_lead.id})")
-        # Carregar histórico de mensagens
-        existing_lead.conversation_history = await repository.get_conversation_messages(existing_lead.id)
+        # Carregar janela recente do histórico (não a conversa inteira)
+        existing_lead.conversation_history = await repository.get_conversation_messages(
+            existing_lead.id, limit=HISTORY_WINDOW
+        )
         return existing_lead
 
     # Criar novo lead
@@ -246,7 +251,7 @@ async def process_with_agent(lead: Lead, message: str) -> tuple[str, bool]:
     """
     show_calendar = False
     try:
-        # Converter TODO o histórico de conversa para mensagens do LangChain
+        # Converter o histórico carregado (janela HISTORY_WINDOW) para mensagens do LangChain
         # O histórico já inclui a mensagem atual do usuário (adicionada antes de chamar esta função)
         messages = []
 
@@ -273,11 +278,11 @@ async def process_with_agent(lead: Lead, message: str) -> tuple[str, bool]:
         if str(lead.status) == LeadStatus.NOVO.value or str(lead.status) == "novo":
             # Primeiro contato
             state["next_action"] = "new"
-            result = smith_agent.handle_new_lead(state)
+            result = get_smith_agent().handle_new_lead(state)
 
         elif str(lead.status) in [LeadStatus.CONTATO_INICIAL.value, LeadStatus.QUALIFICANDO.value, "contato_inicial", "qualificando"]:
             # Continuar qualificação
-            result = smith_agent.qualify_lead(state)
+            result = get_smith_agent().qualify_lead(state)
 
             # EXTRAIR dados do histórico de conversa (após cada resposta)
             extracted_data = data_extractor.extract_qualification_data(result["lead"])
@@ -293,7 +298,7 @@ async def process_with_agent(lead: Lead, message: str) -> tuple[str, bool]:
                 logger.info(f"✅ {result['lead'].nome} - Todas informações coletadas, qualificando...")
 
                 # Tentar qualificar - gera mensagem de awareness + direciona pro calendário
-                result = await smith_agent.check_qualification(result)
+                result = await get_smith_agent().check_qualification(result)
 
                 # Se qualificou, marcar para mostrar calendário no frontend
                 if str(result["lead"].status) == LeadStatus.QUALIFICADO.value:
@@ -372,7 +377,7 @@ Te vejo lá! 🚀"
 
 Gere a mensagem de confirmação natural e empolgante."""
 
-                        confirmation_response = smith_agent.llm.invoke([SystemMessage(content=confirmation_prompt)])
+                        confirmation_response = await get_smith_agent().llm.ainvoke([SystemMessage(content=confirmation_prompt)])
                         response_text = confirmation_response.content
 
                         # Adicionar ao histórico
@@ -391,7 +396,7 @@ Gere a mensagem de confirmação natural e empolgante."""
                     else:
                         logger.error(f"❌ Erro ao criar evento no Google Calendar")
                         # Fallback - continuar conversa normal
-                        result = smith_agent.qualify_lead(state)
+                        result = get_smith_agent().qualify_lead(state)
                 else:
                     logger.warning(f"⚠️ Horário inválido sugerido por {lead.nome}: {reason}")
                     # Sugerir horários alternativos
@@ -421,11 +426,11 @@ Qual funciona pra você?"""
             else:
                 # Não conseguiu extrair horário - continuar conversa normal
                 logger.debug(f"⏳ Não consegui extrair horário da mensagem de {lead.nome}")
-                result = smith_agent.qualify_lead(state)
+                result = get_smith_agent().qualify_lead(state)
 
         else:
             # Estado padrão - continuar conversa
-            result = smith_agent.qualify_lead(state)
+            result = get_smith_agent().qualify_lead(state)
 
         # Atualizar lead com resultado do agente
         lead.status = result["lead"].status
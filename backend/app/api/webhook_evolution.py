@@ -7,6 +7,7 @@ from typing import Dict, Any, Set, List
 
 from app.repository.leads_repository import LeadsRepository
 from app.services.smith_ai_service import SmithAIService
+from app.services.datetime_parser import parse_datetime
 from app.services.evolution_service import evolution_service
 from app.services.google_calendar_service import google_calendar_service
 from app.services.conversation_storage_service import conversation_storage
@@ -181,55 +182,18 @@ async def _process_incoming_message(payload: Dict[str, Any]):
         # Detectar se lead está confirmando/escolhendo um horário
         async def detect_time_selection(message: str):
             """Detecta se mensagem contém escolha de horário com dia + hora"""
-            import re
-            from datetime import datetime, timedelta
+            from datetime import datetime
             import pytz
 
             SP_TZ = pytz.timezone('America/Sao_Paulo')
-            message_lower = message.lower()
+            now = datetime.now(SP_TZ)
 
-            # Detectar HORA
-            hour_match = re.search(r'(\d{1,2}):?(\d{2})?(?:h|:)?', message_lower)
-            if not hour_match:
+            # Parser local: hora obrigatória; sem dia → próximo dia útil
+            parsed = parse_datetime(message, now)
+            if parsed.ambiguous or parsed.time is None:
                 return None
 
-            hour = int(hour_match.group(1))
-            minute = int(hour_match.group(2)) if hour_match.group(2) else 0
-
-            # Detectar DIA DA SEMANA
-            dias_semana = {
-                'segunda': 0, 'seg': 0,
-                'terça': 1, 'terca': 1, 'ter': 1,
-                'quarta': 2, 'qua': 2,
-                'quinta': 3, 'qui': 3,
-                'sexta': 4, 'sex': 4,
-                'sábado': 5, 'sabado': 5, 'sab': 5,
-                'domingo': 6, 'dom': 6
-            }
-
-            target_weekday = None
-            for dia_nome, weekday in dias_semana.items():
-                if dia_nome in message_lower:
-                    target_weekday = weekday
-                    break
-
-            # Calcular data target
-            now = datetime.now(SP_TZ)
-            current_weekday = now.weekday()
-
-            if target_weekday is not None:
-                # Calcular próxima ocorrência do dia da semana
-                days_ahead = (target_weekday - current_weekday) % 7
-                if days_ahead == 0:
-                    days_ahead = 7  # Próxima semana
-                target_date = now.date() + timedelta(days=days_ahead)
-            else:
-                # Sem dia específico, assume próximo dia útil
-                target_date = now.date() + timedelta(days=1)
-
-            # Criar datetime target
-            target_dt = datetime.combine(target_date, datetime.min.time(), tzinfo=SP_TZ)
-            target_dt = target_dt.replace(hour=hour, minute=minute)
+            target_dt = SP_TZ.localize(parsed.to_datetime(now).replace(tzinfo=None))
 
             logger.info(f"🎯 Horário detectado: {target_dt.strftime('%A, %d/%m às %H:%M')}")
 
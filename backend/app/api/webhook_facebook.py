@@ -1,17 +1,24 @@
 """
 Webhook para integração com Facebook Lead Ads
 Recebe leads, qualifica com IA e insere no CRM
+
+O POST só valida a assinatura, grava o evento bruto (idempotente por leadgen_id) e
+responde; qualificação, CRM, notificação e WhatsApp rodam na fila
+(app/services/facebook_lead_queue.py) via process_facebook_event.
 """
 from fastapi import APIRouter, Request, HTTPException, Query
 from fastapi.responses import PlainTextResponse
 from loguru import logger
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import hmac
 import hashlib
+import json
 from datetime import datetime, timezone
 
 from app.models.lead import Lead, LeadStatus, LeadOrigin
 from app.repository.leads_repository import LeadsRepository
+from app.repository.facebook_lead_events_repository import FacebookLeadEventsRepository
+from app.services.facebook_lead_queue import get_facebook_lead_queue
 from app.services.lead_qualification import LeadQualificationService
 from app.services.notification_service import NotificationService
 from app.services.whatsapp_followup_service import WhatsAppFollowUpService
@@ -21,6 +28,7 @@ router = APIRouter()
 
 # Repositórios e serviços
 leads_repo = LeadsRepository()
+events_repo = FacebookLeadEventsRepository()
 qualification_service = LeadQualificationService()
 notification_service = NotificationService()
 whatsapp_followup_service = WhatsAppFollowUpService()
@@ -53,55 +61,134 @@ async def verify_webhook(
 async def receive_facebook_lead(request: Request):
     """
     Recebe leads do Facebook Lead Ads
-    Processa, qualifica e insere no CRM automaticamente
+    Grava os eventos e responde na hora; o processamento segue na fila
     """
+    # Pegar body raw para validação de assinatura
+    body = await request.body()
+
+    # Validar assinatura do Facebook (segurança)
+    signature = request.headers.get("X-Hub-Signature-256", "")
+    if not _verify_facebook_signature(body, signature):
+        logger.warning("⚠️ Assinatura inválida do Facebook")
+        raise HTTPException(status_code=403, detail="Invalid signature")
+
     try:
-        # Pegar body raw para validação de assinatura
-        body = await request.body()
+        data = json.loads(body)
+    except ValueError:
+        logger.warning("⚠️ Webhook Facebook com JSON inválido")
+        return {"status": "error", "message": "Invalid JSON"}
 
-        # Validar assinatura do Facebook (segurança)
-        signature = request.headers.get("X-Hub-Signature-256", "")
-        if not _verify_facebook_signature(body, signature):
-            logger.warning("⚠️ Assinatura inválida do Facebook")
-            raise HTTPException(status_code=403, detail="Invalid signature")
+    events = _extract_leadgen_events(data)
+    if not events:
+        return {"status": "ok", "message": "No entries to process"}
 
-        # Parse JSON
-        data = await request.json()
-        logger.info(f"📨 Webhook Facebook recebido: {data}")
+    try:
+        new_ids = await events_repo.save_new(events)
+    except Exception as e:
+        # Nada gravado: erro faz o Facebook reenviar (reentrega é idempotente por leadgen_id)
+        logger.error(f"❌ Erro ao gravar eventos do Facebook: {e}")
+        raise HTTPException(status_code=503, detail="Event store unavailable")
 
-        # Processar cada entrada
-        if "entry" not in data:
-            return {"status": "ok", "message": "No entries to process"}
+    queue = get_facebook_lead_queue()
+    for leadgen_id in new_ids:
+        queue.enqueue(leadgen_id)
 
-        for entry in data["entry"]:
-            if "changes" not in entry:
+    logger.info(
+        f"📨 Webhook Facebook: {len(events)} leads recebidos, {len(new_ids)} novos "
+        f"({len(events) - len(new_ids)} reentregas ignoradas)"
+    )
+    return {"status": "ok", "received": len(events), "new": len(new_ids)}
+
+
+def _extract_leadgen_events(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Linhas de facebook_lead_events para as changes "leadgen" do webhook
+    (o mesmo leadgen_id repetido no payload conta uma vez)
+    """
+    events = {}
+    for entry in data.get("entry", []):
+        for change in entry.get("changes", []):
+            if change.get("field") != "leadgen":
                 continue
 
-            for change in entry["changes"]:
-                if change.get("field") != "leadgen":
-                    continue
+            lead_data = change.get("value", {})
+            leadgen_id = lead_data.get("leadgen_id")
+            if not leadgen_id:
+                logger.warning(f"⚠️ Change leadgen sem leadgen_id ignorada: {lead_data}")
+                continue
 
-                # Extrair dados do lead
-                lead_data = change.get("value", {})
-                lead_id_fb = lead_data.get("leadgen_id")
-                form_id = lead_data.get("form_id")
-                page_id = lead_data.get("page_id")
+            # Dados completos do lead viriam da Graph API (GET /{leadgen-id}?fields=field_data)
+            events[str(leadgen_id)] = {
+                "leadgen_id": str(leadgen_id),
+                "form_id": lead_data.get("form_id"),
+                "page_id": lead_data.get("page_id"),
+                "payload": lead_data,
+            }
+    return list(events.values())
 
-                # Buscar dados completos do lead via API do Facebook
-                # (Aqui você precisaria fazer chamada para Graph API)
-                # Por enquanto, vamos processar os dados básicos
 
-                logger.info(f"📋 Processando lead FB: {lead_id_fb}")
+def parse_field_data(field_data_list: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    Converte field_data do Lead Ads ([{"name": ..., "values": [...]}]) em dicionário
+    """
+    field_data = {}
+    for field in field_data_list:
+        field_name = field.get("name", "")
+        field_values = field.get("values", [])
+        field_data[field_name] = field_values[0] if field_values else ""
+    return field_data
 
-                # Processar lead (será implementado abaixo)
-                await _process_facebook_lead(lead_id_fb, form_id, page_id, lead_data)
 
-        return {"status": "ok", "message": "Leads processados"}
+def lead_info_from_fields(field_data: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Mapeia os campos do formulário do Facebook para o formato de qualify_lead
+    """
+    return {
+        "nome": field_data.get("full_name") or "Lead sem nome",
+        "email": field_data.get("email", ""),
+        "telefone": field_data.get("phone_number", ""),
+        "empresa": field_data.get("company_name", ""),
+        "cargo": field_data.get("job_title", ""),
+        "faturamento": field_data.get("custom_disclaimer", ""),  # Campo customizado de faturamento
+        "mensagem": field_data.get("message", ""),
+    }
+
+
+def build_facebook_lead(lead_id_fb: str, lead_info: Dict[str, Any], qualification_result: Dict[str, Any]) -> Lead:
+    """
+    Monta o Lead do CRM para um lead qualificado do Facebook (apenas campos que existem no banco)
+    """
+    score = qualification_result["score"]
+    reasoning = qualification_result["reasoning"]
+    return Lead(
+        id=f"fb_{lead_id_fb}",
+        nome=lead_info["nome"],
+        email=lead_info["email"] if lead_info["email"] else None,
+        telefone=lead_info["telefone"] if lead_info["telefone"] else "Não informado",
+        empresa=lead_info["empresa"] if lead_info["empresa"] else None,
+        status=LeadStatus.QUALIFICADO,
+        origem=LeadOrigin.FACEBOOK_ADS,
+        lead_score=score,
+        notas=f"LEAD QUALIFICADO AUTOMATICAMENTE VIA FACEBOOK ADS\n\nScore: {score}/100\n\nFaturamento: {lead_info.get('faturamento', 'Não informado')}\nCargo: {lead_info.get('cargo', 'N/A')}\n\nRazão da Qualificação:\n{reasoning}\n\nMensagem Original:\n{lead_info['mensagem']}\n\nPróxima Ação:\n{qualification_result.get('next_action', 'Entrar em contato')}",
+        tags=["facebook_ads", "auto_qualified", f"score_{score}"]
+    )
+
+
+async def process_facebook_event(event: Dict[str, Any]) -> Tuple[str, Optional[str]]:
+    """
+    Handler da fila: processa um evento gravado em facebook_lead_events
 
-    except Exception as e:
-        logger.error(f"❌ Erro ao processar webhook Facebook: {e}")
-        # Retorna 200 mesmo com erro para não fazer Facebook retentar infinitamente
-        return {"status": "error", "message": str(e)}
+    Returns:
+        (status final, id do lead no CRM)
+    """
+    if event.get("lead_id"):
+        # Retentativa depois de falha/timeout com o lead já criado: não duplicar no CRM
+        logger.info(f"♻️ Lead FB {event['leadgen_id']} já está no CRM: {event['lead_id']}")
+        return "processado", str(event["lead_id"])
+
+    return await _process_facebook_lead(
+        event["leadgen_id"], event.get("form_id"), event.get("page_id"), event.get("payload") or {}
+    )
 
 
 async def _process_facebook_lead(
@@ -109,92 +196,78 @@ async def _process_facebook_lead(
     form_id: str,
     page_id: str,
     lead_data: Dict[str, Any]
-):
+) -> Tuple[str, Optional[str]]:
     """
     Processa um lead individual do Facebook
     1. Extrai dados
     2. Qualifica com IA
     3. Se qualificado, insere no CRM
     4. Notifica
+
+    Returns:
+        ("processado", lead_id) ou ("descartado", None) se não qualificado
     """
+    logger.info(f"📋 Processando lead FB: {lead_id_fb}")
+
+    # 1. EXTRAIR DADOS DO LEAD
+    # Em produção, você faria chamada para Graph API aqui
+    # GET /{lead-id}?fields=field_data,created_time
+    lead_info = lead_info_from_fields(parse_field_data(lead_data.get("field_data", [])))
+
+    logger.info(f"👤 Dados extraídos: {lead_info['nome']} - {lead_info['email']}")
+
+    # 2. QUALIFICAR COM IA
+    qualification_result = await qualification_service.qualify_lead(lead_info)
+
+    is_qualified = qualification_result["is_qualified"]
+    score = qualification_result["score"]
+    reasoning = qualification_result["reasoning"]
+
+    logger.info(f"🎯 Qualificação: {'✅ QUALIFICADO' if is_qualified else '❌ NÃO QUALIFICADO'} (Score: {score}/100)")
+    logger.info(f"💭 Razão: {reasoning}")
+
+    if not is_qualified:
+        logger.info(f"⏭️ Lead não qualificado, não inserido no CRM")
+        # O evento bruto fica em facebook_lead_events (status descartado) para análise posterior
+        return "descartado", None
+
+    # 3. INSERIR NO CRM SE QUALIFICADO
+    # Contato que já está no CRM (telefone é único) preenche o formulário de novo:
+    # reaproveita o lead e segue notificando, é um novo interesse
+    existing = await leads_repo.get_by_telefone(lead_info["telefone"]) if lead_info["telefone"] else None
+    if existing:
+        created_lead = existing
+        logger.info(f"♻️ Lead FB {lead_id_fb} é contato já existente no CRM: {existing.id}")
+    else:
+        lead = build_facebook_lead(lead_id_fb, lead_info, qualification_result)
+
+        # Salvar no banco
+        created_lead = await leads_repo.create(lead)
+        logger.success(f"✅ Lead inserido no CRM: {created_lead.id}")
+
+    # Chave de idempotência é o leadgen_id: retentativa vê o lead_id no evento e não recria
     try:
-        # 1. EXTRAIR DADOS DO LEAD
-        # Em produção, você faria chamada para Graph API aqui
-        # GET /{lead-id}?fields=field_data,created_time
-
-        # Extrair dados do formulário do Facebook
-        # O Facebook Lead Ads retorna os dados em field_data como lista
-        field_data_list = lead_data.get("field_data", [])
-
-        # Converter lista em dicionário para facilitar acesso
-        field_data = {}
-        for field in field_data_list:
-            field_name = field.get("name", "")
-            field_values = field.get("values", [])
-            field_value = field_values[0] if field_values else ""
-            field_data[field_name] = field_value
-
-        lead_info = {
-            "nome": field_data.get("full_name", "Lead sem nome"),
-            "email": field_data.get("email", ""),
-            "telefone": field_data.get("phone_number", ""),
-            "empresa": field_data.get("company_name", ""),
-            "cargo": field_data.get("job_title", ""),
-            "faturamento": field_data.get("custom_disclaimer", ""),  # Campo customizado de faturamento
-            "mensagem": field_data.get("message", ""),
-        }
-
-        logger.info(f"👤 Dados extraídos: {lead_info['nome']} - {lead_info['email']}")
-
-        # 2. QUALIFICAR COM IA
-        qualification_result = await qualification_service.qualify_lead(lead_info)
-
-        is_qualified = qualification_result["is_qualified"]
-        score = qualification_result["score"]
-        reasoning = qualification_result["reasoning"]
-
-        logger.info(f"🎯 Qualificação: {'✅ QUALIFICADO' if is_qualified else '❌ NÃO QUALIFICADO'} (Score: {score}/100)")
-        logger.info(f"💭 Razão: {reasoning}")
-
-        # 3. INSERIR NO CRM SE QUALIFICADO
-        if is_qualified:
-            # Criar lead no CRM (apenas campos que existem no banco)
-            lead = Lead(
-                id=f"fb_{lead_id_fb}",
-                nome=lead_info["nome"],
-                email=lead_info["email"] if lead_info["email"] else None,
-                telefone=lead_info["telefone"] if lead_info["telefone"] else "Não informado",
-                empresa=lead_info["empresa"] if lead_info["empresa"] else None,
-                status=LeadStatus.QUALIFICADO,
-                origem=LeadOrigin.FACEBOOK_ADS,
-                lead_score=score,
-                notas=f"LEAD QUALIFICADO AUTOMATICAMENTE VIA FACEBOOK ADS\n\nScore: {score}/100\n\nFaturamento: {lead_info.get('faturamento', 'Não informado')}\nCargo: {lead_info.get('cargo', 'N/A')}\n\nRazão da Qualificação:\n{reasoning}\n\nMensagem Original:\n{lead_info['mensagem']}\n\nPróxima Ação:\n{qualification_result.get('next_action', 'Entrar em contato')}",
-                tags=["facebook_ads", "auto_qualified", f"score_{score}"]
-            )
-
-            # Salvar no banco
-            created_lead = await leads_repo.create(lead)
-            logger.success(f"✅ Lead inserido no CRM: {created_lead.id}")
-
-            # 4. NOTIFICAR
-            await notification_service.notify_new_qualified_lead(created_lead, qualification_result)
-            logger.success(f"📢 Notificação enviada sobre lead qualificado!")
-
-            # 5. ENVIAR MENSAGEM DE AGENDAMENTO VIA WHATSAPP
-            whatsapp_sent = await whatsapp_followup_service.send_scheduling_message(created_lead)
-            if whatsapp_sent:
-                logger.success(f"📱 Mensagem de agendamento enviada via WhatsApp")
-            else:
-                logger.warning(f"⚠️ Não foi possível enviar mensagem de agendamento via WhatsApp")
+        await events_repo.set_lead_id(lead_id_fb, str(created_lead.id))
+    except Exception as e:
+        # finish() também grava o lead_id; só uma falha depois daqui levaria a retentativa
+        logger.error(f"❌ Erro ao gravar lead_id no evento FB {lead_id_fb}: {e}")
 
+    # Lead já existe: falha daqui em diante não pode virar retry (reenviaria notificação/WhatsApp)
+    try:
+        # 4. NOTIFICAR
+        await notification_service.notify_new_qualified_lead(created_lead, qualification_result)
+        logger.success(f"📢 Notificação enviada sobre lead qualificado!")
+
+        # 5. ENVIAR MENSAGEM DE AGENDAMENTO VIA WHATSAPP
+        whatsapp_sent = await whatsapp_followup_service.send_scheduling_message(created_lead)
+        if whatsapp_sent:
+            logger.success(f"📱 Mensagem de agendamento enviada via WhatsApp")
         else:
-            logger.info(f"⏭️ Lead não qualificado, não inserido no CRM")
-            # Opcionalmente, você pode salvar leads não qualificados em outra tabela
-            # para análise posterior
-
+            logger.warning(f"⚠️ Não foi possível enviar mensagem de agendamento via WhatsApp")
     except Exception as e:
-        logger.error(f"❌ Erro ao processar lead {lead_id_fb}: {e}")
-        raise
+        logger.error(f"❌ Lead FB {lead_id_fb} criado, mas notificação/WhatsApp falhou: {e}")
+
+    return "processado", str(created_lead.id)
 
 
 def _verify_facebook_signature(payload: bytes, signature: str) -> bool:
@@ -16,6 +16,7 @@ from datetime import datetime
 import uuid
 import asyncio
 
+from app.config import settings
 from app.models.lead import (
     Lead,
     LeadStatus,
@@ -31,8 +32,21 @@ from app.services.uazapi_adapter import (
     extract_phone_from_jid
 )
 from app.services.message_debouncer import get_message_debouncer
+from app.services.fast_path_responder import get_fast_path_responder
+from app.services.llm_gateway import llm_priority, LLMPriority
+from app.services.response_cache import get_response_cache
+from app.services.research_queue import get_research_queue
+from app.services.scheduler_jobs import schedule_lead_followup
+from app.services.tracing import get_tracer
 from app.services.conversation_memory import load_conversation_history
-from app.agent import smith_agent, smith_graph, AgentState
+from app.agent import (
+    get_smith_graph,
+    AgentState,
+    thread_config,
+    load_checkpoint_state,
+    append_checkpoint_messages,
+    clear_checkpoint,
+)
 from langchain_core.messages import HumanMessage, AIMessage
 from app.repository.leads_repository import LeadsRepository
 
@@ -42,6 +56,16 @@ router = APIRouter()
 repository = LeadsRepository()
 uazapi_service = get_uazapi_service()
 message_debouncer = get_message_debouncer(wait_seconds=2.5)
+fast_path = get_fast_path_responder()
+tracer = get_tracer()
+
+# Janela de contexto enviada ao agente (últimas N mensagens = ~N/2 trocas)
+AGENT_HISTORY_WINDOW = 20
+
+# Histórico carregado no lead a cada turno (fast-path, tom, extração de dados).
+# A extração roda todo turno e não apaga campos já extraídos, então basta uma
+# janela com folga sobre a do agente (cobre a qualificação inteira)
+LEAD_HISTORY_WINDOW = 40
 
 
 @router.post("/uazapi")
@@ -108,6 +132,7 @@ async def webhook_uazapi(request: Request):
         # 🧪 COMANDO DE TESTE: /delete - Resetar memória completamente
         if message_text.strip().lower() == "/delete":
             logger.warning(f"🗑️ Comando /delete recebido de {push_name} ({phone})")
+            fast_path.record_command("delete")
             logger.info(f"🔍 DEBUG: Criando task para handle_delete_command")
             task = asyncio.create_task(
                 handle_delete_command(phone, push_name)
@@ -156,16 +181,25 @@ async def process_buffered_message(phone: str, combined_message: str, push_name:
     Esta função é chamada pelo debouncer após X segundos de silêncio.
     Recebe todas as mensagens enviadas pelo usuário combinadas com \\n
 
+    O turno inteiro vira um trace (GET /api/analytics/traces/{lead_id}).
+
     Args:
         phone: Telefone do usuário (sem @s.whatsapp.net)
         combined_message: Mensagens combinadas separadas por \\n
         push_name: Nome do contato
     """
+    with tracer.turn(channel="uazapi", phone=phone, message=combined_message):
+        await _process_buffered_turn(phone, combined_message, push_name)
+
+
+async def _process_buffered_turn(phone: str, combined_message: str, push_name: str):
+    """Pipeline de um turno: lead → fast-path/pesquisa/agente → salvar → enviar"""
     try:
         logger.info(f"🔄 Processando mensagem buffered de {push_name} ({phone[:12]}...)")
 
         # Buscar ou criar lead
         lead = await get_or_create_lead(phone, push_name)
+        tracer.set_turn_lead(lead.id)
 
         # Adicionar mensagem combinada ao banco
         await repository.add_conversation_message(
@@ -184,60 +218,76 @@ async def process_buffered_message(phone: str, combined_message: str, push_name:
         lead.conversation_history.append(user_message)
         lead.ultima_interacao = datetime.now()
 
+        # ⚡ FAST-PATH: turnos previsíveis (saudação, nome, opt-out, "sim" sem horário)
+        # respondidos por template, sem pesquisa nem agente
+        with tracer.span("pipeline", "fast_path") as fp_span:
+            fast_response = fast_path.try_respond(lead, combined_message)
+            fp_span.set(handled=fast_response is not None)
+
         # 🔍 PESQUISA DE EMPRESA
         # - URL + qualificação COMPLETA → análise síncrona (bypass agente, resposta personalizada)
-        # - URL + ainda qualificando → pesquisa background (agente responde normalmente)
-        # - Sem URL → pesquisa background para insight futuro
+        # - URL + ainda qualificando → fila de pesquisas (agente responde normalmente)
+        # - Sem URL → fila pesquisa pelo site salvo ou nome da empresa (insight futuro)
         url_analysis_response = None
-        try:
-            from app.services.empresa_research_service import empresa_research_service
-            from app.services.website_research_service import WebsiteResearchService
-            _wrs = WebsiteResearchService()
-            url_in_message = _wrs.extract_url(combined_message)
-
-            # Verificar se qualificação está completa (todos os dados obrigatórios coletados)
-            qualificacao_completa = (
-                lead.qualification_data and
-                lead.qualification_data.cargo and
-                lead.qualification_data.funcionarios_atendimento and
-                lead.qualification_data.faturamento_anual and
-                lead.qualification_data.is_decision_maker is not None and
-                lead.qualification_data.maior_desafio and
-                lead.qualification_data.maior_desafio.strip() and
-                lead.qualification_data.urgency and
-                lead.qualification_data.urgency.strip()
-            )
-
-            if url_in_message and qualificacao_completa:
-                # Lead já qualificado + URL = análise completa do site (bypass do agente)
-                logger.info(f"🔗 URL detectada + qualificação completa — análise personalizada do site")
-                url_analysis_response = await empresa_research_service.research_empresa_com_plano(
-                    lead, url_in_message
+        if fast_response is None:
+            try:
+                from app.services.empresa_research_service import empresa_research_service
+                from app.services.website_research_service import website_research_service
+                url_in_message = website_research_service.extract_url(combined_message)
+
+                # Verificar se qualificação está completa (todos os dados obrigatórios coletados)
+                qualificacao_completa = (
+                    lead.qualification_data and
+                    lead.qualification_data.cargo and
+                    lead.qualification_data.funcionarios_atendimento and
+                    lead.qualification_data.faturamento_anual and
+                    lead.qualification_data.is_decision_maker is not None and
+                    lead.qualification_data.maior_desafio and
+                    lead.qualification_data.maior_desafio.strip() and
+                    lead.qualification_data.urgency and
+                    lead.qualification_data.urgency.strip()
                 )
-                if url_analysis_response:
-                    logger.success(f"✅ Plano personalizado gerado a partir do site")
+
+                if url_in_message and qualificacao_completa:
+                    # Lead já qualificado + URL = análise completa do site (bypass do agente)
+                    logger.info(f"🔗 URL detectada + qualificação completa — análise personalizada do site")
+                    with llm_priority(LLMPriority.INTERATIVO), tracer.span("pipeline", "research_com_plano"):
+                        url_analysis_response = await empresa_research_service.research_empresa_com_plano(
+                            lead, url_in_message
+                        )
+                    if url_analysis_response:
+                        logger.success(f"✅ Plano personalizado gerado a partir do site")
+                    else:
+                        get_research_queue().prefetch(lead, combined_message)
                 else:
-                    asyncio.create_task(
-                        empresa_research_service.run_background_research(lead, combined_message)
-                    )
-            else:
-                # URL durante qualificação → background research, agente responde normalmente
-                if url_in_message:
-                    logger.info(f"🔗 URL detectada durante qualificação — pesquisa em background")
-                asyncio.create_task(
-                    empresa_research_service.run_background_research(lead, combined_message)
-                )
-        except Exception as research_err:
-            logger.debug(f"Pesquisa ignorada: {research_err}")
+                    # URL durante qualificação → fila de pesquisas, agente responde normalmente
+                    if url_in_message:
+                        logger.info(f"🔗 URL detectada durante qualificação — pesquisa em background")
+                    get_research_queue().prefetch(lead, combined_message)
+            except Exception as research_err:
+                logger.debug(f"Pesquisa ignorada: {research_err}")
 
         # 🤖 PROCESSAR COM O AGENTE SMITH (LangGraph)
-        # Se temos análise do site, usar diretamente (bypass do agente)
-        if url_analysis_response:
-            response_text = url_analysis_response
+        # Se temos resposta do fast-path ou análise do site, usar diretamente (bypass do agente)
+        if fast_response or url_analysis_response:
+            response_text = fast_response or url_analysis_response
             show_calendar = False
-            logger.info("📊 Usando análise do site como resposta (bypass do agente)")
+            if url_analysis_response:
+                logger.info("📊 Usando análise do site como resposta (bypass do agente)")
+            # Manter checkpoint do agente em sincronia com a conversa
+            append_checkpoint_messages(
+                get_smith_graph(),
+                lead.id,
+                [HumanMessage(content=combined_message), AIMessage(content=response_text)]
+            )
         else:
-            response_text, show_calendar = await process_with_agent(lead, combined_message)
+            with tracer.span("pipeline", "agent"):
+                response_text, show_calendar = await process_with_agent(lead, combined_message)
+            # Agente pode ter extraído empresa/site neste turno → pesquisa já começa para os próximos
+            try:
+                get_research_queue().prefetch(lead)
+            except Exception as research_err:
+                logger.debug(f"Prefetch de pesquisa ignorado: {research_err}")
 
         # Adicionar resposta da IA ao histórico
         ai_message = ConversationMessage(
@@ -276,10 +326,20 @@ async def process_buffered_message(phone: str, combined_message: str, push_name:
                 roi_dict["generated_at"] = roi_dict["generated_at"].isoformat()
             update_data["roi_analysis"] = roi_dict
 
+        # 🔁 Lead respondeu: follow-up volta para a primeira tentativa a partir de agora
+        if settings.scheduler_enabled:
+            try:
+                followup_config = await schedule_lead_followup(lead)
+                if followup_config is not None:
+                    update_data["followup_config"] = followup_config
+            except Exception as followup_err:
+                logger.warning(f"⚠️ Follow-up não reagendado: {followup_err}")
+
         await repository.update(lead.id, update_data)
 
         # 📤 ENVIAR RESPOSTA VIA UAZAPI
-        success = uazapi_service.send_text_message(phone, response_text)
+        with tracer.span("uazapi", "send_text_message"):
+            success = uazapi_service.send_text_message(phone, response_text)
 
         if success:
             logger.success(f"✅ Resposta enviada via UAZAPI para {push_name}")
@@ -311,8 +371,10 @@ async def get_or_create_lead(phone: str, name: str) -> Lead:
 
     if existing_lead:
         logger.info(f"Lead existente encontrado: {existing_lead.nome} ({existing_lead.id})")
-        # Carregar histórico de mensagens
-        existing_lead.conversation_history = await repository.get_conversation_messages(existing_lead.id)
+        # Carregar janela recente do histórico (não a conversa inteira)
+        existing_lead.conversation_history = await repository.get_conversation_messages(
+            existing_lead.id, limit=LEAD_HISTORY_WINDOW
+        )
         return existing_lead
 
     # Criar novo lead
@@ -389,6 +451,9 @@ async def handle_delete_command(phone: str, push_name: str):
         await memory.clear_history()
         logger.success(f"🗑️ {message_count} mensagens deletadas do histórico")
 
+        # Limpar estado salvo do agente (senão o próximo turno retomaria a conversa antiga)
+        clear_checkpoint(lead_id)
+
         # 🔄 RESETAR DADOS DO LEAD (RESET COMPLETO - LIMPAR TUDO!)
         # NOMES EXATOS DAS COLUNAS CONFIRMADOS NO SUPABASE DASHBOARD
         reset_data = {
@@ -480,6 +545,33 @@ async def get_buffer_stats():
     }
 
 
+@router.get("/uazapi/response-cache/stats")
+async def get_response_cache_stats():
+    """
+    Retorna estatísticas do cache de respostas (FAQ)
+
+    Útil para debug e monitoramento
+    """
+    response_cache = get_response_cache()
+    return {
+        "status": "ok",
+        "response_cache": response_cache.get_stats() if response_cache else {"enabled": False}
+    }
+
+
+@router.get("/uazapi/fastpath/stats")
+async def get_fast_path_stats():
+    """
+    Retorna estatísticas do fast-path (fração do tráfego respondida sem LLM)
+
+    Útil para debug e monitoramento
+    """
+    return {
+        "status": "ok",
+        "fast_path": fast_path.get_stats()
+    }
+
+
 async def process_with_agent(lead: Lead, message: str) -> tuple[str, bool]:
     """
     Processa mensagem com o agente Smith (LangGraph)
@@ -499,13 +591,35 @@ async def process_with_agent(lead: Lead, message: str) -> tuple[str, bool]:
         Tupla (resposta gerada pelo agente, mostrar calendário)
     """
     show_calendar = False
+    stage = lead.status.value if hasattr(lead.status, 'value') else lead.status
+    response_cache = get_response_cache()
     try:
-        # 🧠 CARREGAR HISTÓRICO DO BANCO (últimas 20 mensagens)
-        logger.info(f"📚 Carregando histórico de conversas para lead {lead.id}")
-        messages = await load_conversation_history(
-            lead_id=lead.id,
-            max_messages=20  # Últimas 20 mensagens (10 trocas)
-        )
+        # 🗄️ PERGUNTA FREQUENTE JÁ RESPONDIDA NESTE STAGE → servir do cache (sem LLM)
+        if response_cache:
+            cached_response = response_cache.get(stage, message, lead)
+            if cached_response:
+                append_checkpoint_messages(
+                    get_smith_graph(),
+                    lead.id,
+                    [HumanMessage(content=message), AIMessage(content=cached_response)]
+                )
+                return cached_response, False
+
+        # 💾 RETOMAR DO CHECKPOINT (se habilitado) - evita reler histórico do banco
+        checkpoint = load_checkpoint_state(get_smith_graph(), lead.id)
+        available_slots = []
+
+        if checkpoint and checkpoint.get("messages"):
+            messages = list(checkpoint["messages"])[-(AGENT_HISTORY_WINDOW - 1):]
+            available_slots = checkpoint.get("available_slots") or []
+            logger.info(f"💾 Estado do agente retomado do checkpoint (lead {lead.id})")
+        else:
+            # 🧠 CARREGAR HISTÓRICO DO BANCO (últimas 20 mensagens)
+            logger.info(f"📚 Carregando histórico de conversas para lead {lead.id}")
+            messages = await load_conversation_history(
+                lead_id=lead.id,
+                max_messages=AGENT_HISTORY_WINDOW  # Últimas 20 mensagens (10 trocas)
+            )
 
         # Adicionar mensagem atual ao histórico (já foi salva no banco)
         messages.append(HumanMessage(content=message))
@@ -522,13 +636,20 @@ async def process_with_agent(lead: Lead, message: str) -> tuple[str, bool]:
             current_stage=lead.status.value if hasattr(lead.status, 'value') else lead.status,
             next_action="continue",
             requires_human_approval=False,
-            available_slots=[]
+            available_slots=available_slots  # Horários oferecidos no turno anterior
         )
 
         logger.info(f"🤖 Processando com smith_agent (LangGraph): stage={initial_state['current_stage']}")
 
         # 🚀 EXECUTAR LANGGRAPH (QUALIFICAÇÃO AUTOMÁTICA)
-        result = smith_graph.invoke(initial_state)
+        # thread_id = lead.id → estado final salvo no checkpoint para o próximo turno
+        # Prioridade INTERATIVO: lead esperando resposta passa na frente do background
+        # Em thread (to_thread copia o contexto, a prioridade vale lá dentro): o grafo é
+        # síncrono e, no loop, travaria os outros leads e furaria a fila do gateway de LLM
+        with llm_priority(LLMPriority.INTERATIVO):
+            result = await asyncio.to_thread(
+                get_smith_graph().invoke, initial_state, config=thread_config(lead.id)
+            )
 
         # Extrair resposta da última mensagem do agente
         if result["messages"]:
@@ -557,6 +678,12 @@ async def process_with_agent(lead: Lead, message: str) -> tuple[str, bool]:
         if result.get("next_action") == "schedule":
             show_calendar = True
 
+        # Cachear só turnos que não mudaram o lead de stage (resposta genérica de FAQ)
+        new_stage = lead.status.value if hasattr(lead.status, 'value') else lead.status
+        agent_replied = bool(result["messages"]) and isinstance(result["messages"][-1], AIMessage)
+        if response_cache and agent_replied and new_stage == stage and not show_calendar:
+            response_cache.put(stage, message, response_text, lead)
+
         return response_text, show_calendar
 
     except Exception as e:
@@ -20,6 +20,7 @@ class Settings(BaseSettings):
     # Anthropic (Claude) - Agente principal
     anthropic_api_key: Optional[str] = Field(default=None, env="ANTHROPIC_API_KEY")
     claude_model: str = Field(default="claude-sonnet-4-6", env="CLAUDE_MODEL")
+    claude_fast_model: str = Field(default="claude-haiku-4-5", env="CLAUDE_FAST_MODEL")
 
     # OpenAI - apenas transcrição de áudio (Whisper)
     openai_api_key: str = Field(..., env="OPENAI_API_KEY")
@@ -67,6 +68,80 @@ class Settings(BaseSettings):
     max_message_length: int = Field(default=2000, env="MAX_MESSAGE_LENGTH")
     default_timezone: str = Field(default="America/Sao_Paulo", env="DEFAULT_TIMEZONE")
 
+    # Checkpoint do agente LangGraph (none | memory | sqlite | postgres)
+    agent_checkpointer: str = Field(default="none", env="AGENT_CHECKPOINTER")
+    agent_checkpoint_sqlite_path: str = Field(default="smith_checkpoints.sqlite", env="AGENT_CHECKPOINT_SQLITE_PATH")
+
+    # Fast-path: respostas por template antes do agente (saudação, nome, opt-out...)
+    fast_path_enabled: bool = Field(default=True, env="FAST_PATH_ENABLED")
+
+    # Gateway de LLM: chamadas simultâneas (global / por modelo / teto para background)
+    llm_max_concurrency: int = Field(default=8, env="LLM_MAX_CONCURRENCY")
+    llm_model_concurrency: int = Field(default=6, env="LLM_MODEL_CONCURRENCY")
+    llm_background_concurrency: int = Field(default=2, env="LLM_BACKGROUND_CONCURRENCY")
+    # Roteamento de modelo por tarefa (override): "extracao=fast|premium,conversa=premium"
+    llm_model_routes: str = Field(default="", env="LLM_MODEL_ROUTES")
+    # Qualificações simultâneas em lote (importação de Lead Ads; usa o teto de background)
+    lead_qualification_batch_concurrency: int = Field(default=8, env="LEAD_QUALIFICATION_BATCH_CONCURRENCY")
+
+    # Cache de respostas para perguntas frequentes (stage + pergunta normalizada)
+    response_cache_enabled: bool = Field(default=True, env="RESPONSE_CACHE_ENABLED")
+    response_cache_ttl_seconds: int = Field(default=21600, env="RESPONSE_CACHE_TTL_SECONDS")
+    response_cache_max_entries: int = Field(default=2000, env="RESPONSE_CACHE_MAX_ENTRIES")
+    response_cache_excluded_stages: str = Field(
+        default="novo,contato_inicial,qualificando,qualificado,agendamento_marcado,agendamento_confirmado,ganho,perdido",
+        env="RESPONSE_CACHE_EXCLUDED_STAGES"
+    )
+    response_cache_embeddings: bool = Field(default=False, env="RESPONSE_CACHE_EMBEDDINGS")
+    response_cache_embedding_model: str = Field(
+        default="paraphrase-multilingual-MiniLM-L12-v2",
+        env="RESPONSE_CACHE_EMBEDDING_MODEL"
+    )
+    response_cache_similarity: float = Field(default=0.92, env="RESPONSE_CACHE_SIMILARITY")
+
+    # Observabilidade: /metrics (Prometheus), traces por turno e OpenTelemetry opcional
+    metrics_enabled: bool = Field(default=True, env="METRICS_ENABLED")
+    trace_max_leads: int = Field(default=500, env="TRACE_MAX_LEADS")
+    trace_turns_per_lead: int = Field(default=20, env="TRACE_TURNS_PER_LEAD")
+    otel_enabled: bool = Field(default=False, env="OTEL_ENABLED")
+    otel_exporter_endpoint: str = Field(default="http://localhost:4317", env="OTEL_EXPORTER_ENDPOINT")
+    otel_service_name: str = Field(default="smith-backend", env="OTEL_SERVICE_NAME")
+
+    # Diagnóstico do event loop: lag contínuo + stack de callbacks que bloqueiam o loop
+    loop_monitor_enabled: bool = Field(default=False, env="LOOP_MONITOR_ENABLED")
+    loop_monitor_interval_ms: int = Field(default=50, env="LOOP_MONITOR_INTERVAL_MS")
+    loop_monitor_block_ms: int = Field(default=200, env="LOOP_MONITOR_BLOCK_MS")
+    loop_monitor_max_offenders: int = Field(default=50, env="LOOP_MONITOR_MAX_OFFENDERS")
+
+    # Transcrição de áudio (openai | local) + pool de workers com fila limitada
+    transcription_engine: str = Field(default="openai", env="TRANSCRIPTION_ENGINE")
+    transcription_local_model: str = Field(default="small", env="TRANSCRIPTION_LOCAL_MODEL")
+    transcription_workers: int = Field(default=2, env="TRANSCRIPTION_WORKERS")
+    transcription_queue_size: int = Field(default=20, env="TRANSCRIPTION_QUEUE_SIZE")
+    # Cache de transcrições por hash do áudio (memória + tabela audio_transcriptions opcional)
+    transcription_cache_enabled: bool = Field(default=True, env="TRANSCRIPTION_CACHE_ENABLED")
+    transcription_cache_max_entries: int = Field(default=1000, env="TRANSCRIPTION_CACHE_MAX_ENTRIES")
+    transcription_cache_persist: bool = Field(default=False, env="TRANSCRIPTION_CACHE_PERSIST")
+
+    # Crawler de sites de leads (pesquisa de empresa): sessão compartilhada + cache HTTP
+    crawler_max_concurrency: int = Field(default=8, env="CRAWLER_MAX_CONCURRENCY")
+    crawler_max_pages: int = Field(default=4, env="CRAWLER_MAX_PAGES")
+    crawler_page_timeout: float = Field(default=10.0, env="CRAWLER_PAGE_TIMEOUT")
+    crawler_max_html_bytes: int = Field(default=1_000_000, env="CRAWLER_MAX_HTML_BYTES")
+    crawler_max_chars: int = Field(default=3000, env="CRAWLER_MAX_CHARS")
+    crawler_http_cache_entries: int = Field(default=500, env="CRAWLER_HTTP_CACHE_ENTRIES")
+    crawler_verify_ssl: bool = Field(default=False, env="CRAWLER_VERIFY_SSL")
+    # Cache de insights de empresa por domínio (memória + tabela empresa_insights opcional)
+    insight_cache_ttl_hours: int = Field(default=24, env="INSIGHT_CACHE_TTL_HOURS")
+    insight_cache_max_entries: int = Field(default=2000, env="INSIGHT_CACHE_MAX_ENTRIES")
+    insight_cache_persist: bool = Field(default=False, env="INSIGHT_CACHE_PERSIST")
+    # Fila de pesquisas de empresa em background (prefetch do insight)
+    research_queue_workers: int = Field(default=2, env="RESEARCH_QUEUE_WORKERS")
+    research_queue_size: int = Field(default=100, env="RESEARCH_QUEUE_SIZE")
+    research_queue_max_attempts: int = Field(default=2, env="RESEARCH_QUEUE_MAX_ATTEMPTS")
+    research_prefetch_by_name: bool = Field(default=True, env="RESEARCH_PREFETCH_BY_NAME")
+    research_agent_wait_seconds: float = Field(default=10.0, env="RESEARCH_AGENT_WAIT_SECONDS")
+
     # Números de Contato
     numero_pedro: str = Field(..., env="NUMERO_PEDRO")
 
@@ -93,6 +168,12 @@ class Settings(BaseSettings):
     facebook_verify_token: str = Field(default="smith_webhook_2026", env="FACEBOOK_VERIFY_TOKEN")
     facebook_app_secret: str = Field(default="", env="FACEBOOK_APP_SECRET")
     facebook_access_token: str = Field(default="", env="FACEBOOK_ACCESS_TOKEN")
+    # Fila de processamento dos leads (webhook só grava o evento e responde)
+    facebook_queue_workers: int = Field(default=2, env="FACEBOOK_QUEUE_WORKERS")
+    facebook_queue_size: int = Field(default=200, env="FACEBOOK_QUEUE_SIZE")
+    facebook_queue_max_attempts: int = Field(default=3, env="FACEBOOK_QUEUE_MAX_ATTEMPTS")
+    facebook_queue_lease_seconds: int = Field(default=600, env="FACEBOOK_QUEUE_LEASE_SECONDS")
+    facebook_queue_sweep_seconds: float = Field(default=60.0, env="FACEBOOK_QUEUE_SWEEP_SECONDS")
 
     # Admin Login
     admin_email: str = Field(default="admin@smith.com", env="ADMIN_EMAIL")
@@ -108,6 +189,31 @@ class Settings(BaseSettings):
 
     # Lembretes de Marcos (Milestones)
     admin_whatsapp: str = Field(default="5561998112622", env="ADMIN_WHATSAPP")
+    reminder_dispatch_concurrency: int = Field(default=4, env="REMINDER_DISPATCH_CONCURRENCY")
+    reminder_min_interval_seconds: float = Field(default=1.0, env="REMINDER_MIN_INTERVAL_SECONDS")
+    reminder_claim_batch: int = Field(default=50, env="REMINDER_CLAIM_BATCH")
+    reminder_claim_lease_seconds: int = Field(default=900, env="REMINDER_CLAIM_LEASE_SECONDS")
+    reminder_progress_batch: int = Field(default=10, env="REMINDER_PROGRESS_BATCH")
+    reminder_catchup_days: int = Field(default=3, env="REMINDER_CATCHUP_DAYS")
+
+    # Pool asyncpg (operações em lote de marcos/lembretes) - separado do cliente REST do Supabase
+    async_db_pool_size: int = Field(default=5, env="ASYNC_DB_POOL_SIZE")
+    async_db_max_overflow: int = Field(default=5, env="ASYNC_DB_MAX_OVERFLOW")
+    async_db_pool_timeout: float = Field(default=10.0, env="ASYNC_DB_POOL_TIMEOUT")
+    async_db_pool_recycle: int = Field(default=1800, env="ASYNC_DB_POOL_RECYCLE")
+    async_db_command_timeout: float = Field(default=30.0, env="ASYNC_DB_COMMAND_TIMEOUT")
+
+    # Agendador interno (lembretes de marcos, follow-up de leads, lembretes de reunião)
+    scheduler_enabled: bool = Field(default=True, env="SCHEDULER_ENABLED")
+    scheduler_tick_seconds: float = Field(default=30.0, env="SCHEDULER_TICK_SECONDS")
+    scheduler_horizon_minutes: int = Field(default=60, env="SCHEDULER_HORIZON_MINUTES")
+    scheduler_refill_minutes: int = Field(default=15, env="SCHEDULER_REFILL_MINUTES")
+    scheduler_max_concurrency: int = Field(default=4, env="SCHEDULER_MAX_CONCURRENCY")
+    scheduler_max_attempts: int = Field(default=3, env="SCHEDULER_MAX_ATTEMPTS")
+    scheduler_reminders_hour: int = Field(default=8, env="SCHEDULER_REMINDERS_HOUR")
+    scheduler_appointment_sweep_minutes: int = Field(default=30, env="SCHEDULER_APPOINTMENT_SWEEP_MINUTES")
+    # Opt-in: dispara WhatsApp automático para leads (requer migration 014 aplicada)
+    scheduler_followups_enabled: bool = Field(default=False, env="SCHEDULER_FOLLOWUPS_ENABLED")
 
     @property
     def cors_origins_list(self) -> List[str]:
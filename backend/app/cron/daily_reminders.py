@@ -1,13 +1,18 @@
 """
-Cron Job para Lembretes Diários de Marcos
-Executa diariamente para enviar lembretes de prazos
+Lembretes Diários de Marcos
+Envia lembretes de prazos uma vez por dia
+
+Com SCHEDULER_ENABLED=true o agendador interno chama run_daily_reminders no horário
+SCHEDULER_REMINDERS_HOUR (job milestone_reminders em app/services/scheduler_jobs.py),
+sem cron externo. `python -m app.cron.daily_reminders` continua servindo para rodar
+manualmente (ou via cron com o agendador desligado).
 """
 import asyncio
 from datetime import date
 from loguru import logger
 from sqlalchemy.orm import Session
 
-from app.database import SessionLocal
+from app.database import new_session
 from app.repository.milestone_repository import MilestoneRepository
 from app.services.milestone_reminder_service import (
     MilestoneReminderService,
@@ -24,7 +29,7 @@ async def run_daily_reminders():
     """
     logger.info(f"🔔 Iniciando verificação de lembretes - {date.today()}")
 
-    db = SessionLocal()
+    db = new_session()
     try:
         # Criar repository e service
         milestone_repo = MilestoneRepository(db)
@@ -54,10 +59,20 @@ async def run_daily_reminders():
         db.close()
 
 
+async def _run_once():
+    """Execução avulsa (CLI): fecha o pool asyncpg antes do loop terminar"""
+    from app.database import dispose_async_engine
+
+    try:
+        return await run_daily_reminders()
+    finally:
+        await dispose_async_engine()
+
+
 def main():
     """Entry point para execução do cron"""
     try:
-        result = asyncio.run(run_daily_reminders())
+        result = asyncio.run(_run_once())
         exit_code = 0 if result['reminders_failed'] == 0 else 1
         exit(exit_code)
     except Exception as e:
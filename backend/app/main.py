@@ -8,7 +8,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from loguru import logger
 
 from app.config import settings, validate_settings
@@ -50,6 +50,23 @@ async def lifespan(app: FastAPI):
 
     logger.info("✅ Conexões inicializadas")
 
+    # 🩺 Diagnóstico do event loop (lag + stacks de chamadas bloqueantes)
+    if settings.loop_monitor_enabled:
+        from app.services.loop_monitor import get_loop_monitor
+        get_loop_monitor().start()
+
+    # ⏰ Agendador interno (lembretes de marcos, follow-ups, lembretes de reunião)
+    if settings.scheduler_enabled:
+        from app.services.scheduler import get_scheduler
+        from app.services.scheduler_jobs import register_default_jobs
+        register_default_jobs(get_scheduler())
+        get_scheduler().start()
+
+    # 📘 Fila de leads do Facebook Lead Ads (webhook só grava o evento e responde)
+    from app.api.webhook_facebook import process_facebook_event
+    from app.services.facebook_lead_queue import get_facebook_lead_queue
+    get_facebook_lead_queue().start(process_facebook_event)
+
     # TODO: Carregar agente LangGraph
     logger.info("✅ Agente Smith carregado")
 
@@ -60,6 +77,24 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("👋 Encerrando Smith 2.0...")
+    if settings.scheduler_enabled:
+        from app.services.scheduler import get_scheduler
+        await get_scheduler().stop()
+    from app.services.facebook_lead_queue import get_facebook_lead_queue
+    await get_facebook_lead_queue().stop()
+    if settings.loop_monitor_enabled:
+        from app.services.loop_monitor import get_loop_monitor
+        await get_loop_monitor().stop()
+    from app.services.audio_transcription_service import audio_transcription_service
+    await audio_transcription_service.stop()
+    from app.services.research_queue import get_research_queue
+    await get_research_queue().stop()
+    from app.services.website_crawler import get_website_crawler
+    await get_website_crawler().close()
+    from app.services.evolution_service import evolution_service
+    await evolution_service.aclose()
+    from app.database import dispose_async_engine
+    await dispose_async_engine()
     # TODO: Fechar conexões
 
 
@@ -143,6 +178,20 @@ async def health_check():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Métricas no formato Prometheus (latência por node/chamada externa, tokens, caches)"""
+    if not settings.metrics_enabled:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+
+    from app.services.tracing import get_tracer
+    body = get_tracer().render_prometheus()
+    if settings.loop_monitor_enabled:
+        from app.services.loop_monitor import get_loop_monitor
+        body += get_loop_monitor().render_prometheus()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
 # ========================================
 # ROTAS DA API
 # ========================================
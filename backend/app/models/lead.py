@@ -3,7 +3,7 @@ Modelos de dados para Leads
 Inclui campos para qualificação e ROI
 """
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Union
 from pydantic import BaseModel, Field
 from enum import Enum
 
@@ -153,6 +153,46 @@ class Lead(BaseModel):
         }
 
 
+class LeadSummary(BaseModel):
+    """
+    Resumo de Lead para listagens e analytics
+
+    Só colunas escalares (sem JSONB de qualificação/ROI/follow-up nem histórico):
+    o repository busca apenas essas colunas (LEAD_SUMMARY_COLUMNS).
+    """
+    id: str
+    nome: str
+    empresa: Optional[str] = None
+    telefone: str
+    email: Optional[str] = None
+    status: LeadStatus = LeadStatus.NOVO
+    origem: LeadOrigin
+    temperatura: Optional[LeadTemperature] = None
+    lead_score: int = 0
+    valor_estimado: float = 0.0  # Campo não existe no banco
+    meeting_scheduled_at: Optional[datetime] = None
+    ultima_interacao: Optional[datetime] = None
+    tags: List[str] = []
+    ai_summary: Optional[str] = None  # Campo não existe no banco
+    created_at: datetime
+    updated_at: datetime
+    lost_at: Optional[datetime] = None
+    won_at: Optional[datetime] = None
+
+    class Config:
+        use_enum_values = True
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
+
+
+class LeadPage(BaseModel):
+    """Página de leads com paginação por cursor (keyset em created_at, id)"""
+    items: List[Union[LeadSummary, Lead]]
+    next_cursor: Optional[str] = None  # None = última página
+    total_estimate: Optional[int] = None  # Estimativa do Postgres (só na 1ª página)
+
+
 class LeadCreate(BaseModel):
     """Payload para criar um lead"""
     nome: str
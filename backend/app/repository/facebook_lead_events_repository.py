@@ -0,0 +1,229 @@
+"""
+Repository dos eventos brutos do Facebook Lead Ads (tabela facebook_lead_events)
+Garante idempotência por leadgen_id e controla o status do processamento assíncrono
+"""
+from datetime import datetime, timedelta, timezone
+from functools import cached_property
+from typing import List, Optional, Dict, Any
+from loguru import logger
+
+from app.database import get_supabase
+from app.services.tracing import traced
+
+
+# Status que ainda precisam de processamento
+PENDING_STATUSES = ("recebido", "erro")
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FacebookLeadEventsRepository:
+    """Repository para gerenciar eventos do Facebook Lead Ads no Supabase"""
+
+    TABLE = "facebook_lead_events"
+
+    @cached_property
+    def supabase(self):
+        """Cliente Supabase obtido no primeiro acesso (instanciar o repository não conecta)"""
+        return get_supabase()
+
+    @traced("supabase")
+    async def save_new(self, events: List[Dict[str, Any]]) -> List[str]:
+        """
+        Grava os eventos recebidos ignorando leadgen_id já conhecidos
+
+        Args:
+            events: Dicionários com leadgen_id, page_id, form_id e payload
+
+        Returns:
+            leadgen_id dos eventos novos (reentregas do Facebook ficam de fora)
+        """
+        if not events:
+            return []
+
+        response = (
+            self.supabase.table(self.TABLE)
+            .upsert(events, on_conflict="leadgen_id", ignore_duplicates=True)
+            .execute()
+        )
+        return [row["leadgen_id"] for row in response.data or []]
+
+    @traced("supabase")
+    async def get_known_ids(self, leadgen_ids: List[str], chunk_size: int = 200) -> List[str]:
+        """
+        leadgen_id já registrados (pelo webhook ou por uma importação anterior)
+
+        Args:
+            leadgen_ids: Ids a verificar
+            chunk_size: Ids por requisição (limite de tamanho da URL do PostgREST)
+        """
+        unique = list(dict.fromkeys(i for i in leadgen_ids if i))
+        known = []
+        for start in range(0, len(unique), chunk_size):
+            response = (
+                self.supabase.table(self.TABLE)
+                .select("leadgen_id")
+                .in_("leadgen_id", unique[start:start + chunk_size])
+                .execute()
+            )
+            known.extend(row["leadgen_id"] for row in response.data or [])
+        return known
+
+    @traced("supabase")
+    async def save_imported(self, events: List[Dict[str, Any]]) -> None:
+        """
+        Registra leads da importação em lote já com o resultado (processado | descartado)
+
+        Reexecutar a importação pula esses leadgen_id, e reentregas do webhook são
+        ignoradas por save_new.
+
+        Args:
+            events: Dicionários com leadgen_id, payload, status, lead_id e erro
+        """
+        if not events:
+            return
+
+        now = _now()
+        rows = [
+            {
+                "leadgen_id": event["leadgen_id"],
+                "page_id": event.get("page_id"),
+                "form_id": event.get("form_id"),
+                "payload": event["payload"],
+                "status": event["status"],
+                "lead_id": str(event["lead_id"]) if event.get("lead_id") else None,
+                "erro": event.get("erro"),
+                "tentativas": 1,
+                "processado_em": now,
+            }
+            for event in events
+        ]
+        (
+            self.supabase.table(self.TABLE)
+            .upsert(rows, on_conflict="leadgen_id", ignore_duplicates=True)
+            .execute()
+        )
+
+    @traced("supabase")
+    async def claim(self, leadgen_id: str, max_attempts: int) -> Optional[Dict[str, Any]]:
+        """
+        Marca o evento como em processamento se ainda estiver pendente
+
+        O UPDATE condicional é atômico: com vários workers/processos, só um pega o evento.
+
+        Returns:
+            Linha do evento ou None se já foi processado, está com outro worker
+            ou esgotou as tentativas
+        """
+        response = (
+            self.supabase.table(self.TABLE)
+            .update({"status": "processando", "iniciado_em": _now()})
+            .eq("leadgen_id", leadgen_id)
+            .in_("status", list(PENDING_STATUSES))
+            .lt("tentativas", max_attempts)
+            .execute()
+        )
+        return response.data[0] if response.data else None
+
+    @traced("supabase")
+    async def finish(
+        self,
+        leadgen_id: str,
+        status: str,
+        tentativas: int,
+        lead_id: Optional[str] = None,
+        erro: Optional[str] = None
+    ) -> None:
+        """
+        Registra o resultado do processamento (processado | descartado | erro)
+        """
+        updates = {"status": status, "tentativas": tentativas, "erro": erro}
+        if lead_id is not None:
+            updates["lead_id"] = str(lead_id)
+        if status != "erro":
+            updates["processado_em"] = _now()
+
+        self.supabase.table(self.TABLE).update(updates).eq("leadgen_id", leadgen_id).execute()
+
+    @traced("supabase")
+    async def list_pending(self, max_attempts: int, limit: int = 100) -> List[str]:
+        """
+        leadgen_id dos eventos a (re)processar, mais antigos primeiro
+        """
+        response = (
+            self.supabase.table(self.TABLE)
+            .select("leadgen_id")
+            .in_("status", list(PENDING_STATUSES))
+            .lt("tentativas", max_attempts)
+            .order("recebido_em")
+            .limit(limit)
+            .execute()
+        )
+        return [row["leadgen_id"] for row in response.data or []]
+
+    @traced("supabase")
+    async def set_lead_id(self, leadgen_id: str, lead_id: str) -> None:
+        """
+        Grava o lead criado no CRM antes de concluir o processamento
+
+        Retentativa (falha ou timeout depois do insert) vê o lead_id e não cria outro lead.
+        """
+        self.supabase.table(self.TABLE).update({"lead_id": str(lead_id)}).eq("leadgen_id", leadgen_id).execute()
+
+    @traced("supabase")
+    async def release_stale(self, lease_seconds: int) -> int:
+        """
+        Devolve para a fila eventos presos em processamento (worker caiu no meio)
+
+        O evento volta como "erro" gastando uma tentativa: um lead que derruba o worker
+        não fica sendo reprocessado para sempre.
+
+        Returns:
+            Quantidade de eventos liberados
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=lease_seconds)
+        stale = (
+            self.supabase.table(self.TABLE)
+            .select("leadgen_id,tentativas")
+            .eq("status", "processando")
+            .lt("iniciado_em", cutoff.isoformat())
+            .execute()
+        )
+
+        released = 0
+        for row in stale.data or []:
+            # PostgREST não incrementa coluna: UPDATE condicional por linha (se o worker
+            # terminou nesse meio tempo o status já mudou e nada é alterado)
+            response = (
+                self.supabase.table(self.TABLE)
+                .update({
+                    "status": "erro",
+                    "tentativas": (row.get("tentativas") or 0) + 1,
+                    "erro": f"Processamento passou de {lease_seconds}s (lease expirado)",
+                })
+                .eq("leadgen_id", row["leadgen_id"])
+                .eq("status", "processando")
+                .execute()
+            )
+            released += len(response.data or [])
+
+        if released:
+            logger.warning(f"⚠️ {released} eventos do Facebook presos em processamento voltaram para a fila")
+        return released
+
+    @traced("supabase")
+    async def count_by_status(self) -> Dict[str, int]:
+        """Eventos por status (para métricas)"""
+        counts = {}
+        for status in ("recebido", "processando", "processado", "descartado", "erro"):
+            response = (
+                self.supabase.table(self.TABLE)
+                .select("leadgen_id", count="exact")
+                .eq("status", status)
+                .limit(1)
+                .execute()
+            )
+            counts[status] = response.count or 0
+        return counts
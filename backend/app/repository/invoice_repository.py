@@ -3,11 +3,10 @@ Repository para gerenciar faturas (Invoices)
 """
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 from uuid import UUID
 
 from loguru import logger
-from supabase import Client
 
 from app.database import get_supabase
 from app.models.invoice import (
@@ -18,11 +17,14 @@ from app.models.invoice import (
     InvoiceStats
 )
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 
 class InvoiceRepository:
     """Repository para operações com faturas"""
 
-    def __init__(self, supabase: Client):
+    def __init__(self, supabase: "Client"):
         self.supabase = supabase
 
     async def create_invoice(self, data: InvoiceCreate) -> Invoice:
@@ -2,14 +2,21 @@
 Repository para operações de banco de dados com Leads
 Gerencia leads e conversation_messages no Supabase
 """
-from typing import List, Optional, Dict, Any
+import asyncio
+import base64
+import uuid
+from functools import cached_property, lru_cache
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime
 from loguru import logger
 from postgrest.exceptions import APIError
 
 from app.database import get_supabase
+from app.services.tracing import traced
 from app.models.lead import (
     Lead,
+    LeadSummary,
+    LeadPage,
     LeadStatus,
     LeadOrigin,
     LeadTemperature,
@@ -20,11 +27,64 @@ from app.models.lead import (
 )
 
 
+# Colunas buscadas nas listagens resumidas (LeadSummary): sem JSONB pesados
+LEAD_SUMMARY_COLUMNS = (
+    "id,nome,empresa,telefone,email,status,origem,temperatura,lead_score,"
+    "meeting_scheduled_at,ultima_interacao,tags,created_at,updated_at,lost_at,won_at"
+)
+
+# Conjuntos de campos aceitos na listagem paginada: nome -> colunas do select
+LEAD_FIELD_SETS = {
+    "summary": LEAD_SUMMARY_COLUMNS,
+    "full": "*",
+}
+
+
+def encode_lead_cursor(created_at: str, lead_id: Any) -> str:
+    """Cursor opaco da paginação: posição (created_at, id) do último lead da página"""
+    raw = f"{created_at}|{lead_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_lead_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decodifica o cursor gerado por encode_lead_cursor
+
+    Raises:
+        ValueError: Cursor inválido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, lead_id = raw.rsplit("|", 1)
+        _parse_timestamp(created_at)
+        uuid.UUID(lead_id)
+        return created_at, lead_id
+    except Exception as e:
+        raise ValueError(f"Cursor inválido: {cursor}") from e
+
+
+@lru_cache(maxsize=8192)
+def _parse_timestamp(value: str) -> datetime:
+    """
+    Converte timestamp ISO do Supabase para datetime
+
+    Cacheado: listagens/polling do CRM hidratam os mesmos leads várias vezes e
+    datetime é imutável, então o mesmo objeto pode ser reaproveitado.
+    """
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _parse_optional_timestamp(value: Optional[str]) -> Optional[datetime]:
+    return _parse_timestamp(value) if value else None
+
+
 class LeadsRepository:
     """Repository para gerenciar leads no Supabase"""
 
-    def __init__(self):
-        self.supabase = get_supabase()
+    @cached_property
+    def supabase(self):
+        """Cliente Supabase obtido no primeiro acesso (instanciar o repository não conecta)"""
+        return get_supabase()
 
     def _convert_db_to_lead(self, db_lead: Dict[str, Any]) -> Lead:
         """
@@ -46,9 +106,7 @@ class LeadsRepository:
             roi_data = db_lead["roi_analysis"].copy()
             # Converter string ISO para datetime se existir
             if roi_data.get("generated_at"):
-                roi_data["generated_at"] = datetime.fromisoformat(
-                    roi_data["generated_at"].replace("Z", "+00:00")
-                )
+                roi_data["generated_at"] = _parse_timestamp(roi_data["generated_at"])
             roi_analysis = ROIAnalysis(**roi_data)
 
         followup_config = FollowUpConfig()
@@ -56,34 +114,16 @@ class LeadsRepository:
             followup_data = db_lead["followup_config"].copy()
             # Converter string ISO para datetime se existir
             if followup_data.get("proxima_tentativa"):
-                followup_data["proxima_tentativa"] = datetime.fromisoformat(
-                    followup_data["proxima_tentativa"].replace("Z", "+00:00")
-                )
+                followup_data["proxima_tentativa"] = _parse_timestamp(followup_data["proxima_tentativa"])
             followup_config = FollowUpConfig(**followup_data)
 
         # Converter timestamps
-        created_at = datetime.fromisoformat(db_lead["created_at"].replace("Z", "+00:00"))
-        updated_at = datetime.fromisoformat(db_lead["updated_at"].replace("Z", "+00:00"))
-
-        ultima_interacao = None
-        if db_lead.get("ultima_interacao"):
-            ultima_interacao = datetime.fromisoformat(
-                db_lead["ultima_interacao"].replace("Z", "+00:00")
-            )
-
-        meeting_scheduled_at = None
-        if db_lead.get("meeting_scheduled_at"):
-            meeting_scheduled_at = datetime.fromisoformat(
-                db_lead["meeting_scheduled_at"].replace("Z", "+00:00")
-            )
-
-        won_at = None
-        if db_lead.get("won_at"):
-            won_at = datetime.fromisoformat(db_lead["won_at"].replace("Z", "+00:00"))
-
-        lost_at = None
-        if db_lead.get("lost_at"):
-            lost_at = datetime.fromisoformat(db_lead["lost_at"].replace("Z", "+00:00"))
+        created_at = _parse_timestamp(db_lead["created_at"])
+        updated_at = _parse_timestamp(db_lead["updated_at"])
+        ultima_interacao = _parse_optional_timestamp(db_lead.get("ultima_interacao"))
+        meeting_scheduled_at = _parse_optional_timestamp(db_lead.get("meeting_scheduled_at"))
+        won_at = _parse_optional_timestamp(db_lead.get("won_at"))
+        lost_at = _parse_optional_timestamp(db_lead.get("lost_at"))
 
         # Conversation history será carregado separadamente se necessário
         # Por padrão, deixar vazio para performance
@@ -121,6 +161,75 @@ class LeadsRepository:
             won_at=won_at,
         )
 
+    def _hydrate_lead(self, db_lead: Dict[str, Any]) -> Lead:
+        """
+        Converte registro do banco para Lead pelo caminho rápido (listagens)
+
+        Uma única chamada Lead.model_validate: enums e JSONB aninhados
+        (qualificação/ROI/follow-up) são validados uma vez, dentro do pydantic-core,
+        sem construir LeadStatus/QualificationData/... em Python antes. Timestamps
+        passam pelo parser cacheado.
+
+        Args:
+            db_lead: Registro do banco de dados
+
+        Returns:
+            Objeto Lead (mesmo conteúdo do _convert_db_to_lead)
+        """
+        return Lead.model_validate({
+            "id": str(db_lead["id"]),
+            "nome": db_lead["nome"],
+            "empresa": db_lead.get("empresa"),
+            "telefone": db_lead["telefone"],
+            "email": db_lead.get("email"),
+            "status": db_lead["status"],
+            "origem": db_lead["origem"],
+            "temperatura": db_lead.get("temperatura") or None,
+            "lead_score": db_lead.get("lead_score", 0),
+            "qualification_data": db_lead.get("qualificacao_detalhes") or None,
+            "roi_analysis": db_lead.get("roi_analysis") or None,
+            "meeting_scheduled_at": _parse_optional_timestamp(db_lead.get("meeting_scheduled_at")),
+            "meeting_google_event_id": db_lead.get("meeting_google_event_id"),
+            "temp_meeting_slot": db_lead.get("temp_meeting_slot"),
+            "followup_config": db_lead.get("followup_config") or {},
+            "ultima_interacao": _parse_optional_timestamp(db_lead.get("ultima_interacao")),
+            "notas": db_lead.get("observacoes"),
+            "tags": db_lead.get("tags") or [],
+            "created_at": _parse_timestamp(db_lead["created_at"]),
+            "updated_at": _parse_timestamp(db_lead["updated_at"]),
+            "lost_at": _parse_optional_timestamp(db_lead.get("lost_at")),
+            "won_at": _parse_optional_timestamp(db_lead.get("won_at")),
+        })
+
+    def _hydrate_summary(self, db_lead: Dict[str, Any]) -> LeadSummary:
+        """
+        Converte registro projetado (LEAD_SUMMARY_COLUMNS) para LeadSummary
+
+        Args:
+            db_lead: Registro do banco com as colunas do resumo
+
+        Returns:
+            Objeto LeadSummary
+        """
+        return LeadSummary.model_validate({
+            "id": str(db_lead["id"]),
+            "nome": db_lead["nome"],
+            "empresa": db_lead.get("empresa"),
+            "telefone": db_lead["telefone"],
+            "email": db_lead.get("email"),
+            "status": db_lead["status"],
+            "origem": db_lead["origem"],
+            "temperatura": db_lead.get("temperatura") or None,
+            "lead_score": db_lead.get("lead_score", 0),
+            "meeting_scheduled_at": _parse_optional_timestamp(db_lead.get("meeting_scheduled_at")),
+            "ultima_interacao": _parse_optional_timestamp(db_lead.get("ultima_interacao")),
+            "tags": db_lead.get("tags") or [],
+            "created_at": _parse_timestamp(db_lead["created_at"]),
+            "updated_at": _parse_timestamp(db_lead["updated_at"]),
+            "lost_at": _parse_optional_timestamp(db_lead.get("lost_at")),
+            "won_at": _parse_optional_timestamp(db_lead.get("won_at")),
+        })
+
     def _convert_lead_to_db(self, lead: Lead) -> Dict[str, Any]:
         """
         Converte objeto Lead para formato do banco
@@ -158,6 +267,7 @@ class LeadsRepository:
 
         return db_data
 
+    @traced("supabase")
     async def create(self, lead: Lead) -> Lead:
         """
         Cria um novo lead no banco
@@ -188,6 +298,51 @@ class LeadsRepository:
             logger.error(f"Erro ao criar lead: {e}")
             raise
 
+    @traced("supabase")
+    async def create_many(self, leads: List[Lead], chunk_size: int = 500) -> List[Lead]:
+        """
+        Cria vários leads com um INSERT por lote (importação de Lead Ads/formulários)
+
+        telefone é único no banco: um repetido derruba o lote inteiro, então quem chama
+        remove antes os telefones repetidos e os já cadastrados (get_ids_by_telefones).
+
+        Args:
+            leads: Leads a criar
+            chunk_size: Linhas por requisição ao PostgREST
+
+        Returns:
+            Leads criados com ID do banco, na ordem de entrada
+        """
+        created = []
+        try:
+            for start in range(0, len(leads), chunk_size):
+                rows = [self._convert_lead_to_db(lead) for lead in leads[start:start + chunk_size]]
+
+                # Insert em lote exige as mesmas colunas em todas as linhas
+                columns = {key for row in rows for key in row}
+                for row in rows:
+                    for column in columns:
+                        row.setdefault(column, None)
+
+                response = self.supabase.table("leads").insert(rows).execute()
+                if len(response.data or []) != len(rows):
+                    raise Exception(
+                        f"Erro ao criar leads: banco retornou {len(response.data or [])} de {len(rows)}"
+                    )
+
+                created.extend(self._convert_db_to_lead(db_lead) for db_lead in response.data)
+
+            logger.info(f"{len(created)} leads criados no banco em lote")
+            return created
+
+        except APIError as e:
+            logger.error(f"Erro API ao criar leads em lote ({len(created)} já criados): {e}")
+            raise
+        except Exception as e:
+            logger.error(f"Erro ao criar leads em lote ({len(created)} já criados): {e}")
+            raise
+
+    @traced("supabase")
     async def get_by_id(self, lead_id: str) -> Optional[Lead]:
         """
         Busca lead por ID
@@ -210,6 +365,7 @@ class LeadsRepository:
             logger.error(f"Erro ao buscar lead {lead_id}: {e}")
             raise
 
+    @traced("supabase")
     async def get_by_telefone(self, telefone: str) -> Optional[Lead]:
         """
         Busca lead por telefone
@@ -232,6 +388,65 @@ class LeadsRepository:
             logger.error(f"Erro ao buscar lead por telefone {telefone}: {e}")
             raise
 
+    @traced("supabase")
+    async def get_ids_by_telefones(self, telefones: List[str], chunk_size: int = 200) -> Dict[str, str]:
+        """
+        Busca quais telefones já estão no CRM (um SELECT ... IN por lote)
+
+        Args:
+            telefones: Telefones a verificar
+            chunk_size: Telefones por requisição (limite de tamanho da URL do PostgREST)
+
+        Returns:
+            {telefone: id do lead} só dos telefones encontrados
+        """
+        unique = list(dict.fromkeys(t for t in telefones if t))
+        found = {}
+        try:
+            for start in range(0, len(unique), chunk_size):
+                response = (
+                    self.supabase.table("leads")
+                    .select("id,telefone")
+                    .in_("telefone", unique[start:start + chunk_size])
+                    .execute()
+                )
+                for row in response.data or []:
+                    found[row["telefone"]] = str(row["id"])
+            return found
+
+        except Exception as e:
+            logger.error(f"Erro ao buscar leads por telefone em lote: {e}")
+            raise
+
+    def _list_query(
+        self,
+        columns: str,
+        status: Optional[LeadStatus],
+        origem: Optional[LeadOrigin],
+        temperatura: Optional[LeadTemperature],
+        limit: int,
+        offset: int,
+    ):
+        """Monta a query de listagem (filtros, ordenação e paginação)"""
+        query = self.supabase.table("leads").select(columns)
+
+        # Aplicar filtros
+        if status:
+            query = query.eq("status", status.value)
+
+        if origem:
+            query = query.eq("origem", origem.value)
+
+        if temperatura:
+            query = query.eq("temperatura", temperatura.value)
+
+        # Ordenar por created_at decrescente
+        query = query.order("created_at", desc=True)
+
+        # Aplicar paginação
+        return query.range(offset, offset + limit - 1)
+
+    @traced("supabase")
     async def list_all(
         self,
         status: Optional[LeadStatus] = None,
@@ -243,6 +458,9 @@ class LeadsRepository:
         """
         Lista leads com filtros opcionais
 
+        Paginação por offset (o Postgres percorre e descarta `offset` linhas):
+        para navegar em tabelas grandes usar list_page.
+
         Args:
             status: Filtrar por status
             origem: Filtrar por origem
@@ -254,9 +472,92 @@ class LeadsRepository:
             Lista de leads
         """
         try:
-            query = self.supabase.table("leads").select("*")
+            response = self._list_query("*", status, origem, temperatura, limit, offset).execute()
+
+            if not response.data:
+                return []
+
+            return [self._hydrate_lead(lead) for lead in response.data]
+
+        except Exception as e:
+            logger.error(f"Erro ao listar leads: {e}")
+            raise
+
+    @traced("supabase")
+    async def list_summaries(
+        self,
+        status: Optional[LeadStatus] = None,
+        origem: Optional[LeadOrigin] = None,
+        temperatura: Optional[LeadTemperature] = None,
+        limit: int = 100,
+        offset: int = 0,
+    ) -> List[LeadSummary]:
+        """
+        Lista leads resumidos (só LEAD_SUMMARY_COLUMNS) para listagens e analytics
+
+        Args:
+            status: Filtrar por status
+            origem: Filtrar por origem
+            temperatura: Filtrar por temperatura
+            limit: Número máximo de resultados
+            offset: Offset para paginação
+
+        Returns:
+            Lista de LeadSummary
+        """
+        try:
+            response = self._list_query(LEAD_SUMMARY_COLUMNS, status, origem, temperatura, limit, offset).execute()
+
+            if not response.data:
+                return []
+
+            return [self._hydrate_summary(lead) for lead in response.data]
+
+        except Exception as e:
+            logger.error(f"Erro ao listar resumo dos leads: {e}")
+            raise
+
+    @traced("supabase")
+    async def list_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: int = 50,
+        fields: str = "summary",
+        status: Optional[LeadStatus] = None,
+        origem: Optional[LeadOrigin] = None,
+        temperatura: Optional[LeadTemperature] = None,
+    ) -> LeadPage:
+        """
+        Lista leads com paginação por cursor (keyset em created_at DESC, id DESC)
+
+        Diferente do offset do list_all, o custo de cada página é constante (o índice
+        idx_leads_created_at_id vai direto à posição do cursor) e leads criados
+        durante a navegação não duplicam nem pulam itens.
+
+        Args:
+            cursor: next_cursor da página anterior (None = primeira página)
+            limit: Tamanho da página
+            fields: Conjunto de campos (LEAD_FIELD_SETS): "summary" ou "full"
+            status: Filtrar por status
+            origem: Filtrar por origem
+            temperatura: Filtrar por temperatura
+
+        Returns:
+            LeadPage com itens, next_cursor e total estimado (só na primeira página)
+
+        Raises:
+            ValueError: Cursor ou conjunto de campos inválido
+        """
+        if fields not in LEAD_FIELD_SETS:
+            raise ValueError(f"Conjunto de campos inválido: {fields} (use {', '.join(LEAD_FIELD_SETS)})")
+
+        columns = LEAD_FIELD_SETS[fields]
+        position = decode_lead_cursor(cursor) if cursor else None
+
+        try:
+            # Contagem estimada (estatísticas do planner) só na 1ª página: count exato varre a tabela
+            query = self.supabase.table("leads").select(columns, count=None if position else "estimated")
 
-            # Aplicar filtros
             if status:
                 query = query.eq("status", status.value)
 
@@ -266,23 +567,39 @@ class LeadsRepository:
             if temperatura:
                 query = query.eq("temperatura", temperatura.value)
 
-            # Ordenar por created_at decrescente
-            query = query.order("created_at", desc=True)
+            if position:
+                created_at, last_id = position
+                query = query.or_(
+                    f'created_at.lt."{created_at}",'
+                    f'and(created_at.eq."{created_at}",id.lt."{last_id}")'
+                )
 
-            # Aplicar paginação
-            query = query.range(offset, offset + limit - 1)
+            # Um item a mais só para saber se existe próxima página
+            response = (
+                query.order("created_at", desc=True)
+                .order("id", desc=True)
+                .limit(limit + 1)
+                .execute()
+            )
 
-            response = query.execute()
+        except Exception as e:
+            logger.error(f"Erro ao paginar leads: {e}")
+            raise
 
-            if not response.data:
-                return []
+        rows = response.data or []
+        has_more = len(rows) > limit
+        rows = rows[:limit]
 
-            return [self._convert_db_to_lead(lead) for lead in response.data]
+        hydrate = self._hydrate_summary if fields == "summary" else self._hydrate_lead
+        last = rows[-1] if rows else None
 
-        except Exception as e:
-            logger.error(f"Erro ao listar leads: {e}")
-            raise
+        return LeadPage(
+            items=[hydrate(row) for row in rows],
+            next_cursor=encode_lead_cursor(last["created_at"], last["id"]) if has_more else None,
+            total_estimate=None if position else response.count,
+        )
 
+    @traced("supabase")
     async def update(self, lead_id: str, updates: Dict[str, Any]) -> Lead:
         """
         Atualiza um lead existente
@@ -311,6 +628,7 @@ class LeadsRepository:
             logger.error(f"Erro ao atualizar lead {lead_id}: {e}")
             raise
 
+    @traced("supabase")
     async def update_empresa(self, lead_id: str, empresa: str) -> bool:
         """
         Atualiza o nome da empresa do lead
@@ -337,6 +655,7 @@ class LeadsRepository:
             logger.error(f"Erro ao atualizar empresa do lead {lead_id}: {e}")
             return False
 
+    @traced("supabase")
     async def delete(self, lead_id: str) -> bool:
         """
         Deleta um lead
@@ -362,24 +681,44 @@ class LeadsRepository:
             logger.error(f"Erro ao deletar lead {lead_id}: {e}")
             raise
 
-    async def get_conversation_messages(self, lead_id: str) -> List[ConversationMessage]:
+    @traced("supabase")
+    async def get_conversation_messages(
+        self,
+        lead_id: str,
+        limit: Optional[int] = None,
+        before: Optional[datetime] = None,
+    ) -> List[ConversationMessage]:
         """
-        Busca todas as mensagens de conversação de um lead
+        Busca mensagens de conversação de um lead
+
+        Com `limit`, retorna só a janela das últimas N mensagens (anteriores a
+        `before`, se informado) usando o índice (lead_id, timestamp DESC): o custo
+        não cresce com o tamanho da conversa.
 
         Args:
             lead_id: ID do lead
+            limit: Máximo de mensagens (as mais recentes). None = conversa inteira
+            before: Cursor: só mensagens com timestamp anterior a este
 
         Returns:
-            Lista de mensagens ordenadas por timestamp
+            Lista de mensagens ordenadas por timestamp (mais antiga primeiro)
         """
         try:
-            response = (
+            query = (
                 self.supabase.table("conversation_messages")
-                .select("*")
+                .select("id,role,content,timestamp,metadata")
                 .eq("lead_id", lead_id)
-                .order("timestamp", desc=False)
-                .execute()
             )
+
+            if before:
+                query = query.lt("timestamp", before.isoformat())
+
+            if limit:
+                query = query.order("timestamp", desc=True).limit(limit)
+            else:
+                query = query.order("timestamp", desc=False)
+
+            response = query.execute()
         except Exception as e:
             logger.error(f"Erro ao buscar mensagens do lead {lead_id}: {e}")
             # Se tabela não existir, retornar lista vazia (não crashar)
@@ -390,8 +729,11 @@ class LeadsRepository:
             if not response.data:
                 return []
 
+            # Janela veio da mais recente para a mais antiga
+            rows = reversed(response.data) if limit else response.data
+
             messages = []
-            for msg in response.data:
+            for msg in rows:
                 messages.append(
                     ConversationMessage(
                         id=msg["id"],
@@ -408,6 +750,7 @@ class LeadsRepository:
             logger.error(f"Erro ao buscar mensagens do lead {lead_id}: {e}")
             raise
 
+    @traced("supabase")
     async def add_conversation_message(
         self, lead_id: str, role: str, content: str, metadata: Optional[Dict[str, Any]] = None
     ) -> ConversationMessage:
@@ -469,6 +812,7 @@ class LeadsRepository:
             logger.error(f"Erro ao adicionar mensagem ao lead {lead_id}: {e}")
             raise
 
+    @traced("supabase")
     async def get_stats(self) -> Dict[str, Any]:
         """
         Retorna estatísticas agregadas dos leads
@@ -506,3 +850,69 @@ class LeadsRepository:
                 "taxa_qualificacao": 0,
                 "taxa_conversao": 0,
             }
+
+    @traced("supabase")
+    async def count_by_origem(self) -> Dict[str, int]:
+        """
+        Quantidade de leads por origem (só contagens, nenhuma linha é trazida)
+
+        Um GROUP BY no banco (RPC count_leads_by_origem, migration 017), fora do
+        event loop: o cliente Supabase é síncrono. Sem a migration aplicada, cai
+        para um count por origem.
+
+        Returns:
+            Dicionário origem -> quantidade (origens sem leads ficam de fora)
+        """
+        try:
+            response = await asyncio.to_thread(
+                lambda: self.supabase.rpc("count_leads_by_origem").execute()
+            )
+        except APIError as e:
+            logger.warning(f"⚠️ RPC count_leads_by_origem indisponível (migration 017?): {e} - contando por origem")
+            return await asyncio.to_thread(self._count_each_origem)
+        return {row["origem"]: row["total"] for row in response.data or [] if row.get("total")}
+
+    def _count_each_origem(self) -> Dict[str, int]:
+        """Fallback de count_by_origem: um count=exact por LeadOrigin (síncrono)"""
+        counts = {}
+        for origem in LeadOrigin:
+            response = (
+                self.supabase.table("leads")
+                .select("id", count="exact")
+                .eq("origem", origem.value)
+                .limit(1)
+                .execute()
+            )
+            if response.count:
+                counts[origem.value] = response.count
+        return counts
+
+    @traced("supabase")
+    async def count_conversations(self) -> Dict[str, int]:
+        """
+        Contagens de conversa para métricas (só contagens, nenhuma linha é trazida)
+
+        Returns:
+            leads_com_interacao (ultima_interacao preenchida) e total_mensagens
+            (linhas de conversation_messages)
+        """
+        # Cliente Supabase síncrono: as duas contagens em paralelo, fora do event loop
+        leads_response, messages_response = await asyncio.gather(
+            asyncio.to_thread(
+                lambda: self.supabase.table("leads")
+                .select("id", count="exact")
+                .not_.is_("ultima_interacao", "null")
+                .limit(1)
+                .execute()
+            ),
+            asyncio.to_thread(
+                lambda: self.supabase.table("conversation_messages")
+                .select("id", count="exact")
+                .limit(1)
+                .execute()
+            ),
+        )
+        return {
+            "leads_com_interacao": leads_response.count or 0,
+            "total_mensagens": messages_response.count or 0,
+        }
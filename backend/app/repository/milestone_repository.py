@@ -1,18 +1,26 @@
 """
 Repository para gerenciar marcos de projetos e lembretes
+
+Escritas em lote (criação de marcos, marcação de atrasados) e o envio de lembretes
+(reserva do lote, registro do resultado) usam o engine asyncpg (get_async_engine), sem
+bloquear o event loop do scheduler; as demais consultas usam a Session síncrona.
 """
-from datetime import date, datetime
-from typing import Optional, List
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Optional, List, Tuple
 from uuid import UUID
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 from loguru import logger
 
+from app.database import get_async_engine
 from app.models.milestone import (
     Milestone, MilestoneCreate, MilestoneUpdate,
     ScheduledReminder, MilestoneStatus, ReminderType
 )
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncConnection
+
 
 class MilestoneRepository:
     """Repository para operações de marcos e lembretes"""
@@ -26,31 +34,65 @@ class MilestoneRepository:
 
         Os lembretes são criados automaticamente pelo trigger do banco
         """
+        milestones = await self.create_milestones([milestone_data])
+        return milestones[0]
+
+    async def create_milestones(
+        self,
+        milestones_data: List[MilestoneCreate],
+        conn: Optional["AsyncConnection"] = None
+    ) -> List[Milestone]:
+        """
+        Cria vários marcos em um único INSERT (asyncpg)
+
+        Os lembretes de todos os marcos são criados de uma vez pelo trigger por
+        statement (migration 015), na mesma transação.
+
+        Args:
+            milestones_data: Marcos a criar
+            conn: Conexão com transação aberta pelo chamador (None = transação própria)
+
+        Returns:
+            Marcos criados, ordenados por ordem e data limite
+        """
+        if not milestones_data:
+            return []
+
         query = text("""
             INSERT INTO project_milestones (
                 project_id, nome, descricao, ordem, data_limite,
                 notificacao_whatsapp, notificacao_email
             )
-            VALUES (
-                :project_id, :nome, :descricao, :ordem, :data_limite,
-                :notificacao_whatsapp, :notificacao_email
+            SELECT * FROM unnest(
+                CAST(:project_ids AS integer[]),
+                CAST(:nomes AS text[]),
+                CAST(:descricoes AS text[]),
+                CAST(:ordens AS integer[]),
+                CAST(:datas_limite AS date[]),
+                CAST(:notificacoes_whatsapp AS boolean[]),
+                CAST(:notificacoes_email AS boolean[])
             )
             RETURNING *
         """)
 
-        result = self.db.execute(query, {
-            "project_id": milestone_data.project_id,
-            "nome": milestone_data.nome,
-            "descricao": milestone_data.descricao,
-            "ordem": milestone_data.ordem,
-            "data_limite": milestone_data.data_limite,
-            "notificacao_whatsapp": milestone_data.notificacao_whatsapp,
-            "notificacao_email": milestone_data.notificacao_email,
-        }).fetchone()
-
-        self.db.commit()
+        params = {
+            "project_ids": [m.project_id for m in milestones_data],
+            "nomes": [m.nome for m in milestones_data],
+            "descricoes": [m.descricao for m in milestones_data],
+            "ordens": [m.ordem for m in milestones_data],
+            "datas_limite": [m.data_limite for m in milestones_data],
+            "notificacoes_whatsapp": [m.notificacao_whatsapp for m in milestones_data],
+            "notificacoes_email": [m.notificacao_email for m in milestones_data],
+        }
+
+        if conn is not None:
+            rows = (await conn.execute(query, params)).fetchall()
+        else:
+            async with get_async_engine().begin() as own_conn:
+                rows = (await own_conn.execute(query, params)).fetchall()
 
-        return self._row_to_milestone(result)
+        rows.sort(key=lambda row: (row.ordem, row.data_limite))
+        return [self._row_to_milestone(row) for row in rows]
 
     async def get_milestone(self, milestone_id: UUID) -> Optional[Milestone]:
         """Busca um marco pelo ID"""
@@ -188,38 +230,127 @@ class MilestoneRepository:
 
         results = self.db.execute(query, {"target_date": target_date}).fetchall()
 
-        reminders_with_milestones = []
-        for row in results:
-            reminder = ScheduledReminder(
-                id=row.id,
-                milestone_id=row.milestone_id,
-                tipo=ReminderType(row.tipo),
-                data_envio=row.data_envio,
-                enviado=row.enviado,
-                enviado_em=row.enviado_em,
-                erro_envio=row.erro_envio,
-                metodo=row.metodo,
-                created_at=row.created_at
-            )
+        return [self._row_to_reminder_with_milestone(row) for row in results]
 
-            milestone = Milestone(
-                id=row.milestone_id,
-                project_id=row.project_id,
-                nome=row.milestone_nome,
-                descricao=row.milestone_descricao,
-                ordem=0,  # Não usado neste contexto
-                data_limite=row.data_limite,
-                data_conclusao=None,
-                status=MilestoneStatus(row.status),
-                notificacao_whatsapp=True,
-                notificacao_email=False,
-                created_at=datetime.now(),
-                updated_at=datetime.now()
+    async def claim_pending_reminders(
+        self,
+        target_date: date,
+        catchup_days: int = 0,
+        limit: int = 50,
+        lease_seconds: int = 900
+    ) -> List[Tuple[ScheduledReminder, Milestone]]:
+        """
+        Reserva (lease) um lote de lembretes pendentes para envio
+
+        Marca enviando_em = NOW() nos lembretes retornados, em um único UPDATE.
+        Lembretes reservados por outra execução (lease ainda válido) ficam de fora,
+        assim cron e endpoint rodando juntos não enviam o mesmo lembrete duas vezes.
+        Lease vencido sem enviado/erro = execução anterior caiu no meio: o lembrete
+        volta para a fila (pode repetir o envio que estava em andamento).
+
+        Args:
+            target_date: Data de referência (normalmente hoje)
+            catchup_days: Dias anteriores ainda pendentes que também entram (execução perdida)
+            limit: Tamanho do lote
+            lease_seconds: Validade da reserva
+
+        Returns:
+            Tuplas (reminder, milestone) ordenadas por data limite
+        """
+        query = text("""
+            WITH candidatos AS (
+                SELECT
+                    sr.id,
+                    (sr.enviando_em IS NOT NULL AND sr.erro_envio IS NULL) AS retomado
+                FROM scheduled_reminders sr
+                JOIN project_milestones pm ON sr.milestone_id = pm.id
+                WHERE sr.data_envio BETWEEN :desde AND :target_date
+                  AND sr.enviado = false
+                  AND pm.status NOT IN ('concluido', 'cancelado')
+                  AND (
+                      sr.enviando_em IS NULL
+                      OR sr.enviando_em < NOW() - make_interval(secs => :lease_seconds)
+                  )
+                ORDER BY pm.data_limite ASC, sr.id
+                LIMIT :limit
+                FOR UPDATE OF sr SKIP LOCKED
             )
+            UPDATE scheduled_reminders sr
+            SET enviando_em = NOW()
+            FROM candidatos c, project_milestones pm
+            WHERE sr.id = c.id
+              AND pm.id = sr.milestone_id
+            RETURNING
+                sr.id,
+                sr.milestone_id,
+                sr.tipo,
+                sr.data_envio,
+                sr.enviado,
+                sr.enviado_em,
+                sr.erro_envio,
+                sr.metodo,
+                sr.created_at,
+                c.retomado,
+                pm.project_id,
+                pm.nome as milestone_nome,
+                pm.descricao as milestone_descricao,
+                pm.data_limite,
+                pm.status
+        """)
+
+        async with get_async_engine().begin() as conn:
+            results = (await conn.execute(query, {
+                "desde": target_date - timedelta(days=max(catchup_days, 0)),
+                "target_date": target_date,
+                "lease_seconds": float(lease_seconds),
+                "limit": limit,
+            })).fetchall()
 
-            reminders_with_milestones.append((reminder, milestone))
+        resumed = sum(1 for row in results if row.retomado)
+        if resumed:
+            logger.warning(f"♻️  {resumed} lembretes retomados de uma execução interrompida")
 
-        return reminders_with_milestones
+        rows = sorted(results, key=lambda row: (row.data_limite, str(row.id)))
+        return [self._row_to_reminder_with_milestone(row) for row in rows]
+
+    async def mark_reminders_sent(
+        self,
+        results: List[Tuple[UUID, bool, Optional[str]]]
+    ) -> int:
+        """
+        Registra o resultado de vários lembretes em um único UPDATE
+
+        Args:
+            results: Tuplas (reminder_id, sucesso, mensagem de erro)
+
+        Returns:
+            Número de lembretes atualizados
+        """
+        if not results:
+            return 0
+
+        query = text("""
+            UPDATE scheduled_reminders sr
+            SET enviado = r.ok,
+                enviado_em = CASE WHEN r.ok THEN NOW() ELSE sr.enviado_em END,
+                erro_envio = CASE WHEN r.ok THEN sr.erro_envio ELSE r.erro END
+            FROM unnest(
+                CAST(:ids AS uuid[]),
+                CAST(:oks AS boolean[]),
+                CAST(:erros AS text[])
+            ) AS r(id, ok, erro)
+            WHERE sr.id = r.id
+        """)
+
+        # Transação própria no engine asyncpg: falha faz rollback só deste lote
+        async with get_async_engine().begin() as conn:
+            result = await conn.execute(query, {
+                "ids": [UUID(str(reminder_id)) for reminder_id, _, _ in results],
+                "oks": [success for _, success, _ in results],
+                "erros": [error_message for _, _, error_message in results],
+            })
+
+        return result.rowcount
 
     async def mark_reminder_sent(
         self,
@@ -248,26 +379,32 @@ class MilestoneRepository:
 
         return result.rowcount > 0
 
-    async def mark_overdue_milestones(self) -> int:
+    async def mark_overdue_milestones(self, conn: Optional["AsyncConnection"] = None) -> int:
         """
-        Marca marcos como atrasados (chama função do banco)
+        Marca marcos pendentes com prazo vencido como atrasados
+
+        Um UPDATE set-based (asyncpg) que já devolve quantos mudaram de status.
+        `conn`: conexão com transação aberta pelo chamador (None = transação própria).
 
         Retorna número de marcos atualizados
         """
-        query = text("SELECT mark_overdue_milestones()")
-        self.db.execute(query)
-        self.db.commit()
-
-        # Contar quantos foram atualizados
-        count_query = text("""
-            SELECT COUNT(*) FROM project_milestones
-            WHERE status = 'atrasado'
-              AND data_limite < CURRENT_DATE
-              AND data_conclusao IS NULL
+        query = text("""
+            WITH marcados AS (
+                UPDATE project_milestones
+                SET status = 'atrasado'
+                WHERE status = 'pendente'
+                  AND data_limite < CURRENT_DATE
+                  AND data_conclusao IS NULL
+                RETURNING 1
+            )
+            SELECT COUNT(*) FROM marcados
         """)
-        result = self.db.execute(count_query).fetchone()
 
-        return result[0] if result else 0
+        if conn is not None:
+            return (await conn.execute(query)).scalar_one()
+
+        async with get_async_engine().begin() as own_conn:
+            return (await own_conn.execute(query)).scalar_one()
 
     def _row_to_milestone(self, row) -> Milestone:
         """Converte row do banco para modelo Milestone"""
@@ -295,6 +432,37 @@ class MilestoneRepository:
 
         return milestone
 
+    def _row_to_reminder_with_milestone(self, row) -> Tuple[ScheduledReminder, Milestone]:
+        """Converte row de lembrete + marco (JOIN) para a tupla usada no envio"""
+        reminder = ScheduledReminder(
+            id=row.id,
+            milestone_id=row.milestone_id,
+            tipo=ReminderType(row.tipo),
+            data_envio=row.data_envio,
+            enviado=row.enviado,
+            enviado_em=row.enviado_em,
+            erro_envio=row.erro_envio,
+            metodo=row.metodo,
+            created_at=row.created_at
+        )
+
+        milestone = Milestone(
+            id=row.milestone_id,
+            project_id=row.project_id,
+            nome=row.milestone_nome,
+            descricao=row.milestone_descricao,
+            ordem=0,  # Não usado neste contexto
+            data_limite=row.data_limite,
+            data_conclusao=None,
+            status=MilestoneStatus(row.status),
+            notificacao_whatsapp=True,
+            notificacao_email=False,
+            created_at=datetime.now(),
+            updated_at=datetime.now()
+        )
+
+        return reminder, milestone
+
     def _row_to_reminder(self, row) -> ScheduledReminder:
         """Converte row do banco para modelo ScheduledReminder"""
         return ScheduledReminder(
@@ -2,6 +2,7 @@
 Repository para operações de banco de dados com Projetos
 Gerencia projetos no Supabase
 """
+from functools import cached_property
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone
 from loguru import logger
@@ -14,8 +15,10 @@ from app.models.project import Project, ProjectStatus, ProjectPriority
 class ProjectsRepository:
     """Repository para gerenciar projetos no Supabase"""
 
-    def __init__(self):
-        self.supabase = get_supabase()
+    @cached_property
+    def supabase(self):
+        """Cliente Supabase obtido no primeiro acesso (instanciar o repository não conecta)"""
+        return get_supabase()
 
     def _convert_db_to_project(self, db_project: Dict[str, Any]) -> Project:
         """
@@ -4,7 +4,7 @@ Calcula métricas e KPIs do funil de vendas
 """
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta, timezone
-from app.models.lead import Lead, LeadStatus, LeadTemperature
+from app.models.lead import LeadSummary, LeadStatus, LeadTemperature
 from app.repository.leads_repository import LeadsRepository
 from loguru import logger
 
@@ -29,8 +29,8 @@ class AnalyticsService:
             # Data de corte (timezone-aware)
             data_corte = datetime.now(timezone.utc) - timedelta(days=periodo_dias)
 
-            # Buscar todos os leads
-            all_leads = await self.repository.list_all(limit=1000)
+            # Buscar todos os leads (resumo: só as colunas usadas nas métricas)
+            all_leads = await self.repository.list_summaries(limit=1000)
 
             # Filtrar por período
             leads_periodo = [
@@ -45,7 +45,7 @@ class AnalyticsService:
                 "temperatura": await self._calcular_temperatura(all_leads),
                 "tempo_medio": await self._calcular_tempo_medio(leads_periodo),
                 "motivos_perda": await self._calcular_motivos_perda(leads_periodo),
-                "timeline": await self._calcular_timeline(periodo_dias),
+                "timeline": await self._calcular_timeline(all_leads, periodo_dias),
                 "taxa_conversao": await self._calcular_taxa_conversao(leads_periodo),
             }
 
@@ -56,7 +56,7 @@ class AnalyticsService:
             logger.error(f"Erro ao calcular métricas do dashboard: {e}")
             return self._get_empty_metrics()
 
-    async def _calcular_resumo(self, all_leads: List[Lead], leads_periodo: List[Lead]) -> Dict[str, Any]:
+    async def _calcular_resumo(self, all_leads: List[LeadSummary], leads_periodo: List[LeadSummary]) -> Dict[str, Any]:
         """Calcula resumo geral de leads"""
         total_leads = len(all_leads)
         novos_periodo = len(leads_periodo)
@@ -94,7 +94,7 @@ class AnalyticsService:
             "crescimento_percentual": round(crescimento, 1),
         }
 
-    async def _calcular_funil(self, leads: List[Lead]) -> Dict[str, Any]:
+    async def _calcular_funil(self, leads: List[LeadSummary]) -> Dict[str, Any]:
         """Calcula métricas do funil de conversão"""
         total = len(leads)
         if total == 0:
@@ -118,7 +118,7 @@ class AnalyticsService:
 
         return status_count
 
-    async def _calcular_temperatura(self, leads: List[Lead]) -> Dict[str, Any]:
+    async def _calcular_temperatura(self, leads: List[LeadSummary]) -> Dict[str, Any]:
         """Calcula distribuição por temperatura"""
         total = len([l for l in leads if str(l.status) != LeadStatus.PERDIDO.value])
 
@@ -139,7 +139,7 @@ class AnalyticsService:
             "frio": {"count": frio, "percentual": round((frio / total) * 100, 1)},
         }
 
-    async def _calcular_tempo_medio(self, leads: List[Lead]) -> Dict[str, float]:
+    async def _calcular_tempo_medio(self, leads: List[LeadSummary]) -> Dict[str, float]:
         """Calcula tempo médio em cada estágio (em horas)"""
         # Por enquanto retorna valores estimados
         # TODO: Implementar tracking real de tempo por estágio
@@ -150,7 +150,7 @@ class AnalyticsService:
             "qualificado_para_agendamento": 24.0,  # 24h
         }
 
-    async def _calcular_motivos_perda(self, leads: List[Lead]) -> List[Dict[str, Any]]:
+    async def _calcular_motivos_perda(self, leads: List[LeadSummary]) -> List[Dict[str, Any]]:
         """Agrupa e conta motivos de perda"""
         leads_perdidos = [l for l in leads if str(l.status) == LeadStatus.PERDIDO.value]
 
@@ -193,9 +193,8 @@ class AnalyticsService:
 
         return resultado
 
-    async def _calcular_timeline(self, periodo_dias: int) -> List[Dict[str, Any]]:
+    async def _calcular_timeline(self, all_leads: List[LeadSummary], periodo_dias: int) -> List[Dict[str, Any]]:
         """Calcula evolução de leads ao longo do tempo"""
-        all_leads = await self.repository.list_all(limit=1000)
         data_inicio = datetime.now(timezone.utc) - timedelta(days=periodo_dias)
 
         # Agrupar por dia
@@ -227,7 +226,7 @@ class AnalyticsService:
 
         return resultado
 
-    async def _calcular_taxa_conversao(self, leads: List[Lead]) -> Dict[str, float]:
+    async def _calcular_taxa_conversao(self, leads: List[LeadSummary]) -> Dict[str, float]:
         """Calcula taxas de conversão entre etapas"""
         total = len(leads)
         if total == 0:
@@ -2,14 +2,15 @@
 Processador de agendamentos
 Extrai data/hora de mensagens naturais e valida
 """
-from langchain_anthropic import ChatAnthropic
+from functools import cached_property
 from pydantic import BaseModel, Field
 from datetime import datetime, timedelta
 from typing import Optional
 from loguru import logger
 from zoneinfo import ZoneInfo
 
-from app.config import settings
+from app.services.datetime_parser import parse_datetime
+from app.services.llm_gateway import get_chat_model
 
 # Timezone São Paulo
 SP_TZ = ZoneInfo('America/Sao_Paulo')
@@ -25,13 +26,10 @@ class ExtractedDateTime(BaseModel):
 class AppointmentProcessor:
     """Processa e valida agendamentos"""
 
-    def __init__(self):
-        self.llm = ChatAnthropic(
-            model=settings.claude_model,
-            temperature=0.1,
-            api_key=settings.anthropic_api_key,
-            max_tokens=512,
-        )
+    @cached_property
+    def llm(self):
+        """Modelo criado no primeiro uso (fora do import do app)"""
+        return get_chat_model(temperature=0.1, max_tokens=512, task="data_hora")
 
     async def extract_datetime_from_message(
         self,
@@ -41,6 +39,9 @@ class AppointmentProcessor:
         """
         Extrai data e hora de uma mensagem em linguagem natural
 
+        Tenta primeiro o parser local (datetime_parser); o LLM só é chamado
+        quando a mensagem é ambígua ("terça ou quarta", "depois das 15h").
+
         Args:
             message: Mensagem do lead (ex: "terça 14h", "amanhã às 10h")
             lead_timezone: Timezone do lead
@@ -52,6 +53,23 @@ class AppointmentProcessor:
             # Obter data/hora atual no timezone do lead
             now = datetime.now(ZoneInfo(lead_timezone))
 
+            # Parser local (microssegundos, sem LLM)
+            parsed = parse_datetime(message, now)
+            if not parsed.ambiguous:
+                if not parsed.found:
+                    logger.debug(f"Nenhuma data/hora na mensagem: {message[:50]}")
+                    return None
+
+                result = ExtractedDateTime(
+                    datetime=parsed.to_datetime(now),
+                    confidence=parsed.confidence,
+                    original_text=message
+                )
+                logger.debug(f"⚡ Data/hora resolvida localmente: {result.datetime.isoformat()}")
+                return self._validate_extracted(result, now, message)
+
+            logger.info(f"🤖 Data/hora ambígua ({parsed.reason}) - usando LLM: {message[:50]}")
+
             # Prompt para extração
             extraction_prompt = f"""Você é um assistente que extrai data e hora de mensagens.
 
@@ -83,30 +101,39 @@ Se não conseguir extrair data/hora com confiança >= 0.5, retorne None."""
             structured_llm = self.llm.with_structured_output(ExtractedDateTime)
 
             # Invocar LLM
-            result = structured_llm.invoke(extraction_prompt)
-
-            if result and result.confidence >= 0.5:
-                # Validar que é futuro
-                if result.datetime <= now:
-                    logger.warning(f"Data/hora extraída está no passado: {result.datetime}")
-                    return None
+            result = await structured_llm.ainvoke(extraction_prompt)
 
-                # Validar horário comercial (9h-18h)
-                if result.datetime.hour < 9 or result.datetime.hour >= 18:
-                    logger.warning(f"Horário fora do comercial: {result.datetime.hour}h")
-                    # Ajustar para 14h se fora do horário
-                    result.datetime = result.datetime.replace(hour=14, minute=0)
-
-                logger.success(f"✅ Data/hora extraída: {result.datetime.strftime('%d/%m/%Y %H:%M')} (confiança: {result.confidence:.0%})")
-                return result
-
-            logger.warning(f"Não consegui extrair data/hora com confiança suficiente da mensagem: {message}")
-            return None
+            return self._validate_extracted(result, now, message)
 
         except Exception as e:
             logger.error(f"❌ Erro ao extrair data/hora: {e}", exc_info=True)
             return None
 
+    def _validate_extracted(
+        self,
+        result: Optional[ExtractedDateTime],
+        now: datetime,
+        message: str
+    ) -> Optional[ExtractedDateTime]:
+        """Aplica as regras comuns (confiança, futuro, horário comercial) ao resultado extraído"""
+        if result and result.confidence >= 0.5:
+            # Validar que é futuro
+            if result.datetime <= now:
+                logger.warning(f"Data/hora extraída está no passado: {result.datetime}")
+                return None
+
+            # Validar horário comercial (9h-18h)
+            if result.datetime.hour < 9 or result.datetime.hour >= 18:
+                logger.warning(f"Horário fora do comercial: {result.datetime.hour}h")
+                # Ajustar para 14h se fora do horário
+                result.datetime = result.datetime.replace(hour=14, minute=0)
+
+            logger.success(f"✅ Data/hora extraída: {result.datetime.strftime('%d/%m/%Y %H:%M')} (confiança: {result.confidence:.0%})")
+            return result
+
+        logger.warning(f"Não consegui extrair data/hora com confiança suficiente da mensagem: {message}")
+        return None
+
     def is_valid_meeting_time(self, dt: datetime) -> tuple[bool, Optional[str]]:
         """
         Valida se o horário é adequado para reunião
@@ -1,71 +1,303 @@
 """
-Serviço de transcrição de áudio usando OpenAI Whisper
+Serviço de transcrição de áudio (OpenAI Whisper ou modelo local)
+
+Pipeline todo em memória: bytes do áudio → buffer (nome + bytes) enviado pelo
+cliente assíncrono da OpenAI (pool de conexões reaproveitado), sem arquivo
+temporário por mensagem.
+
+As transcrições passam por um pool de workers com fila limitada
+(TRANSCRIPTION_WORKERS / TRANSCRIPTION_QUEUE_SIZE): rajadas de áudios não abrem
+chamadas ilimitadas ao Whisper e, com a fila cheia, o áudio é recusado na hora
+(o webhook pede para o lead reenviar ou escrever).
+
+Motor (TRANSCRIPTION_ENGINE):
+- openai: Whisper API (whisper-1)
+- local:  faster-whisper na CPU (TRANSCRIPTION_LOCAL_MODEL) - testes/dev sem API
+
+Cache (TranscriptionCache): áudio encaminhado ou webhook reentregue tem os mesmos
+bytes → mesma transcrição. Chave = sha256 dos bytes; LRU em memória
+(TRANSCRIPTION_CACHE_MAX_ENTRIES) + tabela audio_transcriptions opcional
+(TRANSCRIPTION_CACHE_PERSIST, migration 011) que sobrevive a deploys.
 """
-import tempfile
-import os
 import asyncio
-from typing import Optional
-from openai import OpenAI
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, List, Optional
+
 from loguru import logger
 
 from app.config import settings
+from app.services.tracing import get_tracer
+
+
+class OpenAIWhisperEngine:
+    """Whisper API via cliente assíncrono (uma instância = um pool de conexões)"""
+
+    name = "openai"
+
+    @cached_property
+    def client(self):
+        """Cliente OpenAI criado no primeiro áudio (SDK fora do import do app)"""
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key=settings.openai_api_key)
+
+    async def transcribe(self, audio_data: bytes, audio_format: str) -> str:
+        # Tupla (nome, bytes): o SDK envia o buffer como upload multipart, sem tocar o disco.
+        # O nome só informa o formato ao Whisper.
+        # Não especificar language deixa o Whisper detectar automaticamente
+        transcript = await self.client.audio.transcriptions.create(
+            model="whisper-1",
+            file=(f"audio.{audio_format}", audio_data),
+            response_format="text"  # Retornar apenas texto
+        )
+        return transcript if isinstance(transcript, str) else transcript.text
+
+    async def close(self):
+        if "client" in self.__dict__:
+            await self.client.close()
+
+
+class LocalWhisperEngine:
+    """Modelo Whisper local (faster-whisper, CPU) - substituto da API para testes"""
+
+    name = "local"
+
+    def __init__(self, model_size: str):
+        self.model_size = model_size
+
+    @cached_property
+    def model(self):
+        """Modelo carregado no primeiro áudio (requer faster-whisper)"""
+        from faster_whisper import WhisperModel
+        logger.info(f"🎤 Carregando modelo local de transcrição ({self.model_size})...")
+        return WhisperModel(self.model_size, device="cpu", compute_type="int8")
+
+    async def transcribe(self, audio_data: bytes, audio_format: str) -> str:
+        def _transcribe():
+            # faster-whisper aceita file-like: decodifica o OGG/Opus direto do buffer
+            segments, _info = self.model.transcribe(io.BytesIO(audio_data))
+            return " ".join(segment.text.strip() for segment in segments)
+
+        # Inferência é CPU-bound: fora do event loop
+        return await asyncio.to_thread(_transcribe)
+
+    async def close(self):
+        pass
+
+
+class TranscriptionCache:
+    """
+    Cache de transcrições por hash do áudio (LRU em memória + tabela opcional)
+
+    Uso:
+        key = TranscriptionCache.key(audio_data)
+        text = await cache.get(key)
+        ...
+        await cache.put(key, text, len(audio_data), engine)
+    """
+
+    TABLE = "audio_transcriptions"
+
+    def __init__(self, max_entries: int = 1000, persist: bool = False):
+        self.max_entries = max(1, max_entries)
+        self.persist = persist
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "stores": 0}
+
+    @staticmethod
+    def key(audio_data: bytes) -> str:
+        return hashlib.sha256(audio_data).hexdigest()
+
+    def _count(self, field_name: str):
+        with self._lock:
+            self._stats[field_name] += 1
+
+    def _remember(self, key: str, text: str):
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        """Transcrição já conhecida para o áudio (memória → tabela) ou None"""
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+                self._stats["memory_hits"] += 1
+
+        if text is None and self.persist:
+            text = await asyncio.to_thread(self._load, key)
+            if text is not None:
+                self._remember(key, text)
+                self._count("persistent_hits")
+
+        if text is None:
+            self._count("misses")
+
+        get_tracer().record_cache("transcription", text is not None)
+        return text
+
+    async def put(self, key: str, text: str, audio_size: int, engine: str):
+        """Guarda transcrição (memória e, se habilitado, tabela)"""
+        self._remember(key, text)
+        self._count("stores")
+        if self.persist:
+            await asyncio.to_thread(self._store, key, text, audio_size, engine)
+
+    def _load(self, key: str) -> Optional[str]:
+        try:
+            from app.database import get_supabase
+            response = (
+                get_supabase().table(self.TABLE)
+                .select("transcription")
+                .eq("audio_hash", key)
+                .limit(1)
+                .execute()
+            )
+            return response.data[0]["transcription"] if response.data else None
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao ler cache de transcrição: {e}")
+            return None
+
+    def _store(self, key: str, text: str, audio_size: int, engine: str):
+        try:
+            from app.database import get_supabase
+            get_supabase().table(self.TABLE).upsert({
+                "audio_hash": key,
+                "transcription": text,
+                "audio_bytes": audio_size,
+                "engine": engine,
+            }).execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao salvar cache de transcrição: {e}")
+
+    def get_stats(self) -> dict:
+        """
+        Retorna estatísticas do cache
+
+        Returns:
+            Dict com entries, hit_ratio e contadores (memória, tabela, misses)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+
+        hits = stats["memory_hits"] + stats["persistent_hits"]
+        lookups = hits + stats["misses"]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "persist": self.persist,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            **stats,
+        }
+
+
+@dataclass
+class _TranscriptionJob:
+    audio_data: bytes
+    audio_format: str
+    future: asyncio.Future = field(repr=False)
 
 
 class AudioTranscriptionService:
-    """Serviço para transcrever áudios usando Whisper API"""
+    """Serviço para transcrever áudios (fila limitada + pool de workers)"""
+
+    def __init__(self, workers: int = 2, queue_size: int = 20, cache: Optional[TranscriptionCache] = None):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.cache = cache
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._inflight: Dict[str, asyncio.Future] = {}  # hash → transcrição em andamento
+        self._rejected = 0
+        self._coalesced = 0
+
+    @cached_property
+    def engine(self):
+        """Motor de transcrição conforme TRANSCRIPTION_ENGINE (atribuível em testes)"""
+        if settings.transcription_engine == "local":
+            return LocalWhisperEngine(settings.transcription_local_model)
+        return OpenAIWhisperEngine()
+
+    def _ensure_workers(self):
+        """Cria fila e workers no event loop atual (no primeiro áudio)"""
+        if self._tasks and not all(task.done() for task in self._tasks):
+            return
+
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [
+            loop.create_task(self._worker(), name=f"transcription-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(
+            f"🎤 Pool de transcrição iniciado ({self.workers} workers, fila={self.queue_size}, "
+            f"motor={self.engine.name})"
+        )
 
-    def __init__(self):
-        self.client = OpenAI(api_key=settings.openai_api_key)
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.future.cancelled():
+                    continue
+                text = await self.engine.transcribe(job.audio_data, job.audio_format)
+                if not job.future.done():
+                    job.future.set_result(text)
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                self._queue.task_done()
 
     async def transcribe_audio(self, audio_data: bytes, audio_format: str = "ogg") -> Optional[str]:
         """
-        Transcreve áudio usando Whisper API
+        Transcreve áudio (cache por hash dos bytes → pool de workers)
 
         Args:
             audio_data: Bytes do arquivo de áudio
             audio_format: Formato do áudio (ogg, mp3, wav, etc)
 
         Returns:
-            Texto transcrito ou None em caso de erro
+            Texto transcrito ou None em caso de erro (ou fila cheia)
         """
         try:
             logger.info(f"🎤 Transcrevendo áudio ({len(audio_data)} bytes, formato original: {audio_format})")
 
-            # WhatsApp usa Opus dentro de OGG, mas Whisper prefere MP3/M4A/WAV
-            # Vamos tentar primeiro como está e deixar o Whisper lidar com o formato
-            # Se falhar, podemos adicionar conversão depois
+            key = TranscriptionCache.key(audio_data)
+            if self.cache:
+                cached_text = await self.cache.get(key)
+                if cached_text:
+                    logger.info(f"🗄️ Transcrição em cache ({key[:12]}): {cached_text[:100]}...")
+                    return cached_text
 
-            # Criar arquivo temporário com o formato original
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{audio_format}") as tmp_file:
-                tmp_file.write(audio_data)
-                tmp_file_path = tmp_file.name
+            # Mesmo áudio já sendo transcrito (webhook reentregue): aguardar o resultado dele
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                self._coalesced += 1
+                return await asyncio.shield(inflight)
 
+            future = asyncio.get_running_loop().create_future()
+            self._inflight[key] = future
+            text = None
             try:
-                # Transcrever com Whisper (executar em thread separada para não bloquear)
-                def _transcribe():
-                    with open(tmp_file_path, "rb") as audio_file:
-                        # Não especificar language deixa o Whisper detectar automaticamente
-                        # Isso pode funcionar melhor para áudios com ruído ou qualidade baixa
-                        transcript = self.client.audio.transcriptions.create(
-                            model="whisper-1",
-                            file=audio_file,
-                            response_format="text"  # Retornar apenas texto
-                        )
-                    return transcript if isinstance(transcript, str) else transcript.text
-
-                transcribed_text = await asyncio.to_thread(_transcribe)
-
-                if transcribed_text and transcribed_text.strip():
-                    logger.success(f"✅ Áudio transcrito ({len(transcribed_text)} chars): {transcribed_text[:100]}...")
-                    return transcribed_text.strip()
-                else:
-                    logger.warning("⚠️ Whisper retornou texto vazio")
-                    return None
-
+                text = await self._transcribe_in_pool(audio_data, audio_format)
             finally:
-                # Limpar arquivo temporário
-                if os.path.exists(tmp_file_path):
-                    os.unlink(tmp_file_path)
+                # Duplicados recebem o mesmo resultado (None se esta transcrição falhou)
+                self._inflight.pop(key, None)
+                future.set_result(text)
+
+            if text and self.cache:
+                await self.cache.put(key, text, len(audio_data), self.engine.name)
+            return text
 
         except Exception as e:
             logger.error(f"❌ Erro ao transcrever áudio: {str(e)}")
@@ -74,6 +306,62 @@ class AudioTranscriptionService:
             logger.debug(f"Stack trace: {traceback.format_exc()}")
             return None
 
+    async def _transcribe_in_pool(self, audio_data: bytes, audio_format: str) -> Optional[str]:
+        """Enfileira o áudio para os workers e aguarda o texto (None se fila cheia/vazio)"""
+        self._ensure_workers()
+        job = _TranscriptionJob(audio_data, audio_format, asyncio.get_running_loop().create_future())
+
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._rejected += 1
+            logger.warning(f"⚠️ Fila de transcrição cheia ({self.queue_size}) - áudio recusado")
+            return None
+
+        transcribed_text = await job.future
+
+        if transcribed_text and transcribed_text.strip():
+            logger.success(f"✅ Áudio transcrito ({len(transcribed_text)} chars): {transcribed_text[:100]}...")
+            return transcribed_text.strip()
+
+        logger.warning("⚠️ Whisper retornou texto vazio")
+        return None
+
+    def get_stats(self) -> dict:
+        """
+        Retorna ocupação do pool de transcrição
+
+        Returns:
+            Dict com motor, workers, fila atual, áudios recusados por fila cheia,
+            duplicados aguardando a mesma transcrição e estatísticas do cache
+        """
+        return {
+            "engine": self.engine.name,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "rejected": self._rejected,
+            "coalesced": self._coalesced,
+            "cache": self.cache.get_stats() if self.cache else {"enabled": False},
+        }
+
+    async def stop(self):
+        """Cancela os workers e fecha o cliente do motor (shutdown do app)"""
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if "engine" in self.__dict__:
+            await self.engine.close()
+
 
 # Instância global
-audio_transcription_service = AudioTranscriptionService()
+audio_transcription_service = AudioTranscriptionService(
+    workers=settings.transcription_workers,
+    queue_size=settings.transcription_queue_size,
+    cache=TranscriptionCache(
+        max_entries=settings.transcription_cache_max_entries,
+        persist=settings.transcription_cache_persist,
+    ) if settings.transcription_cache_enabled else None,
+)
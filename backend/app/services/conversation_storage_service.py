@@ -2,6 +2,7 @@
 Serviço para armazenar conversas no Supabase
 Mantém histórico completo e persistente de todas as interações
 """
+from functools import cached_property
 from typing import List, Dict, Optional, Any
 from loguru import logger
 from app.database import get_supabase
@@ -10,8 +11,10 @@ from app.database import get_supabase
 class ConversationStorageService:
     """Gerencia armazenamento de conversas no Supabase"""
 
-    def __init__(self):
-        self.supabase = get_supabase()
+    @cached_property
+    def supabase(self):
+        """Cliente Supabase obtido no primeiro acesso (instanciar o repository não conecta)"""
+        return get_supabase()
 
     async def get_or_create_conversation(self, phone: str, lead_id: int) -> int:
         """
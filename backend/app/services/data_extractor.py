@@ -2,13 +2,13 @@
 Serviço de Extração de Dados de Qualificação
 Usa GPT-4 para extrair dados estruturados do histórico de conversa
 """
+from functools import cached_property
 from typing import Optional
-from langchain_anthropic import ChatAnthropic
 from langchain_core.messages import SystemMessage, HumanMessage
 from pydantic import BaseModel, Field
 from loguru import logger
 
-from app.config import settings
+from app.services.llm_gateway import get_chat_model
 from app.models.lead import Lead, QualificationData
 
 
@@ -41,13 +41,10 @@ class ExtractedData(BaseModel):
 class DataExtractor:
     """Extrator de dados de qualificação usando LLM"""
 
-    def __init__(self):
-        self.llm = ChatAnthropic(
-            model=settings.claude_model,
-            temperature=0.1,
-            api_key=settings.anthropic_api_key,
-            max_tokens=1024,
-        )
+    @cached_property
+    def llm(self):
+        """Modelo criado no primeiro uso (fora do import do app)"""
+        return get_chat_model(temperature=0.1, max_tokens=1024, task="extracao")
 
     def extract_qualification_data(self, lead: Lead) -> Optional[ExtractedData]:
         """
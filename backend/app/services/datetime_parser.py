@@ -0,0 +1,380 @@
+"""
+Parser local (sem LLM) de data/hora em português do Brasil para agendamento
+
+Entende as expressões que os leads usam ao escolher horário:
+- Dia relativo: "hoje", "amanhã", "depois de amanhã"
+- Dia da semana: "terça", "quinta-feira", "sex", "segunda que vem", "próxima semana na quarta"
+- Data absoluta: "15/03", "15/03/2026", "dia 15", "15 de março"
+- Hora: "14h", "14h30", "14:30", "às 10", "10 horas", "10 e meia", "meio-dia", "2 da tarde"
+- Período: "de manhã", "à tarde", "à noite", "fim da tarde", "cedo"
+
+Resolve em microssegundos contra os horários oferecidos (match_slot). Quando a mensagem
+é ambígua ("terça ou quarta", "depois das 15h", "semana que vem") o resultado vem com
+ambiguous=True e quem chama decide se cai no LLM.
+"""
+import re
+from datetime import date, datetime, timedelta
+from typing import List, NamedTuple, Optional, Tuple
+
+from app.services.intent_detector import WEEKDAYS, normalize_text
+
+
+# Horário padrão quando só o dia foi informado (mesma regra do prompt do AppointmentProcessor)
+DEFAULT_HOUR = 14
+
+# Hora representativa e faixa [início, fim) de cada período do dia
+PERIODS = {
+    "manha": (10, (6, 12)),
+    "almoco": (12, (11, 14)),
+    "tarde": (14, (12, 18)),
+    "fim_da_tarde": (17, (16, 19)),
+    "noite": (19, (18, 23)),
+}
+
+MONTHS = {
+    "janeiro": 1, "fevereiro": 2, "marco": 3, "abril": 4, "maio": 5, "junho": 6,
+    "julho": 7, "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+
+# Saudações citam período mas não escolhem horário ("boa tarde, pode ser terça?")
+_SAUDACOES = re.compile(r"\b(?:bom dia|boa tarde|boa noite)\b")
+
+# ----------------
+# DIA
+# ----------------
+
+_DIA_RELATIVO = re.compile(r"\b(depois de amanha|amanha|hoje)\b")
+_DIA_RELATIVO_OFFSET = {"hoje": 0, "amanha": 1, "depois de amanha": 2}
+
+# Abreviações ("ter", "qua", "sex") só valem coladas em hora ("ter 14h", "ter às 10"),
+# "feira" ou fim da frase: "vou ter que ver" e "vou ter 3 reuniões" não são terça
+_WEEKDAY_ABREVIADO = {k for k in WEEKDAYS if len(k) == 3}
+_WEEKDAY = re.compile(
+    r"\b(?:(" + "|".join(sorted(set(WEEKDAYS) - _WEEKDAY_ABREVIADO, key=len, reverse=True)) + r")"
+    r"|(" + "|".join(sorted(_WEEKDAY_ABREVIADO)) + r")(?=[\s,.-]*(?:as\s+\d|\d{1,2}\s*(?:h|hs|hrs?|:\d{2})\b)|[\s-]*feira\b|[\s?!.]*$))"
+    r"(?:[\s-]?feira)?\b"
+)
+_SEMANA_QUE_VEM = re.compile(r"\b(?:semana que vem|proxima semana|semana seguinte)\b")
+_DIA_QUE_VEM = re.compile(
+    r"\b(?:" + "|".join(sorted(WEEKDAYS, key=len, reverse=True)) + r")(?:[\s-]?feira)?\s+(?:que vem|da semana que vem)\b"
+)
+
+_DATA_BARRA = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2}|\d{4}))?\b")
+_DATA_EXTENSO = re.compile(r"\b(\d{1,2})\s+de\s+(" + "|".join(MONTHS) + r")\b")
+_DIA_DO_MES = re.compile(r"\bdia\s+(\d{1,2})\b")
+
+# ----------------
+# HORA
+# ----------------
+
+_MEIO_DIA = re.compile(r"\bmeio[\s-]dia(?:\s+e\s+meia)?\b")
+_HORA_MINUTO = re.compile(r"\b(\d{1,2})\s*(?:h|:)\s*(\d{2})(?:h|hs)?\b")
+_HORA_PERIODO = re.compile(r"\b(\d{1,2})\s+(?:da|de)\s+(?=manha|tarde|noite)")
+_HORA_E_MEIA = re.compile(r"\b(\d{1,2})\s*(?:h|hs|horas?)?\s+e\s+meia\b")
+_HORA_SUFIXO = re.compile(r"\b(\d{1,2})\s*(?:h|hs|hrs?|horas?)\b")
+_HORA_PREPOSICAO = re.compile(r"\b(?:as|a|das|umas|pelas|para as|pras)\s+(\d{1,2})\b")
+
+_PERIODO = re.compile(
+    r"\b(fim da tarde|final da tarde|fim de tarde|inicio da tarde|comeco da tarde|"
+    r"hora do almoco|almoco|manha|tarde|noite|cedo)\b"
+)
+_PERIODO_CANONICO = {
+    "fim da tarde": "fim_da_tarde", "final da tarde": "fim_da_tarde", "fim de tarde": "fim_da_tarde",
+    "inicio da tarde": "tarde", "comeco da tarde": "tarde",
+    "hora do almoco": "almoco", "almoco": "almoco",
+    "manha": "manha", "cedo": "manha", "tarde": "tarde", "noite": "noite",
+}
+
+# Expressões temporais que o parser não resolve sozinho → LLM decide
+_NEGACAO = re.compile(r"\b(?:nao|nem|impossivel)\b")
+_INTERVALO = re.compile(r"\b(?:depois|antes|a partir|apos|entre|ate)\s+(?:d?as|de|o|a)?\s*\d")
+_VAGO = re.compile(
+    r"\b(?:mes que vem|proximo mes|fim de semana|final de semana|qualquer dia|"
+    r"qualquer horario|essa semana|esta semana|nessa semana|outro dia)\b"
+)
+
+
+class ParsedDateTime(NamedTuple):
+    """Resultado do parser (datas no calendário do 'now' usado no parse)"""
+    date: Optional[date]                  # Dia resolvido (None se não mencionado)
+    weekday: Optional[int]                # Dia da semana citado (0=segunda), p/ casar com slots
+    time: Optional[Tuple[int, int]]       # (hora, minuto) explícitos
+    period: Optional[str]                 # manha/almoco/tarde/fim_da_tarde/noite
+    ambiguous: bool                       # True → cair no LLM
+    reason: Optional[str] = None          # Motivo da ambiguidade (debug/log)
+    inferred_pm: bool = False             # "às 2" → 14h (horário comercial)
+
+    @property
+    def found(self) -> bool:
+        return self.date is not None or self.time is not None or self.period is not None
+
+    @property
+    def confidence(self) -> float:
+        """Confiança na mesma escala dos exemplos do prompt de extração"""
+        if not self.found or self.ambiguous:
+            return 0.0
+        if self.date is not None and self.time is not None:
+            score = 0.95
+        elif self.date is not None and self.period is not None:
+            score = 0.8
+        elif self.date is not None:
+            score = 0.7
+        else:
+            score = 0.6
+        return round(score - (0.1 if self.inferred_pm else 0.0), 2)
+
+    def resolved_time(self) -> Tuple[int, int]:
+        if self.time is not None:
+            return self.time
+        if self.period is not None:
+            return PERIODS[self.period][0], 0
+        return DEFAULT_HOUR, 0
+
+    def to_datetime(self, now: datetime) -> Optional[datetime]:
+        """
+        Converte para datetime no timezone de 'now'
+
+        Sem dia → próximo dia útil; sem hora → hora do período ou 14h.
+        """
+        if not self.found:
+            return None
+        target_date = self.date or next_business_day(now.date())
+        hour, minute = self.resolved_time()
+        return datetime.combine(target_date, datetime.min.time(), tzinfo=now.tzinfo).replace(
+            hour=hour, minute=minute
+        )
+
+
+def next_business_day(day: date) -> date:
+    """Próximo dia útil (seg-sex) depois de 'day'"""
+    day += timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _blank(text: str, match: re.Match) -> str:
+    """Apaga o trecho casado mantendo as posições (evita '15/03' virar hora 15)"""
+    return text[:match.start()] + " " * (match.end() - match.start()) + text[match.end():]
+
+
+def _parse_date(text: str, today: date):
+    """
+    Returns:
+        (date, weekday, texto_sem_datas, motivo_ambiguidade)
+    """
+    candidates = []  # (date, weekday, veio_de_dia_da_semana)
+
+    for match in _DATA_BARRA.finditer(text):
+        day, month = int(match.group(1)), int(match.group(2))
+        year = match.group(3)
+        if year:
+            year = int(year) + (2000 if len(year) == 2 else 0)
+            parsed = _safe_date(year, month, day)
+        else:
+            parsed = _safe_date(today.year, month, day)
+            if parsed and parsed < today:
+                parsed = _safe_date(today.year + 1, month, day)
+        if parsed is None:
+            return None, None, text, "data_invalida"
+        candidates.append((parsed, None, False))
+        text = _blank(text, match)
+
+    for match in _DATA_EXTENSO.finditer(text):
+        day, month = int(match.group(1)), MONTHS[match.group(2)]
+        parsed = _safe_date(today.year, month, day)
+        if parsed and parsed < today:
+            parsed = _safe_date(today.year + 1, month, day)
+        if parsed is None:
+            return None, None, text, "data_invalida"
+        candidates.append((parsed, None, False))
+        text = _blank(text, match)
+
+    for match in _DIA_DO_MES.finditer(text):
+        day = int(match.group(1))
+        parsed = _safe_date(today.year, today.month, day)
+        if parsed and parsed < today:
+            next_month = today.replace(day=1) + timedelta(days=32)
+            parsed = _safe_date(next_month.year, next_month.month, day)
+        if parsed is None:
+            return None, None, text, "data_invalida"
+        candidates.append((parsed, None, False))
+        text = _blank(text, match)
+
+    for match in _DIA_RELATIVO.finditer(text):
+        candidates.append((today + timedelta(days=_DIA_RELATIVO_OFFSET[match.group(1)]), None, False))
+        text = _blank(text, match)
+
+    next_week = bool(_SEMANA_QUE_VEM.search(text) or _DIA_QUE_VEM.search(text))
+    for match in _WEEKDAY.finditer(text):
+        weekday = WEEKDAYS[match.group(1) or match.group(2)]
+        days_ahead = (weekday - today.weekday()) % 7 or 7  # Mesmo dia → próxima semana
+        target = today + timedelta(days=days_ahead)
+        if next_week and target.isocalendar()[1] == today.isocalendar()[1]:
+            target += timedelta(days=7)
+        candidates.append((target, None if next_week else weekday, True))
+        text = _blank(text, match)
+
+    if not candidates:
+        return None, None, text, "semana_sem_dia" if next_week else None
+
+    # "terça dia 15" é um dia só; "terça ou quarta" não
+    if len({d for d, _, _ in candidates}) > 1:
+        explicit = {d for d, _, from_weekday in candidates if not from_weekday}
+        weekdays = {d.weekday() for d, _, from_weekday in candidates if from_weekday}
+        if len(explicit) != 1 or weekdays - {next(iter(explicit)).weekday()}:
+            return None, None, text, "multiplos_dias"
+        only = explicit.pop()
+        return only, None, text, None
+
+    chosen, weekday, _ = candidates[0]
+    return chosen, weekday, text, None
+
+
+def _parse_time(text: str):
+    """
+    Returns:
+        (time, period, inferred_pm, motivo_ambiguidade)
+    """
+    text = _SAUDACOES.sub(" ", text)
+
+    periods = {_PERIODO_CANONICO[m.group(1)] for m in _PERIODO.finditer(text)}
+    period = None
+    if len(periods) == 1:
+        period = periods.pop()
+    elif len(periods) > 1:
+        # "sexta de manhã ou à tarde"
+        return None, None, False, "multiplos_periodos"
+
+    if _INTERVALO.search(text):
+        return None, period, False, "intervalo"
+
+    times = []  # (hora, minuto, explícito_24h)
+    for pattern, has_minute in (
+        (_MEIO_DIA, None),
+        (_HORA_MINUTO, True),
+        (_HORA_E_MEIA, False),
+        (_HORA_SUFIXO, False),
+        (_HORA_PERIODO, False),
+        (_HORA_PREPOSICAO, False),
+    ):
+        for match in pattern.finditer(text):
+            if pattern is _MEIO_DIA:
+                minute = 30 if match.group(0).endswith("meia") else 0
+                times.append((12, minute, True))
+            elif pattern is _HORA_E_MEIA:
+                times.append((int(match.group(1)), 30, False))
+            else:
+                minute = int(match.group(2)) if has_minute else 0
+                times.append((int(match.group(1)), minute, False))
+            text = _blank(text, match)
+
+    if not times:
+        return None, period, False, None
+
+    distinct = {(h, m) for h, m, _ in times}
+    if len(distinct) > 1:
+        return None, period, False, "multiplos_horarios"
+
+    hour, minute, explicit = times[0]
+    if hour > 23 or minute > 59:
+        return None, period, False, "hora_invalida"
+
+    inferred_pm = False
+    if not explicit and hour < 12:
+        if period in ("tarde", "fim_da_tarde", "noite"):
+            hour += 12
+        elif period is None and 1 <= hour <= 7:
+            # "às 2" em conversa comercial é 14h
+            hour += 12
+            inferred_pm = True
+
+    return (hour, minute), period, inferred_pm, None
+
+
+def parse_datetime(message: str, now: datetime) -> ParsedDateTime:
+    """
+    Interpreta data/hora mencionadas na mensagem
+
+    Args:
+        message: Mensagem do lead (ex: "terça às 14h", "amanhã de manhã")
+        now: Data/hora atual (com timezone) para resolver expressões relativas
+
+    Returns:
+        ParsedDateTime (found=False se não há data/hora; ambiguous=True → usar LLM)
+    """
+    text = normalize_text(message)
+    if not text:
+        return ParsedDateTime(None, None, None, None, False)
+
+    day, weekday, text, reason = _parse_date(text, now.date())
+    time, period, inferred_pm, time_reason = _parse_time(text)
+    reason = reason or time_reason
+
+    if reason is None and _VAGO.search(text) and day is None:
+        reason = "vago"
+    if reason is None and (day is not None or time is not None) and _NEGACAO.search(text):
+        reason = "negacao"  # "terça não posso, quarta 10h"
+
+    return ParsedDateTime(
+        date=day,
+        weekday=weekday,
+        time=time,
+        period=period,
+        ambiguous=reason is not None,
+        reason=reason,
+        inferred_pm=inferred_pm,
+    )
+
+
+def _slot_start(slot: dict) -> datetime:
+    start = slot["start"]
+    return datetime.fromisoformat(start) if isinstance(start, str) else start
+
+
+def match_slot(parsed: ParsedDateTime, available_slots: List[dict]) -> Optional[dict]:
+    """
+    Encontra o horário oferecido que corresponde ao que o lead escolheu
+
+    Args:
+        parsed: Resultado de parse_datetime
+        available_slots: Slots oferecidos ({"start": datetime|iso, "end", "display"})
+
+    Returns:
+        Slot escolhido ou None se não houver correspondência única
+    """
+    if not parsed.found or parsed.ambiguous or not available_slots:
+        return None
+
+    candidates = []
+    for slot in available_slots:
+        start = _slot_start(slot)
+        if parsed.weekday is not None:
+            # Dia da semana casa com o slot oferecido mesmo se for hoje
+            if start.weekday() != parsed.weekday:
+                continue
+        elif parsed.date is not None and start.date() != parsed.date:
+            continue
+
+        if parsed.time is not None:
+            if (start.hour, start.minute) != parsed.time:
+                continue
+        elif parsed.period is not None:
+            begin, end = PERIODS[parsed.period][1]
+            if not begin <= start.hour < end:
+                continue
+        candidates.append((start, slot))
+
+    if not candidates:
+        return None
+    if len(candidates) == 1 or parsed.time is not None:
+        # Mesmo horário em semanas diferentes → o mais próximo
+        return min(candidates, key=lambda c: c[0])[1]
+    return None
@@ -2,28 +2,356 @@
 Serviço de pesquisa de empresas para o SDR Smith.
 Usa website_research_service para scraping + Gemini 2.0 Flash para gerar insights.
 Roda em background sem bloquear o fluxo principal.
+
+Insights ficam no InsightCache, por domínio do site (dois leads da mesma empresa
+compartilham a pesquisa): TTL (INSIGHT_CACHE_TTL_HOURS), LRU em memória
+(INSIGHT_CACHE_MAX_ENTRIES) e tabela empresa_insights opcional
+(INSIGHT_CACHE_PERSIST, migration 012). Pesquisas simultâneas do mesmo domínio
+viram uma só (single-flight).
+
+As pesquisas em background são disparadas pela fila de research_queue.
 """
 
 import asyncio
-from datetime import datetime, timedelta
-from typing import Optional, Dict
+import concurrent.futures
+import threading
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional, Dict
+from urllib.parse import parse_qs, urlparse
 from loguru import logger
 
 from app.config import settings
 from app.services.website_research_service import WebsiteResearchService
+from app.services.tracing import get_tracer, traced
+
+
+# Hosts compartilhados por vários negócios (redes sociais, link na bio, Google Sites):
+# a chave é host + segmentos do caminho que identificam o perfil/página
+# ("instagram.com/padaria_ze", "sites.google.com/view/oficina_x"). Sem esses segmentos
+# não há chave - nada é cacheado nem deduplicado.
+SHARED_HOSTS = {
+    "instagram.com": 1,
+    "facebook.com": 1,
+    "fb.com": 1,
+    "tiktok.com": 1,
+    "twitter.com": 1,
+    "x.com": 1,
+    "youtube.com": 1,
+    "linkedin.com": 2,  # /company/<nome>, /in/<nome>
+    "wa.me": 1,
+    "linktr.ee": 1,
+    "linkin.bio": 1,
+    "beacons.ai": 1,
+    "bio.link": 1,
+    "sites.google.com": 2,  # /view/<site>
+    "g.page": 1,
+}
+
+# Construtores de site em que o subdomínio é o site ("padaria.blogspot.com",
+# "loja.wixsite.com/site"): a chave é o host completo; o host puro não tem chave.
+SUBDOMAIN_HOSTS = ("blogspot.com", "wordpress.com", "wixsite.com", "carrd.co")
+
+# Hosts que não são o site de um negócio (e-mail gratuito, encurtadores, mapas,
+# WhatsApp): sem chave - "joao@gmail.com" ou um link do Maps não viram insight
+# compartilhado por todos os leads que os mandam
+GENERIC_HOSTS = (
+    "gmail.com", "googlemail.com", "hotmail.com", "hotmail.com.br", "outlook.com",
+    "outlook.com.br", "live.com", "msn.com", "yahoo.com", "yahoo.com.br", "icloud.com",
+    "me.com", "uol.com.br", "bol.com.br", "terra.com.br", "ig.com.br", "globo.com",
+    "globomail.com", "protonmail.com", "proton.me", "zoho.com",
+    "bit.ly", "goo.gl", "tinyurl.com", "t.co", "cutt.ly", "rebrand.ly", "ow.ly", "is.gd",
+    "encurtador.com.br", "shorturl.at", "abre.ai",
+    "google.com", "google.com.br", "waze.com",
+    "whatsapp.com", "wa.link",
+)
+
+# Primeiro segmento que não identifica um perfil (post, vídeo, grupo...): sem chave
+NON_PROFILE_SEGMENTS = {
+    "p", "reel", "reels", "tv", "stories", "explore", "watch", "shorts", "embed",
+    "pages", "groups", "events", "share", "sharer", "hashtag", "search", "photo",
+    "photos", "video", "videos", "permalink.php", "story.php", "i",
+}
+
+# Segmentos seguidos do id do perfil ("youtube.com/channel/<id>"): chave com um segmento a mais
+PROFILE_PREFIX_SEGMENTS = {"channel", "c", "user"}
+
+# Perfis identificados por query string ("facebook.com/profile.php?id=<id>")
+PROFILE_QUERY_PATHS = {"profile.php": "id"}
+
+
+def _shared_host(host: str) -> Optional[str]:
+    for shared in SHARED_HOSTS:
+        if host == shared or host.endswith("." + shared):
+            return shared
+    return None
+
+
+def _subdomain_host(host: str) -> Optional[str]:
+    for shared in SUBDOMAIN_HOSTS:
+        if host == shared or host.endswith("." + shared):
+            return shared
+    return None
+
+
+def _generic_host(host: str) -> bool:
+    return any(host == generic or host.endswith("." + generic) for generic in GENERIC_HOSTS)
+
+
+class InsightCache:
+    """
+    Cache de insights de empresa por domínio (TTL + LRU em memória + tabela opcional)
+
+    Thread-safe: nodes síncronos do grafo consultam o cache a partir de outras threads.
+
+    Uso:
+        domain = InsightCache.domain(url)
+        entry = cache.get(domain)  # {"insight", "full_analysis", "empresa", "url", "timestamp"}
+        ...
+        cache.put(domain, insight, empresa=..., url=url)
+    """
+
+    TABLE = "empresa_insights"
+
+    def __init__(self, ttl_hours: int = 24, max_entries: int = 2000, persist: bool = False):
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_entries = max(1, max_entries)
+        self.persist = persist
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        # lead_id -> domínio pesquisado (lead que mandou a URL antes do site_url ser salvo)
+        self._lead_domains: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "persistent_hits": 0, "misses": 0, "expired": 0, "stores": 0}
+
+    @staticmethod
+    def domain(url: Optional[str]) -> Optional[str]:
+        """
+        Chave de cache da URL: domínio normalizado ("https://www.Empresa.com.br/x" -> "empresa.com.br")
+
+        Em hosts compartilhados (SHARED_HOSTS) inclui o perfil/página
+        ("https://www.instagram.com/Padaria_Ze/" -> "instagram.com/padaria_ze") e
+        retorna None se a URL não identifica um negócio ("instagram.com",
+        "instagram.com/p/<post>", "facebook.com/profile.php" sem id) ou é de um host
+        genérico (GENERIC_HOSTS: "gmail.com", "bit.ly", "google.com"). Em construtores
+        de site (SUBDOMAIN_HOSTS) a chave é o host completo ("padaria.blogspot.com").
+        """
+        if not url:
+            return None
+        url = url.strip()
+        if "://" not in url:
+            url = f"https://{url}"
+        try:
+            parsed = urlparse(url)
+            host = parsed.hostname
+        except ValueError:
+            return None
+        if not host or "." not in host:
+            return None
+        host = host.rstrip(".")
+        for prefix in ("www.", "m."):
+            if host.startswith(prefix) and "." in host[len(prefix):]:
+                host = host[len(prefix):]
+                break
+
+        site_builder = _subdomain_host(host)
+        if site_builder is not None:
+            return host if host != site_builder else None
+
+        shared = _shared_host(host)
+        if shared is None:
+            return None if _generic_host(host) else host
+
+        segments = [s for s in parsed.path.lower().split("/") if s]
+        if not segments or segments[0] in NON_PROFILE_SEGMENTS:
+            return None
+        if segments[0] in PROFILE_QUERY_PATHS:
+            param = PROFILE_QUERY_PATHS[segments[0]]
+            values = parse_qs(parsed.query).get(param)
+            if not values or not values[0].strip():
+                return None
+            return f"{host}/{segments[0]}?{param}={values[0].strip()}"
+
+        depth = SHARED_HOSTS[shared]
+        if depth == 1 and segments[0] in PROFILE_PREFIX_SEGMENTS:
+            depth = 2
+        if len(segments) < depth:
+            return None
+        return "/".join([host] + segments[:depth])
+
+    @staticmethod
+    def lead_key(lead_id) -> str:
+        """Chave de dado de um lead só (plano endereçado ao lead): lead:<id>"""
+        return f"lead:{lead_id}"
+
+    @staticmethod
+    def name_key(empresa: Optional[str]) -> Optional[str]:
+        """Chave para insight só pelo nome da empresa ("Acme Ltda." -> "nome:acme ltda.")"""
+        if not empresa or not empresa.strip():
+            return None
+        normalized = unicodedata.normalize("NFKD", empresa.lower())
+        folded = "".join(c for c in normalized if not unicodedata.combining(c))
+        return "nome:" + " ".join(folded.split())
+
+    def _count(self, field_name: str):
+        with self._lock:
+            self._stats[field_name] += 1
+
+    def _remember(self, domain: str, entry: dict):
+        with self._lock:
+            self._entries[domain] = entry
+            self._entries.move_to_end(domain)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def link_lead(self, lead_id, domain: str):
+        """Associa o lead ao domínio pesquisado (para get_cached_insight sem URL)"""
+        with self._lock:
+            self._lead_domains[str(lead_id)] = domain
+            self._lead_domains.move_to_end(str(lead_id))
+            while len(self._lead_domains) > self.max_entries:
+                self._lead_domains.popitem(last=False)
+
+    def domain_for_lead(self, lead_id) -> Optional[str]:
+        with self._lock:
+            return self._lead_domains.get(str(lead_id))
+
+    def get(self, domain: str, persistent: bool = True) -> Optional[dict]:
+        """
+        Insight recente (< TTL) do domínio: memória → tabela (se persist e persistent=True)
+
+        A leitura da tabela é bloqueante; no event loop usar asyncio.to_thread.
+        """
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry is not None and datetime.now() - entry["timestamp"] >= self.ttl:
+                del self._entries[domain]
+                self._stats["expired"] += 1
+                entry = None
+            elif entry is not None:
+                self._entries.move_to_end(domain)
+                self._stats["memory_hits"] += 1
+
+        if entry is None and persistent and self.persist:
+            entry = self._load(domain)
+            if entry is not None:
+                self._remember(domain, entry)
+                self._count("persistent_hits")
+
+        if entry is None:
+            self._count("misses")
+
+        get_tracer().record_cache("insight", entry is not None)
+        return entry
+
+    def put(
+        self,
+        domain: str,
+        insight: str,
+        full_analysis: Optional[str] = None,
+        empresa: str = "",
+        url: Optional[str] = None
+    ):
+        """Guarda insight (memória e, se habilitado, tabela - bloqueante)"""
+        entry = {
+            "insight": insight,
+            "full_analysis": full_analysis,
+            "empresa": empresa,
+            "url": url,
+            "timestamp": datetime.now(),
+        }
+        self._remember(domain, entry)
+        self._count("stores")
+        if self.persist:
+            self._store(domain, entry)
+
+    def _load(self, domain: str) -> Optional[dict]:
+        try:
+            from app.database import get_supabase
+            cutoff = datetime.now(timezone.utc) - self.ttl
+            response = (
+                get_supabase().table(self.TABLE)
+                .select("insight, full_analysis, empresa, url, updated_at")
+                .eq("domain", domain)
+                .gte("updated_at", cutoff.isoformat())
+                .limit(1)
+                .execute()
+            )
+            if not response.data:
+                return None
+            row = response.data[0]
+            try:
+                # TTL conta a partir da pesquisa original, não do load
+                timestamp = datetime.fromisoformat(row["updated_at"]).astimezone().replace(tzinfo=None)
+            except (TypeError, ValueError):
+                timestamp = datetime.now()
+            return {
+                "insight": row["insight"],
+                "full_analysis": row.get("full_analysis"),
+                "empresa": row.get("empresa") or "",
+                "url": row.get("url"),
+                "timestamp": timestamp,
+            }
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao ler cache de insight: {e}")
+            return None
+
+    def _store(self, domain: str, entry: dict):
+        try:
+            from app.database import get_supabase
+            get_supabase().table(self.TABLE).upsert({
+                "domain": domain,
+                "insight": entry["insight"],
+                "full_analysis": entry["full_analysis"],
+                "empresa": entry["empresa"],
+                "url": entry["url"],
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            }).execute()
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao salvar cache de insight: {e}")
+
+    def get_stats(self) -> dict:
+        """
+        Retorna estatísticas do cache
+
+        Returns:
+            Dict com entries, hit_ratio e contadores (memória, tabela, misses, expirados)
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._entries)
+
+        hits = stats["memory_hits"] + stats["persistent_hits"]
+        lookups = hits + stats["misses"]
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_hours": self.ttl.total_seconds() / 3600,
+            "persist": self.persist,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            **stats,
+        }
 
 
 class EmpresaResearchService:
     """
     Pesquisa informações sobre a empresa do lead.
     Usa scraping do site + Gemini 2.0 Flash para gerar 1 insight de vendas.
-    Cache em memória com TTL de 24h.
+    Insights em cache por domínio (InsightCache).
     """
 
     def __init__(self):
         self.website_research = WebsiteResearchService()
-        # Cache: {lead_id: {"insight": str, "timestamp": datetime, "empresa": str}}
-        self._cache: Dict[str, dict] = {}
+        self.cache = InsightCache(
+            ttl_hours=settings.insight_cache_ttl_hours,
+            max_entries=settings.insight_cache_max_entries,
+            persist=settings.insight_cache_persist,
+        )
+        # domínio → pesquisa em andamento. Future de concurrent.futures porque o agente
+        # pesquisa a partir de outra thread/event loop (SmithAgent._fetch_site_insight)
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._coalesced = 0
         self._gemini_model = None
 
     def _init_gemini(self):
@@ -48,33 +376,7 @@ class EmpresaResearchService:
             logger.error(f"Erro ao inicializar Gemini: {e}")
             return None
 
-    def detect_trigger(self, lead, message: str):
-        """
-        Detecta se deve rodar pesquisa de empresa.
-
-        Triggers:
-        - Mensagem contém URL
-        - Lead tem empresa preenchida mas ainda não foi pesquisado
-
-        Retorna: (deve_pesquisar, url_ou_none)
-        """
-        # Se já tem insight em cache recente (< 24h), não pesquisar de novo
-        cached = self._cache.get(str(lead.id))
-        if cached:
-            age = datetime.now() - cached["timestamp"]
-            if age < timedelta(hours=24):
-                return False, None
-
-        # Verificar se mensagem tem URL
-        url = self.website_research.extract_url(message)
-        if url:
-            logger.info(f"🔗 URL detectada na mensagem: {url}")
-            return True, url
-
-        # Se lead tem empresa mas nunca foi pesquisado - não faz nada ainda
-        # (só pesquisamos quando temos URL ou site explícito)
-        return False, None
-
+    @traced("gemini")
     def _generate_insight_with_gemini(
         self,
         company_name: str,
@@ -123,6 +425,100 @@ Responda APENAS com a frase, sem explicações."""
 
         return None
 
+    async def _cache_get(self, domain: str) -> Optional[dict]:
+        if self.cache.persist:
+            return await asyncio.to_thread(self.cache.get, domain)
+        return self.cache.get(domain)
+
+    async def _cache_put(self, domain: str, insight: str, **kwargs):
+        if self.cache.persist:
+            await asyncio.to_thread(self.cache.put, domain, insight, **kwargs)
+        else:
+            self.cache.put(domain, insight, **kwargs)
+
+    async def _single_flight(self, domain: str, factory: Callable[[], Awaitable[Optional[str]]]) -> Optional[str]:
+        """Roda factory() uma vez por domínio; chamadas simultâneas aguardam o mesmo resultado"""
+        with self._inflight_lock:
+            future = self._inflight.get(domain)
+            owner = future is None
+            if owner:
+                future = concurrent.futures.Future()
+                # RUNNING: cancelamento de quem aguarda não cancela a pesquisa compartilhada
+                future.set_running_or_notify_cancel()
+                self._inflight[domain] = future
+            else:
+                self._coalesced += 1
+
+        if not owner:
+            logger.debug(f"Pesquisa de {domain} já em andamento - aguardando resultado")
+            return await asyncio.wrap_future(future)
+
+        result = None
+        try:
+            result = await factory()
+            return result
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(domain, None)
+            future.set_result(result)
+
+    async def get_or_research_insight(self, lead, url: str) -> Optional[str]:
+        """
+        Insight da empresa pelo domínio da URL: cache → pesquisa (uma por domínio)
+
+        Args:
+            lead: Lead que enviou/tem o site
+            url: URL do site
+
+        Returns:
+            Insight (cacheado para o domínio) ou None
+        """
+        domain = InsightCache.domain(url)
+        if not domain:
+            return await self.research_empresa(lead, url=url)
+
+        self.cache.link_lead(lead.id, domain)
+        cached = await self._cache_get(domain)
+        if cached:
+            return cached["insight"]
+
+        async def _research() -> Optional[str]:
+            insight = await self.research_empresa(lead, url=url)
+            if insight:
+                await self._cache_put(domain, insight, empresa=lead.empresa or "", url=url)
+                logger.success(f"Insight salvo para {domain} (lead {lead.id}): {insight[:60]}...")
+            return insight
+
+        return await self._single_flight(domain, _research)
+
+    async def research_por_nome(self, lead) -> Optional[str]:
+        """Insight inferido só pelo nome da empresa (lead ainda não mandou o site)"""
+        return await self._generate_insight_sem_site(lead.empresa, "não informada")
+
+    async def get_or_research_by_name(self, lead) -> Optional[str]:
+        """
+        Insight pelo nome da empresa: cache → pesquisa (uma por nome)
+
+        Usado até o lead mandar o site; o insight do domínio tem precedência
+        em get_cached_insight.
+        """
+        key = InsightCache.name_key(lead.empresa)
+        if not key:
+            return None
+
+        cached = await self._cache_get(key)
+        if cached:
+            return cached["insight"]
+
+        async def _research() -> Optional[str]:
+            insight = await self.research_por_nome(lead)
+            if insight:
+                await self._cache_put(key, insight, empresa=lead.empresa)
+                logger.success(f"Insight salvo para {key} (lead {lead.id}): {insight[:60]}...")
+            return insight
+
+        return await self._single_flight(key, _research)
+
     async def research_empresa(
         self,
         lead,
@@ -186,16 +582,10 @@ Responda APENAS com a frase, sem explicações."""
         Chamado quando o scraping falha (403, timeout, etc).
         """
         try:
-            from langchain_anthropic import ChatAnthropic
             from langchain_core.messages import SystemMessage
+            from app.services.llm_gateway import get_chat_model
 
-            llm = ChatAnthropic(
-                model=settings.claude_model,
-                temperature=0.4,
-                api_key=settings.anthropic_api_key,
-                max_tokens=256,
-                timeout=15,
-            )
+            llm = get_chat_model(temperature=0.4, max_tokens=256, timeout=15, task="pesquisa")
 
             prompt = f"""Você é um assistente de vendas da AutomateX, empresa que vende automação de atendimento e vendas via WhatsApp/IA.
 
@@ -229,6 +619,7 @@ Responda APENAS com a frase, sem explicações."""
 
         return None
 
+    @traced("gemini")
     def _generate_plano_personalizado(
         self,
         company_name: str,
@@ -291,17 +682,10 @@ Responda APENAS com a mensagem final, sem título ou explicações."""
         Gera plano personalizado com Claude (antigo fallback OpenAI).
         """
         try:
-            from langchain_anthropic import ChatAnthropic
             from langchain_core.messages import SystemMessage
-            from app.config import settings
-
-            llm = ChatAnthropic(
-                model=settings.claude_model,
-                temperature=0.3,
-                api_key=settings.anthropic_api_key,
-                max_tokens=1024,
-                timeout=20,
-            )
+            from app.services.llm_gateway import get_chat_model
+
+            llm = get_chat_model(temperature=0.3, max_tokens=1024, timeout=20, task="conversa")
 
             prompt = f"""Você é Smith, consultor sênior da AutomateX — automação de atendimento e vendas via IA.
 Você analisou o site da empresa de {lead_nome} e vai dar um diagnóstico direto.
@@ -351,16 +735,10 @@ Responda APENAS com a mensagem final, sem título ou explicações."""
         Usa apenas o nome da empresa e URL para inferir o segmento.
         """
         try:
-            from langchain_anthropic import ChatAnthropic
             from langchain_core.messages import SystemMessage
+            from app.services.llm_gateway import get_chat_model
 
-            llm = ChatAnthropic(
-                model=settings.claude_model,
-                temperature=0.4,
-                api_key=settings.anthropic_api_key,
-                max_tokens=1024,
-                timeout=20,
-            )
+            llm = get_chat_model(temperature=0.4, max_tokens=1024, timeout=20, task="conversa")
 
             prompt = f"""Você é Smith, consultor sênior da AutomateX — automação de atendimento e vendas via IA.
 
@@ -418,12 +796,7 @@ Responda APENAS com a mensagem final, sem título ou explicações."""
                 logger.warning(f"Não foi possível acessar {url} — usando análise baseada no domínio")
                 plano = await self._generate_plano_sem_site(empresa_nome, lead_nome, url)
                 if plano:
-                    self._cache[str(lead.id)] = {
-                        "insight": plano[:120],
-                        "full_analysis": plano,
-                        "timestamp": datetime.now(),
-                        "empresa": empresa_nome
-                    }
+                    await self._remember_plano(lead, url, empresa_nome, plano)
                 return plano
 
             logger.info(f"✅ Site acessado ({len(content)} chars) — gerando análise personalizada")
@@ -446,12 +819,7 @@ Responda APENAS com a mensagem final, sem título ou explicações."""
                 plano = await self._generate_plano_com_openai(empresa_nome, lead_nome, content)
 
             if plano:
-                self._cache[str(lead.id)] = {
-                    "insight": plano[:120],
-                    "full_analysis": plano,
-                    "timestamp": datetime.now(),
-                    "empresa": empresa_nome
-                }
+                await self._remember_plano(lead, url, empresa_nome, plano)
                 return plano
 
             logger.warning("Não foi possível gerar análise personalizada")
@@ -461,43 +829,52 @@ Responda APENAS com a mensagem final, sem título ou explicações."""
             logger.error(f"Erro na análise completa da empresa: {e}")
             return None
 
-    def get_cached_insight(self, lead_id) -> Optional[str]:
-        """Retorna insight do cache se existir e for recente (< 24h)"""
-        cached = self._cache.get(str(lead_id))
-        if not cached:
-            return None
-
-        age = datetime.now() - cached["timestamp"]
-        if age > timedelta(hours=24):
-            del self._cache[str(lead_id)]
-            return None
-
-        return cached.get("insight")
-
-    async def run_background_research(self, lead, message: str):
+    async def _remember_plano(self, lead, url: str, empresa_nome: str, plano: str):
         """
-        Entry point para rodar em background.
-        Detecta trigger, pesquisa empresa, salva no cache.
-        Não bloqueia o fluxo principal.
+        Guarda o plano só para este lead (o começo serve de insight para os próximos turnos)
+
+        O plano é escrito para o lead ("empresa de {lead_nome}"): no cache do domínio
+        seria servido a outros leads da mesma empresa.
         """
-        try:
-            deve_pesquisar, url = self.detect_trigger(lead, message)
+        await self._cache_put(
+            InsightCache.lead_key(lead.id), plano[:120], full_analysis=plano, empresa=empresa_nome, url=url
+        )
 
-            if not deve_pesquisar:
-                return
+    def get_cached_insight(self, lead, url: Optional[str] = None) -> Optional[str]:
+        """
+        Retorna insight recente (< TTL) da empresa do lead
 
-            insight = await self.research_empresa(lead, url=url)
+        Ordem: domínio da url informada → site_url da qualificação → plano gerado
+        para o lead → último domínio pesquisado pelo lead → nome da empresa
+        """
+        qd = getattr(lead, "qualification_data", None)
+        site_url = qd.site_url if qd and qd.site_url and qd.site_url != "sem_site" else None
+        keys = []
+        for key in (
+            InsightCache.domain(url),
+            InsightCache.domain(site_url),
+            InsightCache.lead_key(lead.id),
+            self.cache.domain_for_lead(lead.id),
+            InsightCache.name_key(getattr(lead, "empresa", None)),
+        ):
+            if key and key not in keys:
+                keys.append(key)
+
+        if not keys:
+            get_tracer().record_cache("insight", False)
+            return None
 
-            if insight:
-                self._cache[str(lead.id)] = {
-                    "insight": insight,
-                    "timestamp": datetime.now(),
-                    "empresa": lead.empresa or ""
-                }
-                logger.success(f"Insight salvo para lead {lead.id}: {insight[:60]}...")
+        for key in keys:
+            cached = self.cache.get(key)
+            if cached:
+                return cached["insight"]
+        return None
 
-        except Exception as e:
-            logger.error(f"Erro na pesquisa background de empresa: {e}")
+    def get_stats(self) -> dict:
+        """Métricas do cache de insights e das pesquisas deduplicadas"""
+        with self._inflight_lock:
+            inflight = len(self._inflight)
+        return {**self.cache.get_stats(), "inflight": inflight, "coalesced": self._coalesced}
 
 
 # Instância global (singleton)
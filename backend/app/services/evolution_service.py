@@ -1,6 +1,9 @@
 """
 Serviço de integração com Evolution API (WhatsApp)
 """
+import base64
+from functools import cached_property
+
 import httpx
 from loguru import logger
 from app.config import settings
@@ -16,6 +19,17 @@ class EvolutionService:
         self.api_key = settings.evolution_api_key
         self.instance_name = settings.evolution_instance_name
 
+    @cached_property
+    def http(self) -> httpx.AsyncClient:
+        """Cliente HTTP compartilhado (pool de conexões keep-alive com a Evolution API)"""
+        return httpx.AsyncClient(timeout=30.0)
+
+    async def aclose(self):
+        """Fecha o cliente HTTP, se já foi criado (shutdown do app)"""
+        client = self.__dict__.pop("http", None)
+        if client is not None:
+            await client.aclose()
+
     async def send_text_message(self, phone: str, message: str) -> bool:
         """
         Envia mensagem de texto via WhatsApp
@@ -49,9 +63,8 @@ class EvolutionService:
             }
 
             # Enviar requisição
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(url, headers=headers, json=payload)
-                response.raise_for_status()
+            response = await self.http.post(url, headers=headers, json=payload)
+            response.raise_for_status()
 
             logger.success(f"✅ Mensagem WhatsApp enviada para {clean_phone}")
             return True
@@ -94,21 +107,19 @@ class EvolutionService:
                 "convertToMp4": False  # Não converter
             }
 
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(url, headers=headers, json=payload)
-                response.raise_for_status()
-
-                data = response.json()
-
-                # Evolution retorna base64
-                if "base64" in data:
-                    import base64
-                    media_bytes = base64.b64decode(data["base64"])
-                    logger.success(f"✅ {media_type} baixado: {len(media_bytes)} bytes")
-                    return media_bytes
-                else:
-                    logger.error(f"❌ Resposta não contém base64: {data}")
-                    return None
+            response = await self.http.post(url, headers=headers, json=payload, timeout=60.0)
+            response.raise_for_status()
+
+            data = response.json()
+
+            # Evolution retorna base64: decodificado direto para bytes em memória
+            if "base64" in data:
+                media_bytes = base64.b64decode(data["base64"])
+                logger.success(f"✅ {media_type} baixado: {len(media_bytes)} bytes")
+                return media_bytes
+            else:
+                logger.error(f"❌ Resposta não contém base64: {list(data)}")
+                return None
 
         except Exception as e:
             logger.error(f"❌ Erro ao baixar {media_type}: {str(e)}")
@@ -0,0 +1,219 @@
+"""
+Fila de processamento dos leads do Facebook Lead Ads
+
+Antes o webhook qualificava (LLM), inseria no CRM, notificava e mandava WhatsApp antes
+de responder: LLM lento → timeout no Facebook → reentrega → lead duplicado.
+
+Agora:
+- O webhook só valida a assinatura, grava o evento bruto em facebook_lead_events
+  (idempotente por leadgen_id) e responde; eventos novos entram nesta fila
+- Workers limitados (FACEBOOK_QUEUE_WORKERS) e fila limitada (FACEBOOK_QUEUE_SIZE):
+  rajadas de leads não abrem chamadas de LLM ilimitadas. Fila cheia não perde nada -
+  o evento já está gravado e a varredura o pega depois
+- Cada evento é reservado com UPDATE condicional (claim): reentrega, varredura ou
+  outro processo não processam o mesmo leadgen_id duas vezes
+- Falha vira status "erro" e é retentada pela varredura (FACEBOOK_QUEUE_SWEEP_SECONDS)
+  até FACEBOOK_QUEUE_MAX_ATTEMPTS; o handler é cancelado depois de
+  FACEBOOK_QUEUE_LEASE_SECONDS, e evento preso em "processando" por mais que isso
+  (worker caiu) vira "erro" gastando uma tentativa
+- Retentativa não duplica o lead: o id criado no CRM é gravado no evento logo após o
+  insert e o handler confere esse lead_id antes de criar de novo
+
+Status em GET /api/analytics/facebook-leads.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.config import settings
+from app.repository.facebook_lead_events_repository import FacebookLeadEventsRepository
+
+
+# Handler: evento (linha de facebook_lead_events) → (status final, lead_id)
+Handler = Callable[[Dict[str, Any]], Awaitable[Tuple[str, Optional[str]]]]
+
+
+class FacebookLeadQueue:
+    """Fila limitada + pool de workers no event loop principal"""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        queue_size: int = 200,
+        max_attempts: int = 3,
+        lease_seconds: int = 600,
+        sweep_seconds: float = 60.0,
+    ):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.max_attempts = max(1, max_attempts)
+        self.lease_seconds = lease_seconds
+        self.sweep_seconds = sweep_seconds
+        self.repo = FacebookLeadEventsRepository()
+        self._handler: Optional[Handler] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._inflight: Set[str] = set()  # leadgen_id na fila ou rodando neste processo
+        self._stats = {
+            "enqueued": 0, "deferred": 0, "skipped": 0,
+            "processado": 0, "descartado": 0, "erro": 0,
+            "processing_total_s": 0.0,
+        }
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self, handler: Handler):
+        """Sobe os workers e a varredura (no lifespan, com o event loop rodando)"""
+        if self.running:
+            return
+        self._handler = handler
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+        logger.info(f"📘 Fila de leads do Facebook iniciada ({self.workers} workers, fila {self.queue_size})")
+
+    def enqueue(self, leadgen_id: str) -> bool:
+        """
+        Coloca o evento na fila (não bloqueia)
+
+        Returns:
+            False se a fila está cheia/parada (o evento fica para a varredura)
+        """
+        if leadgen_id in self._inflight:
+            return True
+        if self._queue is None:
+            self._stats["deferred"] += 1
+            return False
+        try:
+            self._queue.put_nowait(leadgen_id)
+        except asyncio.QueueFull:
+            self._stats["deferred"] += 1
+            logger.warning(f"⚠️ Fila de leads do Facebook cheia ({self.queue_size}) - {leadgen_id} fica para a varredura")
+            return False
+        self._inflight.add(leadgen_id)
+        self._stats["enqueued"] += 1
+        return True
+
+    # ----------------
+    # WORKERS
+    # ----------------
+
+    async def _worker(self):
+        while True:
+            leadgen_id = await self._queue.get()
+            try:
+                await self._process(leadgen_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro no worker da fila do Facebook: {e}")
+            finally:
+                self._inflight.discard(leadgen_id)
+                self._queue.task_done()
+
+    async def _process(self, leadgen_id: str):
+        event = await self.repo.claim(leadgen_id, self.max_attempts)
+        if event is None:
+            # Já processado, com outro worker/processo ou sem tentativas restantes
+            self._stats["skipped"] += 1
+            return
+
+        tentativas = (event.get("tentativas") or 0) + 1
+        started_at = time.perf_counter()
+        try:
+            # Handler que passa do lease é cancelado antes de release_stale liberar o evento
+            # (senão outro worker o pegaria com este ainda rodando)
+            status, lead_id = await asyncio.wait_for(self._handler(event), self.lease_seconds)
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                e = f"timeout após {self.lease_seconds}s"
+            self._stats["erro"] += 1
+            final = tentativas >= self.max_attempts
+            logger.error(
+                f"❌ Lead FB {leadgen_id} falhou (tentativa {tentativas}/{self.max_attempts}"
+                f"{', desistindo' if final else ''}): {e}"
+            )
+            await self.repo.finish(leadgen_id, "erro", tentativas, erro=str(e)[:1000])
+            return
+        finally:
+            self._stats["processing_total_s"] += time.perf_counter() - started_at
+
+        self._stats[status] += 1
+        await self.repo.finish(leadgen_id, status, tentativas, lead_id=lead_id)
+
+    async def _sweeper(self):
+        """Recoloca na fila eventos pendentes, com erro ou presos (fila cheia, restart, outro worker caiu)"""
+        while True:
+            try:
+                await self.repo.release_stale(self.lease_seconds)
+                free = self.queue_size - self._queue.qsize()
+                if free > 0:
+                    pending = await self.repo.list_pending(self.max_attempts, limit=free + len(self._inflight))
+                    requeued = sum(
+                        1 for leadgen_id in pending
+                        if leadgen_id not in self._inflight and self.enqueue(leadgen_id)
+                    )
+                    if requeued:
+                        logger.info(f"📘 {requeued} eventos do Facebook recolocados na fila")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro na varredura da fila do Facebook: {e}")
+            await asyncio.sleep(self.sweep_seconds)
+
+    # ----------------
+    # STATUS
+    # ----------------
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estado da fila
+
+        Returns:
+            Workers, tamanho da fila, contadores deste processo e eventos na tabela por status
+        """
+        stats = dict(self._stats)
+        finished = stats["processado"] + stats["descartado"] + stats["erro"]
+        stats["processing_avg_ms"] = round(stats.pop("processing_total_s") / finished * 1000, 1) if finished else None
+        try:
+            table = await self.repo.count_by_status()
+        except Exception as e:
+            table = {"error": str(e)}
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "inflight": len(self._inflight),
+            **stats,
+            "events": table,
+        }
+
+    async def stop(self):
+        """Cancela workers e varredura (eventos não concluídos são retomados no próximo start)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._inflight.clear()
+
+
+_facebook_lead_queue: Optional[FacebookLeadQueue] = None
+
+
+def get_facebook_lead_queue() -> FacebookLeadQueue:
+    """Fila de leads do Facebook compartilhada pelo processo"""
+    global _facebook_lead_queue
+    if _facebook_lead_queue is None:
+        _facebook_lead_queue = FacebookLeadQueue(
+            workers=settings.facebook_queue_workers,
+            queue_size=settings.facebook_queue_size,
+            max_attempts=settings.facebook_queue_max_attempts,
+            lease_seconds=settings.facebook_queue_lease_seconds,
+            sweep_seconds=settings.facebook_queue_sweep_seconds,
+        )
+    return _facebook_lead_queue
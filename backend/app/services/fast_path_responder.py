@@ -0,0 +1,267 @@
+"""
+Fast-path de respostas determinísticas (sem LLM)
+Roda ANTES do smith_graph no webhook: turnos previsíveis são respondidos por template
+em milissegundos, sem LangGraph nem Claude.
+
+Regras (em ordem de prioridade):
+- opt_out: lead pediu para não receber mais mensagens → despedida + status perdido
+- saudacao: lead novo mandou só uma saudação → abertura fixa pedindo o nome
+- captura_nome: lead respondeu o nome à abertura → pergunta empresa e cargo
+- aceite_sem_horario: lead disse "sim"/"ok" após ver os horários sem escolher um → pede dia e hora
+- delete: comando /delete (executado no webhook, só contabilizado aqui)
+
+O tom (formal/informal) é espelhado via tone_detector + tone_templates.
+"""
+import re
+import time
+from datetime import datetime
+from typing import Optional, Dict
+
+from loguru import logger
+
+from app.config import settings
+from app.models.lead import Lead, LeadStatus, LeadTemperature
+from app.services.intent_detector import (
+    ACEITE_AGENDAMENTO,
+    OPT_OUT,
+    PERGUNTA_NOME,
+    SAUDACAO,
+    normalize_text,
+)
+from app.services.datetime_parser import parse_datetime
+from app.services.tone_detector import detect_tone
+from app.services.tone_templates import TEMPLATES
+
+
+# Máximo de palavras para considerar a mensagem "só saudação" / "só aceite"
+MAX_PALAVRAS_SAUDACAO = 5
+MAX_PALAVRAS_ACEITE = 3
+
+# Prefixos comuns antes do nome ("oi, me chamo Ana", "sou o Pedro")
+_NAME_PREFIX = re.compile(
+    r"^(?:(?:oi|ola|opa|e ai|bom dia|boa tarde|boa noite)\b[\s,!.]*)?"
+    r"(?:(?:meu nome e|me chamo|eu sou o|eu sou a|eu sou|sou o|sou a|sou|"
+    r"pode me chamar de|aqui e o|aqui e a|e o|e a)\s+)?"
+)
+
+# Palavras que não são nome mesmo sendo curtas e alfabéticas
+_NAO_NOME = {
+    "sim", "nao", "ok", "oi", "ola", "opa", "quem", "voce", "vc", "obrigado", "obrigada",
+    "tudo", "bem", "bom", "boa", "dia", "tarde", "noite", "blz", "beleza", "certo",
+    "claro", "isso", "pode", "quero", "nada", "aqui", "eu", "ai", "hein", "que", "como",
+}
+
+_STATUS_AGUARDANDO_HORARIO = {
+    LeadStatus.AGUARDANDO_ESCOLHA_HORARIO.value,
+    "horarios_oferecidos",
+}
+
+
+def _status_value(lead: Lead) -> str:
+    return lead.status.value if hasattr(lead.status, "value") else lead.status
+
+
+def _last_assistant_message(lead: Lead) -> Optional[str]:
+    for msg in reversed(lead.conversation_history):
+        if msg.role == "assistant":
+            return msg.content
+    return None
+
+
+def _primeiro_nome(lead: Lead) -> str:
+    partes = (lead.nome or "").split()
+    return partes[0] if partes else ""
+
+
+def extract_name(message: str) -> Optional[str]:
+    """
+    Extrai o nome de uma resposta curta à pergunta "como posso te chamar?"
+
+    Args:
+        message: Mensagem do lead (ex: "Pedro", "me chamo Ana Paula", "oi, sou o João!")
+
+    Returns:
+        Nome capitalizado ou None se a mensagem não parece ser só um nome
+    """
+    original = message.strip()
+    normalized = normalize_text(original)
+    prefix = _NAME_PREFIX.match(normalized)
+    # normalize_text preserva o tamanho para acentos do português → dá para recortar o original
+    source = original if len(normalized) == len(original) else normalized
+    rest = source[prefix.end():] if prefix else source
+
+    words = [w.strip(".,!?;:)(") for w in rest.split()]
+    words = [w for w in words if w]
+    if not 1 <= len(words) <= 2:
+        return None
+    if not all(w.isalpha() for w in words):
+        return None
+    if any(normalize_text(w) in _NAO_NOME for w in words):
+        return None
+
+    return " ".join(w.capitalize() for w in words)
+
+
+class FastPathResponder:
+    """
+    Responde turnos previsíveis por template e contabiliza a fração do tráfego atendida
+
+    Uso:
+        response = fast_path.try_respond(lead, message)
+        if response is None:
+            ...  # seguir para o agente (smith_graph)
+    """
+
+    def __init__(self):
+        self.total_turns = 0
+        self.handled: Dict[str, int] = {}
+        self.total_ms = 0.0
+
+        logger.info("⚡ FastPathResponder inicializado")
+
+    # ----------------
+    # REGRAS
+    # ----------------
+
+    def _opt_out(self, lead: Lead, normalized: str, tone: str) -> Optional[str]:
+        if not OPT_OUT.matches_normalized(normalized):
+            return None
+
+        lead.status = LeadStatus.PERDIDO
+        lead.temperatura = LeadTemperature.FRIO
+        nome = _primeiro_nome(lead)
+        if not nome:
+            return TEMPLATES["opt_out_sem_nome"][tone]
+        return TEMPLATES["opt_out"][tone].format(nome=nome)
+
+    def _saudacao(self, lead: Lead, normalized: str, tone: str) -> Optional[str]:
+        if _status_value(lead) != LeadStatus.NOVO.value:
+            return None
+        if len(normalized.split()) > MAX_PALAVRAS_SAUDACAO or not SAUDACAO.matches_normalized(normalized):
+            return None
+
+        # Mesmo efeito do handle_new_lead
+        lead.status = LeadStatus.CONTATO_INICIAL
+        lead.temperatura = LeadTemperature.MORNO
+        return TEMPLATES["abertura"][tone]
+
+    def _captura_nome(self, lead: Lead, message: str, tone: str) -> Optional[str]:
+        if _status_value(lead) != LeadStatus.CONTATO_INICIAL.value:
+            return None
+        if lead.qualification_data and lead.qualification_data.cargo:
+            return None
+
+        last_ai = _last_assistant_message(lead)
+        if not last_ai or not PERGUNTA_NOME.matches(last_ai):
+            return None
+
+        nome = extract_name(message)
+        if not nome:
+            return None
+
+        # Manter o nome completo do WhatsApp se o primeiro nome bate
+        if normalize_text(_primeiro_nome(lead)) != normalize_text(nome.split()[0]):
+            lead.nome = nome
+
+        # Mesmo efeito do qualify_lead no passo "empresa_e_cargo"
+        lead.status = LeadStatus.QUALIFICANDO
+        lead.temperatura = LeadTemperature.QUENTE
+        return TEMPLATES["empresa_e_cargo"][tone].format(nome=nome.split()[0])
+
+    def _aceite_sem_horario(self, lead: Lead, message: str, normalized: str, tone: str) -> Optional[str]:
+        if _status_value(lead) not in _STATUS_AGUARDANDO_HORARIO:
+            return None
+        if len(normalized.split()) > MAX_PALAVRAS_ACEITE or not ACEITE_AGENDAMENTO.matches_normalized(normalized):
+            return None
+        parsed = parse_datetime(message, datetime.now())
+        if parsed.found or parsed.ambiguous:
+            return None  # Tem dia/hora/período → confirm_meeting resolve contra os slots
+
+        return TEMPLATES["escolher_horario"][tone]
+
+    # ----------------
+    # ENTRADA
+    # ----------------
+
+    def try_respond(self, lead: Lead, message: str) -> Optional[str]:
+        """
+        Tenta responder a mensagem sem o agente
+
+        Args:
+            lead: Lead com conversation_history já contendo a mensagem atual
+            message: Mensagem (combinada) do lead
+
+        Returns:
+            Texto da resposta (lead atualizado in-place) ou None para seguir ao agente
+        """
+        self.total_turns += 1
+        if not settings.fast_path_enabled:
+            return None
+
+        start = time.perf_counter()
+        try:
+            normalized = normalize_text(message).strip()
+            tone = detect_tone(lead.conversation_history)
+
+            rules = (
+                ("opt_out", lambda: self._opt_out(lead, normalized, tone)),
+                ("saudacao", lambda: self._saudacao(lead, normalized, tone)),
+                ("captura_nome", lambda: self._captura_nome(lead, message, tone)),
+                ("aceite_sem_horario", lambda: self._aceite_sem_horario(lead, message, normalized, tone)),
+            )
+            for rule, apply in rules:
+                response = apply()
+                if response:
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    self._record(rule, elapsed_ms)
+                    logger.info(f"⚡ Fast-path '{rule}' respondeu {lead.nome} em {elapsed_ms:.1f}ms (tom={tone})")
+                    return response
+        except Exception as e:
+            logger.warning(f"⚠️ Erro no fast-path (seguindo para o agente): {e}")
+
+        return None
+
+    def record_command(self, command: str):
+        """Contabiliza comando tratado fora do pipeline (ex: /delete)"""
+        self.total_turns += 1
+        self._record(command, 0.0)
+
+    def _record(self, rule: str, elapsed_ms: float):
+        self.handled[rule] = self.handled.get(rule, 0) + 1
+        self.total_ms += elapsed_ms
+
+    def get_stats(self) -> dict:
+        """
+        Retorna estatísticas do fast-path
+
+        Returns:
+            Dict com total_turns, handled_turns, handled_ratio, by_rule, avg_ms
+        """
+        handled_turns = sum(self.handled.values())
+        return {
+            "enabled": settings.fast_path_enabled,
+            "total_turns": self.total_turns,
+            "handled_turns": handled_turns,
+            "handled_ratio": round(handled_turns / self.total_turns, 4) if self.total_turns else 0.0,
+            "by_rule": dict(self.handled),
+            "avg_ms": round(self.total_ms / handled_turns, 2) if handled_turns else 0.0,
+        }
+
+
+# Instância global do fast-path
+_fast_path_responder: FastPathResponder = None
+
+
+def get_fast_path_responder() -> FastPathResponder:
+    """
+    Retorna instância global do fast-path (singleton)
+
+    Returns:
+        FastPathResponder
+    """
+    global _fast_path_responder
+
+    if _fast_path_responder is None:
+        _fast_path_responder = FastPathResponder()
+
+    return _fast_path_responder
@@ -2,9 +2,8 @@
 Serviço de integração com Google Calendar API
 Gerencia criação de eventos e agendamentos
 """
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
 from datetime import datetime, timedelta
+from functools import cached_property
 from loguru import logger
 from typing import Optional, Dict, Any, List
 import os
@@ -12,6 +11,7 @@ import json
 from zoneinfo import ZoneInfo
 
 from app.config import settings
+from app.services.tracing import traced
 
 # Configurações
 SCOPES = ['https://www.googleapis.com/auth/calendar']
@@ -23,14 +23,18 @@ SP_TZ = ZoneInfo('America/Sao_Paulo')
 class GoogleCalendarService:
     """Serviço para integração com Google Calendar"""
 
-    def __init__(self):
-        """Inicializa o serviço com autenticação"""
-        self.service = None
-        self._authenticate()
+    @cached_property
+    def service(self):
+        """Cliente da Calendar API (autentica no primeiro uso; None = calendário desabilitado)"""
+        return self._authenticate()
 
     def _authenticate(self):
         """Autentica com Google Calendar API usando Service Account"""
         try:
+            # googleapiclient/google-auth só são importados quando o calendário é usado
+            from google.oauth2 import service_account
+            from googleapiclient.discovery import build
+
             credentials = None
 
             # OPÇÃO 1: Tentar carregar da variável de ambiente (PRODUÇÃO - Railway)
@@ -65,20 +69,23 @@ class GoogleCalendarService:
             # Verificar se conseguiu carregar credenciais
             if not credentials:
                 logger.warning("⚠️ Google Calendar desabilitado. Configure GOOGLE_CREDENTIALS_JSON (Railway) ou google_credentials.json (local)")
-                return
+                return None
 
             # Construir serviço
-            self.service = build('calendar', 'v3', credentials=credentials)
+            service = build('calendar', 'v3', credentials=credentials)
             logger.success("✅ Google Calendar API autenticado e disponível")
+            return service
 
         except Exception as e:
             logger.error(f"❌ Erro ao autenticar com Google Calendar: {str(e)}")
             logger.warning("⚠️ Google Calendar desabilitado")
+            return None
 
     def is_available(self) -> bool:
         """Verifica se o serviço está disponível"""
         return self.service is not None
 
+    @traced("calendar")
     async def create_meeting(
         self,
         lead_name: str,
@@ -217,6 +224,7 @@ class GoogleCalendarService:
         # Arredondar para a próxima hora
         return dt.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
 
+    @traced("calendar")
     async def get_available_slots(
         self,
         days_ahead: int = 7,
@@ -400,6 +408,7 @@ class GoogleCalendarService:
         }
         return days[dt.weekday()]
 
+    @traced("calendar")
     async def cancel_meeting(self, event_id: str) -> bool:
         """
         Cancela uma reunião
@@ -0,0 +1,200 @@
+"""
+Detector de intenções por palavras-chave (pré-compilado)
+Substitui os loops de regex/substring por turno espalhados pelo agente e webhooks.
+
+Cada intenção vira UMA regex de alternação compilada no import, aplicada sobre o
+texto normalizado (minúsculo e sem acentos) — "reunião", "reuniao" e "REUNIÃO" casam igual.
+"""
+import re
+import unicodedata
+from typing import Iterable, Optional, Tuple
+
+
+# Acentos do português via str.translate (bem mais rápido que NFKD por mensagem)
+_ACCENT_TABLE = str.maketrans(
+    "áàâãäéèêëíìîïóòôõöúùûüç",
+    "aaaaaeeeeiiiiooooouuuuc",
+)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza texto para matching: minúsculo e sem acentos
+
+    Args:
+        text: Texto original
+
+    Returns:
+        Texto normalizado (ex: "Terça às 14h" → "terca as 14h")
+    """
+    if not text:
+        return ""
+    text = text.lower()
+    if text.isascii():
+        return text
+    text = text.translate(_ACCENT_TABLE)
+    if text.isascii():
+        return text
+    # Fallback para outros diacríticos/emojis compostos
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+class IntentMatcher:
+    """
+    Matcher de uma intenção: lista de palavras-chave compilada em uma única regex
+
+    Args:
+        keywords: Palavras/frases que indicam a intenção
+        word_boundary: True = palavra inteira ("sim" não casa "assim");
+                       False = substring ("agenda" casa "agendamento")
+    """
+
+    def __init__(self, keywords: Iterable[str], word_boundary: bool = True):
+        normalized = {normalize_text(kw) for kw in keywords if kw}
+        # Mais longas primeiro: "quero sim" vence "quero" na alternação
+        self.keywords = sorted(normalized, key=lambda kw: (-len(kw), kw))
+        alternation = "|".join(re.escape(kw) for kw in self.keywords)
+        if word_boundary:
+            alternation = rf"\b(?:{alternation})\b"
+        self.pattern = re.compile(alternation)
+        self.word_boundary = word_boundary
+
+        # Substring: "marcar" já cobre "bora marcar" - scan com `in` só nas mínimas
+        # (em CPython, poucas buscas `in` batem uma alternação sem âncora)
+        self._substrings = tuple(
+            kw for kw in self.keywords
+            if not any(other != kw and other in kw for other in self.keywords)
+        )
+
+    def search(self, text: str) -> Optional[str]:
+        """Retorna a palavra-chave encontrada (normalizada) ou None"""
+        match = self.pattern.search(normalize_text(text))
+        return match.group(0) if match else None
+
+    def matches(self, text: str) -> bool:
+        """True se o texto contém alguma palavra-chave da intenção"""
+        return self.matches_normalized(normalize_text(text))
+
+    def matches_normalized(self, normalized_text: str) -> bool:
+        """Igual a matches(), para texto já passado por normalize_text()"""
+        if self.word_boundary:
+            return self.pattern.search(normalized_text) is not None
+        return any(kw in normalized_text for kw in self._substrings)
+
+
+# ========================================
+# INTENÇÕES DE AGENDAMENTO
+# ========================================
+
+# Lead aceitou agendar (palavra inteira: "poderia" não é "pode", "assim" não é "sim")
+ACEITE_AGENDAMENTO = IntentMatcher([
+    "sim", "pode", "vamos", "aceito", "quero", "ok", "beleza",
+    "confirmo", "agenda", "marcar", "agendar", "combina",
+    "feito", "bora", "vou", "quero sim", "pode ser",
+])
+
+# IA ofereceu agendamento na última mensagem (substring, como antes)
+OFERTA_AGENDAMENTO = IntentMatcher([
+    "agendar", "reunião", "conversa", "momento para discutir", "horário",
+    "agenda", "marcar", "call", "bora marcar",
+], word_boundary=False)
+
+# Lead hesitante / com dúvidas — NÃO é intenção de agendar
+HESITACAO_AGENDAMENTO = IntentMatcher([
+    "dúvida", "antes de", "mas", "porém", "ainda não", "não sei", "talvez",
+    "primeiro", "preciso saber", "gostaria de saber", "pode explicar",
+    "como funciona", "quanto custa", "qual o preço",
+], word_boundary=False)
+
+# Lead pediu explicitamente para agendar
+PEDIDO_AGENDAMENTO = IntentMatcher([
+    "quero agendar", "quero marcar", "vamos agendar", "vamos marcar",
+    "pode agendar", "pode marcar", "horários disponíveis", "horários livres",
+    "agenda livre", "quando você pode", "sugere horários", "mostre horários",
+], word_boundary=False)
+
+
+# ========================================
+# SAUDAÇÃO / OPT-OUT
+# ========================================
+
+# Saudação pura (primeira mensagem de lead novo)
+SAUDACAO = IntentMatcher([
+    "oi", "oii", "oie", "ola", "opa", "eai", "e ai", "salve", "hey", "hello",
+    "bom dia", "boa tarde", "boa noite", "tudo bem", "tudo bom", "td bem",
+])
+
+# IA perguntou o nome do lead (abertura)
+PERGUNTA_NOME = IntentMatcher([
+    "te chamar", "chama-lo", "chama-la", "seu nome", "como voce se chama",
+], word_boundary=False)
+
+# Lead pediu para não receber mais mensagens
+OPT_OUT = IntentMatcher([
+    "pare de mandar", "para de mandar", "parar de mandar", "pare de me mandar",
+    "para de me mandar", "nao me mande", "nao mande mais", "nao quero receber",
+    "me tira da lista", "me tire da lista", "me remove", "me remova",
+    "remover meu numero", "remove meu numero", "sair da lista", "descadastrar",
+    "nao entre mais em contato", "nao me procure", "stop",
+])
+
+
+# ========================================
+# DIA DA SEMANA / HORA
+# ========================================
+
+WEEKDAYS = {
+    "segunda": 0, "seg": 0,
+    "terca": 1, "ter": 1,
+    "quarta": 2, "qua": 2,
+    "quinta": 3, "qui": 3,
+    "sexta": 4, "sex": 4,
+    "sabado": 5, "sab": 5,
+    "domingo": 6, "dom": 6,
+}
+
+# Palavra inteira: "ter" não casa "interesse", "sex" não casa "sexo" mas casa "sex-feira"
+_WEEKDAY_PATTERN = re.compile(
+    r"\b(" + "|".join(sorted(WEEKDAYS, key=len, reverse=True)) + r")\b"
+)
+
+# Hora: "14h", "14:30", "14h30", "9"
+_HOUR_PATTERN = re.compile(r"(\d{1,2}):?(\d{2})?(?:h|:)?")
+
+
+def detect_weekday(text: str) -> Optional[int]:
+    """
+    Detecta dia da semana mencionado
+
+    Returns:
+        0=segunda ... 6=domingo, ou None
+    """
+    match = _WEEKDAY_PATTERN.search(normalize_text(text))
+    return WEEKDAYS[match.group(1)] if match else None
+
+
+def detect_hour(text: str) -> Optional[Tuple[int, int]]:
+    """
+    Detecta primeira hora mencionada
+
+    Returns:
+        Tupla (hora, minuto) ou None
+    """
+    match = _HOUR_PATTERN.search(text)
+    if not match:
+        return None
+    minute = int(match.group(2)) if match.group(2) else 0
+    return int(match.group(1)), minute
+
+
+def detect_scheduling_intent(message: str) -> bool:
+    """
+    Detecta se o lead quer agendar reunião
+
+    Hesitação/dúvida tem prioridade sobre pedido explícito.
+    """
+    normalized = normalize_text(message)
+    if HESITACAO_AGENDAMENTO.matches_normalized(normalized):
+        return False
+    return PEDIDO_AGENDAMENTO.matches_normalized(normalized)
@@ -2,14 +2,100 @@
 Serviço de Qualificação de Leads com IA
 Usa o Agente Smith para analisar e qualificar leads automaticamente
 """
-from typing import Dict, Any
+import asyncio
+import json
+import math
+import time
+import unicodedata
+from functools import cached_property
+from typing import Dict, Any, List, Optional, Tuple
 from loguru import logger
-from langchain_anthropic import ChatAnthropic
 from langchain_core.prompts import ChatPromptTemplate
 from app.config import settings
+from app.services.llm_gateway import get_chat_model, llm_priority, LLMPriority
 import re
 
 
+def _faixa_faturamento(faturamento_str: str) -> Optional[str]:
+    """
+    Faixa de faturamento a partir do texto do formulário
+
+    Returns:
+        "baixo" (< R$ 300k), "borderline" (R$ 300-500k), "bom" (R$ 500k-1M),
+        "excelente" (> R$ 1M) ou None se não informado/irreconhecível
+    """
+    if "menos" in faturamento_str:
+        return "baixo"
+    if "300" in faturamento_str and "500" in faturamento_str:
+        return "borderline"
+    if "500" in faturamento_str:
+        return "bom"
+    if "acima" in faturamento_str or "milhão" in faturamento_str or "milhões" in faturamento_str:
+        return "excelente"
+    return None
+
+
+# Cargos com poder de decisão (regra 300-500k do prompt)
+CARGOS_DECISORES = (
+    "ceo", "fundador", "socio", "socia", "dono", "dona", "proprietario", "proprietaria",
+    "owner", "partner", "diretor", "director", "presidente",
+)
+
+# Número com unidade opcional: "300", "1,5 milhão", "300.000", "500k", "R$ 2 mi"
+_VALOR_RE = re.compile(
+    r"(\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|\d+(?:,\d+)?)\s*(mil\b|k\b|milhao\b|milhoes\b|mi\b|mm\b|m\b)?"
+)
+_MULTIPLICADORES = {"mil": 1e3, "k": 1e3, "milhao": 1e6, "milhoes": 1e6, "mi": 1e6, "mm": 1e6, "m": 1e6}
+
+
+def _normalizar(texto: str) -> str:
+    texto = unicodedata.normalize("NFKD", (texto or "").lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def _faixa_anual(faturamento: str) -> Optional[Tuple[float, float]]:
+    """
+    Faixa de faturamento ANUAL (mínimo, máximo) em reais, só quando o texto é explícito
+
+    "Menos de R$ 300 mil/ano" -> (0, 300000); "Entre R$ 300 mil e R$ 500 mil por ano"
+    -> (300000, 500000); "Acima de R$ 3 milhões/ano" -> (3000000, inf).
+
+    Returns:
+        None se não há valor, o período não é anual explícito (por mês, sem período)
+        ou o texto não é reconhecido - esses casos ficam para a IA
+    """
+    texto = _normalizar(faturamento)
+    if re.search(r"\bmes\b|mensa", texto):
+        return None
+    if not re.search(r"\bano\b|anua|/ano|\ba\.a\b", texto):
+        return None
+
+    valores = []
+    for numero, unidade in _VALOR_RE.findall(texto):
+        if "." in numero:
+            # "300.000,00": separador de milhar, centavos descartados
+            valor = float(numero.split(",")[0].replace(".", ""))
+        else:
+            valor = float(numero.replace(",", "."))
+        valores.append([valor, unidade])
+    if not valores:
+        return None
+
+    # "300-500k", "300 a 500 mil": número sem unidade herda a do seguinte
+    for i in range(len(valores) - 2, -1, -1):
+        if not valores[i][1]:
+            valores[i][1] = valores[i + 1][1]
+    reais = [valor * _MULTIPLICADORES.get(unidade, 1) for valor, unidade in valores]
+
+    if len(reais) >= 2:
+        return min(reais[:2]), max(reais[:2])
+    if re.search(r"\b(menos|ate|abaixo|inferior)\b", texto):
+        return 0.0, reais[0]
+    if re.search(r"\b(acima|mais|superior)\b", texto):
+        return reais[0], math.inf
+    return reais[0], reais[0]
+
+
 class LeadQualificationService:
     """
     Serviço que usa IA para qualificar leads automaticamente
@@ -21,14 +107,12 @@ class LeadQualificationService:
     - Custo 1º ano: ~R$ 16.600
     """
 
-    def __init__(self):
-        self.llm = ChatAnthropic(
-            model=settings.claude_model,
-            temperature=0.3,
-            api_key=settings.anthropic_api_key,
-            max_tokens=1024,
-        )
+    @cached_property
+    def llm(self):
+        """Modelo criado no primeiro uso (fora do import do app)"""
+        return get_chat_model(temperature=0.3, max_tokens=1024, task="qualificacao")
 
+    def __init__(self):
         # Prompt de qualificação focado em faturamento + cargo
         self.qualification_prompt = ChatPromptTemplate.from_messages([
             ("system", """Você é um especialista em qualificação de leads B2B para um sistema de automação de atendimento.
@@ -122,11 +206,10 @@ Retorne o JSON de qualificação.""")
             # Criar chain
             chain = self.qualification_prompt | self.llm
 
-            # Executar qualificação
-            response = chain.invoke(prepared_data)
+            # Executar qualificação (assíncrono: não bloqueia o event loop)
+            response = await chain.ainvoke(prepared_data)
 
             # Parse resposta
-            import json
             result_text = response.content.strip()
 
             # Limpar markdown se vier com ```json
@@ -155,23 +238,24 @@ Retorne o JSON de qualificação.""")
         score = 0
         reasoning_parts = []
 
-        faturamento_str = lead_data.get("faturamento", "").lower()
-        cargo_str = lead_data.get("cargo", "").lower()
+        faturamento_str = (lead_data.get("faturamento") or "").lower()
+        cargo_str = (lead_data.get("cargo") or "").lower()
 
         # SCORE POR FATURAMENTO (70% do score)
-        if "menos" in faturamento_str or "300" in faturamento_str and "menos" in faturamento_str:
+        faixa = _faixa_faturamento(faturamento_str)
+        if faixa == "baixo":
             score += 10
             reasoning_parts.append("❌ Faturamento < R$ 300k (inviável)")
             is_qualified = False
-        elif "300" in faturamento_str and "500" in faturamento_str:
+        elif faixa == "borderline":
             score += 50
             reasoning_parts.append("⚠️ Faturamento R$ 300-500k (borderline)")
             is_qualified = False  # Só qualifica se tiver cargo alto
-        elif "500" in faturamento_str or ("500k" in faturamento_str and "1m" in faturamento_str):
+        elif faixa == "bom":
             score += 75
             reasoning_parts.append("✅ Faturamento R$ 500k-1M (bom)")
             is_qualified = True
-        elif "acima" in faturamento_str or "milhão" in faturamento_str or "milhões" in faturamento_str:
+        elif faixa == "excelente":
             score += 90
             reasoning_parts.append("🔥 Faturamento > R$ 1M (excelente)")
             is_qualified = True
@@ -214,19 +298,85 @@ Retorne o JSON de qualificação.""")
             "faturamento_estimado": lead_data.get("faturamento", "Não informado")
         }
 
-    async def batch_qualify_leads(self, leads_data: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+    def prescreen_lead(self, lead_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Pré-triagem determinística (sem IA) para lotes
+
+        Só descarta o que as REGRAS CRÍTICAS do prompt rejeitam de qualquer forma, e só
+        com faixa ANUAL explícita: até R$ 300k, ou R$ 300-500k sem cargo decisor.
+        Faturamento mensal, sem período, fora dessas faixas ou não informado vai para a IA.
+
+        Returns:
+            Resultado de qualificação (rejeitado) ou None se o lead precisa da IA
+        """
+        faturamento = lead_data.get("faturamento") or ""
+        faixa = _faixa_anual(faturamento)
+        if faixa is None:
+            return None
+
+        minimo, maximo = faixa
+        cargo = _normalizar(lead_data.get("cargo") or "")
+        if maximo <= 300_000:
+            score = 10
+            reasoning = "❌ Faturamento até R$ 300k/ano (inviável)"
+        elif minimo >= 300_000 and maximo <= 500_000 and not any(c in cargo for c in CARGOS_DECISORES):
+            score = 50
+            reasoning = "⚠️ Faturamento R$ 300-500k/ano sem cargo decisor"
+        else:
+            return None
+
+        return {
+            "is_qualified": False,
+            "score": score,
+            "reasoning": f"{reasoning} (Pré-triagem sem IA)",
+            "next_action": "Descartado",
+            "faturamento_estimado": faturamento,
+        }
+
+    async def batch_qualify_leads(
+        self,
+        leads_data: List[Dict[str, Any]],
+        concurrency: Optional[int] = None,
+        prescreen: bool = True
+    ) -> List[Dict[str, Any]]:
         """
-        Qualifica múltiplos leads de uma vez
+        Qualifica múltiplos leads de uma vez (importação de Lead Ads/formulários)
+
+        Leads rejeitados pela pré-triagem não chamam a IA; os demais rodam em paralelo
+        (até `concurrency` por vez) com prioridade BACKGROUND no gateway de LLM -
+        o teto efetivo também depende de LLM_BACKGROUND_CONCURRENCY.
+
+        Args:
+            leads_data: Lista de dicionários no formato de qualify_lead
+            concurrency: Qualificações simultâneas (padrão: LEAD_QUALIFICATION_BATCH_CONCURRENCY)
+            prescreen: Aplicar pré-triagem determinística antes da IA
+
+        Returns:
+            Lista na mesma ordem da entrada: {"lead", "qualification", "pre_triagem"}
         """
-        results = []
-        for lead_data in leads_data:
-            result = await self.qualify_lead(lead_data)
-            results.append({
-                "lead": lead_data,
-                "qualification": result
-            })
-
-        return results
+        limit = asyncio.Semaphore(max(1, concurrency or settings.lead_qualification_batch_concurrency))
+
+        async def qualify_one(lead_data: Dict[str, Any]) -> Dict[str, Any]:
+            if prescreen:
+                result = self.prescreen_lead(lead_data)
+                if result is not None:
+                    return {"lead": lead_data, "qualification": result, "pre_triagem": True}
+
+            async with limit:
+                result = await self.qualify_lead(lead_data)
+            return {"lead": lead_data, "qualification": result, "pre_triagem": False}
+
+        started_at = time.perf_counter()
+        with llm_priority(LLMPriority.BACKGROUND):
+            results = await asyncio.gather(*(qualify_one(lead_data) for lead_data in leads_data))
+
+        prescreened = sum(1 for r in results if r["pre_triagem"])
+        qualified = sum(1 for r in results if r["qualification"].get("is_qualified"))
+        logger.info(
+            f"📦 Lote de {len(results)} leads qualificado em {time.perf_counter() - started_at:.1f}s "
+            f"({qualified} aprovados, {prescreened} descartados na pré-triagem)"
+        )
+        return list(results)
 
     def calculate_manual_score(self, lead_data: Dict[str, Any]) -> int:
         """
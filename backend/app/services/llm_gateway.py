@@ -0,0 +1,576 @@
+"""
+Gateway central de LLM (Anthropic)
+Pool de clientes compartilhados + limite de concorrência + prioridade + métricas de fila
+
+Antes cada serviço (SmithAgent, DataExtractor, LeadQualificationService, SmithAIService...)
+criava o próprio ChatAnthropic com cliente HTTP separado e nada limitava chamadas
+simultâneas — picos de mensagens viravam 429 + retries no provedor.
+
+Agora:
+- get_chat_model(): instâncias compartilhadas por configuração; variantes de temperatura/
+  max_tokens reaproveitam o MESMO cliente HTTP (pool de conexões único por modelo)
+- Semáforo global + por modelo + teto para background, com fila por prioridade:
+  resposta ao vivo no WhatsApp passa na frente de pesquisa em background
+- Métricas de tempo em fila por modelo/prioridade (get_stats)
+
+Prioridade da chamada vem do contexto:
+    with llm_priority(LLMPriority.BACKGROUND):
+        await llm.ainvoke(...)
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.config import settings
+from app.services.tracing import get_tracer
+
+
+class LLMPriority(IntEnum):
+    """Classes de prioridade (menor valor = atendido primeiro)"""
+    INTERATIVO = 0  # Resposta ao vivo para o lead (WhatsApp)
+    PADRAO = 1      # Chamadas de API/admin
+    BACKGROUND = 2  # Pesquisa de empresa, lotes, jobs
+
+
+_current_priority: contextvars.ContextVar[LLMPriority] = contextvars.ContextVar(
+    "llm_priority", default=LLMPriority.PADRAO
+)
+
+
+@contextmanager
+def llm_priority(priority: LLMPriority):
+    """
+    Define a prioridade das chamadas de LLM feitas dentro do bloco
+
+    Propaga para tasks criadas (asyncio.create_task), asyncio.to_thread e nodes do LangGraph.
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> LLMPriority:
+    return _current_priority.get()
+
+
+# ========================================
+# LIMITADOR COM PRIORIDADE (threads + asyncio)
+# ========================================
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "granted", "cancelled", "event", "future", "loop")
+
+    def __init__(self, priority: int, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.granted = False
+        self.cancelled = False
+        self.event: Optional[threading.Event] = None
+        self.future: Optional[asyncio.Future] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+    def wake(self):
+        if self.event is not None:
+            self.event.set()
+        elif self.future is not None:
+            self.loop.call_soon_threadsafe(_resolve_future, self.future)
+
+
+def _resolve_future(future: asyncio.Future):
+    if not future.done():
+        future.set_result(True)
+
+
+class PriorityLimiter:
+    """
+    Semáforo com fila de prioridade, seguro entre threads e event loops
+
+    Chamadas síncronas (nodes do LangGraph, ThreadPoolExecutor) e assíncronas (ainvoke)
+    disputam os mesmos slots. Ao liberar, o slot vai direto para o próximo da fila.
+    """
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = max(1, limit)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._waiters: list = []
+        self._seq = itertools.count()
+
+    def _enqueue_or_take(self, waiter: _Waiter) -> bool:
+        """Pega slot livre (True) ou entra na fila (False)"""
+        with self._lock:
+            if self._in_use < self.limit and not self._waiters:
+                self._in_use += 1
+                return True
+            waiter.seq = next(self._seq)
+            heapq.heappush(self._waiters, waiter)
+            return False
+
+    def acquire(self, priority: int):
+        try:
+            asyncio.get_running_loop()
+            on_loop_thread = True
+        except RuntimeError:
+            on_loop_thread = False
+
+        if on_loop_thread:
+            # Rede de segurança: chamada síncrona DENTRO do event loop (devia estar em
+            # asyncio.to_thread). Esperar aqui travaria o loop e quem segura o slot - entra
+            # sem fila, acima do limite
+            with self._lock:
+                self._in_use += 1
+                in_use = self._in_use
+            logger.warning(
+                f"⚠️ Chamada LLM síncrona no event loop furou a fila '{self.name}' "
+                f"({in_use}/{self.limit}) - rode com asyncio.to_thread"
+            )
+            return
+
+        waiter = _Waiter(priority, 0)
+        waiter.event = threading.Event()
+        if self._enqueue_or_take(waiter):
+            return
+        waiter.event.wait()
+
+    async def acquire_async(self, priority: int):
+        waiter = _Waiter(priority, 0)
+        waiter.loop = asyncio.get_running_loop()
+        waiter.future = waiter.loop.create_future()
+        if self._enqueue_or_take(waiter):
+            return
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if not waiter.granted:
+                    waiter.cancelled = True
+                    raise
+            # Slot já concedido: devolver antes de propagar o cancelamento
+            self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if self._in_use > self.limit:
+                # Slot excedente (entrada sem fila) - só devolve
+                self._in_use -= 1
+                return
+            while self._waiters:
+                waiter = heapq.heappop(self._waiters)
+                if waiter.cancelled:
+                    continue
+                waiter.granted = True  # Slot passa direto (in_use não muda)
+                waiter.wake()
+                return
+            self._in_use -= 1
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for w in self._waiters if not w.cancelled)
+
+
+# ========================================
+# GATEWAY
+# ========================================
+
+class LLMGateway:
+    """
+    Controla concorrência e coleta métricas de todas as chamadas de LLM
+
+    Ordem de aquisição (fixa, evita deadlock): background → modelo → global
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        model_concurrency: int,
+        background_concurrency: int,
+    ):
+        self.global_limiter = PriorityLimiter("global", max_concurrency)
+        self.background_limiter = PriorityLimiter("background", background_concurrency)
+        self.model_concurrency = model_concurrency
+        self._model_limiters: Dict[str, PriorityLimiter] = {}
+        self._limiters_lock = threading.Lock()
+
+        self._metrics_lock = threading.Lock()
+        self._metrics: Dict[Tuple[str, str], dict] = {}
+
+        logger.info(
+            f"🚦 LLMGateway inicializado (global={max_concurrency}, "
+            f"por modelo={model_concurrency}, background={background_concurrency})"
+        )
+
+    def _limiters_for(self, model: str, priority: LLMPriority) -> list:
+        with self._limiters_lock:
+            model_limiter = self._model_limiters.get(model)
+            if model_limiter is None:
+                model_limiter = PriorityLimiter(model, self.model_concurrency)
+                self._model_limiters[model] = model_limiter
+
+        limiters = [model_limiter, self.global_limiter]
+        if priority >= LLMPriority.BACKGROUND:
+            limiters.insert(0, self.background_limiter)
+        return limiters
+
+    def _record(self, model: str, priority: LLMPriority, wait_s: float, duration_s: float, error: bool):
+        key = (model, priority.name.lower())
+        with self._metrics_lock:
+            m = self._metrics.setdefault(key, {
+                "calls": 0, "errors": 0,
+                "wait_total_s": 0.0, "wait_max_s": 0.0,
+                "duration_total_s": 0.0,
+            })
+            m["calls"] += 1
+            m["errors"] += int(error)
+            m["wait_total_s"] += wait_s
+            m["wait_max_s"] = max(m["wait_max_s"], wait_s)
+            m["duration_total_s"] += duration_s
+
+        if wait_s > 2:
+            logger.warning(f"⏳ Chamada LLM ({model}, {priority.name}) esperou {wait_s:.1f}s na fila")
+
+    @contextmanager
+    def slot(self, model: str, priority: Optional[LLMPriority] = None):
+        """Reserva slot para chamada síncrona"""
+        priority = current_priority() if priority is None else priority
+        limiters = self._limiters_for(model, priority)
+
+        queued_at = time.perf_counter()
+        acquired = []
+        try:
+            for limiter in limiters:
+                limiter.acquire(priority)
+                acquired.append(limiter)
+        except BaseException:
+            for limiter in reversed(acquired):
+                limiter.release()
+            raise
+
+        started_at = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            for limiter in reversed(acquired):
+                limiter.release()
+            self._record(model, priority, started_at - queued_at, time.perf_counter() - started_at, error)
+
+    @asynccontextmanager
+    async def aslot(self, model: str, priority: Optional[LLMPriority] = None):
+        """Reserva slot para chamada assíncrona"""
+        priority = current_priority() if priority is None else priority
+        limiters = self._limiters_for(model, priority)
+
+        queued_at = time.perf_counter()
+        acquired = []
+        try:
+            for limiter in limiters:
+                await limiter.acquire_async(priority)
+                acquired.append(limiter)
+        except BaseException:
+            for limiter in reversed(acquired):
+                limiter.release()
+            raise
+
+        started_at = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            for limiter in reversed(acquired):
+                limiter.release()
+            self._record(model, priority, started_at - queued_at, time.perf_counter() - started_at, error)
+
+    def get_stats(self) -> dict:
+        """
+        Retorna estatísticas do gateway
+
+        Returns:
+            Dict com ocupação/fila dos limitadores e tempo em fila por modelo/prioridade
+        """
+        with self._limiters_lock:
+            limiters = [self.global_limiter, self.background_limiter] + list(self._model_limiters.values())
+
+        with self._metrics_lock:
+            calls = []
+            for (model, priority), m in sorted(self._metrics.items()):
+                calls.append({
+                    "model": model,
+                    "priority": priority,
+                    "calls": m["calls"],
+                    "errors": m["errors"],
+                    "avg_wait_ms": round(m["wait_total_s"] / m["calls"] * 1000, 1),
+                    "max_wait_ms": round(m["wait_max_s"] * 1000, 1),
+                    "avg_duration_ms": round(m["duration_total_s"] / m["calls"] * 1000, 1),
+                })
+
+        return {
+            "routes": {task: resolve_task_models(task) for task in get_model_routes()},
+            "limiters": [
+                {"name": l.name, "limit": l.limit, "in_use": l.in_use, "queued": l.queued}
+                for l in limiters
+            ],
+            "calls": calls,
+        }
+
+
+# Gateway global (inicializado sob demanda)
+_llm_gateway: LLMGateway = None
+
+
+def get_llm_gateway() -> LLMGateway:
+    """
+    Retorna instância global do LLMGateway
+
+    Returns:
+        Instância singleton do gateway
+    """
+    global _llm_gateway
+    if _llm_gateway is None:
+        _llm_gateway = LLMGateway(
+            max_concurrency=settings.llm_max_concurrency,
+            model_concurrency=settings.llm_model_concurrency,
+            background_concurrency=settings.llm_background_concurrency,
+        )
+    return _llm_gateway
+
+
+# ========================================
+# CLIENTES COMPARTILHADOS
+# ========================================
+
+def _record_usage(tracer, model: str, result):
+    """Tokens da resposta (usage_metadata da mensagem gerada) → contadores do tracer"""
+    try:
+        usage = result.generations[0].message.usage_metadata or {}
+        tracer.record_tokens(model, usage.get("input_tokens"), usage.get("output_tokens"))
+    except (AttributeError, IndexError):
+        pass
+
+
+_gated_chat_anthropic = None
+
+
+def _gated_chat_anthropic_class():
+    """
+    Classe GatedChatAnthropic: ChatAnthropic que passa pelo LLMGateway
+
+    Criada na primeira chamada: langchain_anthropic (+ SDK anthropic) só é importado
+    quando algum modelo é de fato instanciado, não no import do app (cold start).
+    """
+    global _gated_chat_anthropic
+
+    if _gated_chat_anthropic is None:
+        from langchain_anthropic import ChatAnthropic
+
+        class GatedChatAnthropic(ChatAnthropic):
+            """ChatAnthropic que passa pelo LLMGateway (invoke, ainvoke e structured output)"""
+
+            def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+                tracer = get_tracer()
+                with tracer.span("llm", self.model, priority=current_priority().name.lower()):
+                    with get_llm_gateway().slot(self.model):
+                        result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                    _record_usage(tracer, self.model, result)
+                    return result
+
+            async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+                tracer = get_tracer()
+                with tracer.span("llm", self.model, priority=current_priority().name.lower()):
+                    async with get_llm_gateway().aslot(self.model):
+                        result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+                    _record_usage(tracer, self.model, result)
+                    return result
+
+        _gated_chat_anthropic = GatedChatAnthropic
+
+    return _gated_chat_anthropic
+
+
+def __getattr__(name: str):
+    # Compatibilidade: `from app.services.llm_gateway import GatedChatAnthropic`
+    if name == "GatedChatAnthropic":
+        return _gated_chat_anthropic_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+_base_models: Dict[tuple, object] = {}
+_chat_models: Dict[tuple, object] = {}
+_pool_lock = threading.Lock()
+
+
+def _get_base_model(model: str, timeout: Optional[float], max_retries: int):
+    """Instância base por (modelo, timeout, retries) — dona do cliente HTTP"""
+    key = (model, timeout, max_retries)
+    base = _base_models.get(key)
+    if base is None:
+        base = _gated_chat_anthropic_class()(
+            model=model,
+            api_key=settings.anthropic_api_key,
+            timeout=timeout,
+            max_retries=max_retries,
+        )
+        try:
+            # Materializa os clientes (cached_property) para as cópias herdarem
+            base._client
+            base._async_client
+        except Exception as e:
+            logger.debug(f"Clientes Anthropic não pré-criados ({e}) - cada variante criará o seu")
+        _base_models[key] = base
+    return base
+
+
+def _get_model_instance(
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    timeout: Optional[float],
+    max_retries: int,
+):
+    key = (model, temperature, max_tokens, timeout, max_retries)
+    with _pool_lock:
+        llm = _chat_models.get(key)
+        if llm is None:
+            base = _get_base_model(model, timeout, max_retries)
+            llm = base.model_copy(update={"temperature": temperature, "max_tokens": max_tokens})
+            _chat_models[key] = llm
+        return llm
+
+
+def get_chat_model(
+    temperature: float = 0,
+    max_tokens: int = 1024,
+    timeout: Optional[float] = None,
+    max_retries: int = 2,
+    model: Optional[str] = None,
+    task: Optional[str] = None,
+):
+    """
+    Retorna ChatAnthropic compartilhado para a configuração pedida
+
+    Variantes de temperatura/max_tokens são cópias da instância base e reaproveitam
+    o mesmo cliente HTTP (pool de conexões) — só timeout/retries criam cliente novo.
+
+    Args:
+        temperature: Temperatura
+        max_tokens: Máximo de tokens de saída
+        timeout: Timeout por requisição (segundos)
+        max_retries: Retries do SDK Anthropic
+        model: Modelo explícito (ignora o roteamento por tarefa)
+        task: Tarefa para o roteamento (conversa, extracao, data_hora, qualificacao, pesquisa)
+
+    Returns:
+        GatedChatAnthropic compartilhado, ou Runnable com fallbacks se a rota tiver mais de um modelo
+        (with_structured_output/bind_tools continuam funcionando - aplicados a todos os modelos)
+    """
+    if model:
+        models = [model]
+    elif task:
+        models = resolve_task_models(task)
+    else:
+        models = [settings.claude_model]
+
+    chain = [_get_model_instance(m, temperature, max_tokens, timeout, max_retries) for m in models]
+    if len(chain) == 1:
+        return chain[0]
+
+    key = (tuple(models), temperature, max_tokens, timeout, max_retries)
+    with _pool_lock:
+        llm = _routed_models.get(key)
+        if llm is None:
+            llm = chain[0].with_fallbacks(chain[1:])
+            _routed_models[key] = llm
+        return llm
+
+
+# ========================================
+# ROTEAMENTO DE MODELO POR TAREFA
+# ========================================
+
+# Tarefa → cadeia de tiers (primeiro = principal, demais = fallback em erro/sobrecarga)
+# Tiers: "premium" = CLAUDE_MODEL, "fast" = CLAUDE_FAST_MODEL, ou id explícito de modelo
+DEFAULT_MODEL_ROUTES: Dict[str, List[str]] = {
+    "conversa": ["premium", "fast"],      # Respostas ao lead (agente, SmithAIService, plano do site)
+    "extracao": ["fast", "premium"],      # Structured output do DataExtractor
+    "data_hora": ["fast", "premium"],     # AppointmentProcessor.extract_datetime_from_message
+    "qualificacao": ["fast", "premium"],  # Score de leads de formulário/ads (JSON curto)
+    "pesquisa": ["fast", "premium"],      # Insight curto a partir do site
+}
+
+_routed_models: Dict[tuple, object] = {}
+
+
+def _parse_routes(raw: str) -> Dict[str, List[str]]:
+    """
+    LLM_MODEL_ROUTES="extracao=fast|premium,conversa=premium"
+    """
+    routes = {}
+    for item in (raw or "").split(","):
+        if "=" not in item:
+            continue
+        task, chain = item.split("=", 1)
+        tiers = [t.strip() for t in chain.split("|") if t.strip()]
+        if task.strip() and tiers:
+            routes[task.strip().lower()] = tiers
+    return routes
+
+
+def get_model_routes() -> Dict[str, List[str]]:
+    """Tabela de roteamento efetiva (padrão + overrides do LLM_MODEL_ROUTES)"""
+    routes = dict(DEFAULT_MODEL_ROUTES)
+    routes.update(_parse_routes(settings.llm_model_routes))
+    return routes
+
+
+def resolve_task_models(task: str) -> List[str]:
+    """
+    Resolve a cadeia de modelos de uma tarefa
+
+    Returns:
+        Lista de ids de modelo sem repetição (primeiro = principal)
+    """
+    tiers = {"premium": settings.claude_model, "fast": settings.claude_fast_model}
+    chain = get_model_routes().get(task, ["premium"])
+
+    models = []
+    for tier in chain:
+        model = tiers.get(tier, tier)
+        if model and model not in models:
+            models.append(model)
+    return models or [settings.claude_model]
+
+
+_async_anthropic_client = None
+
+
+def get_async_anthropic_client():
+    """Cliente anthropic.AsyncAnthropic compartilhado (usar com get_llm_gateway().aslot)"""
+    global _async_anthropic_client
+    if _async_anthropic_client is None:
+        import anthropic
+        _async_anthropic_client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+    return _async_anthropic_client
@@ -0,0 +1,278 @@
+"""
+Diagnóstico do event loop: lag contínuo + detector de chamadas bloqueantes
+
+Muita coisa síncrona roda dentro de `async def` (cliente Supabase, requests,
+googleapiclient, Whisper...). Enquanto uma dessas chamadas roda, nenhum outro
+webhook/turno anda. O monitor (LOOP_MONITOR_ENABLED=true) mede isso em produção:
+
+- heartbeat: task no loop que dorme `interval` e mede o atraso ao acordar (lag)
+  → histograma smith_event_loop_lag_seconds em /metrics
+- watchdog: thread que percebe quando o heartbeat parou por mais de `block_ms`
+  e captura a stack da thread do loop naquele instante (sys._current_frames)
+- ofensores: bloqueios agrupados pelo ponto do código do app que estava rodando
+  (GET /api/analytics/event-loop), com contagem, tempo total/máximo e a stack
+"""
+import asyncio
+import statistics
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from app.config import settings
+from app.services.tracing import LATENCY_BUCKETS, _Histogram
+
+
+# Diretório do app: frames daqui identificam quem (no nosso código) bloqueou o loop
+APP_ROOT = str(Path(__file__).resolve().parents[1])
+
+# Frames guardados por ofensor (do mais interno para fora)
+STACK_DEPTH = 30
+STACK_LINES_KEPT = 12
+
+
+class LoopMonitor:
+    """Mede lag do event loop e registra stacks de bloqueios acima do limite"""
+
+    def __init__(self, interval_ms: int = 50, block_ms: int = 200, max_offenders: int = 50):
+        self.interval = interval_ms / 1000
+        self.threshold = block_ms / 1000
+        self.max_offenders = max_offenders
+
+        self._lock = threading.Lock()
+        self._samples: deque = deque(maxlen=max(1, int(60 / self.interval)))  # ~último minuto
+        self._histogram = _Histogram()
+        self._offenders: Dict[str, dict] = {}
+        self._blocks = 0
+        self._unattributed = 0
+
+        self._last_beat = 0.0
+        self._pending: Optional[List[traceback.FrameSummary]] = None  # stack do bloqueio em andamento
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Inicia heartbeat + watchdog (chamar de dentro do event loop)"""
+        if self.running:
+            return
+
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.perf_counter()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watchdog, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+        logger.info(
+            f"🩺 Monitor do event loop ativo (intervalo={self.interval * 1000:.0f}ms, "
+            f"bloqueio>{self.threshold * 1000:.0f}ms)"
+        )
+
+    async def stop(self):
+        """Para heartbeat e watchdog"""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag = max(0.0, now - expected)
+
+            with self._lock:
+                self._last_beat = now
+                self._samples.append(lag)
+                self._histogram.observe(lag)
+                stack, self._pending = self._pending, None
+
+            if lag >= self.threshold:
+                self._record_block(lag, stack)
+
+    def _watchdog(self):
+        # Checa 4x por limite: bloqueios pouco acima do limite ainda têm stack capturada
+        while not self._stop.wait(self.threshold / 4):
+            with self._lock:
+                stalled = time.perf_counter() - self._last_beat - self.interval
+                if stalled < self.threshold or self._pending is not None:
+                    continue
+
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            try:
+                stack = traceback.extract_stack(frame, limit=STACK_DEPTH)
+            finally:
+                del frame
+
+            with self._lock:
+                self._pending = stack
+
+    def _record_block(self, lag: float, stack: Optional[List[traceback.FrameSummary]]):
+        location, blocking_call = self._describe(stack)
+        stack_lines = traceback.format_list(stack[-STACK_LINES_KEPT:]) if stack else []
+        lag_ms = lag * 1000
+
+        with self._lock:
+            self._blocks += 1
+            if stack is None:
+                self._unattributed += 1
+
+            offender = self._offenders.get(location)
+            if offender is None:
+                offender = self._offenders[location] = {
+                    "location": location,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                }
+            offender["count"] += 1
+            offender["total_ms"] += lag_ms
+            offender["max_ms"] = max(offender["max_ms"], lag_ms)
+            offender["last_ms"] = lag_ms
+            offender["last_at"] = datetime.now().isoformat(timespec="seconds")
+            offender["blocking_call"] = blocking_call
+            offender["stack"] = stack_lines
+
+            if len(self._offenders) > self.max_offenders:
+                smallest = min(self._offenders.values(), key=lambda o: o["total_ms"])
+                self._offenders.pop(smallest["location"], None)
+
+        logger.warning(
+            f"🐢 Event loop bloqueado por {lag_ms:.0f}ms em {location} (chamada: {blocking_call})"
+            + ("\n" + "".join(stack_lines) if stack_lines else "")
+        )
+
+    @staticmethod
+    def _describe(stack: Optional[List[traceback.FrameSummary]]) -> tuple:
+        """(frame mais interno do app, frame mais interno de todos) da stack capturada"""
+        if not stack:
+            return "desconhecido (bloqueio curto demais para capturar a stack)", None
+
+        innermost = stack[-1]
+        blocking_call = f"{Path(innermost.filename).name}:{innermost.lineno} ({innermost.name})"
+
+        for frame in reversed(stack):
+            if frame.filename.startswith(APP_ROOT) and frame.filename != __file__:
+                relative = Path(frame.filename).relative_to(Path(APP_ROOT).parent)
+                return f"{relative}:{frame.lineno} ({frame.name})", blocking_call
+
+        return blocking_call, blocking_call
+
+    def get_stats(self, limit: int = 20) -> dict:
+        """
+        Retorna lag recente e os maiores ofensores (por tempo total bloqueado)
+
+        Args:
+            limit: Quantos ofensores retornar
+
+        Returns:
+            Dict com lag (p50/p99/max do último minuto), totais e lista de ofensores
+        """
+        with self._lock:
+            samples = sorted(self._samples)
+            offenders = sorted(self._offenders.values(), key=lambda o: o["total_ms"], reverse=True)[:limit]
+            offenders = [
+                {
+                    **o,
+                    "total_ms": round(o["total_ms"], 1),
+                    "max_ms": round(o["max_ms"], 1),
+                    "last_ms": round(o["last_ms"], 1),
+                    "avg_ms": round(o["total_ms"] / o["count"], 1),
+                }
+                for o in offenders
+            ]
+            blocks, unattributed = self._blocks, self._unattributed
+
+        def pct(p: float) -> float:
+            if not samples:
+                return 0.0
+            return round(samples[min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))] * 1000, 1)
+
+        return {
+            "running": self.running,
+            "interval_ms": round(self.interval * 1000),
+            "block_threshold_ms": round(self.threshold * 1000),
+            "lag_ms": {
+                "p50": pct(50),
+                "p99": pct(99),
+                "max": round(samples[-1] * 1000, 1) if samples else 0.0,
+                "mean": round(statistics.mean(samples) * 1000, 2) if samples else 0.0,
+            },
+            "blocks_total": blocks,
+            "blocks_without_stack": unattributed,
+            "offenders": offenders,
+        }
+
+    def reset(self):
+        """Zera ofensores e contadores (ex.: depois de um deploy com correção)"""
+        with self._lock:
+            self._offenders.clear()
+            self._blocks = 0
+            self._unattributed = 0
+            self._samples.clear()
+
+    def render_prometheus(self) -> str:
+        """Métricas smith_event_loop_* no formato texto do Prometheus"""
+        with self._lock:
+            buckets = list(self._histogram.buckets)
+            total, count = self._histogram.sum, self._histogram.count
+            blocks = self._blocks
+
+        lines = [
+            "# HELP smith_event_loop_lag_seconds Atraso do heartbeat do event loop",
+            "# TYPE smith_event_loop_lag_seconds histogram",
+        ]
+        for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+            lines.append(f'smith_event_loop_lag_seconds_bucket{{le="{bound}"}} {bucket_count}')
+        lines.append(f'smith_event_loop_lag_seconds_bucket{{le="+Inf"}} {count}')
+        lines.append(f"smith_event_loop_lag_seconds_sum {total:.6f}")
+        lines.append(f"smith_event_loop_lag_seconds_count {count}")
+        lines.append("# HELP smith_event_loop_blocks_total Bloqueios do event loop acima do limite")
+        lines.append("# TYPE smith_event_loop_blocks_total counter")
+        lines.append(f"smith_event_loop_blocks_total {blocks}")
+        return "\n".join(lines) + "\n"
+
+
+# Instância global
+_loop_monitor: Optional[LoopMonitor] = None
+
+
+def get_loop_monitor() -> LoopMonitor:
+    """
+    Retorna instância global do LoopMonitor (singleton)
+
+    Returns:
+        LoopMonitor configurado via LOOP_MONITOR_*
+    """
+    global _loop_monitor
+
+    if _loop_monitor is None:
+        _loop_monitor = LoopMonitor(
+            interval_ms=settings.loop_monitor_interval_ms,
+            block_ms=settings.loop_monitor_block_ms,
+            max_offenders=settings.loop_monitor_max_offenders,
+        )
+
+    return _loop_monitor
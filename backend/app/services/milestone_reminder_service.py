@@ -2,8 +2,10 @@
 Serviço de Lembretes de Marcos de Projetos
 Envia lembretes automáticos via WhatsApp sobre prazos de projetos
 """
+import asyncio
+import time
 from datetime import date, datetime
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 from uuid import UUID
 from loguru import logger
 
@@ -15,6 +17,61 @@ from app.repository.milestone_repository import MilestoneRepository
 from app.services.uazapi_service import UazapiService
 
 
+class _RecipientRateLimiter:
+    """Garante um intervalo mínimo entre mensagens para o mesmo número"""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = max(0.0, min_interval)
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._next_slot: Dict[str, float] = {}
+
+    async def wait(self, recipient: str):
+        """Aguarda a vez do destinatário (envios para números diferentes não esperam)"""
+        lock = self._locks.setdefault(recipient, asyncio.Lock())
+        async with lock:
+            delay = self._next_slot.get(recipient, 0.0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_slot[recipient] = time.monotonic() + self.min_interval
+
+
+class _ReminderProgress:
+    """
+    Acumula resultados de envio e grava em lote (mark_reminders_sent)
+
+    Gravar a cada batch_size resultados limita o que uma queda pode reenviar
+    a no máximo um lote (+ envios em andamento).
+    """
+
+    def __init__(self, milestone_repo: MilestoneRepository, batch_size: int):
+        self.milestone_repo = milestone_repo
+        self.batch_size = max(1, batch_size)
+        self.sent = 0
+        self.failed = 0
+        self._pending: List[Tuple[UUID, bool, Optional[str]]] = []
+
+    async def add(self, reminder_id: UUID, success: bool, error_message: Optional[str] = None):
+        self._pending.append((reminder_id, success, error_message))
+        if success:
+            self.sent += 1
+        else:
+            self.failed += 1
+
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        try:
+            await self.milestone_repo.mark_reminders_sent(batch)
+        except Exception as e:
+            # Lease continua no banco: após REMINDER_CLAIM_LEASE_SECONDS voltam para a fila
+            logger.error(f"❌ Erro ao gravar progresso de {len(batch)} lembretes: {e}")
+
+
 class MilestoneReminderService:
     """Serviço para envio de lembretes de marcos de projetos"""
 
@@ -31,7 +88,12 @@ class MilestoneReminderService:
         """
         Verifica e envia lembretes pendentes do dia
 
-        Chamado diariamente via cron job
+        Chamado diariamente via cron job. Os lembretes são reservados em lotes
+        (claim com lease no banco), enviados com concorrência limitada e
+        respeitando um intervalo mínimo por destinatário; o resultado é gravado
+        em lotes (um UPDATE por lote). Se a execução cair no meio, a próxima
+        continua de onde parou: lembretes já gravados como enviados não são
+        reenviados e os pendentes dos últimos REMINDER_CATCHUP_DAYS dias entram.
 
         Returns:
             dict com estatísticas de envio
@@ -44,101 +106,110 @@ class MilestoneReminderService:
         if overdue_count > 0:
             logger.warning(f"⚠️  {overdue_count} marcos marcados como ATRASADOS")
 
-        # 2. Buscar lembretes pendentes do dia
-        reminders = await self.milestone_repo.get_pending_reminders(today)
+        # 2. Reservar e enviar lembretes pendentes, lote a lote
+        semaphore = asyncio.Semaphore(max(1, settings.reminder_dispatch_concurrency))
+        limiter = _RecipientRateLimiter(settings.reminder_min_interval_seconds)
+        progress = _ReminderProgress(
+            self.milestone_repo,
+            batch_size=settings.reminder_progress_batch
+        )
+
+        while True:
+            reminders = await self.milestone_repo.claim_pending_reminders(
+                today,
+                catchup_days=settings.reminder_catchup_days,
+                limit=settings.reminder_claim_batch,
+                lease_seconds=settings.reminder_claim_lease_seconds
+            )
+            if not reminders:
+                break
 
-        if not reminders:
+            logger.info(f"📬 {len(reminders)} lembretes reservados para envio")
+
+            await asyncio.gather(*[
+                self._dispatch(reminder, milestone, semaphore, limiter, progress)
+                for reminder, milestone in reminders
+            ])
+            await progress.flush()
+
+        if progress.sent == 0 and progress.failed == 0:
             logger.info("✅ Nenhum lembrete pendente para hoje")
-            return {
-                "date": str(today),
-                "reminders_sent": 0,
-                "reminders_failed": 0,
-                "overdue_marked": overdue_count
-            }
-
-        logger.info(f"📬 Encontrados {len(reminders)} lembretes para enviar")
-
-        # 3. Enviar cada lembrete
-        sent_count = 0
-        failed_count = 0
-
-        for reminder, milestone in reminders:
-            success = await self._send_reminder(reminder, milestone)
-            if success:
-                sent_count += 1
-            else:
-                failed_count += 1
-
-        logger.info(
-            f"✅ Lembretes enviados: {sent_count} | "
-            f"❌ Falhas: {failed_count}"
-        )
+        else:
+            logger.info(
+                f"✅ Lembretes enviados: {progress.sent} | "
+                f"❌ Falhas: {progress.failed}"
+            )
 
         return {
             "date": str(today),
-            "reminders_sent": sent_count,
-            "reminders_failed": failed_count,
+            "reminders_sent": progress.sent,
+            "reminders_failed": progress.failed,
             "overdue_marked": overdue_count
         }
 
+    async def _dispatch(
+        self,
+        reminder: ScheduledReminder,
+        milestone: Milestone,
+        semaphore: asyncio.Semaphore,
+        limiter: "_RecipientRateLimiter",
+        progress: "_ReminderProgress"
+    ):
+        """Envia um lembrete dentro do limite de concorrência e registra o resultado"""
+        async with semaphore:
+            success, error_message = await self._send_reminder(reminder, milestone, limiter)
+        await progress.add(reminder.id, success, error_message)
+
     async def _send_reminder(
         self,
         reminder: ScheduledReminder,
-        milestone: Milestone
-    ) -> bool:
+        milestone: Milestone,
+        limiter: Optional["_RecipientRateLimiter"] = None
+    ) -> Tuple[bool, Optional[str]]:
         """
         Envia um lembrete individual via WhatsApp
 
+        Não grava no banco: o resultado é registrado em lote pelo chamador.
+
         Args:
             reminder: Lembrete a ser enviado
             milestone: Marco relacionado
+            limiter: Intervalo mínimo entre mensagens para o mesmo destinatário
 
         Returns:
-            True se enviado com sucesso, False caso contrário
+            (True, None) se enviado com sucesso, (False, erro) caso contrário
         """
         try:
+            if reminder.metodo != "whatsapp":
+                # Email não implementado ainda
+                logger.warning(f"Método {reminder.metodo} não suportado ainda")
+                return False, "Método de envio não suportado"
+
             # Montar mensagem
             message = self._build_reminder_message(reminder, milestone)
 
-            # Enviar via WhatsApp
-            if reminder.metodo == "whatsapp":
-                await self.uazapi_service.send_text_message(
-                    phone_number=self.admin_whatsapp,
-                    message=message
-                )
-            else:
-                # Email não implementado ainda
-                logger.warning(f"Método {reminder.metodo} não suportado ainda")
-                await self.milestone_repo.mark_reminder_sent(
-                    reminder.id,
-                    success=False,
-                    error_message="Método de envio não suportado"
-                )
-                return False
+            if limiter:
+                await limiter.wait(self.admin_whatsapp)
 
-            # Marcar como enviado
-            await self.milestone_repo.mark_reminder_sent(
-                reminder.id,
-                success=True
+            # Enviar via WhatsApp (cliente UAZAPI é síncrono - roda fora do event loop)
+            sent = await asyncio.to_thread(
+                self.uazapi_service.send_text_message,
+                phone_number=self.admin_whatsapp,
+                message=message
             )
+            if not sent:
+                logger.error(f"❌ UAZAPI não confirmou o lembrete {reminder.id}")
+                return False, "UAZAPI não confirmou o envio"
 
             logger.info(
                 f"✅ Lembrete enviado: {milestone.nome} "
                 f"({reminder.tipo.value})"
             )
-            return True
+            return True, None
 
         except Exception as e:
             logger.error(f"❌ Erro ao enviar lembrete {reminder.id}: {e}")
-
-            # Registrar erro no banco
-            await self.milestone_repo.mark_reminder_sent(
-                reminder.id,
-                success=False,
-                error_message=str(e)
-            )
-
-            return False
+            return False, str(e)
 
     def _build_reminder_message(
         self,
@@ -245,10 +316,14 @@ class MilestoneReminderService:
                 milestones
             )
 
-            await self.uazapi_service.send_text_message(
+            sent = await asyncio.to_thread(
+                self.uazapi_service.send_text_message,
                 phone_number=self.admin_whatsapp,
                 message=message
             )
+            if not sent:
+                logger.error(f"❌ UAZAPI não confirmou o resumo do projeto #{project_id}")
+                return False
 
             logger.info(f"✅ Resumo de marcos enviado: Projeto #{project_id}")
             return True
@@ -0,0 +1,363 @@
+"""
+Fila de pesquisas de empresa em background
+
+Substitui o asyncio.create_task solto do webhook:
+- Workers limitados (RESEARCH_QUEUE_WORKERS) e fila limitada (RESEARCH_QUEUE_SIZE):
+  rajadas de leads não abrem crawls/LLM ilimitados
+- Prioridade: pesquisa que o agente está aguardando > site recém-enviado > nome da empresa
+- Dedup por domínio (em redes sociais/link na bio, por perfil) ou nome da empresa:
+  o mesmo site pedido por vários leads/turnos vira um job só; job concluído há pouco
+  também não é repetido
+- Retry com backoff (RESEARCH_QUEUE_MAX_ATTEMPTS) e status de cada job
+  (queued/running/done/failed) em GET /api/analytics/research
+
+Prefetch: o webhook enfileira assim que aparece URL na mensagem ou o nome da
+empresa do lead, então o insight costuma estar no cache quando o agente chega
+na oferta de ROI.
+
+Os workers rodam num event loop próprio, em thread dedicada: chamadas síncronas no
+loop principal (cliente Supabase, UAZAPI) não atrasam o prefetch, que avança em
+paralelo ao agente (smith_graph.invoke, em thread); o agente só espera o que falta
+(RESEARCH_AGENT_WAIT_SECONDS) com ResearchJob.wait.
+"""
+import asyncio
+import concurrent.futures
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from app.config import settings
+from app.services.llm_gateway import llm_priority, LLMPriority
+
+
+class ResearchPriority(IntEnum):
+    """Prioridade dos jobs (menor valor = atendido primeiro)"""
+    AGENTE = 0  # Agente aguardando o insight neste turno
+    URL = 1     # Lead acabou de mandar o site
+    NOME = 2    # Só o nome da empresa (insight inferido)
+
+
+_EMAIL = re.compile(r"\S+@\S+")
+
+# Job concluído há menos que isso não é repetido (se falhou, não insistir a cada mensagem)
+FINISHED_DEDUP_SECONDS = 15 * 60
+RETRY_BACKOFF_SECONDS = 5.0
+
+
+@dataclass
+class ResearchJob:
+    """Pesquisa de uma empresa (por domínio ou nome) e seu status"""
+    key: str  # Domínio normalizado ou "nome:<empresa>"
+    lead: Any = field(repr=False)
+    url: Optional[str]
+    priority: int
+    status: str = "queued"  # queued | running | done | failed
+    attempts: int = 0
+    lead_ids: List[str] = field(default_factory=list)
+    insight: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    future: concurrent.futures.Future = field(default_factory=concurrent.futures.Future, repr=False)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def wait(self, timeout: float) -> Optional[str]:
+        """Bloqueia até o insight ficar pronto (qualquer thread) ou timeout → None"""
+        try:
+            return self.future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "key": self.key,
+            "url": self.url,
+            "priority": ResearchPriority(self.priority).name.lower(),
+            "status": self.status,
+            "attempts": self.attempts,
+            "lead_ids": self.lead_ids,
+            "insight": self.insight[:80] if self.insight else None,
+            "error": self.error,
+            "queued_ms": round(((self.started_at or time.time()) - self.created_at) * 1000, 1),
+            "duration_ms": round((self.finished_at - self.started_at) * 1000, 1)
+            if self.started_at and self.finished_at else None,
+        }
+
+
+class ResearchQueue:
+    """Fila com prioridade + pool de workers num event loop dedicado (thread própria)"""
+
+    def __init__(self, workers: int = 2, queue_size: int = 100, max_attempts: int = 2, history: int = 200):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.max_attempts = max(1, max_attempts)
+        self.history = max(1, history)
+        self._lock = threading.Lock()
+        # key → job mais recente (ativos + histórico dos últimos concluídos)
+        self._jobs: "OrderedDict[str, ResearchJob]" = OrderedDict()
+        self._pending = 0  # jobs em status queued
+        self._seq = itertools.count()
+        self._thread: Optional[threading.Thread] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stats = {"submitted": 0, "deduplicated": 0, "rejected": 0, "done": 0, "failed": 0, "retries": 0}
+
+    # ----------------
+    # LOOP DEDICADO
+    # ----------------
+
+    def _ensure_started(self):
+        """Sobe a thread com o event loop e os workers (no primeiro job)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            # Loop e fila existem antes da thread: outro submit que veja a thread viva
+            # já pode chamar _put (call_soon_threadsafe roda quando o loop começar)
+            loop = asyncio.new_event_loop()
+            self._loop = loop
+            self._queue = asyncio.PriorityQueue()
+            self._thread = threading.Thread(
+                target=self._run_loop, args=(loop,), name="research-queue", daemon=True
+            )
+            self._thread.start()
+        logger.info(f"🔎 Fila de pesquisas iniciada ({self.workers} workers)")
+
+    def _run_loop(self, loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def _put(self, job: ResearchJob):
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (job.priority, next(self._seq), job))
+
+    # ----------------
+    # SUBMISSÃO
+    # ----------------
+
+    def submit(
+        self,
+        lead,
+        url: Optional[str] = None,
+        priority: ResearchPriority = ResearchPriority.URL
+    ) -> Optional[ResearchJob]:
+        """
+        Enfileira pesquisa da empresa do lead (thread-safe, não bloqueia)
+
+        Args:
+            lead: Lead
+            url: Site (sem url = pesquisa pelo nome da empresa)
+            priority: ResearchPriority
+
+        Returns:
+            Job (novo ou o já existente para o mesmo domínio/nome) ou None se
+            já há insight em cache, não há o que pesquisar ou a fila está cheia
+        """
+        from app.services.empresa_research_service import InsightCache, empresa_research_service
+
+        key = InsightCache.domain(url) if url else InsightCache.name_key(getattr(lead, "empresa", None))
+        if not key:
+            return None
+        if url:
+            empresa_research_service.cache.link_lead(lead.id, key)
+
+        lead_id = str(lead.id)
+        with self._lock:
+            job = self._jobs.get(key)
+            recent = job is not None and (
+                job.active or time.time() - (job.finished_at or 0) < FINISHED_DEDUP_SECONDS
+            )
+            if recent:
+                self._stats["deduplicated"] += 1
+                if lead_id not in job.lead_ids:
+                    job.lead_ids.append(lead_id)
+                # Agente esperando: job ainda na fila passa na frente (entrada antiga é ignorada)
+                if job.status == "queued" and priority < job.priority:
+                    job.priority = int(priority)
+                    self._put(job)
+                return job
+
+        if empresa_research_service.cache.get(key, persistent=False):
+            return None
+
+        self._ensure_started()
+        with self._lock:
+            if self._pending >= self.queue_size:
+                self._stats["rejected"] += 1
+                logger.warning(f"⚠️ Fila de pesquisas cheia ({self.queue_size}) - {key} descartado")
+                return None
+            job = ResearchJob(key=key, lead=lead, url=url, priority=int(priority), lead_ids=[lead_id])
+            job.future.set_running_or_notify_cancel()
+            self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            self._pending += 1
+            self._stats["submitted"] += 1
+            self._trim_history()
+            self._put(job)
+
+        logger.info(f"🔎 Pesquisa enfileirada: {key} (lead {lead_id}, prioridade {ResearchPriority(priority).name})")
+        return job
+
+    def prefetch(self, lead, message: Optional[str] = None) -> Optional[ResearchJob]:
+        """
+        Enfileira a melhor pesquisa disponível para o lead
+
+        URL na mensagem (e-mails ignorados) > site_url da qualificação > nome da empresa (RESEARCH_PREFETCH_BY_NAME)
+        """
+        from app.services.website_research_service import website_research_service
+
+        # E-mail não é site: "joao@gmail.com" viraria pesquisa de gmail.com
+        url = website_research_service.extract_url(_EMAIL.sub(" ", message)) if message else None
+        if url:
+            return self.submit(lead, url=url, priority=ResearchPriority.URL)
+
+        qd = getattr(lead, "qualification_data", None)
+        if qd and qd.site_url and qd.site_url != "sem_site":
+            return self.submit(lead, url=qd.site_url, priority=ResearchPriority.URL)
+
+        if settings.research_prefetch_by_name and getattr(lead, "empresa", None):
+            return self.submit(lead, priority=ResearchPriority.NOME)
+        return None
+
+    def _trim_history(self):
+        """Mantém só os últimos `history` jobs concluídos (chamar com _lock)"""
+        finished = [key for key, job in self._jobs.items() if not job.active]
+        for key in finished[:max(0, len(self._jobs) - self.history)]:
+            del self._jobs[key]
+
+    # ----------------
+    # WORKERS
+    # ----------------
+
+    async def _worker(self):
+        while True:
+            priority, _, job = await self._queue.get()
+            try:
+                with self._lock:
+                    # Entrada antiga de job repriorizado (ou já executado)
+                    if job.status != "queued" or priority != job.priority:
+                        continue
+                    self._pending -= 1
+                    job.status = "running"
+                    job.started_at = time.time()
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro no worker da fila de pesquisas: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: ResearchJob):
+        from app.services.empresa_research_service import empresa_research_service
+
+        # Agente aguardando = resposta ao vivo; prefetch não compete com o atendimento
+        llm_class = LLMPriority.INTERATIVO if job.priority == ResearchPriority.AGENTE else LLMPriority.BACKGROUND
+        insight = None
+
+        try:
+            for attempt in range(1, self.max_attempts + 1):
+                job.attempts = attempt
+                try:
+                    with llm_priority(llm_class):
+                        if job.url:
+                            insight = await empresa_research_service.get_or_research_insight(job.lead, job.url)
+                        else:
+                            insight = await empresa_research_service.get_or_research_by_name(job.lead)
+                    if insight:
+                        break
+                    job.error = "pesquisa sem insight"
+                except Exception as e:
+                    job.error = str(e)
+                    logger.warning(f"⚠️ Pesquisa {job.key} falhou (tentativa {attempt}): {e}")
+
+                if attempt < self.max_attempts:
+                    with self._lock:
+                        self._stats["retries"] += 1
+                    await asyncio.sleep(RETRY_BACKOFF_SECONDS * attempt)
+        finally:
+            # Sempre libera quem espera (inclusive se o worker for cancelado no shutdown)
+            with self._lock:
+                job.finished_at = time.time()
+                job.insight = insight
+                job.status = "done" if insight else "failed"
+                if insight:
+                    job.error = None
+                self._stats[job.status] += 1
+            job.future.set_result(insight)
+
+    # ----------------
+    # STATUS
+    # ----------------
+
+    def get_job(self, key: str) -> Optional[ResearchJob]:
+        with self._lock:
+            return self._jobs.get(key)
+
+    def get_stats(self, limit: int = 20) -> Dict[str, Any]:
+        """
+        Retorna estado da fila
+
+        Returns:
+            Workers, jobs na fila/rodando, contadores e os últimos jobs (mais recente primeiro)
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+            stats = dict(self._stats)
+            pending = self._pending
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queued": pending,
+            "running": sum(1 for job in jobs if job.status == "running"),
+            **stats,
+            "jobs": [job.to_dict() for job in reversed(jobs[-limit:])],
+        }
+
+    async def stop(self):
+        """Cancela workers, fecha a sessão do crawler do loop dedicado e encerra a thread"""
+        if self._loop is None or self._thread is None or not self._thread.is_alive():
+            return
+
+        async def _shutdown():
+            from app.services.website_crawler import get_website_crawler
+
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            await get_website_crawler().close()
+
+        try:
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(_shutdown(), self._loop))
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            await asyncio.to_thread(self._thread.join, 5)
+
+
+_research_queue: Optional[ResearchQueue] = None
+
+
+def get_research_queue() -> ResearchQueue:
+    """Fila de pesquisas compartilhada pelo processo"""
+    global _research_queue
+    if _research_queue is None:
+        _research_queue = ResearchQueue(
+            workers=settings.research_queue_workers,
+            queue_size=settings.research_queue_size,
+            max_attempts=settings.research_queue_max_attempts,
+        )
+    return _research_queue
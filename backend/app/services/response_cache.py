@@ -0,0 +1,338 @@
+"""
+Cache de respostas para perguntas frequentes dos leads
+("quanto custa?", "como funciona?", "vocês fazem site?")
+
+Chave = stage do lead + pergunta normalizada:
+1. Hash exato (sha1) da pergunta normalizada
+2. Opcional: similaridade por embedding local (sentence-transformers) dentro do mesmo stage
+
+Só entra no cache:
+- Stage não excluído (RESPONSE_CACHE_EXCLUDED_STAGES) — stages personalizados ficam fora
+- Pergunta de FAQ conhecida (curta, sobre preço/funcionamento/integrações..., sem números/URL/email)
+- Turno em que o agente NÃO mudou o status do lead
+- Resposta sem números (ROI, valores e horários são específicos do lead)
+
+Nome e empresa do lead viram placeholders ao salvar e são preenchidos ao servir.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict
+
+from loguru import logger
+
+from app.config import settings
+from app.services.intent_detector import normalize_text
+from app.services.tracing import get_tracer
+
+
+# Pergunta curta e genérica (sem dados pessoais)
+MAX_PALAVRAS_PERGUNTA = 15
+
+_SAUDACAO_INICIAL = re.compile(r"^(?:(?:oi+e?|ola|opa|e ai|bom dia|boa tarde|boa noite|tudo bem)\b[\s,!.]*)+")
+_PONTUACAO = re.compile(r"[^\w\s]")
+_ESPACOS = re.compile(r"\s+")
+_NUMEROS = re.compile(r"\d")
+_DADOS_PESSOAIS = re.compile(r"\d|@|https?://|www\.|\.com\b|\.br\b")
+# Forma de pergunta sem "?": começa com interrogativo ("quanto custa", "como funciona")
+_INTERROGATIVO = re.compile(r"^(?:quanto|como|qual|quais|o que|oque|onde|quando|por que|da pra|e possivel)\b")
+# Assuntos de FAQ: a resposta não depende do histórico da conversa
+_ASSUNTO_FAQ = re.compile(
+    r"\b(?:quanto custa|custa|custo|preco|precos|valor|valores|investimento|mensalidade|plano|planos|"
+    r"pagamento|parcela|funciona|funcionam|integra|integram|integracao|integracoes|crm|whatsapp|instagram|"
+    r"sistema|plataforma|ferramenta|automacao|automatizar|agente|chatbot|bot|inteligencia artificial|ia|"
+    r"site|sites|landing page|trafego|suporte|contrato|fidelidade|garantia|prazo|implantacao|"
+    r"implementacao|demonstracao|demo|teste gratis|periodo de teste|nota fiscal|empresa de voces)\b"
+)
+# Palavras sem conteúdo: "como assim?", "pode ser?", "qual?" dependem da conversa
+_PALAVRAS_VAZIAS = {
+    "a", "o", "as", "os", "e", "de", "do", "da", "dos", "das", "em", "no", "na", "um", "uma",
+    "que", "oque", "qual", "quais", "como", "quanto", "quando", "onde", "porque", "por", "pra",
+    "para", "com", "sem", "assim", "isso", "isto", "esse", "essa", "ai", "la", "ne", "sim", "nao",
+    "serio", "pode", "ser", "faz", "sentido", "tem", "vc", "vcs", "voce", "voces", "eu", "me",
+    "mim", "entao", "mas", "ok", "certo", "tipo", "mesmo", "ja", "tambem", "beleza",
+}
+
+
+def normalize_question(message: str) -> str:
+    """
+    Normaliza pergunta para a chave do cache
+
+    "Oi! Quanto CUSTA??" → "quanto custa"
+    """
+    text = normalize_text(message).strip()
+    text = _SAUDACAO_INICIAL.sub("", text)
+    text = _PONTUACAO.sub(" ", text)
+    return _ESPACOS.sub(" ", text).strip()
+
+
+def is_faq_question(message: str) -> bool:
+    """
+    True se a mensagem é pergunta genérica de FAQ (cacheável)
+
+    Precisa ter forma de pergunta ("?" ou interrogativo no início), tratar de um assunto
+    conhecido (preço, funcionamento, integrações...) e ter ao menos uma palavra de
+    conteúdo: "como assim?" depende da conversa e "não tenho site" é resposta de
+    qualificação, não pergunta.
+    """
+    if _DADOS_PESSOAIS.search(message.lower()):
+        return False
+    normalized = normalize_question(message)
+    if not normalized or len(normalized.split()) > MAX_PALAVRAS_PERGUNTA:
+        return False
+    if "?" not in message and not _INTERROGATIVO.match(normalized):
+        return False
+    if not any(word not in _PALAVRAS_VAZIAS for word in normalized.split()):
+        return False
+    return bool(_ASSUNTO_FAQ.search(normalized))
+
+
+def _parse_stages(raw: str) -> set:
+    return {s.strip().lower() for s in (raw or "").split(",") if s.strip()}
+
+
+class ResponseCache:
+    """
+    Cache LRU com TTL de respostas do agente por (stage, pergunta)
+
+    Uso:
+        cached = response_cache.get(stage, message, lead)
+        ...
+        response_cache.put(stage, message, response, lead)
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int,
+        max_entries: int,
+        excluded_stages: set,
+        use_embeddings: bool = False,
+        similarity_threshold: float = 0.92,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.excluded_stages = excluded_stages
+        self.similarity_threshold = similarity_threshold
+
+        # {hash: {"stage", "question", "response", "expires_at", "vector"}}
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        self._embedder = self._init_embedder() if use_embeddings else None
+
+        logger.info(
+            f"🗄️ ResponseCache inicializado (ttl={ttl_seconds}s, max={max_entries}, "
+            f"embeddings={'on' if self._embedder else 'off'})"
+        )
+
+    def _init_embedder(self):
+        """Carrega modelo de embedding local - apenas se sentence-transformers estiver instalado"""
+        try:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(settings.response_cache_embedding_model)
+            logger.info(f"🧮 Embeddings do cache: {settings.response_cache_embedding_model}")
+            return model
+        except ImportError:
+            logger.warning("⚠️ sentence-transformers não instalado - cache só por hash exato")
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao carregar embeddings do cache: {e} - cache só por hash exato")
+        return None
+
+    def _embed(self, text: str):
+        if not self._embedder:
+            return None
+        try:
+            return self._embedder.encode(text, normalize_embeddings=True)
+        except Exception as e:
+            logger.debug(f"Erro ao gerar embedding: {e}")
+            return None
+
+    @staticmethod
+    def _key(stage: str, question: str) -> str:
+        return hashlib.sha1(f"{stage}|{question}".encode("utf-8")).hexdigest()
+
+    def _count(self, stage: str, field: str):
+        stage_stats = self._stats.setdefault(stage, {"hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0})
+        stage_stats[field] += 1
+
+    def is_stage_cacheable(self, stage: str) -> bool:
+        return bool(stage) and stage.lower() not in self.excluded_stages
+
+    # ----------------
+    # PERSONALIZAÇÃO
+    # ----------------
+
+    @staticmethod
+    def _personal_values(lead) -> Dict[str, str]:
+        values = {}
+        nome = lead.nome.split()[0] if lead and lead.nome else ""
+        if len(nome) >= 3:
+            values["nome"] = nome
+        if lead and lead.empresa and len(lead.empresa) >= 3:
+            values["empresa"] = lead.empresa
+        return values
+
+    def _to_template(self, response: str, lead) -> Optional[str]:
+        if "{" in response or "}" in response:
+            return None  # Evita conflito com str.format
+        if _NUMEROS.search(response):
+            return None  # ROI, valores, datas: específicos do lead/momento
+        template = response
+        for field, value in self._personal_values(lead).items():
+            template = re.sub(r"\b" + re.escape(value) + r"\b", "{" + field + "}", template)
+        return template
+
+    def _render(self, template: str, lead) -> Optional[str]:
+        try:
+            return template.format(**self._personal_values(lead))
+        except (KeyError, IndexError, ValueError):
+            return None  # Lead atual não tem o dado usado na resposta
+
+    # ----------------
+    # GET / PUT
+    # ----------------
+
+    def get(self, stage: str, message: str, lead=None) -> Optional[str]:
+        """
+        Busca resposta em cache para a pergunta no stage
+
+        Returns:
+            Resposta pronta (personalizada para o lead) ou None
+        """
+        if not self.is_stage_cacheable(stage) or not is_faq_question(message):
+            return None
+
+        question = normalize_question(message)
+        key = self._key(stage, question)
+        now = time.time()
+        semantic = False
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry["expires_at"] < now:
+                del self._entries[key]
+                entry = None
+
+        if entry is None and self._embedder:
+            vector = self._embed(question)
+            if vector is not None:
+                key, entry = self._most_similar(stage, vector, now)
+                semantic = entry is not None
+
+        with self._lock:
+            if entry is None:
+                self._count(stage, "misses")
+                get_tracer().record_cache("response_cache", False)
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self._count(stage, "semantic_hits" if semantic else "hits")
+
+        get_tracer().record_cache("response_cache", True)
+        response = self._render(entry["response"], lead)
+        if response:
+            logger.info(
+                f"🗄️ Cache {'semântico' if semantic else 'exato'} hit (stage={stage}): '{question[:50]}'"
+            )
+        return response
+
+    def _most_similar(self, stage: str, vector, now: float):
+        best_key, best_entry, best_score = None, None, self.similarity_threshold
+        with self._lock:
+            candidates = [
+                (k, e) for k, e in self._entries.items()
+                if e["stage"] == stage and e["vector"] is not None and e["expires_at"] >= now
+            ]
+        for k, e in candidates:
+            score = float((e["vector"] * vector).sum())  # Vetores normalizados → cosseno
+            if score >= best_score:
+                best_key, best_entry, best_score = k, e, score
+        return best_key, best_entry
+
+    def put(self, stage: str, message: str, response: str, lead=None) -> bool:
+        """
+        Salva resposta do agente no cache (se stage/pergunta forem cacheáveis)
+
+        Returns:
+            True se a resposta foi armazenada
+        """
+        if not response or not self.is_stage_cacheable(stage) or not is_faq_question(message):
+            return False
+
+        template = self._to_template(response, lead)
+        if not template:
+            return False
+
+        question = normalize_question(message)
+        vector = self._embed(question)
+
+        with self._lock:
+            self._entries[self._key(stage, question)] = {
+                "stage": stage,
+                "question": question,
+                "response": template,
+                "expires_at": time.time() + self.ttl_seconds,
+                "vector": vector,
+            }
+            self._entries.move_to_end(self._key(stage, question))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._count(stage, "stores")
+
+        logger.debug(f"🗄️ Resposta cacheada (stage={stage}): '{question[:50]}'")
+        return True
+
+    def clear(self):
+        """Limpa todo o cache (ex: após mudar prompts)"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> dict:
+        """
+        Retorna estatísticas do cache
+
+        Returns:
+            Dict com entries, hit_ratio e contadores por stage
+        """
+        with self._lock:
+            by_stage = {stage: dict(s) for stage, s in self._stats.items()}
+            entries = len(self._entries)
+
+        hits = sum(s["hits"] + s["semantic_hits"] for s in by_stage.values())
+        lookups = hits + sum(s["misses"] for s in by_stage.values())
+        return {
+            "enabled": settings.response_cache_enabled,
+            "entries": entries,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "embeddings": self._embedder is not None,
+            "excluded_stages": sorted(self.excluded_stages),
+            "by_stage": by_stage,
+        }
+
+
+# Instância global do cache
+_response_cache: ResponseCache = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Retorna instância global do ResponseCache
+
+    Returns:
+        Instância singleton do cache ou None se desabilitado (RESPONSE_CACHE_ENABLED=false)
+    """
+    global _response_cache
+    if not settings.response_cache_enabled:
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            ttl_seconds=settings.response_cache_ttl_seconds,
+            max_entries=settings.response_cache_max_entries,
+            excluded_stages=_parse_stages(settings.response_cache_excluded_stages),
+            use_embeddings=settings.response_cache_embeddings,
+            similarity_threshold=settings.response_cache_similarity,
+        )
+    return _response_cache
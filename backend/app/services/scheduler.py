@@ -0,0 +1,642 @@
+"""
+Agendador de jobs dentro do processo (substitui o cron externo)
+
+Jobs ficam na tabela scheduled_jobs (migration 014): sobrevivem a deploys e podem
+ser agendados de qualquer worker com get_scheduler().schedule(). Só um worker dispara:
+
+- Líder: pg_try_advisory_lock numa conexão dedicada (fora do pool). Se o processo
+  morrer, a conexão cai e o lock é liberado; os outros workers tentam a cada tick
+- Roda de tempo (timer wheel): o líder carrega para memória só os jobs das próximas
+  SCHEDULER_HORIZON_MINUTES (uma consulta a cada SCHEDULER_REFILL_MINUTES) e dispara
+  por slot a cada SCHEDULER_TICK_SECONDS, sem consultar o banco a cada tick
+- Jobs novos dentro do horizonte chegam por NOTIFY na mesma conexão do lock
+  (LISTEN; conn.poll() não faz round-trip), então entram na roda no tick seguinte
+- Disparo: claim atômico (status pendente → executando) evita execução dupla
+  na troca de líder; erro = retry com backoff até SCHEDULER_MAX_ATTEMPTS;
+  executando há mais de STALE_RUNNING_SECONDS (líder caiu) volta para pendente
+
+Handlers são registrados por tipo (register) e podem devolver o próximo horário
+(job recorrente ou próxima tentativa de follow-up). Ver app/services/scheduler_jobs.py.
+"""
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+from app.config import settings
+
+
+# Chave do pg_advisory_lock do líder (qualquer bigint fixo, único no banco)
+LEADER_LOCK_KEY = 7_316_482_047
+NOTIFY_CHANNEL = "smith_scheduler"
+
+# Job em execução há mais que isso sem concluir = líder caiu no meio
+STALE_RUNNING_SECONDS = 15 * 60
+RETRY_BACKOFF_SECONDS = 60
+STOP_TIMEOUT_SECONDS = 10
+REFILL_LIMIT = 1000
+
+# Modos de schedule() quando o job (kind, ref_id) já existe:
+# - replace: reagenda sempre (volta para pendente mesmo se concluído)
+# - move: só move job ainda pendente (concluído/em execução não volta)
+# - ensure: só reativa job parado (concluído/erro/cancelado); pendente fica como está
+UPSERT_MODES = {
+    "replace": "",
+    "move": "WHERE scheduled_jobs.status = 'pendente'",
+    "ensure": "WHERE scheduled_jobs.status IN ('concluido', 'erro', 'cancelado')",
+}
+
+
+@dataclass
+class ScheduledJob:
+    """Job carregado da tabela scheduled_jobs no momento do disparo"""
+    id: int
+    kind: str
+    ref_id: str
+    run_at: datetime
+    payload: Dict[str, Any] = field(default_factory=dict)
+    attempts: int = 0
+
+
+JobHandler = Callable[[ScheduledJob], Awaitable[Optional[datetime]]]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: datetime) -> datetime:
+    """Datetime sem fuso = horário local do servidor (como o resto do app usa datetime.now())"""
+    return value.astimezone() if value.tzinfo is None else value
+
+
+class TimerWheel:
+    """
+    Roda de tempo com slots de `slot_seconds`
+
+    Cada job vai para o slot do seu horário (módulo o número de slots); o tick só olha
+    os slots que passaram desde o último tick. Reagendar um job já na roda só troca o
+    horário registrado: a entrada antiga é descartada quando o slot dela passar.
+    """
+
+    def __init__(self, slot_seconds: float, slots: int):
+        self.slot_seconds = max(1.0, slot_seconds)
+        self.slots: List[Dict[int, float]] = [{} for _ in range(max(1, slots))]
+        self._due: Dict[int, float] = {}
+        self._cursor: Optional[int] = None  # Último slot totalmente processado
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    @property
+    def horizon_seconds(self) -> float:
+        return self.slot_seconds * len(self.slots)
+
+    def _tick_of(self, ts: float) -> int:
+        return int(ts // self.slot_seconds)
+
+    def add(self, job_id: int, run_at_ts: float, now_ts: float) -> bool:
+        """Coloca o job na roda (False se estiver além do horizonte)"""
+        if run_at_ts - now_ts >= self.horizon_seconds:
+            return False
+        if self._due.get(job_id) == run_at_ts:
+            return True
+
+        tick = self._tick_of(run_at_ts)
+        if self._cursor is not None and tick <= self._cursor:
+            tick = self._cursor + 1  # Atrasado: sai no próximo tick
+        self._due[job_id] = run_at_ts
+        self.slots[tick % len(self.slots)][job_id] = run_at_ts
+        return True
+
+    def discard(self, job_id: int):
+        self._due.pop(job_id, None)
+
+    def pop_due(self, now_ts: float) -> List[int]:
+        """Jobs vencidos nos slots entre o último tick e agora (slot atual é revisto no próximo)"""
+        current = self._tick_of(now_ts)
+        start = current if self._cursor is None else self._cursor + 1
+        start = max(start, current - len(self.slots) + 1)
+        due = []
+
+        for tick in range(start, current + 1):
+            slot = self.slots[tick % len(self.slots)]
+            for job_id, run_at_ts in list(slot.items()):
+                if self._due.get(job_id) != run_at_ts:
+                    del slot[job_id]  # Reagendado/descartado
+                elif run_at_ts <= now_ts:
+                    del slot[job_id]
+                    del self._due[job_id]
+                    due.append(job_id)
+
+        self._cursor = current - 1  # Slot atual ainda pode ter jobs para daqui a pouco
+        return due
+
+    def clear(self):
+        for slot in self.slots:
+            slot.clear()
+        self._due.clear()
+        self._cursor = None
+
+
+class JobStore:
+    """Acesso à tabela scheduled_jobs (SQLAlchemy síncrono - chamar via asyncio.to_thread)"""
+
+    def _execute(self, sql: str, params: Optional[dict] = None, fetch: str = "all"):
+        from sqlalchemy import text
+        from app.database import new_session
+
+        db = new_session()
+        try:
+            result = db.execute(text(sql), params or {})
+            rows = None
+            if fetch == "all":
+                rows = result.fetchall()
+            elif fetch == "one":
+                rows = result.fetchone()
+            db.commit()
+            return rows
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def upsert(
+        self,
+        kind: str,
+        ref_id: str,
+        run_at: datetime,
+        payload: Optional[dict],
+        mode: str,
+        notify_before: datetime
+    ) -> Optional[int]:
+        """
+        Cria ou reagenda o job (kind, ref_id) - ver UPSERT_MODES
+
+        Returns:
+            ID do job, ou None se o job existente não se enquadra no modo
+        """
+        conflict_filter = UPSERT_MODES[mode]
+        row = self._execute(f"""
+            WITH job AS (
+                INSERT INTO scheduled_jobs (kind, ref_id, run_at, payload, status, attempts)
+                VALUES (:kind, :ref_id, :run_at, CAST(:payload AS jsonb), 'pendente', 0)
+                ON CONFLICT (kind, ref_id) DO UPDATE
+                SET run_at = EXCLUDED.run_at,
+                    payload = EXCLUDED.payload,
+                    status = 'pendente',
+                    attempts = 0,
+                    last_error = NULL,
+                    locked_at = NULL,
+                    updated_at = NOW()
+                {conflict_filter}
+                RETURNING id, run_at
+            )
+            SELECT
+                job.id,
+                CASE WHEN job.run_at < :notify_before
+                     THEN pg_notify(:channel, job.id || '|' || extract(epoch FROM job.run_at))
+                END
+            FROM job
+        """, {
+            "kind": kind,
+            "ref_id": ref_id,
+            "run_at": run_at,
+            "payload": json.dumps(payload or {}),
+            "notify_before": notify_before,
+            "channel": NOTIFY_CHANNEL,
+        }, fetch="one")
+        return row[0] if row else None
+
+    def cancel(self, kind: str, ref_id: str) -> bool:
+        row = self._execute("""
+            UPDATE scheduled_jobs
+            SET status = 'cancelado', locked_at = NULL, updated_at = NOW()
+            WHERE kind = :kind AND ref_id = :ref_id AND status = 'pendente'
+            RETURNING id
+        """, {"kind": kind, "ref_id": ref_id}, fetch="one")
+        return row is not None
+
+    def load_window(self, until: datetime) -> List[tuple]:
+        """Libera jobs presos em execução e retorna (id, run_at) pendentes até `until`"""
+        return self._execute("""
+            WITH liberados AS (
+                UPDATE scheduled_jobs
+                SET status = 'pendente', locked_at = NULL, updated_at = NOW()
+                WHERE status = 'executando'
+                  AND locked_at < NOW() - make_interval(secs => :stale_seconds)
+                RETURNING id, run_at
+            )
+            SELECT id, run_at FROM liberados
+            UNION ALL
+            SELECT id, run_at FROM (
+                SELECT id, run_at FROM scheduled_jobs
+                WHERE status = 'pendente' AND run_at < :until
+                ORDER BY run_at
+                LIMIT :limit
+            ) pendentes
+        """, {"until": until, "stale_seconds": STALE_RUNNING_SECONDS, "limit": REFILL_LIMIT})
+
+    def claim(self, job_id: int, slack_seconds: float) -> Optional[ScheduledJob]:
+        row = self._execute("""
+            UPDATE scheduled_jobs
+            SET status = 'executando', locked_at = NOW(),
+                attempts = attempts + 1, updated_at = NOW()
+            WHERE id = :id
+              AND status = 'pendente'
+              AND run_at <= NOW() + make_interval(secs => :slack)
+            RETURNING id, kind, ref_id, run_at, payload, attempts
+        """, {"id": job_id, "slack": slack_seconds}, fetch="one")
+        if not row:
+            return None
+        return ScheduledJob(
+            id=row.id,
+            kind=row.kind,
+            ref_id=row.ref_id,
+            run_at=row.run_at,
+            payload=row.payload or {},
+            attempts=row.attempts,
+        )
+
+    def finish(
+        self,
+        job_id: int,
+        next_run_at: Optional[datetime] = None,
+        error: Optional[str] = None,
+        failed: bool = False
+    ):
+        """Conclui, reagenda (next_run_at) ou marca erro - só se o job não foi reagendado no meio"""
+        if next_run_at is not None:
+            status = "pendente"
+        else:
+            status = "erro" if failed else "concluido"
+        self._execute("""
+            UPDATE scheduled_jobs
+            SET status = :status,
+                run_at = COALESCE(:next_run_at, run_at),
+                attempts = CASE WHEN :reset THEN 0 ELSE attempts END,
+                last_error = :error,
+                locked_at = NULL,
+                updated_at = NOW()
+            WHERE id = :id AND status = 'executando'
+        """, {
+            "id": job_id,
+            "status": status,
+            "next_run_at": next_run_at,
+            "reset": error is None,
+            "error": error,
+        }, fetch=None)
+
+    def counts(self) -> Dict[str, int]:
+        rows = self._execute("""
+            SELECT status, COUNT(*) AS total FROM scheduled_jobs GROUP BY status
+        """)
+        return {row.status: row.total for row in rows}
+
+
+class _LeaderConnection:
+    """Conexão dedicada que segura o advisory lock e escuta o NOTIFY (síncrona)"""
+
+    def __init__(self):
+        self._conn = None
+
+    def try_acquire(self) -> bool:
+        from app.database import get_engine
+
+        if self._conn is None:
+            pooled = get_engine().raw_connection()
+            pooled.detach()  # Fora do pool: vive enquanto o processo for líder
+            self._conn = pooled
+            self._conn.driver_connection.autocommit = True
+
+        cursor = self._conn.cursor()
+        try:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", (LEADER_LOCK_KEY,))
+            acquired = bool(cursor.fetchone()[0])
+            if acquired:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            return acquired
+        finally:
+            cursor.close()
+
+    def drain(self) -> List[str]:
+        """Payloads de NOTIFY recebidos (levanta erro se a conexão caiu)"""
+        conn = self._conn.driver_connection
+        conn.poll()
+        payloads = [notify.payload for notify in conn.notifies]
+        conn.notifies.clear()
+        return payloads
+
+    def close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()  # Encerra a sessão → libera o advisory lock
+            except Exception:
+                pass
+            self._conn = None
+
+
+class Scheduler:
+    """Agendador com eleição de líder, roda de tempo e handlers por tipo de job"""
+
+    def __init__(
+        self,
+        tick_seconds: float = 30.0,
+        horizon_minutes: int = 60,
+        refill_minutes: int = 15,
+        max_concurrency: int = 4,
+        max_attempts: int = 3,
+    ):
+        self.tick_seconds = max(1.0, tick_seconds)
+        self.horizon = timedelta(minutes=max(1, horizon_minutes))
+        self.refill_interval = max(60.0, refill_minutes * 60.0)
+        self.max_attempts = max(1, max_attempts)
+        self.store = JobStore()
+        self.wheel = TimerWheel(
+            self.tick_seconds,
+            int(self.horizon.total_seconds() // self.tick_seconds) + 1
+        )
+
+        self._handlers: Dict[str, JobHandler] = {}
+        self._startup_hooks: List[Callable[[], Awaitable[None]]] = []
+        self._leader = _LeaderConnection()
+        self._is_leader = False
+        self._last_refill = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._running: set = set()
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        self._stats = {
+            "ticks": 0,
+            "refills": 0,
+            "notifications": 0,
+            "fired": 0,
+            "succeeded": 0,
+            "retried": 0,
+            "failed": 0,
+            "skipped": 0,
+            "leadership_changes": 0,
+        }
+        self._by_kind: Dict[str, Dict[str, int]] = {}
+        self._last_error: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # Registro e agendamento
+    # ------------------------------------------------------------------
+
+    def register(self, kind: str, handler: JobHandler):
+        """Registra o handler de um tipo de job"""
+        self._handlers[kind] = handler
+
+    def on_leadership(self, hook: Callable[[], Awaitable[None]]):
+        """Hook chamado ao virar líder (ex.: garantir jobs recorrentes)"""
+        self._startup_hooks.append(hook)
+
+    async def schedule(
+        self,
+        kind: str,
+        ref_id: str,
+        run_at: datetime,
+        payload: Optional[dict] = None,
+        mode: str = "replace"
+    ) -> Optional[int]:
+        """
+        Agenda (ou reagenda) o job único (kind, ref_id)
+
+        Pode ser chamado de qualquer worker: jobs dentro do horizonte avisam o líder por NOTIFY.
+
+        Args:
+            mode: replace | move | ensure (ver UPSERT_MODES)
+
+        Returns:
+            ID do job, ou None se o job existente não se enquadra no modo
+        """
+        if mode not in UPSERT_MODES:
+            raise ValueError(f"Modo de agendamento inválido: {mode}")
+        return await asyncio.to_thread(
+            self.store.upsert,
+            kind,
+            str(ref_id),
+            _aware(run_at),
+            payload,
+            mode,
+            _utcnow() + self.horizon,
+        )
+
+    async def cancel(self, kind: str, ref_id: str) -> bool:
+        """Cancela um job ainda pendente"""
+        return await asyncio.to_thread(self.store.cancel, kind, str(ref_id))
+
+    # ------------------------------------------------------------------
+    # Loop principal
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Inicia o loop do agendador (chamar de dentro do event loop)"""
+        if self.running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        logger.info(
+            f"⏰ Agendador iniciado (tick={self.tick_seconds:.0f}s, "
+            f"horizonte={self.horizon.total_seconds() / 60:.0f}min, "
+            f"tipos={sorted(self._handlers)})"
+        )
+
+    async def stop(self):
+        """Para o loop, aguarda jobs em andamento e libera a liderança"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._running:
+            # Job interrompido fica "executando" e volta para a fila após STALE_RUNNING_SECONDS
+            _, pending = await asyncio.wait(self._running, timeout=STOP_TIMEOUT_SECONDS)
+            for task in pending:
+                task.cancel()
+        await asyncio.to_thread(self._leader.close)
+        self._set_leader(False)
+
+    async def _run(self):
+        while True:
+            try:
+                await self._tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._last_error = str(e)
+                logger.error(f"❌ Erro no tick do agendador: {e}")
+
+            # Alinha ao próximo slot da roda (precisão de um tick)
+            now = time.time()
+            await asyncio.sleep(self.tick_seconds - (now % self.tick_seconds))
+
+    async def _tick(self):
+        self._stats["ticks"] += 1
+
+        if not self._is_leader:
+            try:
+                acquired = await asyncio.to_thread(self._leader.try_acquire)
+            except Exception as e:
+                await asyncio.to_thread(self._leader.close)
+                raise RuntimeError(f"eleição de líder falhou: {e}") from e
+            if not acquired:
+                return
+            self._set_leader(True)
+            for hook in self._startup_hooks:
+                try:
+                    await hook()
+                except Exception as e:
+                    logger.error(f"❌ Erro ao preparar jobs recorrentes: {e}")
+            await self._refill()
+        else:
+            try:
+                payloads = await asyncio.to_thread(self._leader.drain)
+            except Exception as e:
+                logger.warning(f"⚠️ Conexão do líder caiu, liderança liberada: {e}")
+                await asyncio.to_thread(self._leader.close)
+                self._set_leader(False)
+                return
+            self._on_notifications(payloads)
+
+            if time.monotonic() - self._last_refill >= self.refill_interval:
+                await self._refill()
+
+        for job_id in self.wheel.pop_due(time.time()):
+            task = asyncio.get_running_loop().create_task(self._execute(job_id))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    def _set_leader(self, leader: bool):
+        if leader == self._is_leader:
+            return
+        self._is_leader = leader
+        self._stats["leadership_changes"] += 1
+        if leader:
+            logger.success("👑 Este worker é o líder do agendador")
+        else:
+            self.wheel.clear()
+
+    def _on_notifications(self, payloads: List[str]):
+        now_ts = time.time()
+        for payload in payloads:
+            self._stats["notifications"] += 1
+            try:
+                job_id, run_at_ts = payload.split("|", 1)
+                self.wheel.add(int(job_id), float(run_at_ts), now_ts)
+            except ValueError:
+                logger.debug(f"NOTIFY ignorado: {payload}")
+
+    async def _refill(self):
+        rows = await asyncio.to_thread(self.store.load_window, _utcnow() + self.horizon)
+        now_ts = time.time()
+        for job_id, run_at in rows:
+            self.wheel.add(job_id, _aware(run_at).timestamp(), now_ts)
+        self._last_refill = time.monotonic()
+        self._stats["refills"] += 1
+        logger.debug(f"⏰ Roda recarregada: {len(self.wheel)} jobs no horizonte")
+
+    # ------------------------------------------------------------------
+    # Execução
+    # ------------------------------------------------------------------
+
+    def _count(self, kind: str, key: str):
+        self._stats[key] += 1
+        per_kind = self._by_kind.setdefault(kind, {"succeeded": 0, "failed": 0, "retried": 0})
+        if key in per_kind:
+            per_kind[key] += 1
+
+    async def _execute(self, job_id: int):
+        async with self._semaphore:
+            job = await asyncio.to_thread(self.store.claim, job_id, self.tick_seconds)
+            if job is None:
+                # Reagendado, cancelado ou já executado por outro líder
+                self._stats["skipped"] += 1
+                return
+
+            self._stats["fired"] += 1
+            handler = self._handlers.get(job.kind)
+            if handler is None:
+                logger.error(f"❌ Job {job.id} sem handler registrado: {job.kind}")
+                await asyncio.to_thread(
+                    self.store.finish, job.id, None, f"Tipo sem handler: {job.kind}", True
+                )
+                self._count(job.kind, "failed")
+                return
+
+            try:
+                next_run_at = await handler(job)
+            except Exception as e:
+                if job.attempts < self.max_attempts:
+                    retry_at = _utcnow() + timedelta(seconds=RETRY_BACKOFF_SECONDS * job.attempts)
+                    logger.warning(
+                        f"⚠️ Job {job.kind}:{job.ref_id} falhou (tentativa {job.attempts}), "
+                        f"nova tentativa às {retry_at:%H:%M}: {e}"
+                    )
+                    await asyncio.to_thread(self.store.finish, job.id, retry_at, str(e))
+                    self.wheel.add(job.id, retry_at.timestamp(), time.time())
+                    self._count(job.kind, "retried")
+                else:
+                    logger.error(f"❌ Job {job.kind}:{job.ref_id} falhou definitivamente: {e}")
+                    await asyncio.to_thread(self.store.finish, job.id, None, str(e), True)
+                    self._count(job.kind, "failed")
+                return
+
+            if next_run_at is not None:
+                next_run_at = _aware(next_run_at)
+                self.wheel.add(job.id, next_run_at.timestamp(), time.time())
+            await asyncio.to_thread(self.store.finish, job.id, next_run_at)
+            self._count(job.kind, "succeeded")
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estado do agendador
+
+        Returns:
+            Liderança, jobs na roda, contadores (por tipo) e jobs na tabela por status
+        """
+        try:
+            table = await asyncio.to_thread(self.store.counts)
+        except Exception as e:
+            table = {"error": str(e)}
+        return {
+            "running": self.running,
+            "leader": self._is_leader,
+            "tick_seconds": self.tick_seconds,
+            "horizon_minutes": self.horizon.total_seconds() / 60,
+            "wheel_jobs": len(self.wheel),
+            "in_flight": len(self._running),
+            "handlers": sorted(self._handlers),
+            **self._stats,
+            "by_kind": self._by_kind,
+            "jobs_by_status": table,
+            "last_error": self._last_error,
+        }
+
+
+_scheduler: Optional[Scheduler] = None
+
+
+def get_scheduler() -> Scheduler:
+    """Agendador compartilhado pelo processo"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = Scheduler(
+            tick_seconds=settings.scheduler_tick_seconds,
+            horizon_minutes=settings.scheduler_horizon_minutes,
+            refill_minutes=settings.scheduler_refill_minutes,
+            max_concurrency=settings.scheduler_max_concurrency,
+            max_attempts=settings.scheduler_max_attempts,
+        )
+    return _scheduler
@@ -0,0 +1,301 @@
+"""
+Jobs do agendador: lembretes de marcos, follow-up de leads e lembretes de reunião
+
+- milestone_reminders (recorrente, ref "diario"): roda run_daily_reminders todo dia às
+  SCHEDULER_REMINDERS_HOUR no fuso DEFAULT_TIMEZONE (antes era o cron externo
+  app/cron/daily_reminders.py)
+- agendamentos_varredura (recorrente, ref "proximos"): a cada
+  SCHEDULER_APPOINTMENT_SWEEP_MINUTES busca as reuniões das próximas 25h
+  (get_proximos_agendamentos) e agenda um job por lembrete (24h, 3h, 30min antes)
+- agendamento_lembrete (ref "<agendamento_id>:<tipo>"): envia o lembrete ao lead
+- lead_followup (ref lead_id): lead sem responder recebe follow-up nos intervalos de
+  FollowUpConfig.intervalo_horas; cada resposta do agente reagenda (schedule_lead_followup)
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+from zoneinfo import ZoneInfo
+
+from loguru import logger
+
+from app.config import settings
+from app.models.lead import Lead, LeadStatus
+from app.services.scheduler import Scheduler, ScheduledJob
+
+
+# Lembretes de reunião: tipo (coluna lembrete_<tipo>_enviado) → antecedência
+APPOINTMENT_REMINDERS = (
+    ("24h", timedelta(hours=24)),
+    ("3h", timedelta(hours=3)),
+    ("30min", timedelta(minutes=30)),
+)
+
+# Lead nestes status não recebe follow-up automático
+FOLLOWUP_FINAL_STATUSES = {
+    LeadStatus.AGENDAMENTO_MARCADO.value,
+    LeadStatus.GANHO.value,
+    LeadStatus.PERDIDO.value,
+}
+
+# Mensagem por tentativa (a última se repete se intervalo_horas tiver mais entradas)
+FOLLOWUP_MESSAGES = (
+    "Oi {nome}, tudo bem? Ficou alguma dúvida sobre o que conversamos? "
+    "Estou por aqui se quiser continuar 🙂",
+    "Oi {nome}, passando para saber se ainda faz sentido falarmos sobre automação "
+    "do seu atendimento. Posso te ajudar com algo?",
+    "Oi {nome}! Vou deixar nossa conversa em pausa por aqui. "
+    "Quando quiser retomar, é só me mandar uma mensagem 👋",
+)
+
+_leads_repository = None
+_agendamentos_repository = None
+
+
+def _leads_repo():
+    global _leads_repository
+    if _leads_repository is None:
+        from app.repository.leads_repository import LeadsRepository
+        _leads_repository = LeadsRepository()
+    return _leads_repository
+
+
+def _agendamentos_repo():
+    global _agendamentos_repository
+    if _agendamentos_repository is None:
+        from app.repository.agendamentos_repository import AgendamentosRepository
+        _agendamentos_repository = AgendamentosRepository()
+    return _agendamentos_repository
+
+
+async def _send_whatsapp(phone: str, message: str):
+    """Envia pela UAZAPI (cliente síncrono, fora do event loop); levanta erro se falhar"""
+    from app.services.uazapi_service import get_uazapi_service
+
+    sent = await asyncio.to_thread(get_uazapi_service().send_text_message, phone, message)
+    if not sent:
+        raise RuntimeError("UAZAPI não confirmou o envio")
+
+
+def _personalize(template: str, lead: Lead) -> str:
+    """Preenche {nome} com o primeiro nome do lead (sem nome: "Oi!" em vez de "Oi !")"""
+    primeiro_nome = (lead.nome or "").strip().split(" ")[0]
+    message = template.format(nome=primeiro_nome)
+    return message.replace(" ,", ",").replace(" !", "!")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: datetime) -> datetime:
+    return value.astimezone() if value.tzinfo is None else value
+
+
+def _local_tz() -> ZoneInfo:
+    """Fuso do negócio (DEFAULT_TIMEZONE), independente do fuso do servidor"""
+    return ZoneInfo(settings.default_timezone)
+
+
+def next_daily_run(hour: int, now: Optional[datetime] = None) -> datetime:
+    """Próxima ocorrência de `hour`:00 no fuso DEFAULT_TIMEZONE (servidor em UTC não adianta o envio)"""
+    now = (now or _now()).astimezone(_local_tz())
+    run_at = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    if run_at <= now:
+        run_at += timedelta(days=1)
+    return run_at
+
+
+# ----------------------------------------------------------------------
+# Lembretes de marcos (antigo cron diário)
+# ----------------------------------------------------------------------
+
+async def run_milestone_reminders(job: ScheduledJob) -> datetime:
+    """Envia os lembretes de marcos do dia e agenda o dia seguinte"""
+    from app.cron.daily_reminders import run_daily_reminders
+
+    try:
+        await run_daily_reminders()
+    except Exception as e:
+        # Recorrente: não entra em retry/erro; o dispatcher retoma pendentes (REMINDER_CATCHUP_DAYS)
+        logger.error(f"❌ Lembretes de marcos falharam, próxima execução amanhã: {e}")
+    return next_daily_run(settings.scheduler_reminders_hour)
+
+
+# ----------------------------------------------------------------------
+# Lembretes de reunião
+# ----------------------------------------------------------------------
+
+async def sweep_appointments(job: ScheduledJob) -> datetime:
+    """Agenda um job por lembrete das reuniões das próximas 25h"""
+    from app.services.scheduler import get_scheduler
+
+    interval = timedelta(minutes=settings.scheduler_appointment_sweep_minutes)
+    now = _now()
+    scheduled = 0
+
+    agendamentos = await _agendamentos_repo().get_proximos_agendamentos(horas=25)
+    for agendamento in agendamentos:
+        data_hora = _aware(agendamento.data_hora)
+        for tipo, antecedencia in APPOINTMENT_REMINDERS:
+            if getattr(agendamento, f"lembrete_{tipo}_enviado", False):
+                continue
+            run_at = data_hora - antecedencia
+            if run_at < now - interval:
+                continue  # Reunião marcada em cima da hora: esse lembrete já não faz sentido
+            # "move": reunião remarcada move o job pendente, lembrete enviado não volta
+            job_id = await get_scheduler().schedule(
+                "agendamento_lembrete",
+                f"{agendamento.id}:{tipo}",
+                max(run_at, now),
+                {"agendamento_id": agendamento.id, "tipo": tipo},
+                mode="move",
+            )
+            if job_id is not None:
+                scheduled += 1
+
+    if scheduled:
+        logger.debug(f"📅 {scheduled} lembretes de reunião agendados/atualizados")
+    return now + interval
+
+
+async def send_appointment_reminder(job: ScheduledJob) -> None:
+    """Envia o lembrete de reunião ao lead (se a reunião ainda está de pé)"""
+    from app.models.agendamento import AgendamentoStatus
+
+    agendamento_id = job.payload.get("agendamento_id")
+    tipo = job.payload.get("tipo")
+    repo = _agendamentos_repo()
+
+    agendamento = await repo.get_by_id(agendamento_id)
+    if not agendamento or agendamento.status not in (
+        AgendamentoStatus.AGENDADO, AgendamentoStatus.CONFIRMADO
+    ):
+        return None
+    if getattr(agendamento, f"lembrete_{tipo}_enviado", False):
+        return None
+
+    data_hora = _aware(agendamento.data_hora)
+    if data_hora <= _now():
+        return None
+
+    lead = await _leads_repo().get_by_id(agendamento.lead_id)
+    if not lead:
+        return None
+
+    hora = data_hora.astimezone(_local_tz()).strftime("%d/%m às %H:%M")
+    prazo = {"24h": "amanhã", "3h": "daqui a pouco", "30min": "em 30 minutos"}.get(tipo, "em breve")
+    message = _personalize(f"Oi {{nome}}! Lembrete da nossa reunião {prazo} ({hora}) 📅", lead)
+    if agendamento.google_meet_link:
+        message += f"\n\n🔗 Link: {agendamento.google_meet_link}"
+
+    await _send_whatsapp(lead.telefone, message)
+    await repo.marcar_lembrete_enviado(agendamento.id, tipo)
+    logger.info(f"📅 Lembrete {tipo} enviado para {lead.nome} (reunião {hora})")
+    return None
+
+
+# ----------------------------------------------------------------------
+# Follow-up de leads
+# ----------------------------------------------------------------------
+
+def _followup_dict(tentativas: int, proxima: Optional[datetime], lead: Lead) -> Dict[str, Any]:
+    config = lead.followup_config
+    return {
+        "tentativas_realizadas": tentativas,
+        "proxima_tentativa": proxima.isoformat() if proxima else None,
+        "intervalo_horas": config.intervalo_horas,
+        "mensagem_template": config.mensagem_template,
+    }
+
+
+async def schedule_lead_followup(lead: Lead) -> Optional[Dict[str, Any]]:
+    """
+    Reagenda o follow-up do lead a partir de agora (chamado a cada resposta do agente)
+
+    Lead respondeu → tentativas voltam a zero e a próxima fica em intervalo_horas[0].
+
+    Returns:
+        followup_config para gravar no lead (None se o lead não recebe follow-up)
+    """
+    from app.services.scheduler import get_scheduler
+
+    intervalos = lead.followup_config.intervalo_horas
+    if not settings.scheduler_followups_enabled or not intervalos:
+        return None
+
+    scheduler = get_scheduler()
+    if lead.status in FOLLOWUP_FINAL_STATUSES:
+        await scheduler.cancel("lead_followup", lead.id)
+        return _followup_dict(0, None, lead)
+
+    proxima = _now() + timedelta(hours=intervalos[0])
+    await scheduler.schedule("lead_followup", lead.id, proxima, {"tentativa": 0})
+    return _followup_dict(0, proxima, lead)
+
+
+async def send_lead_followup(job: ScheduledJob) -> Optional[datetime]:
+    """Envia o follow-up da vez e devolve o horário do próximo (None = acabou)"""
+    repo = _leads_repo()
+    lead = await repo.get_by_id(job.ref_id)
+    if not lead or lead.status in FOLLOWUP_FINAL_STATUSES:
+        return None
+
+    config = lead.followup_config
+    tentativa = config.tentativas_realizadas
+    if tentativa >= len(config.intervalo_horas) or config.proxima_tentativa is None:
+        return None
+    if _aware(config.proxima_tentativa) > _now() + timedelta(minutes=1):
+        return None  # Reagendado (lead respondeu) - o job já foi movido
+
+    template = config.mensagem_template or FOLLOWUP_MESSAGES[min(tentativa, len(FOLLOWUP_MESSAGES) - 1)]
+    message = _personalize(template, lead)
+
+    await _send_whatsapp(lead.telefone, message)
+
+    tentativa += 1
+    proxima = None
+    if tentativa < len(config.intervalo_horas):
+        proxima = _now() + timedelta(hours=config.intervalo_horas[tentativa])
+
+    # Mensagem já saiu: erro daqui em diante não pode virar retry (reenviaria o follow-up)
+    try:
+        await repo.update(lead.id, {"followup_config": _followup_dict(tentativa, proxima, lead)})
+        await repo.add_conversation_message(
+            lead_id=lead.id,
+            role="assistant",
+            content=message,
+            metadata={"tipo": "followup", "tentativa": tentativa}
+        )
+        from langchain_core.messages import AIMessage
+        from app.agent import get_smith_graph, append_checkpoint_messages
+        # Checkpointer síncrono (e o grafo, se ainda não montado): fora do event loop
+        await asyncio.to_thread(
+            lambda: append_checkpoint_messages(get_smith_graph(), lead.id, [AIMessage(content=message)])
+        )
+    except Exception as e:
+        logger.error(f"❌ Follow-up enviado para {lead.nome}, mas não registrado: {e}")
+
+    logger.info(f"🔁 Follow-up {tentativa}/{len(config.intervalo_horas)} enviado para {lead.nome}")
+    return proxima
+
+
+# ----------------------------------------------------------------------
+# Registro
+# ----------------------------------------------------------------------
+
+def register_default_jobs(scheduler: Scheduler):
+    """Registra os handlers e garante os jobs recorrentes quando o worker vira líder"""
+    scheduler.register("milestone_reminders", run_milestone_reminders)
+    scheduler.register("agendamentos_varredura", sweep_appointments)
+    scheduler.register("agendamento_lembrete", send_appointment_reminder)
+    scheduler.register("lead_followup", send_lead_followup)
+
+    async def ensure_recurring():
+        # "ensure": cria se faltar (ou reativa se parou em erro); recorrente pendente fica como está
+        await scheduler.schedule(
+            "milestone_reminders", "diario",
+            next_daily_run(settings.scheduler_reminders_hour), mode="ensure"
+        )
+        await scheduler.schedule("agendamentos_varredura", "proximos", _now(), mode="ensure")
+
+    scheduler.on_leadership(ensure_recurring)
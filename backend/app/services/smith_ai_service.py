@@ -2,14 +2,15 @@
 Smith AI - Assistente Conversacional Inteligente
 Responde dúvidas, qualifica leads e conduz agendamentos
 """
+from functools import cached_property
 from typing import List, Optional
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_anthropic import ChatAnthropic
 from loguru import logger
 
 from app.models.lead import Lead
 from app.models.conversation import ConversationState, Message
-from app.config import settings
+from app.services.intent_detector import detect_scheduling_intent
+from app.services.llm_gateway import get_chat_model
 
 
 class SmithAIService:
@@ -17,14 +18,12 @@ class SmithAIService:
     IA Conversacional do Smith
     """
 
-    def __init__(self):
-        self.model = ChatAnthropic(
-            model=settings.claude_model,
-            temperature=0.7,
-            api_key=settings.anthropic_api_key,
-            max_tokens=2048,
-        )
+    @cached_property
+    def model(self):
+        """Modelo criado no primeiro uso (fora do import do app)"""
+        return get_chat_model(temperature=0.7, max_tokens=2048, task="conversa")
 
+    def __init__(self):
         # Prompt system do Smith
         self.system_prompt = """Você é o Smith, assistente inteligente da **AutomateX** (também conhecida como Automatexia).
 
@@ -177,62 +176,8 @@ Qual seu segmento? Te conto se já temos cases parecidos."
         Returns:
             True se detectou intenção de agendamento
         """
-        message_lower = message.lower()
-
-        # Palavras que indicam hesitação ou que o lead NÃO está pronto para agendar
-        negative_keywords = [
-            "duvida",
-            "dúvida",
-            "antes de",
-            "mas",
-            "porém",
-            "porem",
-            "ainda não",
-            "ainda nao",
-            "não sei",
-            "nao sei",
-            "talvez",
-            "primeiro",
-            "preciso saber",
-            "gostaria de saber",
-            "pode explicar",
-            "como funciona",
-            "quanto custa",
-            "qual o preço",
-            "qual o preco"
-        ]
-
-        # Se tem palavras negativas, NÃO é intenção de agendar
-        if any(neg in message_lower for neg in negative_keywords):
-            return False
-
-        # Palavras que indicam FORTE intenção de agendamento
-        strong_keywords = [
-            "quero agendar",
-            "quero marcar",
-            "vamos agendar",
-            "vamos marcar",
-            "pode agendar",
-            "pode marcar",
-            "horários disponíveis",
-            "horarios disponiveis",
-            "horários livres",
-            "horarios livres",
-            "agenda livre",
-            "quando você pode",
-            "quando voce pode",
-            "sugere horários",
-            "sugere horarios",
-            "mostre horários",
-            "mostre horarios"
-        ]
-
-        # Se tem palavras fortes, É intenção de agendar
-        if any(strong in message_lower for strong in strong_keywords):
-            return True
-
-        # Se não tem negativas nem fortes, não assume intenção de agendamento
-        return False
+        # Hesitação tem prioridade; depois pedidos explícitos ("quero agendar", "horários livres"...)
+        return detect_scheduling_intent(message)
 
     def _build_context(
         self,
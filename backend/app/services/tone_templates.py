@@ -1,9 +1,13 @@
 """
 Templates fixos em 2 versões: formal e informal.
-Usado pelo qualify_lead para espelhar o tom do lead.
+Usado pelo qualify_lead e pelo fast-path do webhook para espelhar o tom do lead.
 """
 
 TEMPLATES = {
+    "abertura": {
+        "informal": "Opa! Sou o Smith da AutomateX 👋 A gente cria soluções de IA que estão gerando em média 35% mais produtividade comercial pros nossos clientes.\n\nComo posso te chamar?",
+        "formal": "Olá! Sou Smith, da AutomateX. Desenvolvemos soluções de IA que têm gerado um aumento médio de 35% em produtividade comercial para nossos clientes.\n\nComo posso chamá-lo(a)?"
+    },
     "empresa_e_cargo": {
         "informal": "Opa, prazer {nome}! 👋\n\nMe fala — em qual empresa você está e o que você faz por lá?",
         "formal": "Olá, {nome}! Prazer em falar com você.\n\nPoderia me contar em qual empresa atua e qual é seu cargo?"
@@ -31,5 +35,17 @@ TEMPLATES = {
     "urgencia": {
         "informal": "Faz sentido, {nome}. Esse tipo de problema sangra lead bom todo dia que passa...\n\nIsso é urgente pra você resolver logo ou dá pra esperar alguns meses?",
         "formal": "Compreendo o cenário. Qual seria o prazo ideal para implementação de uma solução? É uma necessidade imediata ou pode ser planejada para os próximos meses?"
+    },
+    "escolher_horario": {
+        "informal": "Show! Qual desses horários funciona melhor pra você? Só me dizer o dia e horário (ex: quinta 16h) 📅",
+        "formal": "Perfeito. Qual dos horários apresentados é mais conveniente? Basta informar o dia e o horário (ex: quinta às 16h)."
+    },
+    "opt_out": {
+        "informal": "Tranquilo, {nome}! Não vou mais te mandar mensagem. Se um dia quiser retomar, é só chamar aqui 👋",
+        "formal": "Entendido, {nome}. Não enviaremos mais mensagens. Caso deseje retomar o contato futuramente, estaremos à disposição."
+    },
+    "opt_out_sem_nome": {
+        "informal": "Tranquilo! Não vou mais te mandar mensagem. Se um dia quiser retomar, é só chamar aqui 👋",
+        "formal": "Entendido. Não enviaremos mais mensagens. Caso deseje retomar o contato futuramente, estaremos à disposição."
     }
 }
@@ -0,0 +1,449 @@
+"""
+Tracing e métricas de latência do pipeline do Smith
+
+Responde "esse turno lento foi Supabase, Claude, Google Calendar ou Gemini?":
+- span(kind, name): mede um trecho (node do agente, chamada LLM, query Supabase...)
+  e alimenta o histograma smith_span_duration_seconds{kind,name,status}
+- turn(...): agrupa os spans de um turno do WhatsApp em um trace por lead
+  (GET /api/analytics/traces/{lead_id})
+- record_tokens / record_cache: contadores de tokens por modelo e hits/misses de cache
+- render_prometheus(): texto no formato Prometheus para o endpoint /metrics
+- OpenTelemetry opcional (OTEL_ENABLED=true): cada span também vira span OTLP
+
+O contexto (turno e span atual) é propagado via contextvars: funciona em
+asyncio.create_task, asyncio.to_thread e nos branches paralelos do LangGraph.
+"""
+import contextvars
+import functools
+import inspect
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager, ExitStack
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+from app.config import settings
+
+
+# Buckets (segundos) dos histogramas de latência: de queries rápidas a LLM/scraping lentos
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+# Spans que englobam outros (fora do tempo por categoria do turno)
+_AGGREGATE_KINDS = {"turn", "node", "pipeline"}
+
+# Limite de spans guardados por turno (loops longos não estouram memória)
+MAX_SPANS_PER_TURN = 200
+
+_current_turn: contextvars.ContextVar[Optional["TurnTrace"]] = contextvars.ContextVar(
+    "trace_turn", default=None
+)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "trace_span", default=None
+)
+
+
+class _Histogram:
+    """Histograma cumulativo no formato Prometheus"""
+
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+
+
+class Span:
+    """Trecho medido dentro de um turno"""
+
+    __slots__ = ("kind", "name", "attributes", "status", "start", "duration_ms", "offset_ms")
+
+    def __init__(self, kind: str, name: str, attributes: dict, offset_ms: float):
+        self.kind = kind
+        self.name = name
+        self.attributes = attributes
+        self.status = "ok"
+        self.start = time.perf_counter()
+        self.duration_ms = None
+        self.offset_ms = offset_ms
+
+    def set(self, **attributes):
+        """Adiciona atributos ao span (tokens, cache hit, tamanho da resposta...)"""
+        self.attributes.update({k: v for k, v in attributes.items() if v is not None})
+
+    def to_dict(self) -> dict:
+        return {
+            "kind": self.kind,
+            "name": self.name,
+            "status": self.status,
+            "offset_ms": round(self.offset_ms, 1),
+            "duration_ms": round(self.duration_ms, 1) if self.duration_ms is not None else None,
+            "attributes": self.attributes,
+        }
+
+
+class TurnTrace:
+    """Spans de um turno (mensagem do lead → resposta enviada)"""
+
+    def __init__(self, channel: str, phone: Optional[str], lead_id: Optional[str], message: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.channel = channel
+        self.phone = phone
+        self.lead_id = lead_id
+        self.message = (message or "")[:120]
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.duration_ms = None
+        self.status = "ok"
+        self.spans: List[Span] = []
+        self.dropped_spans = 0
+
+    def add(self, span: Span):
+        if len(self.spans) < MAX_SPANS_PER_TURN:
+            self.spans.append(span)
+        else:
+            self.dropped_spans += 1
+
+    def to_dict(self) -> dict:
+        # Só chamadas externas (turn/node/pipeline englobam as outras e contariam em dobro)
+        by_kind: Dict[str, float] = {}
+        for span in self.spans:
+            if span.duration_ms is not None and span.kind not in _AGGREGATE_KINDS:
+                by_kind[span.kind] = by_kind.get(span.kind, 0.0) + span.duration_ms
+        return {
+            "id": self.id,
+            "channel": self.channel,
+            "lead_id": self.lead_id,
+            "message": self.message,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 1) if self.duration_ms is not None else None,
+            "status": self.status,
+            "time_by_kind_ms": {k: round(v, 1) for k, v in by_kind.items()},
+            "spans": [s.to_dict() for s in self.spans],
+            "dropped_spans": self.dropped_spans,
+        }
+
+
+class Tracer:
+    """
+    Instrumentação do pipeline: spans, histogramas, contadores e traces por lead
+
+    Uso:
+        tracer = get_tracer()
+        with tracer.turn(channel="uazapi", phone=phone, message=msg):
+            with tracer.span("supabase", "get_by_telefone"):
+                ...
+    """
+
+    def __init__(self, max_leads: int, turns_per_lead: int):
+        self.max_leads = max_leads
+        self.turns_per_lead = turns_per_lead
+
+        self._lock = threading.Lock()
+        self._histograms: Dict[tuple, _Histogram] = {}
+        self._counters: Dict[tuple, float] = {}
+        # {lead_id: deque[TurnTrace]} em ordem LRU
+        self._turns: "OrderedDict[str, deque]" = OrderedDict()
+
+        self._otel = self._init_otel() if settings.otel_enabled else None
+
+        logger.info(
+            f"🔭 Tracer inicializado (traces: {max_leads} leads x {turns_per_lead} turnos, "
+            f"otel={'on' if self._otel else 'off'})"
+        )
+
+    def _init_otel(self):
+        """Configura exportação OTLP - apenas se opentelemetry estiver instalado"""
+        try:
+            from opentelemetry import trace
+            from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            provider = TracerProvider(resource=Resource.create({"service.name": settings.otel_service_name}))
+            provider.add_span_processor(
+                BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.otel_exporter_endpoint, insecure=True))
+            )
+            trace.set_tracer_provider(provider)
+            logger.info(f"🔭 OpenTelemetry exportando para {settings.otel_exporter_endpoint}")
+            return trace.get_tracer("smith")
+        except ImportError:
+            logger.warning("⚠️ opentelemetry não instalado - spans só locais (/metrics e traces)")
+        except Exception as e:
+            logger.warning(f"⚠️ Erro ao configurar OpenTelemetry: {e} - spans só locais")
+        return None
+
+    # ----------------
+    # SPANS
+    # ----------------
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attributes):
+        """
+        Mede um trecho e registra no histograma (e no turno atual, se houver)
+
+        Args:
+            kind: Categoria (node, llm, supabase, calendar, gemini, http, ...)
+            name: Nome do trecho (node, modelo, método)
+            **attributes: Atributos iniciais do span
+        """
+        turn = _current_turn.get()
+        offset_ms = (time.perf_counter() - turn.start) * 1000 if turn else 0.0
+        span = Span(kind, name, {k: v for k, v in attributes.items() if v is not None}, offset_ms)
+        if turn:
+            turn.add(span)
+
+        token = _current_span.set(span)
+        with ExitStack() as stack:
+            otel_span = None
+            if self._otel:
+                otel_span = stack.enter_context(self._otel.start_as_current_span(f"{kind}.{name}"))
+            try:
+                yield span
+            except BaseException:
+                span.status = "error"
+                raise
+            finally:
+                _current_span.reset(token)
+                elapsed = time.perf_counter() - span.start
+                span.duration_ms = elapsed * 1000
+                self._observe(kind, name, span.status, elapsed)
+                if otel_span is not None:
+                    self._export_attributes(otel_span, span)
+
+    def _observe(self, kind: str, name: str, status: str, elapsed_s: float):
+        key = (kind, name, status)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.observe(elapsed_s)
+
+    @staticmethod
+    def _export_attributes(otel_span, span: Span):
+        try:
+            otel_span.set_attribute("smith.kind", span.kind)
+            otel_span.set_attribute("smith.status", span.status)
+            for key, value in span.attributes.items():
+                if isinstance(value, (str, bool, int, float)):
+                    otel_span.set_attribute(f"smith.{key}", value)
+            turn = _current_turn.get()
+            if turn and turn.lead_id:
+                otel_span.set_attribute("smith.lead_id", str(turn.lead_id))
+        except Exception as e:
+            logger.debug(f"Erro ao exportar atributos OTel: {e}")
+
+    def annotate(self, **attributes):
+        """Adiciona atributos ao span atual (se houver)"""
+        span = _current_span.get()
+        if span is not None:
+            span.set(**attributes)
+
+    # ----------------
+    # TURNOS
+    # ----------------
+
+    @contextmanager
+    def turn(self, channel: str, phone: Optional[str] = None, lead_id: Optional[str] = None, message: str = ""):
+        """
+        Agrupa os spans de um turno do lead em um trace
+
+        O lead_id pode ser definido depois (set_turn_lead) quando o lead é carregado.
+        """
+        trace = TurnTrace(channel, phone, lead_id, message)
+        token = _current_turn.set(trace)
+        try:
+            with self.span("turn", channel):
+                yield trace
+        except BaseException:
+            trace.status = "error"
+            raise
+        finally:
+            _current_turn.reset(token)
+            trace.duration_ms = (time.perf_counter() - trace.start) * 1000
+            self._store_turn(trace)
+
+    def set_turn_lead(self, lead_id):
+        """Associa o turno atual ao lead (após get_or_create_lead)"""
+        turn = _current_turn.get()
+        if turn is not None:
+            turn.lead_id = str(lead_id)
+
+    def _store_turn(self, trace: TurnTrace):
+        key = trace.lead_id or (f"phone:{trace.phone}" if trace.phone else None)
+        if not key:
+            return
+        with self._lock:
+            turns = self._turns.get(key)
+            if turns is None:
+                turns = self._turns[key] = deque(maxlen=self.turns_per_lead)
+            turns.append(trace)
+            self._turns.move_to_end(key)
+            while len(self._turns) > self.max_leads:
+                self._turns.popitem(last=False)
+
+    def get_turns(self, lead_id: str) -> List[dict]:
+        """Traces dos últimos turnos do lead (mais recente primeiro)"""
+        with self._lock:
+            turns = list(self._turns.get(str(lead_id), ()))
+        return [t.to_dict() for t in reversed(turns)]
+
+    def get_recent_turns(self, limit: int = 50, slowest: bool = False) -> List[dict]:
+        """Resumo dos turnos recentes de todos os leads (ou os mais lentos)"""
+        with self._lock:
+            turns = [t for lead_turns in self._turns.values() for t in lead_turns]
+        if slowest:
+            turns.sort(key=lambda t: t.duration_ms or 0.0, reverse=True)
+        else:
+            turns.sort(key=lambda t: t.start, reverse=True)
+
+        summaries = []
+        for t in turns[:limit]:
+            summary = t.to_dict()
+            summary.pop("spans")
+            summaries.append(summary)
+        return summaries
+
+    # ----------------
+    # CONTADORES
+    # ----------------
+
+    def _inc(self, metric: str, labels: tuple, value: float = 1.0):
+        key = (metric, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def record_tokens(self, model: str, input_tokens: Optional[int], output_tokens: Optional[int]):
+        """Contabiliza tokens de uma chamada LLM (e anota no span atual)"""
+        if input_tokens:
+            self._inc("smith_llm_tokens_total", (("model", model), ("type", "input")), input_tokens)
+        if output_tokens:
+            self._inc("smith_llm_tokens_total", (("model", model), ("type", "output")), output_tokens)
+        self.annotate(input_tokens=input_tokens, output_tokens=output_tokens)
+
+    def record_cache(self, cache: str, hit: bool):
+        """Contabiliza hit/miss de um cache (e anota no span atual)"""
+        self._inc("smith_cache_events_total", (("cache", cache), ("result", "hit" if hit else "miss")))
+        self.annotate(**{f"{cache}_hit": hit})
+
+    # ----------------
+    # PROMETHEUS
+    # ----------------
+
+    @staticmethod
+    def _labels(pairs) -> str:
+        escaped = []
+        for key, value in pairs:
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+            escaped.append(f'{key}="{value}"')
+        return ",".join(escaped)
+
+    def render_prometheus(self) -> str:
+        """
+        Exporta métricas no formato texto do Prometheus (0.0.4)
+
+        Returns:
+            Texto para o endpoint /metrics
+        """
+        with self._lock:
+            histograms = {
+                key: (list(h.buckets), h.sum, h.count) for key, h in sorted(self._histograms.items())
+            }
+            counters = dict(sorted(self._counters.items()))
+
+        lines = [
+            "# HELP smith_span_duration_seconds Duração dos trechos do pipeline (nodes, LLM, Supabase, Calendar, Gemini)",
+            "# TYPE smith_span_duration_seconds histogram",
+        ]
+        for (kind, name, status), (buckets, total, count) in histograms.items():
+            base = (("kind", kind), ("name", name), ("status", status))
+            for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                lines.append(
+                    f"smith_span_duration_seconds_bucket{{{self._labels(base + (('le', bound),))}}} {bucket_count}"
+                )
+            lines.append(f"smith_span_duration_seconds_bucket{{{self._labels(base + (('le', '+Inf'),))}}} {count}")
+            lines.append(f"smith_span_duration_seconds_sum{{{self._labels(base)}}} {total:.6f}")
+            lines.append(f"smith_span_duration_seconds_count{{{self._labels(base)}}} {count}")
+
+        help_text = {
+            "smith_llm_tokens_total": "Tokens consumidos por modelo (input/output)",
+            "smith_cache_events_total": "Hits e misses dos caches (resposta, transcrição, insight...)",
+        }
+        for metric, text in help_text.items():
+            lines.append(f"# HELP {metric} {text}")
+            lines.append(f"# TYPE {metric} counter")
+            for (name, labels), value in counters.items():
+                if name == metric:
+                    lines.append(f"{metric}{{{self._labels(labels)}}} {value:g}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Instância global do tracer
+_tracer: Tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Retorna instância global do Tracer (singleton)
+
+    Returns:
+        Tracer
+    """
+    global _tracer
+
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer(
+                    max_leads=settings.trace_max_leads,
+                    turns_per_lead=settings.trace_turns_per_lead,
+                )
+
+    return _tracer
+
+
+def traced(kind: str, name: Optional[str] = None) -> Callable:
+    """
+    Decorator: mede a função (sync ou async) como um span
+
+    Args:
+        kind: Categoria do span (supabase, calendar, gemini, http...)
+        name: Nome do span (padrão: nome da função)
+
+    Exemplo:
+        @traced("supabase")
+        async def get_by_telefone(self, telefone): ...
+    """
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__name__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with get_tracer().span(kind, span_name):
+                    return await fn(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(kind, span_name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -2,7 +2,7 @@
 Cliente UAZAPI para envio de mensagens WhatsApp
 Baseado na implementação da instância Paula
 """
-import requests
+from functools import cached_property
 from typing import Optional
 from loguru import logger
 
@@ -23,6 +23,12 @@ class UazapiService:
             f"{self.base_url} | Instância: {self.instance_id}"
         )
 
+    @cached_property
+    def http(self):
+        """Sessão HTTP compartilhada (keep-alive; requests importado só no primeiro envio)"""
+        import requests
+        return requests.Session()
+
     def send_text_message(self, phone_number: str, message: str) -> bool:
         """
         Envia mensagem de texto via UAZAPI
@@ -63,7 +69,7 @@ class UazapiService:
 
             logger.info(f"📤 Enviando via UAZAPI para {phone_jid[:12]}...")
 
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = self.http.post(url, json=payload, headers=headers, timeout=30)
 
             if response.status_code == 200:
                 logger.success(f"✅ Mensagem enviada para {phone_jid}")
@@ -104,7 +110,7 @@ class UazapiService:
                 "duration": duration_ms
             }
 
-            response = requests.post(url, json=payload, headers=headers, timeout=5)
+            response = self.http.post(url, json=payload, headers=headers, timeout=5)
             return response.status_code == 200
 
         except Exception:
@@ -138,7 +144,7 @@ class UazapiService:
 
             logger.info(f"🎵 Enviando áudio via UAZAPI para {phone_clean[:8]}...")
 
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = self.http.post(url, json=payload, headers=headers, timeout=30)
 
             if response.status_code == 200:
                 logger.success(f"✅ Áudio enviado para {phone_clean}")
@@ -191,7 +197,7 @@ class UazapiService:
 
             logger.info(f"📄 Enviando documento via UAZAPI para {phone_clean[:8]}...")
 
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = self.http.post(url, json=payload, headers=headers, timeout=30)
 
             if response.status_code == 200:
                 logger.success(f"✅ Documento enviado para {phone_clean}")
@@ -239,7 +245,7 @@ class UazapiService:
 
             logger.info(f"🖼️ Enviando imagem via UAZAPI para {phone_clean[:8]}...")
 
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
+            response = self.http.post(url, json=payload, headers=headers, timeout=30)
 
             if response.status_code == 200:
                 logger.success(f"✅ Imagem enviada para {phone_clean}")
@@ -0,0 +1,457 @@
+"""
+Crawler de sites de leads (conteúdo para pesquisa de empresa)
+
+- Sessão aiohttp compartilhada: pool de conexões keep-alive e DNS em cache,
+  em vez de uma sessão nova (handshake TCP/TLS do zero) por pesquisa. Uma sessão
+  por event loop (loop principal e loop da fila de pesquisas - research_queue)
+- Homepage + páginas-chave (sobre, serviços, contato) descobertas nos links
+  da homepage e buscadas em paralelo, com limite de requisições simultâneas
+  por event loop (CRAWLER_MAX_CONCURRENCY) para rajadas de leads
+- Parser rápido quando instalado (selectolax > lxml > html.parser), corpo lido
+  em blocos até CRAWLER_MAX_HTML_BYTES e extração de texto interrompida ao
+  atingir o orçamento de caracteres
+- Cache HTTP condicional: páginas com ETag/Last-Modified são revalidadas com
+  If-None-Match/If-Modified-Since; 304 reaproveita o texto já extraído
+"""
+import asyncio
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from loguru import logger
+
+from app.config import settings
+from app.services.tracing import get_tracer
+
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
+    'Accept-Encoding': 'gzip, deflate',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# Páginas-chave: rótulo -> trechos (sem acento, minúsculos) do caminho ou do texto do link
+KEY_PAGES = {
+    "Sobre": ("sobre", "quem-somos", "quem somos", "a-empresa", "institucional", "nossa-historia", "about"),
+    "Serviços": ("servicos", "solucoes", "produtos", "o-que-fazemos", "services"),
+    "Contato": ("contato", "fale-conosco", "fale conosco", "contact"),
+}
+
+# Conexões simultâneas por site (homepage + páginas-chave)
+MAX_CONNECTIONS_PER_HOST = 4
+# Links da homepage guardados para descobrir páginas-chave
+MAX_LINKS = 300
+READ_CHUNK_BYTES = 64 * 1024
+SKIP_TAGS = ("script", "style", "noscript", "template", "svg")
+
+
+@dataclass
+class CrawledPage:
+    """Texto extraído de uma página (e os links, para descobrir páginas-chave)"""
+    url: str  # URL final, após redirects
+    text: str
+    links: List[Tuple[str, str]] = field(default_factory=list)  # (href, texto do link)
+    max_chars: int = 0  # Orçamento usado na extração
+
+
+@dataclass
+class _HttpCacheEntry:
+    page: CrawledPage
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def _fold(value: str) -> str:
+    """Minúsculas sem acento ("Serviços" -> "servicos")"""
+    normalized = unicodedata.normalize("NFKD", value.lower())
+    return "".join(c for c in normalized if not unicodedata.combining(c))
+
+
+def _host(netloc: str) -> str:
+    netloc = netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def _collect_text(strings: Iterable[str], max_chars: int) -> str:
+    """Junta trechos de texto normalizando espaços e para ao atingir max_chars"""
+    parts = []
+    size = 0
+    for raw in strings:
+        chunk = " ".join(raw.split())
+        if not chunk:
+            continue
+        parts.append(chunk)
+        size += len(chunk) + 1
+        if size >= max_chars:
+            break
+    return " ".join(parts)[:max_chars]
+
+
+@lru_cache(maxsize=1)
+def get_parser_backend() -> str:
+    """Parser HTML mais rápido instalado: selectolax > lxml > html.parser (bs4)"""
+    for backend in ("selectolax", "lxml"):
+        try:
+            __import__(backend)
+            return backend
+        except ImportError:
+            continue
+    return "html.parser"
+
+
+def _parse_selectolax(html: str, max_chars: int) -> Tuple[str, List[Tuple[str, str]]]:
+    from selectolax.parser import HTMLParser
+
+    tree = HTMLParser(html)
+    links = [
+        (node.attributes.get("href") or "", node.text(strip=True))
+        for node in tree.css("a[href]")[:MAX_LINKS]
+    ]
+    tree.strip_tags(list(SKIP_TAGS))
+    root = tree.body or tree.root
+    if root is None:
+        return "", links
+    return _collect_text(root.text(separator="\n").splitlines(), max_chars), links
+
+
+def _parse_lxml(html: str, max_chars: int) -> Tuple[str, List[Tuple[str, str]]]:
+    import lxml.html
+    from lxml import etree
+
+    root = lxml.html.document_fromstring(html)
+    links = []
+    for node in root.iter("a"):
+        href = node.get("href")
+        if href:
+            links.append((href, node.text_content()))
+            if len(links) >= MAX_LINKS:
+                break
+    etree.strip_elements(root, *SKIP_TAGS, with_tail=False)
+    body = root.find("body")
+    # itertext é um gerador: a extração para no orçamento sem percorrer o resto da árvore
+    return _collect_text((body if body is not None else root).itertext(), max_chars), links
+
+
+def _parse_html_parser(html: str, max_chars: int) -> Tuple[str, List[Tuple[str, str]]]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    links = [
+        (node.get("href", ""), node.get_text(" ", strip=True))
+        for node in soup.find_all("a", href=True, limit=MAX_LINKS)
+    ]
+    for node in soup(list(SKIP_TAGS)):
+        node.decompose()
+    return _collect_text(soup.stripped_strings, max_chars), links
+
+
+_PARSERS = {
+    "selectolax": _parse_selectolax,
+    "lxml": _parse_lxml,
+    "html.parser": _parse_html_parser,
+}
+
+
+def parse_html(html: str, max_chars: int) -> Tuple[str, List[Tuple[str, str]]]:
+    """
+    Extrai texto visível (sem script/style) e links de um HTML
+
+    Returns:
+        (texto limitado a max_chars, [(href, texto do link)])
+    """
+    backend = get_parser_backend()
+    try:
+        return _PARSERS[backend](html, max_chars)
+    except Exception as e:
+        if backend == "html.parser":
+            raise
+        logger.debug(f"Parser {backend} falhou ({e}) - usando html.parser")
+        return _parse_html_parser(html, max_chars)
+
+
+def _strip_shared_prefix(text: str, reference: str) -> str:
+    """Remove o cabeçalho/menu que a subpágina repete da homepage"""
+    limit = min(len(text), len(reference))
+    i = 0
+    while i < limit and text[i] == reference[i]:
+        i += 1
+    if i < 40:
+        return text
+    # Voltar até o último espaço para não cortar palavra
+    cut = text.rfind(" ", 0, i)
+    return text[cut + 1 if cut > 0 else i:]
+
+
+class WebsiteCrawler:
+    """Busca homepage + páginas-chave de um site com sessão, limite e cache HTTP compartilhados"""
+
+    def __init__(self):
+        # event loop -> (sessão, semáforo)
+        self._sessions: Dict[asyncio.AbstractEventLoop, tuple] = {}
+        self._lock = threading.Lock()
+        # LRU: url -> página + validadores (ETag/Last-Modified), compartilhado entre loops
+        self._http_cache: "OrderedDict[str, _HttpCacheEntry]" = OrderedDict()
+        self._stats: Dict[str, int] = {
+            "crawls": 0,
+            "pages_fetched": 0,
+            "not_modified": 0,
+            "errors": 0,
+        }
+
+    def _get_session(self) -> tuple:
+        """(sessão, semáforo) do event loop atual, criados no primeiro uso"""
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            # Loops encerrados (ex: scripts com asyncio.run) não voltam
+            for closed_loop in [known for known in self._sessions if known.is_closed()]:
+                del self._sessions[closed_loop]
+            current = self._sessions.get(loop)
+        if current is not None and not current[0].closed:
+            return current
+
+        connector = aiohttp.TCPConnector(
+            limit=settings.crawler_max_concurrency,
+            limit_per_host=MAX_CONNECTIONS_PER_HOST,
+            ttl_dns_cache=300,
+            # Sites de PMEs com certificado vencido/incompleto são comuns
+            ssl=settings.crawler_verify_ssl,
+        )
+        session = aiohttp.ClientSession(
+            headers=HEADERS,
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=settings.crawler_page_timeout),
+        )
+        current = (session, asyncio.Semaphore(settings.crawler_max_concurrency))
+        with self._lock:
+            self._sessions[loop] = current
+        return current
+
+    def _count(self, field_name: str):
+        with self._lock:
+            self._stats[field_name] += 1
+
+    def _cache_get(self, url: str) -> Optional[_HttpCacheEntry]:
+        with self._lock:
+            entry = self._http_cache.get(url)
+            if entry is not None:
+                self._http_cache.move_to_end(url)
+            return entry
+
+    def _cache_put(self, url: str, entry: _HttpCacheEntry):
+        with self._lock:
+            self._http_cache[url] = entry
+            self._http_cache.move_to_end(url)
+            while len(self._http_cache) > settings.crawler_http_cache_entries:
+                self._http_cache.popitem(last=False)
+
+    @staticmethod
+    async def _read_body(response) -> bytes:
+        """Lê o corpo em blocos até CRAWLER_MAX_HTML_BYTES (páginas enormes não entram inteiras)"""
+        max_bytes = settings.crawler_max_html_bytes
+        chunks = []
+        total = 0
+        async for chunk in response.content.iter_chunked(READ_CHUNK_BYTES):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= max_bytes:
+                break
+        return b"".join(chunks)[:max_bytes]
+
+    async def fetch_page(self, url: str, max_chars: int) -> Optional[CrawledPage]:
+        """
+        Busca uma página e extrai o texto (revalidando pelo cache HTTP se possível)
+
+        Args:
+            url: URL da página
+            max_chars: Orçamento de caracteres do texto extraído
+
+        Returns:
+            CrawledPage ou None (erro, status != 200 ou conteúdo não-HTML)
+        """
+        session, semaphore = self._get_session()
+        cached = self._cache_get(url)
+        headers = {}
+        if cached and cached.page.max_chars >= max_chars:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        else:
+            cached = None
+
+        try:
+            async with semaphore:
+                async with session.get(url, headers=headers, allow_redirects=True) as response:
+                    if response.status == 304 and cached:
+                        self._count("not_modified")
+                        get_tracer().record_cache("crawler_http", True)
+                        page = cached.page
+                        return CrawledPage(page.url, page.text[:max_chars], page.links, max_chars)
+
+                    if response.status != 200:
+                        logger.warning(f"Site retornou status {response.status} para {url}")
+                        return None
+
+                    content_type = response.content_type or ""
+                    if content_type and "html" not in content_type:
+                        logger.debug(f"Conteúdo não-HTML ({content_type}) em {url}")
+                        return None
+
+                    body = await self._read_body(response)
+                    final_url = str(response.url)
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+                    encoding = response.charset or "utf-8"
+
+            self._count("pages_fetched")
+            if headers:
+                get_tracer().record_cache("crawler_http", False)
+
+            try:
+                html = body.decode(encoding, errors="replace")
+            except LookupError:
+                html = body.decode("utf-8", errors="replace")
+
+            # Parse fora do event loop (html.parser em página grande leva dezenas de ms)
+            text, links = await asyncio.to_thread(parse_html, html, max_chars)
+            page = CrawledPage(final_url, text, links, max_chars)
+
+            if etag or last_modified:
+                self._cache_put(url, _HttpCacheEntry(page, etag, last_modified))
+            return page
+
+        except asyncio.TimeoutError:
+            self._count("errors")
+            logger.warning(f"Timeout ao acessar {url}")
+            return None
+        except Exception as e:
+            self._count("errors")
+            logger.warning(f"Erro ao acessar {url}: {e}")
+            return None
+
+    def find_key_pages(self, home: CrawledPage) -> List[Tuple[str, str]]:
+        """
+        Escolhe nos links da homepage uma página por rótulo de KEY_PAGES (mesmo domínio)
+
+        Returns:
+            [(rótulo, url)] na ordem de KEY_PAGES
+        """
+        home_parsed = urlparse(home.url)
+        home_host = _host(home_parsed.netloc)
+        home_path = home_parsed.path.rstrip("/")
+        found: Dict[str, str] = {}
+
+        for href, anchor in home.links:
+            href = href.strip()
+            if not href or href.startswith("#"):
+                continue
+            parsed = urlparse(urljoin(home.url, href))
+            if parsed.scheme not in ("http", "https") or _host(parsed.netloc) != home_host:
+                continue
+            if parsed.path.rstrip("/") == home_path:
+                continue
+
+            haystack = _fold(f"{parsed.path} {anchor}")
+            for label, keywords in KEY_PAGES.items():
+                if label not in found and any(keyword in haystack for keyword in keywords):
+                    found[label] = parsed._replace(fragment="").geturl()
+                    break
+
+        return [(label, found[label]) for label in KEY_PAGES if label in found]
+
+    async def crawl(self, url: str) -> Optional[str]:
+        """
+        Busca homepage (https, com fallback para http) e, em paralelo, as páginas-chave
+
+        Args:
+            url: URL do site (normalizada com https://)
+
+        Returns:
+            Texto da homepage seguido de "Sobre: ...", "Serviços: ...", "Contato: ..."
+            (até CRAWLER_MAX_CHARS) ou None se o site não respondeu
+        """
+        self._count("crawls")
+        max_chars = settings.crawler_max_chars
+
+        urls_to_try = [url]
+        if url.startswith("https://"):
+            urls_to_try.append(url.replace("https://", "http://", 1))
+
+        home = None
+        for attempt_url in urls_to_try:
+            home = await self.fetch_page(attempt_url, max_chars)
+            if home and home.text.strip():
+                break
+            home = None
+
+        if not home:
+            logger.warning(f"Não foi possível acessar nenhuma versão de {url}")
+            return None
+
+        key_pages = self.find_key_pages(home)[:max(settings.crawler_max_pages - 1, 0)]
+        if not key_pages:
+            logger.info(f"✅ Site acessado com sucesso: {home.url} ({len(home.text)} chars)")
+            return home.text
+
+        # Metade do orçamento para a homepage, o resto dividido entre as páginas-chave
+        page_budget = max_chars // 2
+        results = await asyncio.gather(
+            *(self.fetch_page(page_url, page_budget) for _, page_url in key_pages)
+        )
+
+        sections = []
+        for (label, _), page in zip(key_pages, results):
+            if page:
+                text = _strip_shared_prefix(page.text, home.text)
+                if text.strip():
+                    sections.append((label, text))
+
+        home_text = home.text
+        if sections:
+            home_text = home.text[:page_budget]
+            per_section = (max_chars - len(home_text)) // len(sections)
+            home_text += "".join(f"\n\n{label}: {text[:per_section]}" for label, text in sections)
+
+        logger.info(
+            f"✅ Site acessado com sucesso: {home.url} "
+            f"(+{len(sections)} páginas: {', '.join(label for label, _ in sections) or '-'}; "
+            f"{len(home_text)} chars)"
+        )
+        return home_text[:max_chars]
+
+    def get_stats(self) -> Dict[str, object]:
+        """Contadores do crawler e ocupação do cache HTTP"""
+        with self._lock:
+            return {
+                **self._stats,
+                "parser": get_parser_backend(),
+                "http_cache_entries": len(self._http_cache),
+                "sessions": len(self._sessions),
+                "max_concurrency": settings.crawler_max_concurrency,
+            }
+
+    async def close(self):
+        """Fecha a sessão do event loop atual (shutdown do app / da fila de pesquisas)"""
+        with self._lock:
+            current = self._sessions.pop(asyncio.get_running_loop(), None)
+        if current is not None and not current[0].closed:
+            await current[0].close()
+
+
+_crawler: Optional[WebsiteCrawler] = None
+
+
+def get_website_crawler() -> WebsiteCrawler:
+    """Crawler compartilhado pelo processo"""
+    global _crawler
+    if _crawler is None:
+        _crawler = WebsiteCrawler()
+    return _crawler
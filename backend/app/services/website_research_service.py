@@ -6,18 +6,18 @@ from typing import Dict, Optional, List
 from loguru import logger
 import re
 from urllib.parse import urlparse
-import asyncio
-import aiohttp
-from bs4 import BeautifulSoup
-import anthropic
-from app.config import settings
+from functools import cached_property
+from app.services.llm_gateway import get_async_anthropic_client, get_llm_gateway, resolve_task_models
+from app.services.tracing import get_tracer, traced
 
 
 class WebsiteResearchService:
     """Pesquisa e analisa websites de leads para personalizar atendimento"""
 
-    def __init__(self):
-        self.anthropic_client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key)
+    @cached_property
+    def anthropic_client(self):
+        """Cliente Anthropic compartilhado (SDK importado só quando há análise de site)"""
+        return get_async_anthropic_client()
 
     def extract_url(self, message: str) -> Optional[str]:
         """
@@ -77,9 +77,10 @@ class WebsiteResearchService:
             logger.error(f"Erro ao extrair nome da empresa: {e}")
             return "Empresa"
 
+    @traced("http", "fetch_website_content")
     async def fetch_website_content(self, url: str) -> Optional[str]:
         """
-        Faz fetch do conteúdo do website
+        Faz fetch do conteúdo do website (homepage + páginas sobre/serviços/contato)
 
         Args:
             url: URL do site
@@ -87,66 +88,11 @@ class WebsiteResearchService:
         Returns:
             Texto extraído do site ou None
         """
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        }
-        # Lista de URLs para tentar (https primeiro, http como fallback)
-        urls_to_try = [url]
-        if url.startswith("https://"):
-            urls_to_try.append(url.replace("https://", "http://", 1))
+        # aiohttp/parser só entram quando um site é realmente buscado (fora do cold start)
+        from app.services.website_crawler import get_website_crawler
 
         try:
-            connector = aiohttp.TCPConnector(ssl=False)
-            async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
-                for attempt_url in urls_to_try:
-                    try:
-                        async with session.get(
-                            attempt_url,
-                            timeout=aiohttp.ClientTimeout(total=15),
-                            allow_redirects=True
-                        ) as response:
-                            if response.status not in (200, 201):
-                                logger.warning(f"Site retornou status {response.status} para {attempt_url}")
-                                continue
-
-                            html = await response.text()
-
-                            # Usar BeautifulSoup para extrair texto
-                            soup = BeautifulSoup(html, 'html.parser')
-
-                            # Remover scripts e styles
-                            for script in soup(["script", "style"]):
-                                script.decompose()
-
-                            text = soup.get_text()
-
-                            # Limpar espaços em branco
-                            lines = (line.strip() for line in text.splitlines())
-                            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                            text = ' '.join(chunk for chunk in chunks if chunk)
-
-                            # Limitar tamanho
-                            text = text[:3000]
-
-                            if text.strip():
-                                logger.info(f"✅ Site acessado com sucesso: {attempt_url} ({len(text)} chars)")
-                                return text
-
-                    except asyncio.TimeoutError:
-                        logger.warning(f"Timeout ao acessar {attempt_url}")
-                        continue
-                    except Exception as inner_e:
-                        logger.warning(f"Erro ao acessar {attempt_url}: {inner_e}")
-                        continue
-
-            logger.warning(f"Não foi possível acessar nenhuma versão de {url}")
-            return None
-
+            return await get_website_crawler().crawl(url)
         except Exception as e:
             logger.error(f"Erro ao fazer fetch do site: {e}")
             return None
@@ -189,12 +135,25 @@ Responda APENAS em formato JSON:
     "insight": "Um insight para usar na conversa (ex: 'Vi que trabalham com X. Muitos clientes nossos nesse segmento tinham desafio de Y')"
 }}"""
 
-            response = await self.anthropic_client.messages.create(
-                model=settings.claude_model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=300,
-            )
+            # Rota "pesquisa": modelo rápido, com fallback para os próximos da cadeia
+            models = resolve_task_models("pesquisa")
+            for i, model in enumerate(models):
+                try:
+                    tracer = get_tracer()
+                    with tracer.span("llm", model, task="pesquisa"):
+                        async with get_llm_gateway().aslot(model):
+                            response = await self.anthropic_client.messages.create(
+                                model=model,
+                                messages=[{"role": "user", "content": prompt}],
+                                temperature=0.7,
+                                max_tokens=300,
+                            )
+                        tracer.record_tokens(model, response.usage.input_tokens, response.usage.output_tokens)
+                    break
+                except Exception as model_error:
+                    if i == len(models) - 1:
+                        raise
+                    logger.warning(f"⚠️ {model} falhou na análise do site ({model_error}) - tentando {models[i + 1]}")
 
             import json
             raw_text = response.content[0].text
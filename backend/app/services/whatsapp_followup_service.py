@@ -12,7 +12,7 @@ from app.repository.leads_repository import LeadsRepository
 from app.services.google_calendar_service import google_calendar_service
 from app.services.notification_service import NotificationService
 from app.config import settings
-from app.database import SessionLocal
+from app.database import new_session
 
 
 class WhatsAppFollowUpService:
@@ -328,7 +328,7 @@ Preparar demonstração personalizada com foco nos pontos de dor do lead.
             from app.repositories.conversation_repository import ConversationRepository, MessageRepository
             from app.models.conversation import MessageDirection, MessageType
 
-            db = SessionLocal()
+            db = new_session()
 
             try:
                 conversation_repo = ConversationRepository(db)
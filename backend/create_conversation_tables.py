@@ -2,7 +2,7 @@
 Script para criar tabelas de conversação no Supabase
 """
 import asyncio
-from app.database import engine
+from app.database import get_engine
 from app.models.conversation import Conversation, Message
 from loguru import logger
 
@@ -16,7 +16,7 @@ async def create_tables():
         from app.database import Base
 
         # Criar todas as tabelas
-        Base.metadata.create_all(bind=engine)
+        Base.metadata.create_all(bind=get_engine())
 
         logger.success("✅ Tabelas criadas com sucesso!")
         logger.info("""
@@ -0,0 +1,17 @@
+-- Migration 009: Índices para paginação por cursor (keyset) de leads
+-- GET /api/leads/page ordena por (created_at DESC, id DESC) e filtra a partir
+-- da posição do cursor; com estes índices cada página custa o mesmo,
+-- independente da profundidade (o offset percorre todas as linhas anteriores)
+
+-- Listagem sem filtro
+CREATE INDEX IF NOT EXISTS idx_leads_created_at_id ON leads(created_at DESC, id DESC);
+
+-- Listagem filtrada por status (filtro mais usado no CRM)
+CREATE INDEX IF NOT EXISTS idx_leads_status_created_at_id ON leads(status, created_at DESC, id DESC);
+
+-- Estatísticas atualizadas para a contagem estimada (count=estimated do PostgREST)
+ANALYZE leads;
+
+-- Comentários
+COMMENT ON INDEX idx_leads_created_at_id IS 'Paginação por cursor (created_at, id) da listagem de leads';
+COMMENT ON INDEX idx_leads_status_created_at_id IS 'Paginação por cursor da listagem de leads filtrada por status';
@@ -0,0 +1,9 @@
+-- Migration 010: Índice para janela de histórico de conversas
+-- A cada mensagem recebida o webhook carrega só as últimas N mensagens do lead
+-- (WHERE lead_id = ? [AND timestamp < cursor] ORDER BY timestamp DESC LIMIT N);
+-- com o índice composto a busca para após N linhas, sem ordenar a conversa inteira
+
+CREATE INDEX IF NOT EXISTS idx_messages_lead_timestamp ON conversation_messages(lead_id, timestamp DESC);
+
+-- Comentários
+COMMENT ON INDEX idx_messages_lead_timestamp IS 'Janela das últimas mensagens por lead (histórico paginado)';
@@ -0,0 +1,18 @@
+-- Migration 011: Cache persistente de transcrições de áudio
+-- Áudio encaminhado ou webhook reentregue chega com os mesmos bytes: a transcrição
+-- é reaproveitada pelo hash (sha256) em vez de chamar o Whisper de novo.
+-- Usado quando TRANSCRIPTION_CACHE_PERSIST=true
+
+CREATE TABLE IF NOT EXISTS audio_transcriptions (
+    audio_hash TEXT PRIMARY KEY,           -- sha256 (hex) dos bytes do áudio
+    transcription TEXT NOT NULL,
+    audio_bytes INTEGER,                   -- tamanho do áudio original
+    engine TEXT,                           -- openai | local
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Limpeza de entradas antigas (ex.: DELETE ... WHERE created_at < NOW() - INTERVAL '90 days')
+CREATE INDEX IF NOT EXISTS idx_audio_transcriptions_created_at ON audio_transcriptions(created_at);
+
+-- Comentários
+COMMENT ON TABLE audio_transcriptions IS 'Cache de transcrições de áudio do WhatsApp por hash do arquivo';
@@ -0,0 +1,19 @@
+-- Migration 012: Cache persistente de insights de empresa por domínio
+-- Leads da mesma empresa (mesmo site) reaproveitam a pesquisa (crawl + LLM), inclusive
+-- entre workers e depois de deploys. Linhas mais antigas que INSIGHT_CACHE_TTL_HOURS são ignoradas.
+-- Usado quando INSIGHT_CACHE_PERSIST=true
+
+CREATE TABLE IF NOT EXISTS empresa_insights (
+    domain TEXT PRIMARY KEY,               -- domínio normalizado (sem www/porta), ex: empresa.com.br
+    insight TEXT NOT NULL,                 -- frase usada na conversa
+    full_analysis TEXT,                    -- plano personalizado completo (research_empresa_com_plano)
+    empresa TEXT,
+    url TEXT,                              -- URL pesquisada
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+-- Limpeza de entradas antigas (ex.: DELETE ... WHERE updated_at < NOW() - INTERVAL '30 days')
+CREATE INDEX IF NOT EXISTS idx_empresa_insights_updated_at ON empresa_insights(updated_at);
+
+-- Comentários
+COMMENT ON TABLE empresa_insights IS 'Cache de insights de pesquisa de empresa por domínio do site';
@@ -0,0 +1,15 @@
+-- Migration 013: Reserva (lease) de lembretes durante o envio
+-- O disparo de lembretes reserva lotes com enviando_em = NOW() antes de enviar e grava
+-- enviado/erro_envio em lote. Lease vencido sem enviado = execução interrompida: o lembrete
+-- volta para a próxima execução. Lease válido = outra execução enviando (cron + endpoint juntos).
+
+ALTER TABLE scheduled_reminders
+    ADD COLUMN IF NOT EXISTS enviando_em TIMESTAMP WITH TIME ZONE;
+
+-- Busca de pendentes (claim_pending_reminders) só percorre lembretes não enviados
+CREATE INDEX IF NOT EXISTS idx_reminders_pendentes_envio
+    ON scheduled_reminders(data_envio)
+    WHERE enviado = false;
+
+-- Comentários
+COMMENT ON COLUMN scheduled_reminders.enviando_em IS 'Início da reserva para envio (lease do disparo de lembretes)';
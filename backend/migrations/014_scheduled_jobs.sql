@@ -0,0 +1,39 @@
+-- Migration 014: Jobs do agendador interno (app/services/scheduler.py)
+-- Substitui o cron externo: lembretes diários de marcos, follow-up de leads e
+-- lembretes de reunião. Um job por (kind, ref_id): reagendar atualiza a mesma linha.
+-- Só o worker líder (pg_try_advisory_lock) dispara; jobs das próximas horas ficam em memória.
+
+CREATE TABLE IF NOT EXISTS scheduled_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    kind TEXT NOT NULL,                    -- milestone_reminders | lead_followup | agendamento_lembrete | ...
+    ref_id TEXT NOT NULL,                  -- ex: lead_id, "<agendamento_id>:24h", "diario"
+    run_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    payload JSONB NOT NULL DEFAULT '{}'::jsonb,
+
+    -- Controle de execução
+    status TEXT NOT NULL DEFAULT 'pendente' CHECK (status IN (
+        'pendente', 'executando', 'concluido', 'erro', 'cancelado'
+    )),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    locked_at TIMESTAMP WITH TIME ZONE,    -- início da execução (executando há muito = líder caiu)
+
+    -- Timestamps
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW() NOT NULL,
+
+    UNIQUE (kind, ref_id)
+);
+
+-- Recarga da roda de tempo: só pendentes, por horário
+CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_pendentes
+    ON scheduled_jobs(run_at)
+    WHERE status = 'pendente';
+
+-- Jobs presos em execução (recuperados na recarga)
+CREATE INDEX IF NOT EXISTS idx_scheduled_jobs_executando
+    ON scheduled_jobs(locked_at)
+    WHERE status = 'executando';
+
+-- Comentários
+COMMENT ON TABLE scheduled_jobs IS 'Jobs do agendador interno (lembretes, follow-ups)';
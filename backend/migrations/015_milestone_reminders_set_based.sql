@@ -0,0 +1,101 @@
+-- Migration 015: Lembretes de marcos criados por statement (set-based)
+-- O trigger da migration 008 rodava por linha (até 5 INSERTs por marco). Agora um
+-- INSERT/UPDATE com N marcos cria todos os lembretes num único INSERT ... SELECT,
+-- usando as transition tables do statement. Também não recria lembretes já enviados
+-- quando o prazo de um marco é alterado.
+
+-- Cria os lembretes ainda futuros de um conjunto de marcos
+CREATE OR REPLACE FUNCTION schedule_milestone_reminders(milestone_ids UUID[])
+RETURNS void AS $$
+BEGIN
+    INSERT INTO scheduled_reminders (milestone_id, tipo, data_envio, metodo)
+    SELECT
+        pm.id,
+        t.tipo,
+        pm.data_limite - t.dias,
+        CASE WHEN pm.notificacao_whatsapp THEN 'whatsapp' ELSE 'email' END
+    FROM project_milestones pm
+    CROSS JOIN (VALUES
+        ('10_dias', 10),
+        ('7_dias', 7),
+        ('3_dias', 3),
+        ('1_dia', 1),
+        ('no_dia', 0)
+    ) AS t(tipo, dias)
+    WHERE pm.id = ANY(milestone_ids)
+      AND (pm.notificacao_whatsapp OR pm.notificacao_email)
+      AND pm.status NOT IN ('concluido', 'cancelado')
+      AND pm.data_limite - t.dias >= CURRENT_DATE
+      AND NOT EXISTS (
+          SELECT 1 FROM scheduled_reminders sr
+          WHERE sr.milestone_id = pm.id
+            AND sr.tipo = t.tipo
+            AND sr.enviado = true
+      );
+END;
+$$ LANGUAGE plpgsql;
+
+-- INSERT: lembretes de todos os marcos inseridos pelo statement
+CREATE OR REPLACE FUNCTION create_milestone_reminders_on_insert()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM schedule_milestone_reminders(ARRAY(SELECT id FROM novos_marcos));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- UPDATE: só marcos com prazo/notificação alterados (e ainda ativos) têm os
+-- lembretes não enviados recriados
+CREATE OR REPLACE FUNCTION create_milestone_reminders_on_update()
+RETURNS TRIGGER AS $$
+DECLARE
+    alterados UUID[];
+BEGIN
+    SELECT ARRAY(
+        SELECT n.id
+        FROM novos_marcos n
+        JOIN antigos_marcos o ON o.id = n.id
+        WHERE (n.notificacao_whatsapp OR n.notificacao_email)
+          AND n.status NOT IN ('concluido', 'cancelado')
+          AND (
+              n.data_limite IS DISTINCT FROM o.data_limite
+              OR n.notificacao_whatsapp IS DISTINCT FROM o.notificacao_whatsapp
+              OR n.notificacao_email IS DISTINCT FROM o.notificacao_email
+          )
+    ) INTO alterados;
+
+    IF cardinality(alterados) = 0 THEN
+        RETURN NULL;
+    END IF;
+
+    DELETE FROM scheduled_reminders
+    WHERE milestone_id = ANY(alterados)
+      AND enviado = false;
+
+    PERFORM schedule_milestone_reminders(alterados);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Substitui o trigger por linha da migration 008
+DROP TRIGGER IF EXISTS trigger_create_milestone_reminders ON project_milestones;
+
+DROP TRIGGER IF EXISTS trigger_create_milestone_reminders_insert ON project_milestones;
+CREATE TRIGGER trigger_create_milestone_reminders_insert
+    AFTER INSERT ON project_milestones
+    REFERENCING NEW TABLE AS novos_marcos
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION create_milestone_reminders_on_insert();
+
+-- Transition tables não aceitam "UPDATE OF <colunas>": o filtro de colunas é feito na função
+DROP TRIGGER IF EXISTS trigger_create_milestone_reminders_update ON project_milestones;
+CREATE TRIGGER trigger_create_milestone_reminders_update
+    AFTER UPDATE ON project_milestones
+    REFERENCING OLD TABLE AS antigos_marcos NEW TABLE AS novos_marcos
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION create_milestone_reminders_on_update();
+
+-- Marcação de atrasados (MilestoneRepository.mark_overdue_milestones)
+CREATE INDEX IF NOT EXISTS idx_milestones_pendentes_prazo
+    ON project_milestones(data_limite)
+    WHERE status = 'pendente' AND data_conclusao IS NULL;
@@ -0,0 +1,28 @@
+-- Migration 016: Eventos brutos do Facebook Lead Ads (ingestão assíncrona)
+-- O webhook grava o evento e responde na hora; a qualificação (LLM), o INSERT no CRM,
+-- a notificação e o WhatsApp rodam depois na fila (app/services/facebook_lead_queue.py).
+-- leadgen_id é a chave: reentregas do Facebook não criam evento (nem lead) duplicado.
+
+CREATE TABLE IF NOT EXISTS facebook_lead_events (
+    leadgen_id TEXT PRIMARY KEY,           -- id do lead no Facebook (idempotência)
+    page_id TEXT,
+    form_id TEXT,
+    payload JSONB NOT NULL,                -- "value" da change leadgen, como recebido
+    status TEXT NOT NULL DEFAULT 'recebido'
+        CHECK (status IN ('recebido', 'processando', 'processado', 'descartado', 'erro')),
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    erro TEXT,
+    lead_id TEXT,                          -- lead criado no CRM (se qualificado)
+    recebido_em TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    iniciado_em TIMESTAMP WITH TIME ZONE,  -- início do processamento atual (lease)
+    processado_em TIMESTAMP WITH TIME ZONE
+);
+
+-- Varredura da fila: eventos a (re)processar e processamentos presos
+CREATE INDEX IF NOT EXISTS idx_facebook_lead_events_pendentes
+    ON facebook_lead_events(recebido_em)
+    WHERE status IN ('recebido', 'erro', 'processando');
+
+-- Comentários
+COMMENT ON TABLE facebook_lead_events IS 'Eventos do webhook do Facebook Lead Ads e status do processamento';
+COMMENT ON COLUMN facebook_lead_events.status IS 'recebido | processando | processado (lead criado ou já existente) | descartado (não qualificado) | erro';
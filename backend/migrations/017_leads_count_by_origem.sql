@@ -0,0 +1,14 @@
+-- Migration 017: Contagem de leads por origem num único GROUP BY
+-- GET /api/analytics/metricas-integracao fazia um count=exact por LeadOrigin
+-- (uma requisição ao PostgREST por origem); esta função devolve todas as
+-- contagens numa chamada RPC, usando o índice idx_leads_origem
+
+CREATE OR REPLACE FUNCTION count_leads_by_origem()
+RETURNS TABLE (origem TEXT, total BIGINT) AS $$
+    SELECT l.origem::TEXT, COUNT(*)
+    FROM leads l
+    GROUP BY l.origem;
+$$ LANGUAGE sql STABLE;
+
+-- Comentários
+COMMENT ON FUNCTION count_leads_by_origem() IS 'Quantidade de leads por origem (métricas de integração do CRM)';
@@ -0,0 +1,94 @@
+"""
+Benchmark + corpus rotulado do parser local de data/hora (app/services/datetime_parser.py)
+
+Valida as expressões mais comuns dos leads contra um "agora" fixo e mede o tempo
+por mensagem. Mensagens ambíguas devem sair com ambiguous=True (→ LLM).
+
+Uso:
+    python scripts/benchmark_datetime_parser.py [--iterations 20000]
+"""
+import argparse
+import sys
+import timeit
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.datetime_parser import parse_datetime
+
+
+# Segunda-feira, 19/10/2026 09:00 (São Paulo)
+NOW = datetime(2026, 10, 19, 9, 0, tzinfo=ZoneInfo("America/Sao_Paulo"))
+
+AMBIGUO = "ambiguo"
+
+# (mensagem, esperado: "dd/mm HH:MM" | None (sem data/hora) | AMBIGUO)
+CORPUS = [
+    ("terça às 14h", "20/10 14:00"),
+    ("pode ser na terca 10h", "20/10 10:00"),
+    ("amanhã de manhã", "20/10 10:00"),
+    ("amanhã cedo", "20/10 10:00"),
+    ("depois de amanhã 10h30", "21/10 10:30"),
+    ("quinta-feira", "22/10 14:00"),
+    ("sex 15h", "23/10 15:00"),
+    ("ter 14h", "20/10 14:00"),
+    ("quinta, 16:30", "22/10 16:30"),
+    ("14h", "20/10 14:00"),
+    ("às 2", "20/10 14:00"),
+    ("2 da tarde", "20/10 14:00"),
+    ("15/11 às 16:00h", "15/11 16:00"),
+    ("dia 22 meio-dia", "22/10 12:00"),
+    ("25 de dezembro 10h", "25/12 10:00"),
+    ("segunda que vem 10h", "26/10 10:00"),
+    ("quarta 10 e meia", "21/10 10:30"),
+    ("fim da tarde de quinta", "22/10 17:00"),
+    ("boa tarde, pode ser quarta 10h?", "21/10 10:00"),
+    ("terça dia 20 às 9h", "20/10 09:00"),
+    ("terça ou quarta", AMBIGUO),
+    ("depois das 15h", AMBIGUO),
+    ("semana que vem", AMBIGUO),
+    ("terça não posso, quarta 10h", AMBIGUO),
+    ("10h ou 14h", AMBIGUO),
+    ("ok obrigado", None),
+    ("vou ter que ver com meu sócio", None),
+    ("vou ter 3 reuniões", None),
+    ("vou ter 10 minutos livres às 16h", "20/10 16:00"),
+    ("ter às 10", "20/10 10:00"),
+    ("ter-feira 15h", "20/10 15:00"),
+    ("tenho interesse", None),
+    ("boa noite!", None),
+]
+
+
+def resolve(message: str):
+    parsed = parse_datetime(message, NOW)
+    if parsed.ambiguous:
+        return AMBIGUO
+    dt = parsed.to_datetime(NOW)
+    return dt.strftime("%d/%m %H:%M") if dt else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do parser de data/hora")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    errors = [(msg, expected, resolve(msg)) for msg, expected in CORPUS if resolve(msg) != expected]
+
+    messages = [msg for msg, _ in CORPUS]
+    n = args.iterations // len(messages) or 1
+    elapsed = timeit.timeit(lambda: [parse_datetime(m, NOW) for m in messages], number=n)
+
+    print(f"acerto: {len(CORPUS) - len(errors)}/{len(CORPUS)}")
+    print(f"tempo médio: {elapsed * 1e6 / (n * len(messages)):.2f} µs/mensagem")
+    for msg, expected, got in errors:
+        print(f"   ❌ '{msg}': esperado={expected} obtido={got}")
+
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmark + corpus rotulado do detector de intenções (app/services/intent_detector.py)
+
+Compara a implementação antiga (loop de regex/substring por palavra-chave a cada turno)
+com as regex de alternação pré-compiladas e valida a precisão contra o corpus.
+
+Uso:
+    python scripts/benchmark_intent_detector.py [--iterations 20000]
+"""
+import argparse
+import re
+import sys
+import timeit
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.intent_detector import (
+    ACEITE_AGENDAMENTO,
+    OFERTA_AGENDAMENTO,
+    detect_scheduling_intent,
+    detect_weekday,
+)
+
+
+# ============================================
+# CORPUS ROTULADO (mensagem, esperado)
+# ============================================
+
+CORPUS_ACEITE = [
+    ("sim", True),
+    ("Sim, pode ser", True),
+    ("bora!", True),
+    ("ok", True),
+    ("quero sim", True),
+    ("beleza, pode marcar", True),
+    ("Confirmo", True),
+    ("combina comigo", True),
+    ("assim não dá", False),
+    ("poderia me explicar melhor?", False),
+    ("qual o valor?", False),
+    ("não tenho interesse agora", False),
+    ("SIM", True),
+    ("vamos nessa", True),
+]
+
+CORPUS_OFERTA = [
+    ("Que tal agendarmos uma conversa rápida?", True),
+    ("Posso te mostrar os horários disponíveis?", True),
+    ("Bora marcar uma call de 30 min?", True),
+    ("Qual o faturamento anual da empresa?", False),
+    ("Tenho esses horarios livres na agenda", True),
+    ("Você é o responsável pelas decisões?", False),
+    ("Vamos marcar uma reuniao?", True),
+]
+
+CORPUS_PEDIDO = [
+    ("quero agendar uma reunião", True),
+    ("Vamos marcar!", True),
+    ("quais os horarios disponiveis?", True),
+    ("Quando você pode?", True),
+    ("quero agendar, mas antes tenho uma dúvida", False),
+    ("como funciona?", False),
+    ("quanto custa?", False),
+    ("talvez semana que vem", False),
+    ("oi, tudo bem?", False),
+    ("QUERO MARCAR", True),
+]
+
+CORPUS_DIA = [
+    ("terça às 14h", 1),
+    ("pode ser na terca 10h", 1),
+    ("segunda-feira 9h", 0),
+    ("sábado de manhã", 5),
+    ("sex 15h", 4),
+    ("tenho interesse", None),
+    ("amanhã 10h", None),
+    ("quinta, 16:30", 3),
+    ("domingo não", 6),
+]
+
+
+# ============================================
+# IMPLEMENTAÇÃO ANTIGA (referência)
+# ============================================
+
+_OLD_ACEITE = ["sim", "pode", "vamos", "aceito", "quero", "ok", "beleza",
+               "confirmo", "agenda", "marcar", "agendar", "combina",
+               "feito", "bora", "vou", "quero sim", "pode ser"]
+
+_OLD_OFERTA = ["agendar", "reunião", "conversa", "momento para discutir", "horário",
+               "agenda", "marcar", "call", "bora marcar"]
+
+_OLD_NEGATIVAS = ["duvida", "dúvida", "antes de", "mas", "porém", "porem", "ainda não",
+                  "ainda nao", "não sei", "nao sei", "talvez", "primeiro", "preciso saber",
+                  "gostaria de saber", "pode explicar", "como funciona", "quanto custa",
+                  "qual o preço", "qual o preco"]
+
+_OLD_FORTES = ["quero agendar", "quero marcar", "vamos agendar", "vamos marcar",
+               "pode agendar", "pode marcar", "horários disponíveis", "horarios disponiveis",
+               "horários livres", "horarios livres", "agenda livre", "quando você pode",
+               "quando voce pode", "sugere horários", "sugere horarios", "mostre horários",
+               "mostre horarios"]
+
+_OLD_DIAS = {'segunda': 0, 'seg': 0, 'terça': 1, 'terca': 1, 'ter': 1, 'quarta': 2, 'qua': 2,
+             'quinta': 3, 'qui': 3, 'sexta': 4, 'sex': 4, 'sábado': 5, 'sabado': 5, 'sab': 5,
+             'domingo': 6, 'dom': 6}
+
+
+def old_aceite(msg: str) -> bool:
+    msg = msg.lower().strip()
+    return any(re.search(r'\b' + re.escape(kw) + r'\b', msg, re.IGNORECASE) for kw in _OLD_ACEITE)
+
+
+def old_oferta(msg: str) -> bool:
+    msg = msg.lower()
+    return any(kw in msg for kw in _OLD_OFERTA)
+
+
+def old_pedido(msg: str) -> bool:
+    msg = msg.lower()
+    if any(neg in msg for neg in _OLD_NEGATIVAS):
+        return False
+    return any(strong in msg for strong in _OLD_FORTES)
+
+
+def old_dia(msg: str):
+    msg = msg.lower()
+    for dia_nome, weekday in _OLD_DIAS.items():
+        if dia_nome in msg:
+            return weekday
+    return None
+
+
+# ============================================
+# EXECUÇÃO
+# ============================================
+
+SUITES = [
+    ("aceite", CORPUS_ACEITE, old_aceite, ACEITE_AGENDAMENTO.matches),
+    ("oferta", CORPUS_OFERTA, old_oferta, OFERTA_AGENDAMENTO.matches),
+    ("pedido", CORPUS_PEDIDO, old_pedido, detect_scheduling_intent),
+    ("dia", CORPUS_DIA, old_dia, detect_weekday),
+]
+
+
+def accuracy(corpus, fn) -> tuple:
+    errors = [(msg, expected, fn(msg)) for msg, expected in corpus if fn(msg) != expected]
+    return len(corpus) - len(errors), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do detector de intenções")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'intenção':<10} {'antigo':>12} {'novo':>12} {'speedup':>8} {'acerto antigo':>14} {'acerto novo':>12}")
+
+    for name, corpus, old_fn, new_fn in SUITES:
+        messages = [msg for msg, _ in corpus]
+        n = args.iterations // len(messages) or 1
+
+        old_time = timeit.timeit(lambda: [old_fn(m) for m in messages], number=n)
+        new_time = timeit.timeit(lambda: [new_fn(m) for m in messages], number=n)
+        per_call = 1e6 / (n * len(messages))
+
+        old_ok, _ = accuracy(corpus, old_fn)
+        new_ok, new_errors = accuracy(corpus, new_fn)
+
+        print(
+            f"{name:<10} {old_time * per_call:>9.2f} µs {new_time * per_call:>9.2f} µs "
+            f"{old_time / new_time:>7.1f}x {old_ok:>8}/{len(corpus):<5} {new_ok:>6}/{len(corpus)}"
+        )
+        for msg, expected, got in new_errors:
+            failed = True
+            print(f"   ❌ '{msg}': esperado={expected} obtido={got}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmark da hidratação de leads (linhas do Supabase -> modelos Pydantic)
+
+Compara, sobre linhas sintéticas no formato da tabela `leads`:
+- validado: LeadsRepository._convert_db_to_lead (leitura unitária: enums/JSONB construídos em Python)
+- rápido:   LeadsRepository._hydrate_lead (um model_validate por linha, JSONB validado no pydantic-core)
+- resumo:   LeadsRepository._hydrate_summary sobre a projeção LEAD_SUMMARY_COLUMNS
+
+Cada caminho roda com o cache de timestamps frio (1ª listagem) e quente (polling
+repetido do CRM), e o script confere que rápido e validado geram o mesmo model_dump.
+Não acessa o banco.
+
+Uso:
+    python scripts/benchmark_lead_hydration.py [--rows 1000] [--repeat 5] [--seed 42]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.models.lead import LeadOrigin, LeadStatus, LeadTemperature  # noqa: E402
+from app.repository.leads_repository import (  # noqa: E402
+    LEAD_SUMMARY_COLUMNS,
+    LeadsRepository,
+    _parse_timestamp,
+)
+
+
+def iso(dt: datetime) -> str:
+    """Formato devolvido pelo PostgREST para timestamptz"""
+    return dt.isoformat().replace("+00:00", "Z")
+
+
+def make_rows(count: int, rng: random.Random) -> list:
+    """Gera linhas sintéticas da tabela leads (select *)"""
+    now = datetime.now(timezone.utc)
+    rows = []
+
+    for i in range(count):
+        created = now - timedelta(days=rng.randint(0, 180), seconds=rng.randint(0, 86400))
+        qualified = rng.random() < 0.6
+        rows.append({
+            "id": i + 1,
+            "nome": f"Lead {i + 1}",
+            "empresa": f"Empresa {i % 97}" if rng.random() < 0.8 else None,
+            "telefone": f"55119{rng.randint(10000000, 99999999)}",
+            "email": f"lead{i + 1}@exemplo.com.br" if rng.random() < 0.5 else None,
+            "cargo": None,
+            "status": rng.choice(list(LeadStatus)).value,
+            "origem": rng.choice(list(LeadOrigin)).value,
+            "temperatura": rng.choice([None] + [t.value for t in LeadTemperature]),
+            "lead_score": rng.randint(0, 100),
+            "faturamento_anual": None,
+            "qualificacao_detalhes": {
+                "cargo": "CEO",
+                "faturamento_anual": float(rng.randint(1, 50) * 100000),
+                "is_decision_maker": True,
+                "urgency": "1-3_meses",
+                "setor": "varejo",
+                "ferramentas_atuais": ["planilha", "whatsapp"],
+                "site_url": "https://exemplo.com.br",
+                "site_perguntado": True,
+            } if qualified else None,
+            "roi_analysis": {
+                "tempo_economizado_mes": 120.5,
+                "valor_economizado_ano": 85000.0,
+                "roi_percentual": 340.0,
+                "payback_meses": 3,
+                "generated_at": iso(created + timedelta(hours=2)),
+            } if qualified and rng.random() < 0.3 else None,
+            "followup_config": {
+                "tentativas_realizadas": rng.randint(0, 3),
+                "proxima_tentativa": iso(created + timedelta(days=1)),
+                "intervalo_horas": [24, 72, 168],
+            } if rng.random() < 0.5 else None,
+            "meeting_scheduled_at": iso(created + timedelta(days=3)) if rng.random() < 0.2 else None,
+            "meeting_google_event_id": None,
+            "temp_meeting_slot": None,
+            "ultima_interacao": iso(created + timedelta(minutes=rng.randint(1, 5000))),
+            "observacoes": None,
+            "tags": ["inbound"] if rng.random() < 0.3 else None,
+            "created_at": iso(created),
+            "updated_at": iso(created + timedelta(minutes=5)),
+            "won_at": None,
+            "lost_at": None,
+        })
+
+    return rows
+
+
+def project(rows: list, columns: str) -> list:
+    """Simula o select(colunas) do PostgREST"""
+    names = columns.split(",")
+    return [{name: row.get(name) for name in names} for row in rows]
+
+
+def measure(label: str, fn, rows: list, repeat: int) -> dict:
+    """Roda fn em todas as linhas: 1 rodada com cache frio + `repeat` com cache quente"""
+    _parse_timestamp.cache_clear()
+
+    start = time.perf_counter()
+    for row in rows:
+        fn(row)
+    cold = time.perf_counter() - start
+
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for row in rows:
+            fn(row)
+        warm.append(time.perf_counter() - start)
+
+    warm_median = statistics.median(warm) if warm else cold
+    return {
+        "label": label,
+        "cold_ms": cold * 1000,
+        "warm_ms": warm_median * 1000,
+        "us_per_row": warm_median / len(rows) * 1e6,
+    }
+
+
+def check_equivalence(repo: LeadsRepository, rows: list) -> int:
+    """Quantas linhas o caminho rápido hidrata diferente do validado"""
+    mismatches = 0
+    for row in rows:
+        if repo._convert_db_to_lead(row).model_dump() != repo._hydrate_lead(row).model_dump():
+            mismatches += 1
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da hidratação de leads")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    repo = LeadsRepository()
+    rows = make_rows(args.rows, random.Random(args.seed))
+    summary_rows = project(rows, LEAD_SUMMARY_COLUMNS)
+
+    results = [
+        measure("validado (_convert_db_to_lead)", repo._convert_db_to_lead, rows, args.repeat),
+        measure("rápido (_hydrate_lead)", repo._hydrate_lead, rows, args.repeat),
+        measure("resumo (_hydrate_summary)", repo._hydrate_summary, summary_rows, args.repeat),
+    ]
+
+    baseline = results[0]["warm_ms"]
+    print(f"\n=== Hidratação de {args.rows} leads (mediana de {args.repeat} rodadas) ===")
+    print(f"{'caminho':<34} {'frio':>10} {'quente':>10} {'µs/linha':>10} {'speedup':>8}")
+    for r in results:
+        print(
+            f"{r['label']:<34} {r['cold_ms']:>8.1f}ms {r['warm_ms']:>8.1f}ms "
+            f"{r['us_per_row']:>10.1f} {baseline / r['warm_ms']:>7.1f}x"
+        )
+
+    mismatches = check_equivalence(repo, rows)
+    print(f"\nequivalência rápido x validado: {'OK' if not mismatches else f'{mismatches} linhas diferentes'}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Benchmark da criação de marcos e da marcação de atrasados (banco real)
+
+Compara, sobre um portfólio sintético de N marcos num projeto existente:
+- criação linha a linha: 1 INSERT por marco pela conexão síncrona (caminho antigo
+  do POST /api/milestones/project/{id}/bulk, sem contar o commit por marco)
+- criação set-based: MilestoneRepository.create_milestones (1 INSERT via asyncpg,
+  lembretes criados pelo trigger por statement da migration 015)
+- atrasados legado: SELECT mark_overdue_milestones() + COUNT(*) de atrasados
+- atrasados set-based: MilestoneRepository.mark_overdue_milestones (UPDATE ... RETURNING)
+
+Cada rodada roda numa transação desfeita no final (ROLLBACK): nada fica no banco.
+O script também confere que os dois caminhos criam o mesmo número de lembretes.
+Requer migrations 008 e 015 aplicadas e SUPABASE_* configurados.
+
+Uso:
+    python scripts/benchmark_milestones.py --project-id 1 [--milestones 5000] [--repeat 3]
+        [--overdue-ratio 0.3] [--seed 42]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import dispose_async_engine, get_async_engine, get_engine  # noqa: E402
+from app.models.milestone import MilestoneCreate  # noqa: E402
+from app.repository.milestone_repository import MilestoneRepository  # noqa: E402
+
+
+INSERT_ONE = text("""
+    INSERT INTO project_milestones (
+        project_id, nome, descricao, ordem, data_limite,
+        notificacao_whatsapp, notificacao_email
+    )
+    VALUES (
+        :project_id, :nome, :descricao, :ordem, :data_limite,
+        :notificacao_whatsapp, :notificacao_email
+    )
+    RETURNING id
+""")
+
+COUNT_REMINDERS = text("""
+    SELECT COUNT(*) FROM scheduled_reminders
+    WHERE milestone_id IN (
+        SELECT id FROM project_milestones WHERE project_id = :project_id AND nome LIKE 'bench-%'
+    )
+""")
+
+
+def make_milestones(project_id: int, count: int, overdue_ratio: float, rng: random.Random) -> list:
+    """Marcos sintéticos: parte com prazo vencido (viram atrasados), parte nos próximos 60 dias"""
+    today = date.today()
+    milestones = []
+    for i in range(count):
+        if rng.random() < overdue_ratio:
+            data_limite = today - timedelta(days=rng.randint(1, 30))
+        else:
+            data_limite = today + timedelta(days=rng.randint(0, 60))
+        milestones.append(MilestoneCreate(
+            project_id=project_id,
+            nome=f"bench-{i}",
+            descricao="Etapa sintética do benchmark" if rng.random() < 0.5 else None,
+            ordem=i,
+            data_limite=data_limite,
+            notificacao_whatsapp=rng.random() < 0.9,
+            notificacao_email=rng.random() < 0.2,
+        ))
+    return milestones
+
+
+def run_legacy(project_id: int, milestones: list) -> dict:
+    """Caminho antigo: INSERT por marco + função do banco + COUNT"""
+    with get_engine().connect() as conn:
+        trans = conn.begin()
+        try:
+            start = time.perf_counter()
+            for m in milestones:
+                conn.execute(INSERT_ONE, m.model_dump())
+            create_s = time.perf_counter() - start
+
+            reminders = conn.execute(COUNT_REMINDERS, {"project_id": project_id}).scalar_one()
+
+            start = time.perf_counter()
+            conn.execute(text("SELECT mark_overdue_milestones()"))
+            overdue = conn.execute(text("""
+                SELECT COUNT(*) FROM project_milestones
+                WHERE status = 'atrasado'
+                  AND data_limite < CURRENT_DATE
+                  AND data_conclusao IS NULL
+            """)).scalar_one()
+            overdue_s = time.perf_counter() - start
+        finally:
+            trans.rollback()
+
+    return {"create_s": create_s, "overdue_s": overdue_s, "reminders": reminders, "overdue": overdue}
+
+
+async def run_set_based(project_id: int, milestones: list) -> dict:
+    """Caminho novo: MilestoneRepository com asyncpg, tudo numa transação desfeita no final"""
+    repo = MilestoneRepository(db=None)  # Métodos em lote não usam a Session síncrona
+
+    async with get_async_engine().connect() as conn:
+        trans = await conn.begin()
+        try:
+            start = time.perf_counter()
+            await repo.create_milestones(milestones, conn=conn)
+            create_s = time.perf_counter() - start
+
+            reminders = (await conn.execute(COUNT_REMINDERS, {"project_id": project_id})).scalar_one()
+
+            start = time.perf_counter()
+            overdue = await repo.mark_overdue_milestones(conn=conn)
+            overdue_s = time.perf_counter() - start
+        finally:
+            await trans.rollback()
+
+    return {"create_s": create_s, "overdue_s": overdue_s, "reminders": reminders, "overdue": overdue}
+
+
+def median_of(runs: list, key: str) -> float:
+    return statistics.median(run[key] for run in runs)
+
+
+async def main_async(args) -> int:
+    milestones = make_milestones(
+        args.project_id, args.milestones, args.overdue_ratio, random.Random(args.seed)
+    )
+
+    legacy_runs, set_runs = [], []
+    try:
+        for _ in range(args.repeat):
+            legacy_runs.append(await asyncio.to_thread(run_legacy, args.project_id, milestones))
+            set_runs.append(await run_set_based(args.project_id, milestones))
+    finally:
+        await dispose_async_engine()
+
+    print(f"\n=== {args.milestones} marcos, {args.overdue_ratio:.0%} vencidos (mediana de {args.repeat} rodadas) ===")
+    print(f"{'etapa':<28} {'linha a linha':>14} {'set-based':>12} {'speedup':>8}")
+    for label, key in (("criação + lembretes", "create_s"), ("marcação de atrasados", "overdue_s")):
+        legacy = median_of(legacy_runs, key)
+        set_based = median_of(set_runs, key)
+        print(
+            f"{label:<28} {legacy * 1000:>12.1f}ms {set_based * 1000:>10.1f}ms "
+            f"{legacy / set_based if set_based else float('inf'):>7.1f}x"
+        )
+    per_row = median_of(set_runs, "create_s") / args.milestones * 1e6
+    print(f"\nset-based: {per_row:.1f} µs/marco na criação")
+
+    legacy_reminders = legacy_runs[0]["reminders"]
+    set_reminders = set_runs[0]["reminders"]
+    print(
+        f"lembretes criados: linha a linha={legacy_reminders} set-based={set_reminders} "
+        f"({'OK' if legacy_reminders == set_reminders else 'DIFERENTE'})"
+    )
+    # Legado conta todos os atrasados da tabela; o novo, só os que mudaram de status agora
+    print(f"atrasados: legado (total)={legacy_runs[0]['overdue']} set-based (marcados)={set_runs[0]['overdue']}")
+    return 0 if legacy_reminders == set_reminders else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de marcos e lembretes (banco real)")
+    parser.add_argument("--project-id", type=int, required=True, help="Projeto existente (FK dos marcos)")
+    parser.add_argument("--milestones", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--overdue-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
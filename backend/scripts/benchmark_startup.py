@@ -0,0 +1,137 @@
+"""
+Benchmark de cold start: tempo de import do app em processos Python novos
+
+Mede `import app.main` (Railway/uvicorn) e `import api.index` (Vercel) em N
+interpretadores limpos e mostra:
+- tempo de import (mediana/mín/máx)
+- quais dependências pesadas foram carregadas no import (devem ficar para o 1º uso)
+- maiores imports acumulados (python -X importtime)
+
+Uso:
+    python scripts/benchmark_startup.py [--runs 5] [--top 15] [--targets app.main,api.index]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+# Dependências que só devem ser importadas no primeiro uso (não no cold start)
+HEAVY_MODULES = [
+    "langgraph",
+    "langchain_anthropic",
+    "anthropic",
+    "googleapiclient",
+    "google.oauth2",
+    "supabase",
+    "openai",
+    "bs4",
+    "aiohttp",
+    "requests",
+    "psycopg2",
+]
+
+# Configurações obrigatórias com valores fictícios (import não deve precisar de rede)
+DUMMY_ENV = {
+    "OPENAI_API_KEY": "sk-bench",
+    "ANTHROPIC_API_KEY": "sk-ant-bench",
+    "EVOLUTION_API_URL": "http://localhost:8080",
+    "EVOLUTION_API_KEY": "bench",
+    "UAZAPI_TOKEN": "bench",
+    "SUPABASE_URL": "http://bench.supabase.co",
+    "SUPABASE_SERVICE_KEY": "bench",
+    "SUPABASE_DB_PASSWORD": "bench",
+    "NUMERO_PEDRO": "5500000000000",
+    "JWT_SECRET_KEY": "bench",
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {target}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print("__BENCH__" + json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def run_probe(target: str, importtime: bool) -> tuple:
+    """Importa o alvo num interpretador novo. Retorna (resultado, stderr)"""
+    env = {**DUMMY_ENV, **os.environ, "LOG_LEVEL": "WARNING"}
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd += ["-c", PROBE.format(target=target, heavy=HEAVY_MODULES)]
+
+    proc = subprocess.run(cmd, cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    for line in proc.stdout.splitlines():
+        if line.startswith("__BENCH__"):
+            return json.loads(line[len("__BENCH__"):]), proc.stderr
+
+    raise RuntimeError(f"import de {target} falhou:\n{proc.stderr[-2000:]}")
+
+
+def top_imports(stderr: str, top: int) -> list:
+    """Maiores imports de pacotes de primeiro nível (tempo acumulado, -X importtime)"""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cum_us, raw_name = line[len("import time:"):].split("|")
+            cum_us = int(cum_us)
+        except ValueError:
+            continue
+        # Só o nível mais externo (sem indentação extra) = custo total do pacote
+        if raw_name.startswith("  "):
+            continue
+        root = raw_name.strip().split(".")[0]
+        cumulative[root] = max(cumulative.get(root, 0), cum_us)
+
+    return sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de cold start (tempo de import)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--targets", default="app.main,api.index")
+    args = parser.parse_args()
+
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    failed = False
+
+    for target in targets:
+        try:
+            timings = []
+            heavy = []
+            for _ in range(args.runs):
+                result, _stderr = run_probe(target, importtime=False)
+                timings.append(result["seconds"])
+                heavy = result["heavy"]
+            _, stderr = run_probe(target, importtime=True)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            failed = True
+            continue
+
+        print(f"\n=== import {target} ({args.runs} processos novos) ===")
+        print(
+            f"tempo: mediana={statistics.median(timings) * 1000:.0f}ms "
+            f"min={min(timings) * 1000:.0f}ms max={max(timings) * 1000:.0f}ms"
+        )
+        print(f"dependências pesadas carregadas no import: {', '.join(heavy) or 'nenhuma'}")
+        print("maiores imports (acumulado):")
+        for name, cum_us in top_imports(stderr, args.top):
+            print(f"   {name:<28} {cum_us / 1000:>8.1f}ms")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
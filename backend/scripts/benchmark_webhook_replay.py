@@ -0,0 +1,708 @@
+"""
+Benchmark offline do pipeline de conversa WhatsApp (replay de webhooks UAZAPI/Evolution)
+
+Reproduz payloads de webhook pelo próprio webhook_uazapi (debouncer → fast-path →
+agente LangGraph → salvar → enviar) sem rede nenhuma:
+- Supabase → repositório em memória (latência configurável, opcionalmente bloqueante
+  como o cliente síncrono real)
+- LLM → modelo fake com latência configurável (passa pelo LLMGateway e pelo tracer)
+- WhatsApp → sender fake que registra o horário de cada resposta
+- Google Calendar / pesquisa de site → fakes com latência fixa
+
+Relatório: throughput, latência do turno p50/p95/p99 (chegada da última mensagem →
+resposta enviada), lag do event loop, memória e tempo por tipo de span do tracer.
+
+Uso:
+    # Conversas sintéticas (roteiro de qualificação completo), 50 leads em paralelo
+    python scripts/benchmark_webhook_replay.py --leads 50 --llm-latency-ms 800
+
+    # Payloads gravados (um payload UAZAPI ou Evolution por linha), 20 msgs/s
+    python scripts/benchmark_webhook_replay.py --payloads webhooks.jsonl --rate 20
+
+    # Simular o cliente Supabase síncrono (bloqueia o event loop como em produção)
+    python scripts/benchmark_webhook_replay.py --leads 50 --db-latency-ms 40 --db-blocking
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Configurações obrigatórias com valores fictícios (nenhum serviço externo é chamado)
+for _key, _value in {
+    "OPENAI_API_KEY": "sk-bench",
+    "ANTHROPIC_API_KEY": "sk-ant-bench",
+    "EVOLUTION_API_URL": "http://localhost:8080",
+    "EVOLUTION_API_KEY": "bench",
+    "UAZAPI_TOKEN": "bench",
+    "SUPABASE_URL": "http://bench.supabase.co",
+    "SUPABASE_SERVICE_KEY": "bench",
+    "SUPABASE_DB_PASSWORD": "bench",
+    "NUMERO_PEDRO": "5500000000000",
+    "JWT_SECRET_KEY": "bench",
+}.items():
+    os.environ.setdefault(_key, _value)
+os.environ["OTEL_ENABLED"] = "false"
+os.environ["RESPONSE_CACHE_EMBEDDINGS"] = "false"
+
+
+SP_TZ = ZoneInfo("America/Sao_Paulo")
+
+# Roteiro sintético: (mensagem, dados que o extrator "encontra" nela)
+SCRIPT = [
+    ("oi, boa tarde", {}),
+    ("sou {nome}, da {empresa}", {"nome": "{nome}", "empresa": "{empresa}"}),
+    ("sou o CEO, eu que decido", {"cargo": "CEO", "is_decision_maker": True}),
+    ("faturamos uns 2 milhões por ano", {"faturamento_anual": 2000000.0}),
+    ("temos 5 pessoas no atendimento", {"funcionarios_atendimento": 5}),
+    ("nosso maior problema é a demora pra responder os leads", {"maior_desafio": "demora no atendimento"}),
+    ("queria resolver isso ainda esse mês", {"urgency": "imediato"}),
+    ("não tenho site", {}),
+    ("quanto custa?", {}),
+    ("sim, quero agendar", {"wants_meeting": True}),
+    ("terça às 14h", {}),
+]
+
+REPLIES = [
+    "Entendi! Me conta um pouco mais sobre a operação de vocês?",
+    "Perfeito. E hoje quantas pessoas cuidam do atendimento?",
+    "Faz sentido. Qual o maior gargalo no atendimento hoje?",
+    "Legal! Posso te mostrar como a automação resolve isso numa conversa rápida?",
+]
+
+
+class LatencyModel:
+    """Latência fixa ± jitter (ms) usada pelos fakes"""
+
+    def __init__(self, latency_ms: float, jitter_ms: float = 0.0, blocking: bool = False):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.blocking = blocking
+
+    def seconds(self) -> float:
+        jitter = random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    async def wait(self):
+        delay = self.seconds()
+        if not delay:
+            return
+        if self.blocking:
+            time.sleep(delay)
+        else:
+            await asyncio.sleep(delay)
+
+
+# ============================================
+# FAKES
+# ============================================
+
+class FakeLeadsRepository:
+    """LeadsRepository em memória (mesma interface usada pelo webhook)"""
+
+    def __init__(self, latency: LatencyModel):
+        self.latency = latency
+        self.leads: Dict[str, object] = {}
+        self.messages: Dict[str, list] = {}
+        self.calls = 0
+
+    async def _io(self):
+        self.calls += 1
+        await self.latency.wait()
+
+    async def create(self, lead):
+        await self._io()
+        self.leads[lead.id] = lead.model_copy(deep=True)
+        self.messages.setdefault(lead.id, [])
+        return lead
+
+    async def get_by_id(self, lead_id):
+        await self._io()
+        lead = self.leads.get(str(lead_id))
+        return lead.model_copy(deep=True) if lead else None
+
+    async def get_by_telefone(self, telefone):
+        await self._io()
+        for lead in self.leads.values():
+            if lead.telefone == telefone:
+                return lead.model_copy(deep=True)
+        return None
+
+    async def update(self, lead_id, updates):
+        from app.models.lead import LeadStatus, LeadTemperature, QualificationData, ROIAnalysis
+
+        await self._io()
+        lead = self.leads[str(lead_id)]
+        for field, value in updates.items():
+            if field == "qualificacao_detalhes":
+                lead.qualification_data = QualificationData(**value) if value else None
+            elif field == "roi_analysis":
+                lead.roi_analysis = ROIAnalysis(**value) if value else None
+            elif field == "status" and value:
+                lead.status = LeadStatus(value)
+            elif field == "temperatura" and value:
+                lead.temperatura = LeadTemperature(value)
+            elif hasattr(lead, field):
+                setattr(lead, field, value)
+        lead.updated_at = datetime.now()
+        return lead.model_copy(deep=True)
+
+    async def update_empresa(self, lead_id, empresa):
+        await self._io()
+        self.leads[str(lead_id)].empresa = empresa
+        return True
+
+    async def delete(self, lead_id):
+        await self._io()
+        self.messages.pop(str(lead_id), None)
+        return self.leads.pop(str(lead_id), None) is not None
+
+    async def add_conversation_message(self, lead_id, role, content, metadata=None):
+        from app.models.lead import ConversationMessage
+
+        await self._io()
+        self.messages.setdefault(str(lead_id), []).append(ConversationMessage(
+            id=str(uuid.uuid4()),
+            role=role,
+            content=content,
+            timestamp=datetime.now(),
+            metadata=metadata,
+        ))
+        return True
+
+    async def get_conversation_messages(self, lead_id, limit=None, before=None):
+        await self._io()
+        history = self.messages.get(str(lead_id), [])
+        if before:
+            history = [m for m in history if m.timestamp < before]
+        if limit:
+            history = history[-limit:]
+        return [m.model_copy() for m in history]
+
+
+class FakeChatModel:
+    """
+    Substitui o ChatAnthropic: latência configurável, passa pelo LLMGateway (fila/prioridade)
+    e vira span "llm" no tracer como o GatedChatAnthropic
+    """
+
+    def __init__(self, model: str, latency: LatencyModel, extraction: Dict[str, dict]):
+        self.model = model
+        self.latency = latency
+        self.extraction = extraction
+        self.calls = 0
+
+    def _span(self):
+        from app.services.llm_gateway import current_priority
+        from app.services.tracing import get_tracer
+
+        return get_tracer().span("llm", self.model, priority=current_priority().name.lower())
+
+    def _record_tokens(self, messages):
+        from app.services.tracing import get_tracer
+
+        text = " ".join(str(getattr(m, "content", m)) for m in (messages if isinstance(messages, list) else [messages]))
+        get_tracer().record_tokens(self.model, len(text) // 4, 60)
+
+    def _call(self, messages):
+        from app.services.llm_gateway import get_llm_gateway
+
+        self.calls += 1
+        with self._span(), get_llm_gateway().slot(self.model):
+            time.sleep(self.latency.seconds())
+        self._record_tokens(messages)
+
+    async def _acall(self, messages):
+        from app.services.llm_gateway import get_llm_gateway
+
+        self.calls += 1
+        with self._span():
+            async with get_llm_gateway().aslot(self.model):
+                await asyncio.sleep(self.latency.seconds())
+        self._record_tokens(messages)
+
+    def invoke(self, messages, *args, **kwargs):
+        from langchain_core.messages import AIMessage
+
+        self._call(messages)
+        return AIMessage(content=random.choice(REPLIES))
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        from langchain_core.messages import AIMessage
+
+        await self._acall(messages)
+        return AIMessage(content=random.choice(REPLIES))
+
+    def with_structured_output(self, schema, **kwargs):
+        return FakeStructuredModel(self, schema)
+
+
+class FakeStructuredModel:
+    """Structured output fake: preenche os campos do roteiro encontrados no prompt"""
+
+    def __init__(self, chat: FakeChatModel, schema):
+        self.chat = chat
+        self.schema = schema
+
+    def _build(self, messages):
+        prompt = " ".join(str(getattr(m, "content", m)) for m in (messages if isinstance(messages, list) else [messages]))
+        data = {}
+        for text, fields in self.chat.extraction.items():
+            if text in prompt:
+                data.update(fields)
+        fields = {k: v for k, v in data.items() if k in self.schema.model_fields}
+        try:
+            return self.schema(**fields)
+        except Exception:
+            return self.schema.model_construct(**fields)
+
+    def invoke(self, messages, *args, **kwargs):
+        self.chat._call(messages)
+        return self._build(messages)
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        await self.chat._acall(messages)
+        return self._build(messages)
+
+
+class FakeWhatsAppSender:
+    """Substitui UazapiService.send_text_message: registra horário de cada resposta"""
+
+    def __init__(self, latency: LatencyModel, on_sent):
+        self.latency = latency
+        self.on_sent = on_sent
+        self.sent = 0
+
+    def send_text_message(self, phone: str, message: str) -> bool:
+        time.sleep(self.latency.seconds())
+        self.sent += 1
+        self.on_sent(phone)
+        return True
+
+
+class FakeRequest:
+    """Request mínimo para chamar o endpoint diretamente"""
+
+    def __init__(self, payload: dict):
+        self._payload = payload
+
+    async def json(self):
+        return self._payload
+
+
+def install_fakes(args, on_sent):
+    """Importa o app e troca os pontos de rede pelos fakes. Retorna (módulo do webhook, fakes)"""
+    from loguru import logger
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    # Cliente Supabase "offline": qualquer acesso não coberto pelos fakes falha na hora
+    import app.database as database
+
+    class _OfflineSupabase:
+        def __getattr__(self, name):
+            raise RuntimeError(f"Supabase desabilitado no benchmark (acesso a '{name}')")
+
+    database.supabase = _OfflineSupabase()
+
+    import app.api.webhook_uazapi as webhook
+    from app.agent import get_smith_agent
+    from app.config import settings
+    from app.services.empresa_research_service import empresa_research_service
+    from app.services.google_calendar_service import google_calendar_service
+    from app.services.website_research_service import WebsiteResearchService
+
+    extraction = {}
+    repository = FakeLeadsRepository(LatencyModel(args.db_latency_ms, args.db_latency_ms / 4, args.db_blocking))
+    llm = FakeChatModel(settings.claude_model, LatencyModel(args.llm_latency_ms, args.llm_jitter_ms), extraction)
+    sender = FakeWhatsAppSender(LatencyModel(args.send_latency_ms), on_sent)
+
+    webhook.repository = repository
+    webhook.uazapi_service = sender
+    webhook.message_debouncer.wait_seconds = args.debounce
+
+    async def load_history(lead_id: str, max_messages: int = 20):
+        from langchain_core.messages import AIMessage, HumanMessage
+
+        history = await repository.get_conversation_messages(lead_id, limit=max_messages)
+        return [
+            HumanMessage(content=m.content) if m.role == "user" else AIMessage(content=m.content)
+            for m in history
+        ]
+
+    webhook.load_conversation_history = load_history
+
+    # Agendador desligado: reagendar follow-up abriria conexão psycopg2 a cada turno
+    # (e com .env real gravaria scheduled_jobs de leads sintéticos no banco)
+    settings.scheduler_enabled = False
+
+    smith_agent = get_smith_agent()
+    smith_agent.llm = llm
+    smith_agent.data_extractor.llm = llm
+
+    # Calendar: 3 horários em dias úteis, com latência de API
+    calendar_latency = LatencyModel(args.calendar_latency_ms)
+
+    async def get_available_slots(days_ahead: int = 7, num_slots: int = 3, duration_minutes: int = 60):
+        await calendar_latency.wait()
+        slots = []
+        day = datetime.now(SP_TZ).replace(minute=0, second=0, microsecond=0)
+        while len(slots) < num_slots:
+            day += timedelta(days=1)
+            if day.weekday() >= 5:
+                continue
+            for hour in (10, 14, 16):
+                start = day.replace(hour=hour)
+                slots.append({
+                    "start": start,
+                    "end": start + timedelta(minutes=duration_minutes),
+                    "display": google_calendar_service._format_slot_display(start),
+                    "day_name": google_calendar_service._get_day_name(start),
+                })
+        return slots[:num_slots]
+
+    async def create_meeting(lead_name, lead_email, lead_phone, meeting_datetime, duration_minutes=30, empresa=None):
+        await calendar_latency.wait()
+        return {
+            "event_id": str(uuid.uuid4()),
+            "event_link": None,
+            "meet_link": None,
+            "start_time": meeting_datetime.isoformat(),
+            "end_time": (meeting_datetime + timedelta(minutes=duration_minutes)).isoformat(),
+            "calendar_id": "bench",
+        }
+
+    google_calendar_service.service = object()
+    google_calendar_service.get_available_slots = get_available_slots
+    google_calendar_service.create_meeting = create_meeting
+
+    # Pesquisa de empresa/site: sem rede, latência de LLM
+    research_latency = LatencyModel(args.llm_latency_ms, args.llm_jitter_ms)
+
+    async def research_empresa(lead, url=None, **kwargs):
+        await research_latency.wait()
+        return "Empresa com atendimento manual e alto volume de leads."
+
+    async def research_empresa_com_plano(lead, url):
+        await research_latency.wait()
+        return "Analisei o site de vocês e montei um plano de automação do atendimento."
+
+    async def research_por_nome(lead):
+        await research_latency.wait()
+        return "Empresas do segmento costumam perder leads por demora no atendimento."
+
+    async def fetch_website_content(self, url, *a, **kw):
+        return None
+
+    empresa_research_service.research_empresa = research_empresa
+    empresa_research_service.research_empresa_com_plano = research_empresa_com_plano
+    empresa_research_service.research_por_nome = research_por_nome
+    WebsiteResearchService.fetch_website_content = fetch_website_content
+
+    return webhook, repository, llm, sender, extraction
+
+
+# ============================================
+# PAYLOADS
+# ============================================
+
+def uazapi_payload(phone: str, name: str, text: str) -> dict:
+    """Payload no formato do webhook UAZAPI"""
+    chatid = f"{phone}@s.whatsapp.net"
+    return {
+        "EventType": "messages",
+        "BaseUrl": "https://bench.uazapi.com",
+        "instanceName": "bench",
+        "owner": "5500000000000",
+        "chat": {"phone": phone, "name": name, "wa_chatid": chatid},
+        "message": {
+            "id": f"bench:{uuid.uuid4().hex[:12]}",
+            "chatid": chatid,
+            "content": text,
+            "messageTimestamp": int(time.time() * 1000),
+            "fromMe": False,
+            "sender": chatid,
+            "senderName": name,
+        },
+    }
+
+
+def evolution_to_uazapi(payload: dict) -> Optional[dict]:
+    """Converte payload gravado da Evolution (messages.upsert) para o formato UAZAPI"""
+    data = payload.get("data", {})
+    key = data.get("key", {})
+    message = data.get("message", {})
+    text = message.get("conversation") or message.get("extendedTextMessage", {}).get("text")
+    if payload.get("event") != "messages.upsert" or key.get("fromMe") or not text:
+        return None
+    phone = (key.get("remoteJid") or "").split("@")[0]
+    return uazapi_payload(phone, data.get("pushName", ""), text)
+
+
+def load_payloads(path: str) -> List[dict]:
+    """Lê payloads gravados (UAZAPI ou Evolution, um JSON por linha)"""
+    payloads = []
+    for line in open(path, encoding="utf-8"):
+        if not line.strip():
+            continue
+        payload = json.loads(line)
+        if "EventType" not in payload:
+            payload = evolution_to_uazapi(payload)
+        if payload:
+            payloads.append(payload)
+    return payloads
+
+
+def payload_phone(payload: dict) -> str:
+    return (payload.get("message", {}).get("chatid") or "").split("@")[0]
+
+
+# ============================================
+# REPLAY
+# ============================================
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+class ReplayStats:
+    """Chegada da última mensagem pendente por telefone → resposta enviada"""
+
+    def __init__(self):
+        self.pending: Dict[str, float] = {}
+        self.latencies: List[float] = []
+        self.loop_lag: List[float] = []
+        self.webhook_ms: List[float] = []
+        self.timeouts = 0
+        self.done: Dict[str, asyncio.Event] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def arrived(self, phone: str):
+        self.pending[phone] = time.perf_counter()
+
+    def sent(self, phone: str):
+        # Chamado na thread do event loop (send_text_message é síncrono no pipeline)
+        started = self.pending.pop(phone, None)
+        if started is not None:
+            self.latencies.append(time.perf_counter() - started)
+        event = self.done.get(phone)
+        if event is not None:
+            event.set()
+
+
+async def sample_loop_lag(stats: ReplayStats, interval: float, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stats.loop_lag.append(max(0.0, time.perf_counter() - start - interval))
+
+
+async def post(webhook, stats: ReplayStats, payload: dict):
+    stats.arrived(payload_phone(payload))
+    start = time.perf_counter()
+    await webhook.webhook_uazapi(FakeRequest(payload))
+    stats.webhook_ms.append((time.perf_counter() - start) * 1000)
+
+
+async def replay_recorded(webhook, stats: ReplayStats, payloads: List[dict], rate: float):
+    """Open-loop: payloads gravados na taxa pedida, sem esperar as respostas"""
+    interval = 1 / rate if rate > 0 else 0.0
+    next_at = time.perf_counter()
+    for payload in payloads:
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+        next_at += interval
+        await post(webhook, stats, payload)
+
+
+async def replay_synthetic(webhook, stats: ReplayStats, extraction: dict, args):
+    """Closed-loop: cada lead manda a próxima mensagem do roteiro depois da resposta"""
+    interval = 1 / args.rate if args.rate > 0 else 0.0
+    pacer = {"next_at": time.perf_counter()}
+    pacer_lock = asyncio.Lock()
+
+    async def paced():
+        if not interval:
+            return
+        async with pacer_lock:
+            wait = pacer["next_at"] - time.perf_counter()
+            pacer["next_at"] = max(pacer["next_at"], time.perf_counter()) + interval
+        await asyncio.sleep(max(0.0, wait))
+
+    async def run_lead(index: int):
+        phone = f"55119{index:08d}"
+        nome, empresa = f"Lead {index}", f"Empresa {index}"
+        stats.done[phone] = asyncio.Event()
+
+        for template, fields in SCRIPT[:args.turns]:
+            text = template.format(nome=nome, empresa=empresa)
+            extraction[text] = {k: v.format(nome=nome, empresa=empresa) if isinstance(v, str) else v for k, v in fields.items()}
+
+            await paced()
+            stats.done[phone].clear()
+            await post(webhook, stats, uazapi_payload(phone, nome, text))
+            try:
+                await asyncio.wait_for(stats.done[phone].wait(), timeout=args.turn_timeout)
+            except asyncio.TimeoutError:
+                stats.pending.pop(phone, None)
+                stats.timeouts += 1
+                print(f"   ⚠️ {phone}: sem resposta em {args.turn_timeout}s para '{text}'")
+            if args.think_ms:
+                await asyncio.sleep(args.think_ms / 1000)
+
+    await asyncio.gather(*(run_lead(i) for i in range(args.leads)))
+
+
+async def drain(stats: ReplayStats, timeout: float):
+    """Espera as respostas pendentes (modo gravado)"""
+    deadline = time.perf_counter() + timeout
+    while stats.pending and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+
+
+async def run(args):
+    stats = ReplayStats()
+    webhook, repository, llm, sender, extraction = install_fakes(args, stats.sent)
+    from app.services.fast_path_responder import get_fast_path_responder
+    from app.services.tracing import get_tracer
+
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(sample_loop_lag(stats, args.lag_interval_ms / 1000, stop))
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    started = time.perf_counter()
+    if args.payloads:
+        payloads = load_payloads(args.payloads)
+        print(f">> {len(payloads)} payloads gravados de {args.payloads} (taxa: {args.rate or 'máxima'}/s)")
+        await replay_recorded(webhook, stats, payloads, args.rate)
+        await asyncio.sleep(args.debounce)
+        await drain(stats, args.turn_timeout)
+        stats.timeouts += len(stats.pending)
+    else:
+        print(f">> {args.leads} leads sintéticos × {min(args.turns, len(SCRIPT))} turnos (taxa: {args.rate or 'máxima'}/s)")
+        await replay_synthetic(webhook, stats, extraction, args)
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await lag_task
+
+    traced_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    if args.tracemalloc:
+        tracemalloc.stop()
+
+    turns = get_tracer().get_recent_turns(limit=10_000)
+    time_by_kind: Dict[str, List[float]] = {}
+    for turn in turns:
+        for kind, ms in (turn.get("time_by_kind_ms") or {}).items():
+            time_by_kind.setdefault(kind, []).append(ms)
+
+    report = {
+        "turnos": len(stats.latencies),
+        "sem_resposta": stats.timeouts,
+        "duracao_s": round(elapsed, 2),
+        "throughput_turnos_s": round(len(stats.latencies) / elapsed, 2) if elapsed else 0.0,
+        "debounce_s": args.debounce,
+        "latencia_ms": {
+            "p50": round(percentile(stats.latencies, 50) * 1000, 1),
+            "p95": round(percentile(stats.latencies, 95) * 1000, 1),
+            "p99": round(percentile(stats.latencies, 99) * 1000, 1),
+            "max": round(max(stats.latencies, default=0) * 1000, 1),
+        },
+        "webhook_ms_p99": round(percentile(stats.webhook_ms, 99), 2),
+        "loop_lag_ms": {
+            "p50": round(percentile(stats.loop_lag, 50) * 1000, 1),
+            "p99": round(percentile(stats.loop_lag, 99) * 1000, 1),
+            "max": round(max(stats.loop_lag, default=0) * 1000, 1),
+        },
+        "memoria_mb": {
+            "rss_max": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "tracemalloc_pico": round(traced_peak / 1024 / 1024, 1) if traced_peak is not None else None,
+        },
+        "chamadas": {
+            "llm": llm.calls,
+            "repositorio": repository.calls,
+            "whatsapp": sender.sent,
+        },
+        "fast_path": get_fast_path_responder().get_stats(),
+        "tempo_medio_por_tipo_ms": {
+            kind: round(statistics.mean(values), 1) for kind, values in sorted(time_by_kind.items())
+        },
+    }
+    return report
+
+
+def print_report(report: dict):
+    lat = report["latencia_ms"]
+    lag = report["loop_lag_ms"]
+    mem = report["memoria_mb"]
+    print(f"\nturnos respondidos:  {report['turnos']} (sem resposta: {report['sem_resposta']})")
+    print(f"duração:             {report['duracao_s']}s")
+    print(f"throughput:          {report['throughput_turnos_s']} turnos/s")
+    print(f"latência do turno:   p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms max={lat['max']}ms"
+          f" (inclui debounce de {report['debounce_s']}s)")
+    print(f"webhook (p99):       {report['webhook_ms_p99']}ms")
+    print(f"lag do event loop:   p50={lag['p50']}ms p99={lag['p99']}ms max={lag['max']}ms")
+    print(f"memória:             rss_max={mem['rss_max']}MB"
+          + (f" tracemalloc_pico={mem['tracemalloc_pico']}MB" if mem["tracemalloc_pico"] is not None else ""))
+    print(f"chamadas:            {report['chamadas']}")
+    if report["tempo_medio_por_tipo_ms"]:
+        print("tempo médio por turno (tracer):")
+        for kind, ms in report["tempo_medio_por_tipo_ms"].items():
+            print(f"   {kind:<12} {ms:>8.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay offline de webhooks pelo pipeline de conversa")
+    parser.add_argument("--payloads", help="JSONL com payloads gravados (UAZAPI ou Evolution)")
+    parser.add_argument("--leads", type=int, default=20, help="Leads sintéticos simultâneos")
+    parser.add_argument("--turns", type=int, default=len(SCRIPT), help="Turnos do roteiro por lead")
+    parser.add_argument("--rate", type=float, default=0.0, help="Mensagens/s (0 = sem limite)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pausa do lead entre resposta e próxima mensagem")
+    parser.add_argument("--debounce", type=float, default=0.0, help="Espera do debouncer (produção: 2.5s)")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200.0)
+    parser.add_argument("--db-latency-ms", type=float, default=30.0)
+    parser.add_argument("--db-blocking", action="store_true", help="Latência do banco bloqueia o event loop (cliente síncrono)")
+    parser.add_argument("--send-latency-ms", type=float, default=0.0, help="Latência do envio (síncrono, como o UazapiService)")
+    parser.add_argument("--calendar-latency-ms", type=float, default=300.0)
+    parser.add_argument("--checkpointer", choices=["none", "memory"], default="none")
+    parser.add_argument("--turn-timeout", type=float, default=60.0)
+    parser.add_argument("--lag-interval-ms", type=float, default=10.0)
+    parser.add_argument("--tracemalloc", action="store_true", help="Pico de memória alocada (deixa o replay mais lento)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--json", dest="json_out", help="Salvar relatório em JSON")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    os.environ["AGENT_CHECKPOINTER"] = args.checkpointer
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n>> relatório salvo em {args.json_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+Avaliação offline do roteamento de modelos por tarefa (LLM_MODEL_ROUTES)
+
+Roda as tarefas estruturadas (extracao, data_hora, qualificacao) com cada modelo candidato
+sobre dados gravados e compara com o modelo de referência (o primeiro da lista):
+concordância das saídas + latência p50/p95.
+
+Uso:
+    # 1. Exportar dados reais do Supabase (últimos N leads com conversa)
+    python scripts/evaluate_model_routing.py export --limit 50 --out eval_routing.jsonl
+
+    # 2. Comparar modelos (referência primeiro; aceita tiers premium/fast ou ids)
+    python scripts/evaluate_model_routing.py run --data eval_routing.jsonl --models premium,fast
+
+Formato do JSONL (um registro por linha):
+    {"task": "extracao", "lead": {...Lead com conversation_history...}}
+    {"task": "data_hora", "message": "terça às 14h"}
+    {"task": "qualificacao", "lead_data": {"nome": ..., "cargo": ..., "faturamento": ...}}
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.config import settings
+from app.models.lead import Lead
+from app.services.intent_detector import detect_hour, detect_weekday
+from app.services.llm_gateway import get_chat_model
+
+
+TASKS = ("extracao", "data_hora", "qualificacao")
+
+
+def resolve_model(name: str) -> str:
+    return {"premium": settings.claude_model, "fast": settings.claude_fast_model}.get(name, name)
+
+
+# ============================================
+# EXPORT (dados gravados)
+# ============================================
+
+async def export_records(limit: int, out_path: str):
+    """Gera registros de avaliação a partir das conversas salvas no Supabase"""
+    from app.repository.leads_repository import LeadsRepository
+
+    repo = LeadsRepository()
+    leads = await repo.list_all(limit=limit)
+    count = 0
+
+    with open(out_path, "w", encoding="utf-8") as f:
+        for lead in leads:
+            lead.conversation_history = await repo.get_conversation_messages(lead.id)
+            if not lead.conversation_history:
+                continue
+
+            f.write(json.dumps({"task": "extracao", "lead": lead.model_dump(mode="json")}, ensure_ascii=False) + "\n")
+            count += 1
+
+            for msg in lead.conversation_history:
+                if msg.role == "user" and detect_hour(msg.content) and detect_weekday(msg.content) is not None:
+                    f.write(json.dumps({"task": "data_hora", "message": msg.content}, ensure_ascii=False) + "\n")
+                    count += 1
+
+            qd = lead.qualification_data
+            if qd and (qd.cargo or qd.faturamento_anual):
+                lead_data = {
+                    "nome": lead.nome,
+                    "email": lead.email or "Não informado",
+                    "telefone": lead.telefone,
+                    "empresa": lead.empresa or "Não informado",
+                    "cargo": qd.cargo or "Não informado",
+                    "faturamento": f"R$ {qd.faturamento_anual:,.0f}/ano" if qd.faturamento_anual else "Não informado",
+                    "mensagem": next((m.content for m in lead.conversation_history if m.role == "user"), ""),
+                }
+                f.write(json.dumps({"task": "qualificacao", "lead_data": lead_data}, ensure_ascii=False) + "\n")
+                count += 1
+
+    print(f">> {count} registros exportados de {len(leads)} leads para {out_path}")
+
+
+# ============================================
+# EXECUÇÃO POR TAREFA
+# ============================================
+
+async def run_extracao(record: dict, model: str):
+    from app.services.data_extractor import DataExtractor
+
+    extractor = DataExtractor()
+    extractor.llm = get_chat_model(temperature=0.1, max_tokens=1024, model=model)
+    lead = Lead(**record["lead"])
+    result = await asyncio.to_thread(extractor.extract_qualification_data, lead)
+    return result.model_dump() if result else None
+
+
+async def run_data_hora(record: dict, model: str):
+    from app.services.appointment_processor import AppointmentProcessor
+
+    processor = AppointmentProcessor()
+    processor.llm = get_chat_model(temperature=0.1, max_tokens=512, model=model)
+    result = await processor.extract_datetime_from_message(record["message"])
+    return result.datetime.isoformat(timespec="minutes") if result else None
+
+
+async def run_qualificacao(record: dict, model: str):
+    from app.services.lead_qualification import LeadQualificationService
+
+    service = LeadQualificationService()
+    service.llm = get_chat_model(temperature=0.3, max_tokens=1024, model=model)
+    result = await service.qualify_lead(record["lead_data"])
+    return {"is_qualified": result.get("is_qualified"), "score": result.get("score")}
+
+
+RUNNERS = {
+    "extracao": run_extracao,
+    "data_hora": run_data_hora,
+    "qualificacao": run_qualificacao,
+}
+
+
+# ============================================
+# COMPARAÇÃO
+# ============================================
+
+def _same_value(a, b) -> bool:
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)) and not isinstance(a, bool):
+        return abs(a - b) <= 0.05 * max(abs(a), abs(b), 1)
+    if isinstance(a, str) and isinstance(b, str):
+        return a.strip().lower() == b.strip().lower()
+    return a == b
+
+
+def agrees(task: str, reference, candidate) -> bool:
+    """Saída do candidato concorda com a referência?"""
+    if reference is None or candidate is None:
+        return reference is None and candidate is None
+
+    if task == "extracao":
+        # Campos que a referência preencheu precisam bater
+        return all(_same_value(v, candidate.get(k)) for k, v in reference.items() if v is not None)
+    if task == "qualificacao":
+        return (
+            reference["is_qualified"] == candidate["is_qualified"]
+            and abs((reference["score"] or 0) - (candidate["score"] or 0)) <= 10
+        )
+    return reference == candidate
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+async def run_evaluation(data_path: str, models: list, tasks: list):
+    records = [json.loads(line) for line in open(data_path, encoding="utf-8") if line.strip()]
+    records = [r for r in records if r.get("task") in tasks]
+    print(f">> {len(records)} registros | modelos: {', '.join(models)} (referência: {models[0]})\n")
+
+    # {task: {model: {"latencies": [], "agree": int, "errors": int}}}
+    results = {t: {m: {"latencies": [], "agree": 0, "errors": 0, "n": 0} for m in models} for t in tasks}
+
+    for i, record in enumerate(records, 1):
+        task = record["task"]
+        outputs = {}
+        for model in models:
+            start = time.perf_counter()
+            try:
+                outputs[model] = await RUNNERS[task](record, model)
+            except Exception as e:
+                outputs[model] = None
+                results[task][model]["errors"] += 1
+                print(f"   ❌ [{task}] {model}: {e}")
+            results[task][model]["latencies"].append(time.perf_counter() - start)
+            results[task][model]["n"] += 1
+
+        reference = outputs[models[0]]
+        for model in models:
+            if agrees(task, reference, outputs[model]):
+                results[task][model]["agree"] += 1
+
+        if i % 10 == 0:
+            print(f"   ... {i}/{len(records)}")
+
+    print(f"\n{'tarefa':<13} {'modelo':<28} {'n':>4} {'concorda':>9} {'erros':>6} {'p50':>8} {'p95':>8}")
+    for task in tasks:
+        for model in models:
+            r = results[task][model]
+            if not r["n"]:
+                continue
+            print(
+                f"{task:<13} {model:<28} {r['n']:>4} {r['agree'] / r['n']:>8.0%} {r['errors']:>6} "
+                f"{statistics.median(r['latencies']):>7.2f}s {percentile(r['latencies'], 95):>7.2f}s"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Avaliação offline do roteamento de modelos")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="Exportar registros do Supabase")
+    export.add_argument("--limit", type=int, default=50)
+    export.add_argument("--out", default="eval_routing.jsonl")
+
+    run = sub.add_parser("run", help="Comparar modelos sobre os registros")
+    run.add_argument("--data", required=True)
+    run.add_argument("--models", default="premium,fast", help="Referência primeiro (tiers ou ids)")
+    run.add_argument("--tasks", default=",".join(TASKS))
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        asyncio.run(export_records(args.limit, args.out))
+    else:
+        models = [resolve_model(m.strip()) for m in args.models.split(",") if m.strip()]
+        tasks = [t.strip() for t in args.tasks.split(",") if t.strip() in TASKS]
+        asyncio.run(run_evaluation(args.data, models, tasks))
+
+
+if __name__ == "__main__":
+    main()
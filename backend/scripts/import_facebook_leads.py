@@ -0,0 +1,175 @@
+"""
+Importação em lote de leads do Facebook Lead Ads (export CSV ou JSONL da Graph API)
+
+Fluxo: leadgen_id já em facebook_lead_events ficam de fora → pré-triagem determinística
+→ qualificação com IA em paralelo (LeadQualificationService.batch_qualify_leads) →
+INSERT em lote dos qualificados com telefone novo (LeadsRepository.create_many) →
+resultado registrado em facebook_lead_events (reexecutar a importação não duplica). Não envia notificação nem WhatsApp: leads importados
+entram no CRM como QUALIFICADO para contato pela equipe.
+
+Formatos aceitos:
+    CSV  (download do Gerenciador de Anúncios): cabeçalho com id, full_name, email,
+         phone_number, company_name, job_title, custom_disclaimer, message...
+    JSONL (Graph API /{form-id}/leads): {"id": "...", "field_data": [{"name": ..., "values": [...]}]}
+
+Uso:
+    python scripts/import_facebook_leads.py leads.csv [--concurrency 8] [--dry-run]
+    python scripts/import_facebook_leads.py leads.jsonl --no-prescreen
+"""
+import argparse
+import asyncio
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.api.webhook_facebook import build_facebook_lead, lead_info_from_fields, parse_field_data  # noqa: E402
+from app.repository.facebook_lead_events_repository import FacebookLeadEventsRepository  # noqa: E402
+from app.repository.leads_repository import LeadsRepository  # noqa: E402
+from app.services.lead_qualification import LeadQualificationService  # noqa: E402
+
+
+def load_records(path: Path) -> list:
+    """Lê o arquivo e devolve [(leadgen_id, lead_info)] sem ids repetidos"""
+    records = []
+    with path.open(encoding="utf-8-sig") as f:
+        if path.suffix.lower() == ".csv":
+            for row in csv.DictReader(f):
+                records.append((row.get("id") or row.get("leadgen_id"), {k: v or "" for k, v in row.items()}))
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                records.append((item.get("id") or item.get("leadgen_id"), parse_field_data(item.get("field_data", []))))
+
+    seen = set()
+    unique = []
+    for leadgen_id, fields in records:
+        if leadgen_id and leadgen_id in seen:
+            continue
+        seen.add(leadgen_id)
+        unique.append((leadgen_id, lead_info_from_fields(fields)))
+    return unique
+
+
+def _event(leadgen_id: str, lead_info: dict, status: str, lead_id=None, erro=None) -> dict:
+    """Linha de facebook_lead_events para um lead importado"""
+    return {
+        "leadgen_id": leadgen_id,
+        "payload": {"origem": "importacao", "lead_info": lead_info},
+        "status": status,
+        "lead_id": lead_id,
+        "erro": erro,
+    }
+
+
+async def main_async(args) -> int:
+    records = load_records(Path(args.file))
+    print(f"📥 {len(records)} leads lidos de {args.file}")
+    if not records:
+        return 0
+
+    # Idempotência por leadgen_id, como no webhook: leads já registrados em
+    # facebook_lead_events (webhook ou importação anterior) não são qualificados de novo
+    events_repo = FacebookLeadEventsRepository()
+    leads_repo = LeadsRepository()
+    known = set(await events_repo.get_known_ids([leadgen_id for leadgen_id, _ in records]))
+    if known:
+        records = [(leadgen_id, info) for leadgen_id, info in records if leadgen_id not in known]
+        print(f"♻️ {len(known)} leads já importados/recebidos antes - ignorados")
+    if not records:
+        return 0
+
+    start = time.perf_counter()
+    results = await LeadQualificationService().batch_qualify_leads(
+        [lead_info for _, lead_info in records],
+        concurrency=args.concurrency,
+        prescreen=not args.no_prescreen,
+    )
+    qualify_s = time.perf_counter() - start
+
+    qualified = [
+        (leadgen_id, result)
+        for (leadgen_id, _), result in zip(records, results)
+        if result["qualification"].get("is_qualified")
+    ]
+    prescreened = sum(1 for r in results if r["pre_triagem"])
+
+    print(f"🎯 Qualificação: {qualify_s:.1f}s ({len(records) / qualify_s:.1f} leads/s)")
+    print(f"   aprovados={len(qualified)} rejeitados={len(records) - len(qualified)} (pré-triagem={prescreened})")
+
+    events = [
+        _event(leadgen_id, result["lead"], "descartado")
+        for (leadgen_id, _), result in zip(records, results)
+        if not result["qualification"].get("is_qualified")
+    ]
+
+    # telefone é único no CRM: sem telefone não entra (todos cairiam no mesmo
+    # "Não informado"), já cadastrado vira o lead existente e repetido no arquivo
+    # aponta para o primeiro
+    existing = await leads_repo.get_ids_by_telefones([r["lead"]["telefone"] for _, r in qualified])
+    to_create = []  # (leadgen_id, lead_info, Lead)
+    duplicates = {}  # telefone -> [(leadgen_id, lead_info)] repetidos no arquivo
+    for leadgen_id, result in qualified:
+        lead_info = result["lead"]
+        telefone = lead_info["telefone"]
+        if not telefone:
+            events.append(_event(leadgen_id, lead_info, "descartado", erro="Sem telefone: não importado"))
+        elif telefone in existing:
+            events.append(_event(leadgen_id, lead_info, "processado", lead_id=existing[telefone]))
+        elif telefone in duplicates:
+            duplicates[telefone].append((leadgen_id, lead_info))
+        else:
+            duplicates[telefone] = []
+            lead = build_facebook_lead(leadgen_id, lead_info, result["qualification"])
+            to_create.append((leadgen_id, lead_info, lead))
+
+    repeated = sum(len(d) for d in duplicates.values())
+    without_phone = sum(1 for _, r in qualified if not r["lead"]["telefone"])
+    print(f"   já no CRM={sum(1 for e in events if e['status'] == 'processado')} "
+          f"repetidos no arquivo={repeated} sem telefone={without_phone} a inserir={len(to_create)}")
+
+    if args.dry_run:
+        print("🧪 --dry-run: nada inserido")
+        return 0
+
+    await events_repo.save_imported([e for e in events if e["leadgen_id"]])
+
+    # Cada lote inserido é registrado em seguida: se a importação cair no meio, rodar
+    # de novo pula os lotes registrados e reaproveita (por telefone) um lote não registrado
+    start = time.perf_counter()
+    inserted = 0
+    for offset in range(0, len(to_create), args.chunk_size):
+        batch = to_create[offset:offset + args.chunk_size]
+        created = await leads_repo.create_many([lead for _, _, lead in batch], chunk_size=args.chunk_size)
+        inserted += len(created)
+
+        batch_events = []
+        for (leadgen_id, lead_info, _), created_lead in zip(batch, created):
+            batch_events.append(_event(leadgen_id, lead_info, "processado", lead_id=created_lead.id))
+            for dup_id, dup_info in duplicates[lead_info["telefone"]]:
+                batch_events.append(_event(dup_id, dup_info, "processado", lead_id=created_lead.id))
+        await events_repo.save_imported([e for e in batch_events if e["leadgen_id"]])
+
+    print(f"✅ {inserted} leads inseridos em {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importação em lote de leads do Facebook Lead Ads")
+    parser.add_argument("file", help="Arquivo .csv ou .jsonl")
+    parser.add_argument("--concurrency", type=int, default=None, help="Padrão: LEAD_QUALIFICATION_BATCH_CONCURRENCY")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Leads por INSERT")
+    parser.add_argument("--no-prescreen", action="store_true", help="Mandar todos os leads para a IA")
+    parser.add_argument("--dry-run", action="store_true", help="Só qualifica, não insere")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Teste das chaves do cache de insights (InsightCache.domain)
+Perfis em redes sociais/link na bio não podem compartilhar insight entre empresas
+Execute: python -m pytest test_insight_cache_keys.py  (ou python test_insight_cache_keys.py)
+"""
+import sys
+from pathlib import Path
+
+# Adicionar app ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.empresa_research_service import InsightCache
+
+
+CASES = [
+    # Site próprio: chave é o domínio
+    ("https://www.Empresa.com.br/contato", "empresa.com.br"),
+    ("empresa.com.br", "empresa.com.br"),
+    ("https://m.empresa.com.br", "empresa.com.br"),
+    # Hosts compartilhados: chave inclui o perfil/página
+    ("https://instagram.com/padaria_ze", "instagram.com/padaria_ze"),
+    ("https://www.instagram.com/oficina_x/", "instagram.com/oficina_x"),
+    ("instagram.com/Padaria_Ze?igsh=abc", "instagram.com/padaria_ze"),
+    ("https://m.facebook.com/clinicaabc", "facebook.com/clinicaabc"),
+    ("https://linktr.ee/padaria_ze", "linktr.ee/padaria_ze"),
+    ("https://sites.google.com/view/oficina-x/inicio", "sites.google.com/view/oficina-x"),
+    ("https://www.linkedin.com/company/acme/", "linkedin.com/company/acme"),
+    ("https://www.youtube.com/@padariaze", "youtube.com/@padariaze"),
+    ("https://www.youtube.com/channel/UCabc123", "youtube.com/channel/ucabc123"),
+    ("https://www.facebook.com/profile.php?id=1000123", "facebook.com/profile.php?id=1000123"),
+    ("https://www.facebook.com/profile.php?id=999&ref=xyz", "facebook.com/profile.php?id=999"),
+    # Construtores de site: o subdomínio é o site
+    ("https://padaria.blogspot.com", "padaria.blogspot.com"),
+    ("https://padaria.blogspot.com/2024/01/post.html", "padaria.blogspot.com"),
+    ("https://loja.wixsite.com/site", "loja.wixsite.com"),
+    ("https://loja.wixsite.com/outra-pagina", "loja.wixsite.com"),
+    ("https://oficina.wordpress.com/", "oficina.wordpress.com"),
+    ("https://clinica.carrd.co", "clinica.carrd.co"),
+    # Host compartilhado sem perfil: sem chave (não cacheia nem deduplica)
+    ("https://instagram.com", None),
+    ("https://linktr.ee/", None),
+    ("https://sites.google.com/view", None),
+    ("https://blogspot.com", None),
+    ("https://wixsite.com/site", None),
+    # Hosts genéricos (e-mail, encurtadores, mapas, WhatsApp): sem chave
+    ("gmail.com", None),
+    ("https://hotmail.com", None),
+    ("https://www.google.com/maps/place/Padaria+Ze", None),
+    ("https://maps.google.com/?q=padaria", None),
+    ("https://maps.app.goo.gl/AbC123", None),
+    ("https://goo.gl/maps/AbC123", None),
+    ("https://bit.ly/3xyz", None),
+    ("https://api.whatsapp.com/send?phone=5511999999999", None),
+    ("https://uol.com.br", None),
+    # Caminhos que não são perfil (post, vídeo, grupo...): sem chave
+    ("https://www.facebook.com/profile.php", None),
+    ("https://www.facebook.com/pages/Padaria-Ze/123", None),
+    ("https://www.facebook.com/groups/vendas", None),
+    ("https://www.instagram.com/p/Cxyz123/", None),
+    ("https://www.instagram.com/reel/Cxyz123/", None),
+    ("https://www.youtube.com/watch?v=abc123", None),
+    # Inválidos
+    ("", None),
+    ("localhost", None),
+]
+
+
+def test_domain_keys():
+    for url, expected in CASES:
+        assert InsightCache.domain(url) == expected, url
+
+
+def test_shared_host_profiles_do_not_share_insight():
+    cache = InsightCache(ttl_hours=1)
+    cache.put(InsightCache.domain("https://instagram.com/padaria_ze"), "Padaria artesanal", url="x")
+
+    assert cache.get(InsightCache.domain("https://www.instagram.com/oficina_x/")) is None
+    assert cache.get(InsightCache.domain("https://instagram.com/padaria_ze/"))["insight"] == "Padaria artesanal"
+
+
+def test_facebook_profile_ids_do_not_share_insight():
+    first = InsightCache.domain("https://facebook.com/profile.php?id=1000123")
+    second = InsightCache.domain("https://facebook.com/profile.php?id=999")
+    assert first and second and first != second
+
+
+
+def test_prefetch_ignores_email_domains():
+    from app.services.research_queue import _EMAIL
+    from app.services.website_research_service import website_research_service
+
+    for message, expected in [
+        ("meu email é joao@gmail.com", None),
+        ("contato@padariaze.com.br", None),
+        ("email joao@gmail.com, site padariaze.com.br", "https://padariaze.com.br"),
+    ]:
+        assert website_research_service.extract_url(_EMAIL.sub(" ", message)) == expected, message
+
+    assert InsightCache.domain(website_research_service.extract_url("meu email é joao@gmail.com")) is None
+
+
+if __name__ == "__main__":
+    test_domain_keys()
+    test_shared_host_profiles_do_not_share_insight()
+    test_facebook_profile_ids_do_not_share_insight()
+    test_prefetch_ignores_email_domains()
+    print("✅ Chaves do cache de insights OK")
@@ -0,0 +1,64 @@
+"""
+Teste da pré-triagem de leads em lote (LeadQualificationService.prescreen_lead)
+Só faixas ANUAIS explícitas são descartadas sem IA; o resto vai para a IA
+Execute: python -m pytest test_lead_prescreen.py  (ou python test_lead_prescreen.py)
+"""
+import sys
+from pathlib import Path
+
+# Adicionar app ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.lead_qualification import LeadQualificationService
+
+
+# (faturamento, cargo, descartado na pré-triagem?)
+CASES = [
+    # Faixas anuais até R$ 300k: sempre descartadas
+    ("Menos de R$ 300 mil/ano", "CEO", True),
+    ("Até R$ 300 mil por ano", "Sócio", True),
+    ("R$ 200.000 anual", "Dono", True),
+    ("Menos de 300k/ano", "Analista", True),
+    # R$ 300-500k/ano: descarta só sem cargo decisor
+    ("Entre R$ 300 mil e R$ 500 mil/ano", "Analista", True),
+    ("300-500k por ano", "Gerente", True),
+    ("Entre R$ 300 mil e R$ 500 mil/ano", "CEO", False),
+    ("Entre R$ 300 mil e R$ 500 mil/ano", "Sócia-proprietária", False),
+    ("Entre R$ 300 mil e R$ 500 mil/ano", "Diretora comercial", False),
+    # Valores com centavos ("300.000,00")
+    ("Entre R$ 300.000,00 e R$ 500.000,00 por ano", "CEO", False),
+    ("Entre R$ 300.000,00 e R$ 500.000,00 por ano", "Analista", True),
+    ("R$ 400.000,00 por ano", "CEO", False),
+    ("R$ 400.000,00 por ano", "Analista", True),
+    ("R$ 250.000,50 por ano", "CEO", True),
+    # "menos de" com teto alto: vai para a IA
+    ("Menos de R$ 1 milhão", "Analista", False),
+    ("menos de 5 milhões por ano", "Analista", False),
+    ("Menos de R$ 1 milhão/ano", "Analista", False),
+    # Mensal ou sem período: vai para a IA
+    ("R$ 300 mil a R$ 500 mil por mês", "Analista", False),
+    ("Menos de R$ 30 mil/mês", "Analista", False),
+    ("faturamento mensal de 100 mil", "Analista", False),
+    ("Menos de R$ 300 mil", "Analista", False),
+    # Faixas boas, não informado ou irreconhecível: IA
+    ("Entre R$ 500 mil e R$ 1 milhão/ano", "Gerente", False),
+    ("Acima de R$ 3 milhões/ano", "Analista", False),
+    ("Entre R$ 1 milhão e R$ 3 milhões/ano", "Analista", False),
+    ("", "Analista", False),
+    (None, None, False),
+    ("prefiro não informar", "CEO", False),
+]
+
+
+def test_prescreen_table():
+    service = LeadQualificationService()
+    for faturamento, cargo, descartado in CASES:
+        result = service.prescreen_lead({"nome": "Lead", "faturamento": faturamento, "cargo": cargo})
+        assert (result is not None) == descartado, (faturamento, cargo, result)
+        if result is not None:
+            assert result["is_qualified"] is False
+
+
+if __name__ == "__main__":
+    test_prescreen_table()
+    print("✅ Pré-triagem de leads OK")
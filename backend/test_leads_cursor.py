@@ -0,0 +1,36 @@
+"""
+Teste do cursor da paginação de leads (encode_lead_cursor / decode_lead_cursor)
+O id do lead é UUID: o cursor da página 2 em diante precisa voltar intacto
+Execute: python -m pytest test_leads_cursor.py  (ou python test_leads_cursor.py)
+"""
+import sys
+from pathlib import Path
+
+# Adicionar app ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.repository.leads_repository import decode_lead_cursor, encode_lead_cursor
+
+
+CREATED_AT = "2026-10-19T12:30:00.123456+00:00"
+LEAD_ID = "3f2b8c1e-9a4d-4e7b-8c6a-2d1f0e9b7a55"
+
+
+def test_cursor_round_trip_uuid():
+    cursor = encode_lead_cursor(CREATED_AT, LEAD_ID)
+    assert decode_lead_cursor(cursor) == (CREATED_AT, LEAD_ID)
+
+
+def test_cursor_rejects_invalid_id():
+    for lead_id in ("123; drop", "abc", ""):
+        try:
+            decode_lead_cursor(encode_lead_cursor(CREATED_AT, lead_id))
+        except ValueError:
+            continue
+        raise AssertionError(f"cursor com id {lead_id!r} deveria ser inválido")
+
+
+if __name__ == "__main__":
+    test_cursor_round_trip_uuid()
+    test_cursor_rejects_invalid_id()
+    print("✅ Cursor da paginação de leads OK")